@@ -0,0 +1,19 @@
+"""
+Shared pytest fixtures for Context Foundry tests
+"""
+
+import pytest
+
+from tools.metrics.cache_metrics import configure_cache_metrics
+
+
+@pytest.fixture(autouse=True)
+def isolate_cache_metrics():
+    """Keep cache instrumentation out of the real ~/.context-foundry/metrics.db.
+
+    Tests that check instrumentation point it at their own database in
+    setup_method (which runs after this fixture).
+    """
+    configure_cache_metrics(enabled=False)
+    yield
+    configure_cache_metrics(enabled=False)
@@ -41,9 +41,15 @@ from tools.cache.test_cache import (
     get_cached_test_results,
     save_test_results_to_cache,
     clear_test_cache,
-    get_test_cache_stats
+    get_test_cache_stats,
+    get_cached_per_test_results,
+    save_per_test_results,
+    merge_test_results
 )
+from tools.incremental.test_impact_analyzer import TestCoverageMap as CoverageMap
 from tools.cache.cache_manager import CacheManager
+from tools.metrics.cache_metrics import configure_cache_metrics
+from tools.metrics.metrics_db import MetricsDatabase
 
 
 class TestScoutCache:
@@ -272,6 +278,73 @@ class TestTestCache:
             assert stats_after["last_test_passed"] == 25
 
 
+class TestPerTestCache:
+    """Test per-test result cache keyed by covered file hashes."""
+
+    def _coverage_map(self):
+        return CoverageMap(
+            framework="pytest",
+            tests={
+                "tests/test_a.py::test_a": {"covers": ["tests/test_a.py", "a.py"], "duration_seconds": 2.0},
+                "tests/test_b.py::test_b": {"covers": ["tests/test_b.py", "b.py"], "duration_seconds": 3.0},
+            },
+            total_duration_seconds=5.0
+        )
+
+    def _write_sources(self, tmpdir):
+        (Path(tmpdir) / "tests").mkdir()
+        for name in ["a", "b"]:
+            (Path(tmpdir) / f"{name}.py").write_text(f"def {name}(): pass")
+            (Path(tmpdir) / "tests" / f"test_{name}.py").write_text(f"def test_{name}(): pass")
+
+    def test_reuses_untouched_tests(self):
+        """Test only tests covering a changed file are re-run."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write_sources(tmpdir)
+            coverage_map = self._coverage_map()
+            save_per_test_results(tmpdir, {
+                "tests/test_a.py::test_a": {"outcome": "passed", "duration_seconds": 2.0},
+                "tests/test_b.py::test_b": {"outcome": "passed", "duration_seconds": 3.0},
+            }, coverage_map)
+
+            (Path(tmpdir) / "b.py").write_text("def b(): return 1")
+            plan = get_cached_per_test_results(tmpdir, coverage_map)
+
+            assert list(plan["cached"]) == ["tests/test_a.py::test_a"]
+            assert plan["to_run"] == ["tests/test_b.py::test_b"]
+            assert plan["time_saved_seconds"] == 2.0
+
+    def test_failed_results_not_reused(self):
+        """Test failing results are always re-run."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self._write_sources(tmpdir)
+            coverage_map = self._coverage_map()
+            save_per_test_results(tmpdir, {
+                "tests/test_a.py::test_a": {"outcome": "failed", "duration_seconds": 2.0},
+            }, coverage_map)
+
+            plan = get_cached_per_test_results(tmpdir, coverage_map)
+
+            assert plan["cached"] == {}
+            assert len(plan["to_run"]) == 2
+
+    def test_merge_test_results(self):
+        """Test cached and fresh results merge into one report."""
+        report = merge_test_results(
+            {"t1": {"outcome": "passed", "duration_seconds": 2.0}},
+            {"t2": {"outcome": "failed", "duration_seconds": 1.5}},
+            test_command="pytest"
+        )
+
+        assert report["total"] == 2
+        assert report["passed"] == 1
+        assert report["success"] is False
+        assert report["duration"] == 1.5
+        assert report["cached_count"] == 1
+        assert report["tests"]["t1"]["source"] == "cached"
+        assert report["tests"]["t2"]["source"] == "fresh"
+
+
 class TestCacheManager:
     """Test cache manager functionality."""
 
@@ -335,5 +408,77 @@ class TestCacheManager:
             assert stats["test_cache"]["has_cached_results"] == True
 
 
+class TestCacheInstrumentation:
+    """Test cache hit/miss instrumentation."""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db = MetricsDatabase(str(Path(self.temp_dir) / "metrics.db"))
+        configure_cache_metrics(self.db)
+
+    def teardown_method(self):
+        configure_cache_metrics(None)
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_scout_cache_events(self):
+        """Test Scout lookups record misses, writes, hits and stale entries."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            get_cached_scout_report("Build app", "new_project", tmpdir)
+            save_scout_report_to_cache("Build app", "new_project", tmpdir, "# Report")
+            get_cached_scout_report("Build app", "new_project", tmpdir)
+            get_cached_scout_report("Build app", "new_project", tmpdir, ttl_hours=0)
+
+            stats = CacheManager(tmpdir).get_stats()["instrumentation"]["scout"]
+
+            assert stats["misses"] == 1
+            assert stats["writes"] == 1
+            assert stats["hits"] == 1
+            assert stats["stale"] == 1
+            assert stats["bytes_read"] == stats["bytes_written"] > 0
+            assert stats["lookup_count"] == 3
+
+    def test_test_cache_hit_records_time_saved(self):
+        """Test a test cache hit records the avoided test duration."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            (Path(tmpdir) / "main.py").write_text("print('hello')")
+            save_test_results_to_cache(tmpdir, {"success": True, "passed": 1, "total": 1, "duration": 12.5})
+            get_cached_test_results(tmpdir)
+
+            stats = self.db.get_cache_stats(namespace="test")["test"]
+
+            assert stats["hits"] == 1
+            assert stats["time_saved_seconds"] == 12.5
+
+    def test_scout_hit_records_stored_duration(self):
+        """Test a Scout hit records the Scout duration saved with the report."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            save_scout_report_to_cache("Build app", "new_project", tmpdir, "# Report",
+                                       scout_duration_seconds=90.0)
+            get_cached_scout_report("Build app", "new_project", tmpdir)
+
+            assert self.db.get_cache_stats()["scout"]["time_saved_seconds"] == 90.0
+
+    def test_scout_hit_estimates_duration(self):
+        """Test a Scout hit without a stored duration records the average Scout phase."""
+        for i, duration in enumerate((40, 80)):
+            build_id = self.db.create_build(session_id=f"session-{i}")
+            self.db.create_phase(build_id, "Scout", duration_seconds=duration)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            save_scout_report_to_cache("Build app", "new_project", tmpdir, "# Report")
+            get_cached_scout_report("Build app", "new_project", tmpdir)
+
+            assert self.db.get_cache_stats()["scout"]["time_saved_seconds"] == 60.0
+
+    def test_clear_records_evictions(self):
+        """Test clearing the cache records evictions."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            save_scout_report_to_cache("Build app", "new_project", tmpdir, "# Report")
+            CacheManager(tmpdir).clear_by_type("scout")
+
+            assert self.db.get_cache_stats()["scout"]["evictions"] == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -6,10 +6,14 @@ Pricing accuracy and budget tracking tests
 
 import pytest
 import json
+import random
+import shutil
 import tempfile
 from pathlib import Path
+from tools.metrics import cost_calculator
 from tools.metrics.cost_calculator import CostCalculator
-from tools.metrics.log_parser import TokenUsage
+from tools.metrics.log_parser import TokenUsage, TokenUsageBatch
+from tools.metrics.metrics_db import MetricsDatabase
 
 
 class TestCostCalculator:
@@ -165,6 +169,120 @@ class TestCostCalculator:
         # Total cost = (4500/1M * $3) + (1900/1M * $15) = $0.0135 + $0.0285 = $0.042
         assert result['total_cost'] == pytest.approx(0.042, abs=0.000001)
 
+    def test_calculate_costs_columnar(self):
+        """Test columnar costs match per-call costs across mixed models"""
+        usages = [
+            TokenUsage(input_tokens=1000, output_tokens=500, model="claude-sonnet-4"),
+            TokenUsage(input_tokens=2000, output_tokens=800, cache_write_tokens=300, model="claude-opus-4"),
+            TokenUsage(input_tokens=1500, output_tokens=600, cache_read_tokens=5000, model=None),
+        ]
+
+        costs = self.calculator.calculate_costs(
+            [usage.model for usage in usages],
+            [usage.input_tokens for usage in usages],
+            [usage.output_tokens for usage in usages],
+            [usage.cache_write_tokens for usage in usages],
+            [usage.cache_read_tokens for usage in usages]
+        )
+
+        assert list(costs) == [self.calculator.calculate_cost(usage) for usage in usages]
+
+    @pytest.mark.parametrize("vectorized", [True, False])
+    def test_empty_batch(self, vectorized, monkeypatch):
+        """Test empty batches price to zero on the NumPy and fallback paths"""
+        if vectorized:
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setattr(cost_calculator, "numpy", None)
+
+        assert len(self.calculator.calculate_costs([], [], [])) == 0
+        assert len(self.calculator.calculate_costs("claude-opus-4", [], [])) == 0
+        result = self.calculator.calculate_batch_cost([])
+        assert (result['call_count'], result['total_cost']) == (0, 0.0)
+
+    def test_vectorized_costs_round_like_calculate_cost(self):
+        """Test NumPy per-call costs are rounded exactly like calculate_cost"""
+        pytest.importorskip("numpy")
+        rng = random.Random(1)
+        usages = [
+            TokenUsage(input_tokens=rng.randint(0, 10**6), output_tokens=rng.randint(0, 10**5),
+                       cache_write_tokens=rng.randint(0, 10**5), cache_read_tokens=rng.randint(0, 10**6),
+                       model=rng.choice(["claude-sonnet-4", "claude-opus-4", None]))
+            for _ in range(2000)
+        ]
+
+        costs = self.calculator.calculate_costs(
+            [usage.model for usage in usages],
+            [usage.input_tokens for usage in usages],
+            [usage.output_tokens for usage in usages],
+            [usage.cache_write_tokens for usage in usages],
+            [usage.cache_read_tokens for usage in usages]
+        )
+
+        assert costs.tolist() == [self.calculator.calculate_cost(usage) for usage in usages]
+
+    def test_calculate_usage_costs_batch(self):
+        """Test a TokenUsageBatch is priced without rebuilding records"""
+        usages = [
+            TokenUsage(input_tokens=1000, output_tokens=500, model="claude-opus-4"),
+            TokenUsage(input_tokens=2000, output_tokens=800, cache_read_tokens=4000),
+        ]
+        batch = TokenUsageBatch(usages)
+
+        costs = self.calculator.calculate_usage_costs(batch)
+
+        assert list(costs) == [self.calculator.calculate_cost(usage) for usage in usages]
+        assert self.calculator.calculate_batch_cost(batch, "claude-sonnet-4") == \
+            self.calculator.calculate_batch_cost(usages, "claude-sonnet-4")
+
+    def test_calculate_columnar_cost_totals(self):
+        """Test columnar totals for a single model"""
+        result = self.calculator.calculate_columnar_cost("claude-opus-4", [1000, 2000], [100, 200])
+
+        assert result['call_count'] == 2
+        assert result['total_tokens'] == 3300
+        assert result['total_cache_read_tokens'] == 0
+        # (3000/1M * $15) + (300/1M * $75) = $0.045 + $0.0225
+        assert result['total_cost'] == pytest.approx(0.0675, abs=0.000001)
+        assert len(result['costs']) == 2
+
+    def test_reprice_history(self):
+        """Test SQL-side repricing after a price change updates calls, totals and rollups"""
+        temp_dir = tempfile.mkdtemp()
+        db = MetricsDatabase(str(Path(temp_dir) / 'metrics.db'))
+        try:
+            build_id = db.create_build(session_id="reprice-1")
+            phase_id = db.create_phase(build_id, "Builder")
+            usage = TokenUsage(input_tokens=1_000_000, output_tokens=100_000, cache_write_tokens=200_000)
+            db.record_api_calls_bulk(phase_id, [{
+                'model': 'claude-sonnet-4',
+                'tokens_input': usage.input_tokens,
+                'tokens_output': usage.output_tokens,
+                'tokens_cache_write': usage.cache_write_tokens,
+                'cost': self.calculator.calculate_cost(usage, 'claude-sonnet-4')
+            }])
+            assert db.get_build_metrics("reprice-1")['total_cost'] == pytest.approx(5.25)
+
+            config = json.loads(Path(self.temp_config.name).read_text())
+            config['models']['claude-sonnet-4']['input_per_mtok'] = 1.00
+            Path(self.temp_config.name).write_text(json.dumps(config))
+            self.calculator.reload_config()
+
+            result = self.calculator.reprice_history(db)
+
+            assert result['calls_repriced'] == 1
+            assert result['cost_delta'] == pytest.approx(-2.0)
+            assert db.get_build("reprice-1")['total_cost'] == pytest.approx(3.25)
+            assert db.get_phase_totals("Builder", days=1)['total_cost'] == pytest.approx(3.25)
+            assert db.get_model_totals(days=1)['claude-sonnet-4']['total_cost'] == pytest.approx(3.25)
+            assert db.get_total_metrics(days=1)['total_cost'] == pytest.approx(3.25)
+
+            # Nothing changes when prices are unchanged
+            assert self.calculator.reprice_history(db)['calls_repriced'] == 0
+        finally:
+            db.close()
+            shutil.rmtree(temp_dir)
+
     def test_estimate_remaining_budget_daily_ok(self):
         """Test budget estimation - daily OK status"""
         current_cost = 10.0
@@ -97,6 +97,32 @@ class TestE2EMetrics:
         # Cleanup
         Path(log_file.name).unlink()
 
+    def test_collect_from_log_file_incremental(self):
+        """Test re-collecting a growing log records only the new calls"""
+        log_path = Path(self.temp_dir) / 'builder.log'
+        log_path.write_text('{"usage": {"input_tokens": 1000, "output_tokens": 500}}\n'
+                            '{"usage": {"input_tokens": 2000, "output_tokens": 800}}\n'
+                            '{"usage": {"input_tokens": 40')  # still being written
+
+        assert self.collector.collect_from_log_file(log_path, "e2e-incremental", "Builder") == 2
+
+        with open(log_path, 'a') as f:
+            f.write('00, "output_tokens": 100}}\n')
+
+        assert self.collector.collect_from_log_file(log_path, "e2e-incremental", "Builder") == 1
+        assert self.collector.collect_from_log_file(log_path, "e2e-incremental", "Builder") == 0
+
+        metrics = self.db.get_build_metrics("e2e-incremental")
+        assert len(metrics['phases']) == 1
+        assert metrics['total_tokens_input'] == 7000
+
+        # A rotated log (new file at the same path) is parsed from the start
+        log_path.unlink()
+        log_path.write_text('{"usage": {"input_tokens": 3000, "output_tokens": 100}}\n')
+
+        assert self.collector.collect_from_log_file(log_path, "e2e-incremental", "Builder") == 1
+        assert self.db.get_build_metrics("e2e-incremental")['total_tokens_input'] == 10000
+
     def test_finalize_build(self):
         """Test build finalization"""
         # Create build with metrics
@@ -4,8 +4,14 @@ Test suite for LogParser module
 20+ test cases with sample logs
 """
 
+import dataclasses
+import json
+import tempfile
+from pathlib import Path
+
 import pytest
-from tools.metrics.log_parser import LogParser, TokenUsage, parse_usage_string
+from tools.metrics import log_parser
+from tools.metrics.log_parser import LogParser, LogCheckpoint, TokenUsage, TokenUsageBatch, parse_usage_string
 
 
 class TestLogParser:
@@ -127,6 +133,45 @@ class TestLogParser:
         assert usage is not None
         assert usage.input_tokens == 1000
 
+    def test_prefilter_skips_unrelated_lines(self, monkeypatch):
+        """Test lines without usage markers never reach the JSON decoder"""
+        calls = []
+        monkeypatch.setattr(log_parser, '_json_loads', lambda text: calls.append(text))
+
+        assert self.parser.parse_line('{"type": "content_block_delta", "text": "hello"}') is None
+        assert self.parser.parse_line('Compiling module 3 of 12...') is None
+        assert calls == []
+
+    def test_response_decoded_once(self, monkeypatch):
+        """Test a top-level API response is decoded exactly once"""
+        calls = []
+
+        def counting_loads(text):
+            calls.append(text)
+            return json.loads(text)
+
+        monkeypatch.setattr(log_parser, '_json_loads', counting_loads)
+
+        usage = self.parser.parse_line('{"id": "msg_1", "usage": {"input_tokens": 10, "output_tokens": 5}}')
+
+        assert usage.input_tokens == 10
+        assert len(calls) == 1
+
+    def test_parse_nested_usage_keeps_response_fields(self):
+        """Test usage nested below the top level still picks up id and model"""
+        line = ('{"id": "msg_9", "model": "claude-opus-4", '
+                '"message": {"usage": {"input_tokens": 70, "output_tokens": 30}}}')
+
+        usage = self.parser.parse_line(line)
+
+        assert usage.input_tokens == 70
+        assert usage.request_id == "msg_9"
+        assert usage.model == "claude-opus-4"
+
+    def test_parse_non_dict_usage(self):
+        """Test a null usage field is ignored rather than raising"""
+        assert self.parser.parse_line('{"usage": null}') is None
+
     def test_total_tokens_calculation(self):
         """Test total tokens property calculation"""
         usage = TokenUsage(
@@ -154,6 +199,123 @@ class TestLogParser:
         assert result['total_tokens'] == 1500
         assert result['request_id'] == "msg_123"
 
+    def test_token_usage_is_immutable_and_slotted(self):
+        """Test TokenUsage records are frozen and carry no per-instance dict"""
+        usage = TokenUsage(input_tokens=1000, output_tokens=500)
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            usage.input_tokens = 1
+        assert not hasattr(usage, '__dict__')
+
+    def test_token_usage_batch_round_trip(self):
+        """Test TokenUsageBatch stores columns and rebuilds records"""
+        usages = [
+            TokenUsage(input_tokens=1000, output_tokens=500, cache_read_tokens=200,
+                       request_id="msg_1", model="claude-sonnet-4"),
+            TokenUsage(input_tokens=2000, output_tokens=800, cache_write_tokens=300),
+        ]
+
+        batch = TokenUsageBatch(usages)
+
+        assert len(batch) == 2
+        assert batch.input_tokens.typecode == 'q'
+        assert list(batch.output_tokens) == [500, 800]
+        assert batch.models == ["claude-sonnet-4", None]
+        assert list(batch) == usages
+        assert batch[1] == usages[1]
+        assert batch.totals() == {
+            'input_tokens': 3000,
+            'output_tokens': 1300,
+            'cache_read_tokens': 200,
+            'cache_write_tokens': 300,
+            'total_tokens': 4300,
+            'call_count': 2
+        }
+
+        batch.extend(TokenUsageBatch(usages[:1]))
+        assert len(batch) == 3
+        assert batch.request_ids[2] == "msg_1"
+
+        batch.clear()
+        assert len(batch) == 0
+        assert not batch
+
+    def test_parse_log_file_batches(self):
+        """Test parsing a log file into bounded columnar batches"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.log', delete=False) as f:
+            for i in range(5):
+                f.write(f'{{"usage": {{"input_tokens": {1000 + i}, "output_tokens": 100}}}}\n')
+                f.write('Some other log line\n')
+
+        try:
+            batches = list(self.parser.parse_log_file_batches(f.name, batch_size=2))
+        finally:
+            Path(f.name).unlink()
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert list(batches[2].input_tokens) == [1004]
+
+    def test_parse_log_file_incremental(self, tmp_path):
+        """Test incremental parsing resumes at the checkpoint and holds back partial lines"""
+        log = tmp_path / 'build.log'
+        log.write_text('{"usage": {"input_tokens": 1, "output_tokens": 1}}\n'
+                       'Input tokens: 2, Output tokens: 2\n'
+                       'Input tokens: 3')
+
+        (batch, checkpoint), = self.parser.parse_log_file_incremental(str(log))
+        assert list(batch.input_tokens) == [1, 2]
+        assert checkpoint.offset == log.stat().st_size - len('Input tokens: 3')
+
+        with open(log, 'a') as f:
+            f.write('0, Output tokens: 3\n')
+
+        (batch, checkpoint), = self.parser.parse_log_file_incremental(str(log), checkpoint)
+        assert list(batch.input_tokens) == [30]
+        assert checkpoint.offset == log.stat().st_size
+
+        (batch, _), = self.parser.parse_log_file_incremental(str(log), checkpoint)
+        assert len(batch) == 0
+
+    def test_parse_log_file_incremental_batches(self, tmp_path):
+        """Test each yielded checkpoint covers exactly the lines of its batch"""
+        log = tmp_path / 'build.log'
+        log.write_text(''.join(f'Input tokens: {i}\n' for i in range(5)))
+
+        results = list(self.parser.parse_log_file_incremental(str(log), batch_size=2))
+
+        assert [len(batch) for batch, _ in results] == [2, 2, 1]
+        (_, middle), = results[1:2]
+        (batch, _), = self.parser.parse_log_file_incremental(str(log), middle)
+        assert list(batch.input_tokens) == [4]
+
+    def test_parse_log_file_incremental_truncation(self, tmp_path):
+        """Test truncated or rewritten logs restart from byte 0"""
+        log = tmp_path / 'build.log'
+        log.write_text('Input tokens: 1\nInput tokens: 2\n')
+        (_, checkpoint), = self.parser.parse_log_file_incremental(str(log))
+
+        # Truncated below the checkpoint
+        log.write_text('Input tokens: 7\n')
+        (batch, _), = self.parser.parse_log_file_incremental(str(log), checkpoint)
+        assert list(batch.input_tokens) == [7]
+
+        # Rewritten in place to at least the old length (same inode, different head)
+        with open(log, 'r+') as f:
+            f.write('Input tokens: 8\nInput tokens: 9\nInput tokens: 5\n')
+        (batch, _), = self.parser.parse_log_file_incremental(str(log), checkpoint)
+        assert list(batch.input_tokens) == [8, 9, 5]
+
+    def test_parse_log_file_incremental_complete(self, tmp_path):
+        """Test a finished log also yields its unterminated last line"""
+        log = tmp_path / 'build.log'
+        log.write_text('Input tokens: 1\nInput tokens: 2')
+
+        (batch, checkpoint), = self.parser.parse_log_file_incremental(str(log), complete=True)
+
+        assert list(batch.input_tokens) == [1, 2]
+        assert checkpoint == LogCheckpoint(str(log), log.stat().st_ino, log.stat().st_size,
+                                           checkpoint.fingerprint, log.stat().st_size)
+
     def test_calculate_latency(self):
         """Test latency calculation"""
         start = "2025-01-13T10:00:00"
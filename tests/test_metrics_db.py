@@ -4,13 +4,17 @@ Test suite for MetricsDatabase module
 Database operations and thread safety tests
 """
 
+import gc
+import sqlite3
 import pytest
 import tempfile
 import threading
 import shutil
 from pathlib import Path
 from datetime import datetime, timedelta
-from tools.metrics.metrics_db import MetricsDatabase
+from tools.metrics.metrics_db import MetricsDatabase, SCHEMA_VERSION
+from tools.metrics.db_pool import get_pool
+from tools.metrics.log_parser import TokenUsage, TokenUsageBatch
 
 
 class TestMetricsDatabase:
@@ -103,6 +107,58 @@ class TestMetricsDatabase:
         metrics = self.db.get_build_metrics("test-session-4")
         assert len(metrics['phases']) == 1
 
+    def test_record_api_calls_bulk(self):
+        """Test recording a batch of API calls updates phase and build totals"""
+        build_id = self.db.create_build(session_id="test-session-bulk")
+        phase_id = self.db.create_phase(build_id=build_id, phase_name="Builder")
+
+        calls = [
+            {'model': "claude-sonnet-4", 'tokens_input': 1000, 'tokens_output': 500,
+             'tokens_cached': 100, 'cost': 0.01, 'request_id': f"msg_{i}"}
+            for i in range(3)
+        ]
+        assert self.db.record_api_calls_bulk(phase_id, calls) == 3
+        assert self.db.record_api_calls_bulk(phase_id, []) == 0
+
+        metrics = self.db.get_build_metrics("test-session-bulk")
+        assert metrics['total_tokens_input'] == 3000
+        assert metrics['total_tokens_cached'] == 300
+        assert abs(metrics['total_cost'] - 0.03) < 1e-9
+
+        build = self.db.get_build("test-session-bulk")
+        assert build['total_tokens_output'] == 1500
+
+        conn = self.db._get_connection()
+        count = conn.execute("SELECT COUNT(*) FROM api_calls WHERE phase_id = ?", (phase_id,)).fetchone()[0]
+        assert count == 3
+
+    def test_record_usage_batch(self):
+        """Test recording a columnar usage batch updates phase and build totals"""
+        build_id = self.db.create_build(session_id="test-session-columnar")
+        phase_id = self.db.create_phase(build_id=build_id, phase_name="Builder")
+
+        batch = TokenUsageBatch(
+            TokenUsage(input_tokens=1000, output_tokens=500, cache_read_tokens=100,
+                       cache_write_tokens=50, request_id=f"msg_{i}")
+            for i in range(3)
+        )
+        assert self.db.record_usage_batch(phase_id, batch, [0.01] * 3, "claude-sonnet-4") == 3
+        assert self.db.record_usage_batch(phase_id, TokenUsageBatch(), []) == 0
+
+        build = self.db.get_build("test-session-columnar")
+        assert build['total_tokens_input'] == 3000
+        assert build['total_tokens_cached'] == 300
+        assert abs(build['total_cost'] - 0.03) < 1e-9
+
+        conn = self.db._get_connection()
+        rows = conn.execute("""
+            SELECT model, tokens_cache_write, request_id FROM api_calls
+            WHERE phase_id = ? ORDER BY id
+        """, (phase_id,)).fetchall()
+        assert [tuple(row) for row in rows] == [
+            ("claude-sonnet-4", 50, f"msg_{i}") for i in range(3)
+        ]
+
     def test_get_build_metrics(self):
         """Test getting comprehensive build metrics"""
         # Create build with multiple phases and API calls
@@ -185,6 +241,27 @@ class TestMetricsDatabase:
         assert summary['min_cost'] == 0.50
         assert summary['max_cost'] == 0.75
 
+    def test_cost_summary_min_max_from_rollups(self):
+        """Test whole-day min/max cost comes from rollups, kept current as costs change"""
+        yesterday = datetime.now() - timedelta(days=1)
+        for session_id, cost in (("range-1", 0.50), ("range-2", 0.75), ("range-3", 2.00)):
+            self.db.create_build(session_id=session_id)
+            self.db.update_build(session_id, total_cost=cost)
+        self.db.update_build("range-3", created_at=yesterday.isoformat())
+        self.db.update_build("range-2", total_cost=0.25)
+
+        start = yesterday.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+        end = datetime.now().replace(hour=23, minute=59, second=59).isoformat()
+
+        # Raw builds are not read for whole days
+        with self.db._transaction() as conn:
+            conn.execute("DELETE FROM builds")
+
+        summary = self.db.get_cost_summary(start, end)
+        assert summary['build_count'] == 3
+        assert summary['min_cost'] == 0.25
+        assert summary['max_cost'] == 2.00
+
     def test_cleanup_old_data(self):
         """Test data retention cleanup"""
         # Create old build
@@ -279,6 +356,40 @@ class TestMetricsDatabase:
         assert len(data['phases']) == 1
         assert len(data['api_calls']) == 1
 
+    def test_record_cache_event(self):
+        """Test cache counters accumulate per namespace"""
+        self.db.record_cache_event('scout', 'hit', latency_ms=0.5, bytes_read=100, time_saved_seconds=30.0)
+        self.db.record_cache_event('scout', 'hit', latency_ms=50.0, bytes_read=100)
+        self.db.record_cache_event('scout', 'miss', latency_ms=2.0)
+        self.db.record_cache_event('scout', 'write', bytes_written=200)
+        self.db.record_cache_event('test', 'stale', latency_ms=5000.0)
+
+        stats = self.db.get_cache_stats()
+
+        scout = stats['scout']
+        assert scout['hits'] == 2
+        assert scout['misses'] == 1
+        assert scout['writes'] == 1
+        assert scout['bytes_read'] == 200
+        assert scout['bytes_written'] == 200
+        assert scout['lookup_count'] == 3
+        assert scout['lookup_ms_max'] == 50.0
+        assert scout['hit_ratio'] == pytest.approx(2 / 3, abs=0.001)
+        assert scout['avg_time_saved_per_hit'] == 15.0
+        assert scout['latency_histogram'] == {
+            '<=1ms': 1, '<=10ms': 1, '<=100ms': 1, '<=1000ms': 0, '>1000ms': 0
+        }
+
+        assert stats['test']['stale'] == 1
+        assert stats['test']['latency_histogram']['>1000ms'] == 1
+
+        assert list(self.db.get_cache_stats(namespace='test')) == ['test']
+
+    def test_record_cache_event_unknown(self):
+        """Test unknown cache events are rejected"""
+        with pytest.raises(ValueError):
+            self.db.record_cache_event('scout', 'bogus')
+
     def test_schema_migration(self):
         """Test schema migration system"""
         # Create new database
@@ -294,11 +405,311 @@ class TestMetricsDatabase:
         cursor.execute("SELECT MAX(version) FROM schema_version")
         version = cursor.fetchone()[0]
 
-        assert version == 1
+        assert version == SCHEMA_VERSION
 
         # Cleanup
         shutil.rmtree(temp_dir2)
 
 
+    def test_rollups_track_updates(self):
+        """Test rollups follow inserts and later updates"""
+        build_id = self.db.create_build(session_id="rollup-1")
+        phase_id = self.db.create_phase(build_id, "Builder", tokens_input=100)
+        self.db.update_phase(phase_id, tokens_input=400, tokens_output=200, cost=0.01, duration_seconds=30)
+        self.db.record_api_calls_bulk(phase_id, [
+            {'model': 'claude-sonnet-4', 'tokens_input': 300, 'tokens_output': 200, 'cost': 0.01, 'latency_ms': 1000},
+            {'model': 'claude-haiku', 'tokens_input': 100, 'tokens_output': 0, 'cost': 0.001, 'latency_ms': 3000},
+        ])
+
+        phase = self.db.get_phase_totals("Builder", days=1)
+        assert phase['total_runs'] == 1
+        assert phase['total_tokens_input'] == 800
+        assert phase['avg_duration_seconds'] == 30
+        assert phase['total_api_calls'] == 2
+        assert phase['avg_latency_ms'] == 2000
+
+        totals = self.db.get_total_metrics(days=1)
+        assert totals['total_builds'] == 1
+        assert totals['total_tokens_input'] == 400
+        assert totals['total_cost'] == pytest.approx(0.011)
+
+        models = self.db.get_model_totals(days=1)
+        assert set(models) == {'claude-sonnet-4', 'claude-haiku'}
+        assert models['claude-sonnet-4']['total_tokens'] == 500
+        assert models['claude-haiku']['avg_latency_ms'] == 3000
+
+    def test_rollups_follow_build_date(self):
+        """Test a build moved to another day moves its rollup"""
+        self.db.create_build(session_id="rollup-old")
+        self.db.update_build("rollup-old", total_cost=1.0)
+        old = (datetime.now() - timedelta(days=10)).isoformat()
+        self.db.update_build("rollup-old", created_at=old)
+
+        assert self.db.get_total_metrics(days=1)['total_builds'] == 0
+        assert self.db.get_total_metrics(days=30)['total_cost'] == pytest.approx(1.0)
+
+    def test_cost_summary_partial_days(self):
+        """Test cost summary combines whole-day rollups with partial boundary days"""
+        now = datetime.now().replace(microsecond=0)
+        for i, days_ago in enumerate([5, 3, 0]):
+            self.db.create_build(session_id=f"summary-{i}")
+            self.db.update_build(
+                f"summary-{i}",
+                total_cost=float(i + 1),
+                created_at=(now - timedelta(days=days_ago)).isoformat()
+            )
+
+        summary = self.db.get_cost_summary((now - timedelta(days=4)).isoformat(), now.isoformat())
+        assert summary['build_count'] == 2
+        assert summary['total_cost'] == pytest.approx(5.0)
+        assert summary['min_cost'] == 2.0
+
+        summary = self.db.get_cost_summary((now - timedelta(days=5)).isoformat(), now.isoformat())
+        assert summary['build_count'] == 3
+
+        empty = self.db.get_cost_summary((now - timedelta(days=2)).isoformat(), (now - timedelta(days=1)).isoformat())
+        assert empty['build_count'] == 0
+        assert empty['total_cost'] == 0.0
+
+    def test_livestream_tables_share_schema(self):
+        """Test livestream records live in the same schema and migration chain"""
+        self.db.create_task({'task_id': 'live-1', 'project_name': 'demo', 'current_phase': 'Scout'})
+        self.db.add_metric('live-1', {'phase': 'Scout', 'token_usage': 1500, 'token_percentage': 0.75})
+        self.db.create_agent_instance({'session_id': 'orphan-session', 'agent_id': 'a-1', 'agent_type': 'Scout'})
+
+        assert self.db.get_task('live-1')['project_name'] == 'demo'
+        assert self.db.get_latest_metric('live-1')['token_usage'] == 1500
+        assert self.db.get_agent_instance('a-1')['session_id'] == 'orphan-session'
+
+    def test_upsert_agent_instances(self):
+        """Test batched agent updates create and update agents in one transaction"""
+        self.db.create_agent_instance({'session_id': 'agents-2', 'agent_id': 'builder-1',
+                                       'agent_type': 'Builder', 'tokens_limit': 1000, 'phase': 'Build'})
+
+        written = self.db.upsert_agent_instances([
+            {'session_id': 'agents-2', 'agent_id': 'builder-1', 'tokens_used': 250, 'progress_percent': 40},
+            {'session_id': 'agents-2', 'agent_id': 'tester-1', 'agent_type': 'Tester',
+             'status': 'active', 'metadata': {'suite': 'unit'}},
+        ])
+        assert written == 2
+
+        builder = self.db.get_agent_instance('builder-1')
+        assert builder['token_percentage'] == pytest.approx(25.0)
+        assert builder['progress_percent'] == 40
+        assert builder['phase'] == 'Build'
+        tester = self.db.get_agent_instance('tester-1')
+        assert tester['status'] == 'active'
+        assert tester['tokens_limit'] == 200000
+        assert tester['metadata'] == {'suite': 'unit'}
+
+        self.db.upsert_agent_instances([{'session_id': 'agents-2', 'agent_id': 'tester-1', 'status': 'failed',
+                                         'error_message': 'boom'}])
+        tester = self.db.get_agent_instance('tester-1')
+        assert tester['status'] == 'failed'
+        assert tester['end_time'] is not None
+        assert tester['duration_seconds'] is not None
+        assert tester['metadata'] == {'suite': 'unit'}
+
+    def test_agent_costs(self):
+        """Test cost per agent instance is a single query over API calls"""
+        build_id = self.db.create_build(session_id="agents-1")
+        phase_id = self.db.create_phase(build_id, "Builder")
+        for agent_id in ('builder-1', 'tester-1', 'idle-1'):
+            self.db.create_agent_instance({'session_id': 'agents-1', 'agent_id': agent_id, 'agent_type': 'Builder'})
+
+        self.db.record_api_call(phase_id, "claude-sonnet-4", 1000, 500, 0, 0.02, agent_id='builder-1')
+        self.db.record_api_calls_bulk(phase_id, [
+            {'model': 'claude-sonnet-4', 'tokens_input': 200, 'tokens_output': 100, 'cost': 0.005, 'agent_id': 'tester-1'},
+            {'model': 'claude-sonnet-4', 'tokens_input': 300, 'tokens_output': 100, 'cost': 0.007, 'agent_id': 'builder-1'},
+        ])
+
+        costs = {row['agent_id']: row for row in self.db.get_agent_costs('agents-1')}
+        assert costs['builder-1']['api_calls'] == 2
+        assert costs['builder-1']['tokens_input'] == 1300
+        assert costs['builder-1']['cost'] == pytest.approx(0.027)
+        assert costs['tester-1']['cost'] == pytest.approx(0.005)
+        assert costs['idle-1']['api_calls'] == 0
+        assert self.db.get_agent_costs()[0]['agent_id'] == 'builder-1'
+
+    def test_decision_tokens(self):
+        """Test tokens per decision joins decisions to the phase they were made in"""
+        build_id = self.db.create_build(session_id="decisions-1")
+        self.db.create_phase(build_id, "Architect", tokens_input=2000, tokens_output=800, cost=0.018)
+        self.db.add_decision('decisions-1', {'phase': 'Architect', 'decision_type': 'design'})
+        self.db.add_decision('decisions-1', {'phase': 'Deploy', 'decision_type': 'release'})
+
+        decisions = {row['decision_type']: row for row in self.db.get_decision_tokens('decisions-1')}
+        assert decisions['design']['phase_tokens'] == 2800
+        assert decisions['design']['phase_cost'] == pytest.approx(0.018)
+        assert decisions['release']['phase_tokens'] == 0
+
+    def test_migration_backfills_rollups(self):
+        """Test upgrading a version 2 database backfills rollups from raw rows"""
+        build_id = self.db.create_build(session_id="backfill-1")
+        phase_id = self.db.create_phase(build_id, "Scout", tokens_input=1000, tokens_output=500)
+        self.db.record_api_call(phase_id, "claude-sonnet-4", 1000, 500, 0, 0.0105, 2500)
+        self.db.update_build("backfill-1", total_tokens_input=1000, total_cost=0.0105)
+
+        with self.db._transaction() as conn:
+            for trigger in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+                conn.execute(f"DROP TRIGGER {trigger[0]}")
+            for table in ('build_rollups', 'phase_rollups', 'model_rollups'):
+                conn.execute(f"DROP TABLE {table}")
+            conn.execute("DROP INDEX idx_builds_rollup_day")
+            conn.execute("DROP INDEX idx_builds_rollup_day_cost")
+            conn.execute("DROP INDEX idx_api_calls_agent")
+            conn.execute("ALTER TABLE builds DROP COLUMN rollup_day")
+            conn.execute("ALTER TABLE phases DROP COLUMN rollup_day")
+            conn.execute("ALTER TABLE api_calls DROP COLUMN agent_id")
+            conn.execute("ALTER TABLE api_calls DROP COLUMN tokens_cache_write")
+            conn.execute("DELETE FROM schema_version WHERE version >= 3")
+        self.db.close()
+
+        db2 = MetricsDatabase(str(self.temp_db_path))
+        assert db2.get_total_metrics(days=1)['total_cost'] == pytest.approx(0.0105)
+        phase = db2.get_phase_totals("Scout", days=1)
+        assert phase['total_runs'] == 1
+        assert phase['avg_latency_ms'] == 2500
+        assert db2.get_model_totals(days=1)['claude-sonnet-4']['total_api_calls'] == 1
+        rollup = db2._get_connection().execute("SELECT min_cost, max_cost FROM build_rollups").fetchone()
+        assert tuple(rollup) == (0.0105, 0.0105)
+
+    def test_legacy_calls_keep_cost_on_reprice(self):
+        """Test calls recorded before cache-write tokens existed are not repriced"""
+        rates = {'claude-sonnet-4': (3.0, 15.0, 3.75, 0.30)}
+        build_id = self.db.create_build(session_id="legacy-1")
+        phase_id = self.db.create_phase(build_id, "Builder")
+        # $0.003 input + $0.015 output + $3.75 for 1M cache-write tokens
+        self.db.record_api_call(phase_id, "claude-sonnet-4", 1000, 1000, 0, 3.768, 100)
+
+        with self.db._transaction() as conn:
+            conn.execute("ALTER TABLE api_calls DROP COLUMN tokens_cache_write")
+            conn.execute("DROP TABLE log_checkpoints")
+            conn.execute("DELETE FROM schema_version WHERE version >= 5")
+        self.db.close()
+
+        db2 = MetricsDatabase(str(self.temp_db_path))
+        result = db2.reprice_api_calls(rates)
+        assert result['calls_repriced'] == 0
+        assert result['calls_skipped'] == 1
+        assert db2._get_connection().execute("SELECT cost FROM api_calls").fetchone()[0] == 3.768
+
+        # Calls recorded after the upgrade are repriced
+        db2.record_api_call(phase_id, "claude-sonnet-4", 1000, 1000, 0, 1.0, 100)
+        result = db2.reprice_api_calls(rates)
+        assert (result['calls_repriced'], result['calls_skipped']) == (1, 1)
+        assert result['cost_delta'] == pytest.approx(0.018 - 1.0)
+
+    def test_migration_leaves_cache_writes_unknown(self):
+        """Test calls recorded before version 5 get NULL cache-write tokens"""
+        build_id = self.db.create_build(session_id="legacy-2")
+        phase_id = self.db.create_phase(build_id, "Builder")
+        self.db.record_api_call(phase_id, "claude-sonnet-4", 1000, 1000, 0, 3.768, 100)
+
+        with self.db._transaction() as conn:
+            conn.execute("ALTER TABLE api_calls DROP COLUMN tokens_cache_write")
+            conn.execute("DROP TABLE log_checkpoints")
+            conn.execute("DELETE FROM schema_version WHERE version >= 5")
+        self.db.close()
+
+        db2 = MetricsDatabase(str(self.temp_db_path))
+        db2.record_api_call(phase_id, "claude-sonnet-4", 1000, 1000, 0, 0.018, 100)
+        rows = db2._get_connection().execute(
+            "SELECT cost, tokens_cache_write FROM api_calls ORDER BY id"
+        ).fetchall()
+        assert [tuple(row) for row in rows] == [(3.768, None), (0.018, 0)]
+
+
+class TestConnectionPool:
+    """Test the shared SQLite connection pool"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = str(Path(self.temp_dir) / 'pool.db')
+        self.pool = get_pool(self.db_path)
+
+    def teardown_method(self):
+        """Cleanup"""
+        self.pool.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_pool_shared_per_file(self):
+        """Test databases on the same file share one pool"""
+        db = MetricsDatabase(self.db_path)
+        assert db._pool is self.pool
+        assert get_pool(self.db_path) is self.pool
+
+    def test_wal_and_pragmas(self):
+        """Test pooled connections use WAL and synchronous=NORMAL"""
+        conn = self.pool.reader()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    def test_reader_reused_per_thread(self):
+        """Test each thread reuses its own reader connection"""
+        readers = []
+        thread = threading.Thread(target=lambda: readers.append(self.pool.reader()))
+        thread.start()
+        thread.join()
+
+        assert self.pool.reader() is self.pool.reader()
+        assert readers[0] is not self.pool.reader()
+
+    def test_nested_write_joins_transaction(self):
+        """Test nested writes commit or roll back with the outer transaction"""
+        with self.pool.write() as conn:
+            conn.execute("CREATE TABLE items (name TEXT)")
+
+        with pytest.raises(RuntimeError):
+            with self.pool.write() as conn:
+                conn.execute("INSERT INTO items VALUES ('a')")
+                with self.pool.write() as inner:
+                    inner.execute("INSERT INTO items VALUES ('b')")
+                raise RuntimeError("abort")
+
+        count = self.pool.reader().execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        assert count == 0
+
+    def test_close_reopens_on_use(self):
+        """Test the pool reopens connections after close"""
+        with self.pool.write() as conn:
+            conn.execute("CREATE TABLE items (name TEXT)")
+        self.pool.close()
+
+        with self.pool.write() as conn:
+            conn.execute("INSERT INTO items VALUES ('a')")
+        assert self.pool.reader().execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+
+
+    def test_exited_thread_reader_is_closed(self):
+        """Test a thread's reader connection is closed when the thread exits"""
+        readers = []
+        for _ in range(5):
+            thread = threading.Thread(target=lambda: readers.append(self.pool.reader()))
+            thread.start()
+            thread.join()
+        gc.collect()
+
+        assert len(self.pool._readers) == 0
+        with pytest.raises(sqlite3.ProgrammingError):
+            readers[0].execute("SELECT 1")
+
+    def test_close_keeps_other_databases_open(self):
+        """Test closing one database leaves another on the same file usable"""
+        first = MetricsDatabase(self.db_path)
+        second = MetricsDatabase(self.db_path)
+        conn = second._get_connection()
+
+        first.close()
+        first.close()
+        assert conn.execute("SELECT COUNT(*) FROM builds").fetchone()[0] == 0
+        assert second._get_connection() is conn
+
+        second.close()
+        self.pool.release()
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test suite for metrics export
+Streaming CSV/NDJSON/Parquet export with date and project filters
+"""
+
+import pytest
+import csv
+import gzip
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from datetime import datetime
+from tools.metrics.metrics_db import MetricsDatabase
+from tools.metrics.retention import RetentionManager, RetentionPolicy
+from tools.metrics.export import MetricsExporter, available_formats
+
+
+class TestMetricsExporter:
+    """Test MetricsExporter functionality"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.db = MetricsDatabase(str(self.temp_dir / 'metrics.db'))
+        self.exporter = MetricsExporter(self.db)
+        self.out = self.temp_dir / 'export'
+
+        for session_id, project, day in (("b-1", "/home/me/alpha", "2026-09-01"),
+                                         ("b-2", "/home/me/beta", "2026-10-01")):
+            build_id = self.db.create_build(session_id=session_id, working_directory=project)
+            self.db.update_build(session_id, created_at=f"{day}T10:00:00", total_cost=1.5)
+            phase_id = self.db.create_phase(build_id, "Scout")
+            with self.db._transaction() as conn:
+                conn.execute("""
+                    INSERT INTO api_calls (phase_id, model, tokens_input, tokens_output, cost, timestamp)
+                    VALUES (?, 'claude-sonnet-4', 100, 50, 0.01, ?)
+                """, (phase_id, f"{day}T10:05:00"))
+
+    def teardown_method(self):
+        """Cleanup"""
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _read_csv(self, name: str):
+        with gzip.open(self.out / f"{name}.csv.gz", 'rt', newline='') as f:
+            return list(csv.DictReader(f))
+
+    def test_export_csv_all_tables(self):
+        """Test every table is exported with a manifest"""
+        manifest = self.exporter.export(str(self.out), fmt='csv', chunk_size=1)
+
+        rows = {entry['table']: entry['rows'] for entry in manifest['tables']}
+        assert rows['builds'] == 2
+        assert rows['api_calls'] == 2
+        assert json.loads((self.out / 'manifest.json').read_text())['format'] == 'csv'
+
+        calls = self._read_csv('api_calls')
+        assert calls[0]['phase_name'] == 'Scout'
+        assert calls[0]['tokens_input'] == '100'
+
+    def test_export_date_and_project_filters(self):
+        """Test date range and project filters"""
+        self.exporter.export(str(self.out), fmt='csv', tables=['api_calls'], start_date='2026-09-15')
+        assert [row['timestamp'][:10] for row in self._read_csv('api_calls')] == ['2026-10-01']
+
+        manifest = self.exporter.export(str(self.out), fmt='csv', project='alpha',
+                                        tables=['builds', 'model_rollups'])
+        assert [row['session_id'] for row in self._read_csv('builds')] == ['b-1']
+        assert manifest['tables'][1]['skipped']
+
+    def test_project_filter_matches_wildcards_literally(self):
+        """Test % and _ in a project name are not LIKE wildcards"""
+        self.db.create_build(session_id="b-3", working_directory="/home/me/my-app")
+        self.db.create_build(session_id="b-4", working_directory="/home/me/my_app")
+
+        self.exporter.export(str(self.out), fmt='csv', project='my_app', tables=['builds'])
+        assert [row['session_id'] for row in self._read_csv('builds')] == ['b-4']
+
+        self.exporter.export(str(self.out), fmt='csv', project='%', tables=['builds'])
+        assert self._read_csv('builds') == []
+
+    def test_export_ndjson_includes_archive(self):
+        """Test NDJSON export includes rows moved to retention partitions"""
+        RetentionManager(str(self.db.db_path), RetentionPolicy(raw_days=14)).run(now=datetime(2026, 10, 18))
+        assert self.db._get_connection().execute("SELECT COUNT(*) FROM api_calls").fetchone()[0] == 0
+
+        manifest = self.exporter.export(str(self.out), fmt='ndjson', tables=['api_calls'])
+        assert manifest['tables'][0]['rows'] == 2
+
+        with gzip.open(self.out / 'api_calls.ndjson.gz', 'rb') as f:
+            records = [json.loads(line) for line in f]
+        assert {record['timestamp'][:10] for record in records} == {'2026-09-01', '2026-10-01'}
+        assert records[0]['phase_name'] == 'Scout'
+
+    def test_archive_filtered_by_local_day(self, monkeypatch):
+        """Test archived rows use the same local day as live rows"""
+        monkeypatch.setenv('TZ', 'America/New_York')
+        time.tzset()
+        try:
+            # CURRENT_TIMESTAMP-style UTC row: local day 2026-09-01
+            with self.db._transaction() as conn:
+                conn.execute("""
+                    INSERT INTO api_calls (phase_id, model, tokens_input, tokens_output, cost, timestamp)
+                    VALUES (1, 'claude-sonnet-4', 7, 0, 0.01, '2026-09-02 02:00:00')
+                """)
+
+            self.exporter.export(str(self.out), fmt='csv', tables=['api_calls'],
+                                 start_date='2026-09-01', end_date='2026-09-01')
+            live = [row['tokens_input'] for row in self._read_csv('api_calls')]
+
+            RetentionManager(str(self.db.db_path), RetentionPolicy(raw_days=14)).run(now=datetime(2026, 10, 18))
+            self.exporter.export(str(self.out), fmt='csv', tables=['api_calls'],
+                                 start_date='2026-09-01', end_date='2026-09-01')
+            archived = [row['tokens_input'] for row in self._read_csv('api_calls')]
+        finally:
+            monkeypatch.undo()
+            time.tzset()
+
+        assert live == ['100', '7']
+        assert archived == live
+
+    def test_unavailable_format(self):
+        """Test requesting an unavailable format fails clearly"""
+        if 'parquet' in available_formats():
+            pytest.skip("pyarrow installed")
+        with pytest.raises(ValueError):
+            self.exporter.export(str(self.out), fmt='parquet')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test suite for metrics retention
+Partitioning, downsampling, compaction and partition drops
+"""
+
+import pytest
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from datetime import datetime, timedelta
+from tools.metrics.metrics_db import MetricsDatabase
+from tools.metrics.retention import RetentionManager, RetentionPolicy, RetentionWorker
+
+
+class TestRetentionManager:
+    """Test RetentionManager functionality"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = Path(self.temp_dir) / 'metrics.db'
+        self.db = MetricsDatabase(str(self.db_path))
+        self.manager = RetentionManager(str(self.db_path), RetentionPolicy(raw_days=14, batch_size=2))
+        self.now = datetime(2026, 10, 18, 12, 0, 0)
+
+        build_id = self.db.create_build(session_id="retention-build")
+        self.phase_id = self.db.create_phase(build_id, "Builder")
+
+    def teardown_method(self):
+        """Cleanup"""
+        self.manager.close()
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _add_call(self, when: datetime, tokens: int = 100, latency_ms: int = 1000):
+        with self.db._transaction() as conn:
+            conn.execute("""
+                INSERT INTO api_calls (phase_id, model, tokens_input, tokens_output, cost, latency_ms, timestamp)
+                VALUES (?, 'claude-sonnet-4', ?, 0, 0.01, ?, ?)
+            """, (self.phase_id, tokens, latency_ms, when.isoformat()))
+
+    def _count(self, table: str) -> int:
+        return self.db._get_connection().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_downsample_moves_expired_rows(self):
+        """Test expired raw rows move to monthly partitions and hourly aggregates"""
+        self._add_call(datetime(2026, 8, 3, 9, 15), tokens=100)
+        self._add_call(datetime(2026, 8, 3, 9, 45), tokens=300, latency_ms=3000)
+        self._add_call(datetime(2026, 9, 1, 10, 0), tokens=50)
+        self._add_call(self.now - timedelta(hours=1), tokens=10)
+
+        totals = self.manager.run(now=self.now)
+
+        assert totals['api_calls'] == 3
+        assert self._count('api_calls') == 1
+        assert self.manager.list_partitions() == ['2026-08', '2026-09']
+
+        hourly = self.manager.get_aggregates('api_calls', 'hour')
+        assert hourly[0]['bucket'] == '2026-08-03 09:00'
+        assert hourly[0]['phase_name'] == 'Builder'
+        assert hourly[0]['api_calls'] == 2
+        assert hourly[0]['tokens_input'] == 400
+        assert hourly[0]['latency_ms_total'] == 4000
+
+        archived = list(self.manager.iter_archived('api_calls', start_month='2026-08', end_month='2026-08'))
+        assert [row['tokens_input'] for row in archived] == [100, 300]
+        assert archived[0]['phase_name'] == 'Builder'
+
+        # Daily rollups keep the full history
+        assert self.db.get_model_totals(days=3650)['claude-sonnet-4']['total_api_calls'] == 4
+
+    def test_downsample_livestream_metrics(self):
+        """Test livestream time series rows are downsampled too"""
+        for usage in (1000, 5000):
+            self.db.add_metric('t1', {
+                'timestamp': datetime(2026, 9, 2, 8, 30).isoformat(),
+                'phase': 'Scout',
+                'token_usage': usage,
+                'token_percentage': usage / 200000
+            })
+
+        assert self.manager.downsample_step('metrics', now=self.now) == 2
+        assert self._count('metrics') == 0
+
+        hourly = self.manager.get_aggregates('metrics', 'hour')
+        assert hourly[0]['samples'] == 2
+        assert hourly[0]['token_usage_max'] == 5000
+        assert hourly[0]['token_usage_total'] == 6000
+
+    def test_compact_hourly_into_daily(self):
+        """Test hourly aggregates past their window compact into daily aggregates"""
+        self._add_call(datetime(2026, 5, 3, 9, 0), tokens=100)
+        self._add_call(datetime(2026, 5, 3, 15, 0), tokens=200)
+        self.manager.run(now=self.now)
+
+        assert self.manager.get_aggregates('api_calls', 'hour') == []
+        daily = self.manager.get_aggregates('api_calls', 'day')
+        assert len(daily) == 1
+        assert daily[0]['bucket'] == '2026-05-03'
+        assert daily[0]['tokens_input'] == 300
+
+    def test_drop_expired_partitions(self):
+        """Test whole monthly partitions are dropped past the archive window"""
+        self._add_call(datetime(2025, 6, 1, 9, 0))
+        self._add_call(datetime(2026, 6, 1, 9, 0))
+        self.manager.run(now=self.now)
+
+        assert self.manager.list_partitions() == ['2026-06']
+        assert not self.manager.partition_path('2025-06').exists()
+
+    def test_delete_finished_builds_in_batches(self):
+        """Test finished builds are deleted in bounded batches"""
+        old = (self.now - timedelta(days=400)).isoformat()
+        for i in range(5):
+            self.db.create_build(session_id=f"old-{i}")
+            self.db.update_build(f"old-{i}", status="completed", created_at=old)
+
+        assert self.manager.delete_finished_builds_step(now=self.now) == 2
+        totals = self.manager.run(now=self.now)
+        assert totals['builds_deleted'] == 3
+        assert self.db.get_build("retention-build") is not None
+
+    def test_worker_runs_in_background(self):
+        """Test the background worker drains expired rows"""
+        self._add_call(datetime(2020, 1, 1, 9, 0))
+        worker = RetentionWorker(self.manager, interval=60, busy_interval=0.01).start()
+        try:
+            for _ in range(200):
+                if self._count('api_calls') == 0:
+                    break
+                time.sleep(0.01)
+        finally:
+            worker.stop()
+
+        assert self._count('api_calls') == 0
+
+    def test_writes_share_the_database_writer(self):
+        """Test retention writes go through the database's single-writer pool"""
+        assert self.manager._pool is self.db._pool
+        self._add_call(datetime(2026, 8, 3, 9, 15))
+
+        # Partitions are attached outside transactions, and detached after each step
+        with self.db._transaction():
+            with pytest.raises(ValueError):
+                with self.manager._pool.write(attach={'part0': str(self.manager.partition_path('2026-08'))}):
+                    pass
+
+        assert self.manager.run_step(now=self.now)['api_calls'] == 1
+        assert self.db._pool._writer.execute("PRAGMA database_list").fetchall()[-1]['name'] == 'main'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
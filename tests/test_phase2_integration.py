@@ -28,6 +28,13 @@ from incremental.global_scout_cache import (
     clear_global_scout_cache
 )
 
+from incremental.cache_codec import (
+    encode_payload,
+    decode_payload,
+    write_payload,
+    read_payload
+)
+
 from incremental.change_detector import (
     capture_build_snapshot,
     detect_changes,
@@ -97,6 +104,42 @@ class TestGlobalScoutCache:
         clear_global_scout_cache()
 
 
+class TestCacheCodec:
+    """Test transparent cache payload compression."""
+
+    def test_roundtrip_each_codec(self):
+        """Test every available codec decodes back to the original bytes."""
+        data = ("# Scout Report\n" + "Use React with Vite. " * 200).encode('utf-8')
+
+        for codec in ['raw', 'zlib']:
+            blob = encode_payload(data, codec)
+            assert blob.startswith(b"CFC1:" + codec.encode() + b"\n")
+            assert decode_payload(blob) == data
+
+        assert len(encode_payload(data, 'zlib')) < len(data) / 5
+
+    def test_small_payload_stored_raw(self):
+        """Test tiny payloads skip compression."""
+        assert encode_payload(b"{}", 'zlib') == b"CFC1:raw\n{}"
+
+    def test_legacy_plain_file_readable(self):
+        """Test files written before compression still read correctly."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            legacy = Path(tmpdir) / "scout-legacy.md"
+            legacy.write_text("# Old report")
+            assert read_payload(legacy) == "# Old report"
+
+            write_payload(legacy, "# New report " * 100, codec='zlib')
+            assert read_payload(legacy) == "# New report " * 100
+
+    def test_corrupt_payload_raises_value_error(self):
+        """Test corrupt compressed payloads surface as ValueError."""
+        with pytest.raises(ValueError):
+            decode_payload(b"CFC1:zlib\nnot-zlib-data")
+        with pytest.raises(ValueError):
+            decode_payload(b"CFC1:lzma\ndata")
+
+
 class TestChangeDetector:
     """Test change detection functionality."""
 
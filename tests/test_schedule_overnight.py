@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Tests for the overnight scheduler's Scout cache prefetch.
+"""
+
+import os
+import sys
+import json
+import shutil
+import threading
+import time
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from unittest.mock import patch
+
+from tools.schedule_overnight import (
+    ScoutPrefetcher,
+    TaskQueue,
+    OvernightScheduler,
+    retry_delay,
+    compute_worker_limit,
+)
+from tools.incremental.global_scout_cache import save_scout_report_to_global_cache
+from tools.cache.scout_cache import get_cached_scout_report
+from tools.metrics.cache_metrics import configure_cache_metrics
+
+
+class TestScoutPrefetcher:
+    """Test Scout cache prefetch for queued overnight tasks."""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.old_home = os.environ.get("HOME")
+        os.environ["HOME"] = self.temp_dir
+        configure_cache_metrics(enabled=False)
+        self.prefetcher = ScoutPrefetcher(projects_dir=Path(self.temp_dir) / "examples")
+
+    def teardown_method(self):
+        configure_cache_metrics(None)
+        if self.old_home is not None:
+            os.environ["HOME"] = self.old_home
+        shutil.rmtree(self.temp_dir)
+
+    def _task(self, project, description):
+        return {"project": project, "description": description, "hours": 1, "priority": 0}
+
+    def test_infer_project_type(self):
+        """Test project type inference from task descriptions."""
+        assert ScoutPrefetcher.infer_project_type("Build a CLI todo tool") == "cli-tool"
+        assert ScoutPrefetcher.infer_project_type("REST API with JWT auth") == "api"
+        assert ScoutPrefetcher.infer_project_type("Refactor everything") == "general"
+
+    def test_plan_groups_near_identical_tasks(self):
+        """Test near-identical queued tasks share a group leader."""
+        tasks = [
+            self._task("app-one", "Build a react todo web app with local storage"),
+            self._task("app-two", "Build a react todo web app with local storage support"),
+            self._task("api", "REST API with JWT auth"),
+        ]
+
+        plans = self.prefetcher.plan(tasks)
+        plan_two = plans["app-two|" + tasks[1]["description"]]
+        plan_api = plans["api|" + tasks[2]["description"]]
+
+        assert plan_two["leader"] == "app-one|" + tasks[0]["description"]
+        assert plan_api["leader"] is None
+
+    def test_warm_seeds_local_cache_from_global(self):
+        """Test a task with a global cache entry starts with a warm local Scout cache."""
+        task = self._task("todo", "Build a react todo web app")
+        self.prefetcher.plan([task])
+        plan = self.prefetcher.plans["todo|" + task["description"]]
+        save_scout_report_to_global_cache(
+            task["description"], plan["project_type"], plan["tech_stack"], "# Scout Report"
+        )
+
+        assert self.prefetcher.warm(task) is True
+
+        working_directory = str(self.prefetcher.project_dir(task))
+        assert get_cached_scout_report(task["description"], "new_project", working_directory) == "# Scout Report"
+
+    def test_harvest_warms_later_similar_task(self):
+        """Test a finished task's Scout report warms a later similar task."""
+        first = self._task("app-one", "Build a react todo web app with local storage")
+        second = self._task("app-two", "Build a react todo web app with local storage support")
+        self.prefetcher.plan([first, second])
+
+        self.prefetcher.start(first)
+        assert self.prefetcher.warm(first) is False
+
+        report_dir = self.prefetcher.project_dir(first) / ".context-foundry"
+        report_dir.mkdir(parents=True)
+        (report_dir / "scout-report.md").write_text("# Shared Report")
+
+        assert self.prefetcher.harvest(first) is True
+        assert self.prefetcher.warm(second) is True
+        assert self.prefetcher.stats == {"warm": 1, "cold": 1, "harvested": 1}
+
+    def _write_report(self, task, text, age=0.0):
+        report_file = self.prefetcher.project_dir(task) / ".context-foundry" / "scout-report.md"
+        report_file.parent.mkdir(parents=True, exist_ok=True)
+        report_file.write_text(text)
+        modified = time.time() - age
+        os.utime(report_file, (modified, modified))
+
+    def test_harvest_ignores_report_from_earlier_run(self):
+        """Test a scout-report.md older than the task's start is not published."""
+        first = self._task("app-one", "Build a react todo web app with local storage")
+        second = self._task("app-two", "Build a react todo web app with local storage support")
+        self.prefetcher.plan([first, second])
+        self._write_report(first, "# Last Night", age=3600)
+
+        # Not started in this run, then started after the report was written
+        assert self.prefetcher.harvest(first) is False
+        self.prefetcher.start(first)
+        assert self.prefetcher.harvest(first) is False
+        assert self.prefetcher.warm(second) is False
+
+    def test_wait_skips_leader_not_started(self):
+        """Test a follower does not wait on a leader that is still queued."""
+        first = self._task("app-one", "Build a react todo web app with local storage")
+        second = self._task("app-two", "Build a react todo web app with local storage support")
+        self.prefetcher.plan([first, second])
+
+        start = time.monotonic()
+        assert self.prefetcher.wait_for_leader(second, timeout=5, poll_interval=0.05) is False
+        assert time.monotonic() - start < 1
+
+    def test_wait_publishes_running_leader_report(self):
+        """Test a follower waits for its running leader's fresh report."""
+        first = self._task("app-one", "Build a react todo web app with local storage")
+        second = self._task("app-two", "Build a react todo web app with local storage support")
+        self.prefetcher.plan([first, second])
+        self._write_report(first, "# Last Night", age=3600)
+        self.prefetcher.start(first)
+
+        timer = threading.Timer(0.2, self._write_report, args=(first, "# Tonight"))
+        timer.start()
+        try:
+            assert self.prefetcher.wait_for_leader(second, timeout=5, poll_interval=0.05) is True
+        finally:
+            timer.join()
+
+        assert self.prefetcher.warm(second) is True
+        working_directory = str(self.prefetcher.project_dir(second))
+        assert get_cached_scout_report(second["description"], "new_project", working_directory) == "# Tonight"
+
+
+class TestTaskQueue:
+    """Test atomic queue persistence and task claims."""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.queue = TaskQueue(Path(self.temp_dir) / "overnight_tasks.txt")
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_add_and_remove_task(self):
+        """Test tasks are added and removed without leaving temp files."""
+        self.queue.add_task({"project": "a", "description": "Task A", "hours": 1, "priority": 1})
+        self.queue.add_task({"project": "b", "description": "Task B", "hours": 2, "priority": 5})
+
+        tasks = self.queue.load_tasks()
+        assert [t["project"] for t in tasks] == ["b", "a"]
+
+        self.queue.remove_task(tasks[0])
+
+        assert [t["project"] for t in self.queue.load_tasks()] == ["a"]
+        assert not [p for p in Path(self.temp_dir).iterdir() if p.name.startswith(".")]
+
+    def test_claims_block_duplicates(self):
+        """Test a claimed task cannot be claimed by another live process."""
+        task = {"project": "a", "description": "Task A"}
+        assert self.queue.claim_task(task) is True
+
+        claims = json.loads(self.queue.state_file.read_text())
+        claims[TaskQueue.claim_key(task)]["pid"] = os.getppid()
+        self.queue.state_file.write_text(json.dumps(claims))
+
+        assert self.queue.claim_task(task) is False
+
+    def test_claims_are_per_project(self):
+        """Test a second task for a running project is not started alongside it."""
+        first = {"project": "a", "description": "Task A"}
+        second = {"project": "a", "description": "Task A2"}
+        assert self.queue.claim_task(first) is True
+        assert self.queue.claim_task(second) is False
+        assert self.queue.claim_task({"project": "b", "description": "Task B"}) is True
+
+        # Releasing the other task leaves the running task's claim alone
+        self.queue.release_task(second)
+        assert self.queue.claim_task(second) is False
+        self.queue.release_task(first)
+        assert self.queue.claim_task(second) is True
+
+    def test_stale_claim_is_taken_over(self):
+        """Test a claim left by a dead scheduler is reclaimed."""
+        task = {"project": "a", "description": "Task A"}
+        self.queue.state_file.write_text(json.dumps({TaskQueue.claim_key(task): {"pid": 2 ** 22 + 1}}))
+
+        assert self.queue.claim_task(task) is True
+        self.queue.release_task(task)
+        assert json.loads(self.queue.state_file.read_text()) == {}
+
+
+class TestOvernightScheduler:
+    """Test task execution, backoff and worker bounds."""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.scheduler = OvernightScheduler(
+            Path(self.temp_dir) / "overnight_tasks.txt",
+            prefetch=False,
+            log_dir=Path(self.temp_dir) / "logs"
+        )
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_retry_delay_backoff(self):
+        """Test backoff grows exponentially, stays capped and is jittered."""
+        for attempt in range(1, 10):
+            delay = min(900, 60 * 2 ** (attempt - 1))
+            assert delay / 2 <= retry_delay(attempt) <= delay
+
+    def test_compute_worker_limit(self):
+        """Test worker count stays between 1 and the requested number."""
+        assert compute_worker_limit(1) == 1
+        assert 1 <= compute_worker_limit(64) <= 64
+        assert compute_worker_limit(8, task_memory_mb=10 ** 9) == 1
+
+    def test_run_task_streams_output_to_log(self):
+        """Test task output goes to the task log file."""
+        self.scheduler.session_command = [sys.executable, "-c", "print('session output')"]
+        result = self.scheduler.run_task({"project": "demo", "description": "Demo", "hours": 1})
+
+        assert result["success"] is True
+        assert "session output" in Path(result["log_file"]).read_text()
+
+    def test_task_log_paths_are_unique(self):
+        """Test runs started in the same second get separate logs."""
+        task = {"project": "demo", "description": "Demo", "hours": 1}
+        assert self.scheduler._task_log_path(task) != self.scheduler._task_log_path(task)
+
+    def test_same_project_tasks_run_sequentially(self):
+        """Test parallel workers never run two tasks of one project at once."""
+        running = {}
+        overlaps = []
+        lock = threading.Lock()
+
+        def run_task(task):
+            with lock:
+                if running.get(task["project"]):
+                    overlaps.append(task["project"])
+                running[task["project"]] = True
+            time.sleep(0.05)
+            with lock:
+                running[task["project"]] = False
+            return {"success": False, "error": "test"}
+
+        for project, description in [("a", "A1"), ("a", "A2"), ("b", "B1"), ("a", "A3")]:
+            self.scheduler.add_task(project, description)
+
+        with patch.object(self.scheduler, "run_task", side_effect=run_task) as run, \
+                patch("tools.schedule_overnight.compute_worker_limit", side_effect=lambda n, m: n):
+            self.scheduler.process_queue(workers=4)
+
+        assert run.call_count == 4
+        assert overlaps == []
+
+    def test_run_task_retries_with_backoff(self):
+        """Test failed attempts are retried after a backoff delay."""
+        self.scheduler.session_command = [sys.executable, "-c", "import sys; sys.exit(3)"]
+        with patch("tools.schedule_overnight.retry_delay", return_value=0) as delay:
+            result = self.scheduler.run_task({"project": "demo", "description": "Demo", "hours": 1}, max_retries=3)
+
+        assert result["success"] is False
+        assert result["attempts"] == 3
+        assert [c.args[0] for c in delay.call_args_list] == [1, 2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Test suite for ContextWatchManager
+Scoped, non-recursive watches on .context-foundry directories
+"""
+
+import threading
+from pathlib import Path
+
+from tools import watch_manager
+from tools.watch_manager import ContextWatchManager
+
+
+class FakeObserver:
+    """Records schedule/unschedule calls instead of watching."""
+
+    def __init__(self):
+        self.scheduled = {}
+        self.started = False
+
+    def schedule(self, handler, path, recursive=False):
+        assert recursive is False
+        self.handler = handler
+        self.scheduled[path] = object()
+        return self.scheduled[path]
+
+    def unschedule(self, watch):
+        for path, scheduled in list(self.scheduled.items()):
+            if scheduled is watch:
+                del self.scheduled[path]
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+    def join(self, timeout=None):
+        pass
+
+
+class OneShotObserver(FakeObserver):
+    """Like a watchdog observer thread: start() works only once."""
+
+    created = 0
+
+    def __init__(self):
+        super().__init__()
+        OneShotObserver.created += 1
+        self.ran = False
+
+    def start(self):
+        if self.ran:
+            raise RuntimeError("threads can only be started once")
+        self.ran = True
+        super().start()
+
+
+class FakeEvent:
+    def __init__(self, event_type, src_path, is_directory=False, dest_path=None):
+        self.event_type = event_type
+        self.src_path = str(src_path)
+        self.is_directory = is_directory
+        if dest_path is not None:
+            self.dest_path = str(dest_path)
+
+
+def make_build(root, name, subdirs=("feedback",)):
+    context_dir = root / name / ".context-foundry"
+    context_dir.mkdir(parents=True)
+    for subdir in subdirs:
+        (context_dir / subdir).mkdir()
+    (root / name / "node_modules").mkdir()
+    return context_dir
+
+
+class TestContextWatchManager:
+    """Test watch registration, bounds and debouncing"""
+
+    def setup_method(self):
+        self.changed = []
+        self.delivered = threading.Event()
+        self.observer = FakeObserver()
+
+    def callback(self, path):
+        self.changed.append(path)
+        self.delivered.set()
+
+    def test_watches_only_context_dirs(self, tmp_path):
+        build = make_build(tmp_path, "app")
+        manager = ContextWatchManager(self.callback, observer=self.observer)
+        manager.add(build)
+        assert manager.watch_count == 0  # Not started yet
+
+        assert manager.start() is True
+        assert sorted(self.observer.scheduled) == [str(build), str(build / "feedback")]
+        assert manager.stats()["watches"] == 2
+
+    def test_builds_are_added_and_removed(self, tmp_path):
+        first = make_build(tmp_path, "first")
+        second = make_build(tmp_path, "second", subdirs=())
+        manager = ContextWatchManager(self.callback, observer=self.observer)
+        manager.start()
+
+        manager.sync([first, second])
+        assert manager.watch_count == 3
+
+        # first finished
+        manager.sync([second])
+        assert list(self.observer.scheduled) == [str(second)]
+        assert manager.directories() == [str(second)]
+
+    def test_missing_directory_is_watched_once_it_exists(self, tmp_path):
+        manager = ContextWatchManager(self.callback, observer=self.observer)
+        manager.start()
+        context_dir = tmp_path / "later" / ".context-foundry"
+
+        assert manager.add(context_dir) is False
+        context_dir.mkdir(parents=True)
+        manager.refresh()
+        assert manager.watch_count == 1
+
+        # A known subdirectory appearing is picked up from the directory event
+        (context_dir / "patterns").mkdir()
+        self.observer.handler.on_any_event(FakeEvent("created", context_dir / "patterns", is_directory=True))
+        assert str(context_dir / "patterns") in self.observer.scheduled
+
+    def test_watch_limit(self, tmp_path):
+        manager = ContextWatchManager(self.callback, observer=self.observer, max_watches=3)
+        manager.start()
+        manager.add(make_build(tmp_path, "a"))
+        manager.add(make_build(tmp_path, "b"))
+
+        assert manager.watch_count == 3
+        assert manager.stats()["rejected"] == 1
+
+    def test_bursts_are_debounced(self, tmp_path):
+        build = make_build(tmp_path, "app")
+        manager = ContextWatchManager(self.callback, observer=self.observer, debounce=0.05,
+                                      file_filter=lambda path: path.endswith(".json"))
+        manager.add(build)
+        manager.start()
+
+        phase_file = build / "current-phase.json"
+        for _ in range(20):
+            self.observer.handler.on_any_event(FakeEvent("modified", phase_file))
+        self.observer.handler.on_any_event(FakeEvent("modified", build / "session.log"))
+
+        assert self.delivered.wait(timeout=5)
+        manager.stop()
+        assert self.changed == [Path(phase_file)]
+        assert manager.stats()["events"] == 20
+        assert manager.stats()["delivered"] == 1
+
+    def test_moved_into_place(self, tmp_path):
+        build = make_build(tmp_path, "app")
+        manager = ContextWatchManager(self.callback, observer=self.observer, debounce=0)
+        manager.add(build)
+        manager.start()
+
+        self.observer.handler.on_any_event(
+            FakeEvent("moved", build / "tmp123", dest_path=build / "current-phase.json"))
+        assert self.delivered.wait(timeout=5)
+        assert self.changed == [build / "current-phase.json"]
+
+    def test_one_debounce_thread_for_all_files(self, tmp_path):
+        build = make_build(tmp_path, "app")
+        manager = ContextWatchManager(self.callback, observer=self.observer, debounce=0.05)
+        manager.add(build)
+        manager.start()
+
+        before = set(threading.enumerate())
+        for i in range(50):
+            self.observer.handler.on_any_event(FakeEvent("modified", build / f"file-{i}.json"))
+        debounce_threads = list(set(threading.enumerate()) - before)
+        assert [t.name for t in debounce_threads] == ["context-watch-debounce"]
+
+        for _ in range(500):
+            if manager.stats()["delivered"] == 50:
+                break
+            threading.Event().wait(0.01)
+        manager.stop()
+        assert len(self.changed) == 50
+        assert not debounce_threads[0].is_alive()
+
+    def test_restart_creates_new_observer(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(watch_manager, "Observer", OneShotObserver)
+        build = make_build(tmp_path, "app")
+        manager = ContextWatchManager(self.callback)
+        manager.add(build)
+
+        assert manager.start() is True
+        manager.stop()
+        assert manager.start() is True
+        assert OneShotObserver.created == 2
+        assert manager.watch_count == 2
+        manager.stop()
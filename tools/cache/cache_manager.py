@@ -23,6 +23,23 @@ from . import (
 )
 from .scout_cache import clear_scout_cache, get_scout_cache_stats
 from .test_cache import clear_test_cache, get_test_cache_stats
+from ..metrics.cache_metrics import (
+    SCOUT_NAMESPACE,
+    TEST_NAMESPACE,
+    record_cache_event,
+    get_cache_metrics
+)
+
+
+def _namespace_for(file: Path) -> Optional[str]:
+    """Map a cache file to its instrumentation namespace."""
+    if file.name.endswith('.meta.json'):
+        return None
+    if file.name.startswith('scout-'):
+        return SCOUT_NAMESPACE
+    if file.name.startswith('test-') or file.name == 'file-hashes.json':
+        return TEST_NAMESPACE
+    return None
 
 class CacheManager:
     """Manages all caching operations for Context Foundry."""
@@ -37,16 +54,20 @@ class CacheManager:
         self.working_directory = working_directory
         self.cache_dir = get_cache_dir(working_directory)
 
-    def get_stats(self) -> Dict[str, Any]:
+    def get_stats(self, days: int = 30) -> Dict[str, Any]:
         """
         Get comprehensive cache statistics.
 
+        Args:
+            days: Look-back window for hit/miss instrumentation
+
         Returns:
             Dict with cache statistics including:
             - scout_cache: Scout cache stats
             - test_cache: Test cache stats
             - total_size_mb: Total cache size in MB
             - total_files: Total number of cache files
+            - instrumentation: Hit/miss/latency counters per cache namespace
         """
         scout_stats = get_scout_cache_stats(self.working_directory)
         test_stats = get_test_cache_stats(self.working_directory)
@@ -67,6 +88,7 @@ class CacheManager:
             "test_cache": test_stats,
             "total_size_mb": round(total_size / (1024 * 1024), 3),
             "total_files": total_files,
+            "instrumentation": get_cache_metrics(days=days),
             "created_at": datetime.now().isoformat()
         }
 
@@ -106,6 +128,10 @@ class CacheManager:
                     if meta_file.exists():
                         meta_file.unlink()
 
+                    namespace = _namespace_for(file)
+                    if namespace:
+                        record_cache_event(namespace, 'eviction')
+
                     # Track deletion type
                     if file.name.startswith('scout-'):
                         deleted_scout += 1
@@ -223,6 +249,10 @@ class CacheManager:
                 freed_size += size
                 deleted_count += 1
 
+                namespace = _namespace_for(file)
+                if namespace:
+                    record_cache_event(namespace, 'eviction')
+
             except OSError:
                 pass
 
@@ -259,4 +289,13 @@ class CacheManager:
         if test['has_cached_results']:
             print(f"  Last test: {test.get('last_test_passed', 0)}/{test.get('last_test_total', 0)} passed")
 
+        if stats['instrumentation']:
+            print()
+            print("Hit Ratios (last 30 days):")
+            for namespace, counters in sorted(stats['instrumentation'].items()):
+                print(f"  {namespace}: {counters['hit_ratio']:.1%} "
+                      f"({counters['hits']} hits, {counters['misses']} misses, {counters['stale']} stale), "
+                      f"avg lookup {counters['avg_lookup_ms']:.1f} ms, "
+                      f"saved {counters['time_saved_seconds']:.0f}s")
+
 __all__ = ['CacheManager']
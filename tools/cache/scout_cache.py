@@ -7,6 +7,7 @@ Cache Key Strategy:
 - Hash of: task description + mode + project type hints
 - Similar tasks within 24h reuse the same Scout report
 - Cache miss triggers normal Scout phase
+- Reports are stored with transparent compression (see incremental/cache_codec.py)
 
 Example:
 - Task 1: "Build a weather app with React"
@@ -31,6 +32,13 @@ from . import (
     load_cache_metadata,
     DEFAULT_CACHE_TTL_HOURS
 )
+from ..incremental.cache_codec import read_payload, write_payload
+from ..metrics.cache_metrics import (
+    SCOUT_NAMESPACE,
+    estimate_scout_time_saved,
+    lookup_started,
+    record_cache_event
+)
 
 def normalize_task_description(task: str) -> str:
     """
@@ -91,12 +99,16 @@ def get_cached_scout_report(
     Returns:
         Scout report markdown content if cache hit, None if cache miss
     """
+    started_at = lookup_started()
+
     # Generate cache key
     cache_key = generate_scout_cache_key(task, mode, working_directory)
     cache_file = get_scout_cache_path(working_directory, cache_key)
 
     # Check if cache is valid
     if not is_cache_valid(cache_file, ttl_hours):
+        event = 'stale' if cache_file.exists() else 'miss'
+        record_cache_event(SCOUT_NAMESPACE, event, started_at)
         return None
 
     # Load metadata for logging
@@ -104,7 +116,15 @@ def get_cached_scout_report(
 
     # Read and return cached report
     try:
-        cached_content = cache_file.read_text()
+        bytes_read = cache_file.stat().st_size
+        cached_content = read_payload(cache_file)
+
+        stored_duration = metadata.get('scout_duration_seconds') if metadata else None
+        record_cache_event(
+            SCOUT_NAMESPACE, 'hit', started_at,
+            bytes_read=bytes_read,
+            time_saved_seconds=estimate_scout_time_saved(stored_duration)
+        )
 
         # Log cache hit
         print(f"✅ Scout cache HIT! Using cached report from {metadata.get('created_at', 'unknown time') if metadata else 'unknown time'}")
@@ -112,15 +132,17 @@ def get_cached_scout_report(
         print(f"   Original task: {metadata.get('original_task', 'unknown') if metadata else 'unknown'}")
 
         return cached_content
-    except OSError as e:
+    except (OSError, ValueError) as e:
         print(f"⚠️ Failed to read Scout cache: {e}")
+        record_cache_event(SCOUT_NAMESPACE, 'miss', started_at)
         return None
 
 def save_scout_report_to_cache(
     task: str,
     mode: str,
     working_directory: str,
-    scout_report_content: str
+    scout_report_content: str,
+    scout_duration_seconds: Optional[float] = None
 ) -> None:
     """
     Save a Scout report to cache.
@@ -130,6 +152,7 @@ def save_scout_report_to_cache(
         mode: Build mode
         working_directory: Project working directory
         scout_report_content: The Scout report markdown content
+        scout_duration_seconds: How long the Scout phase took (time a later hit saves)
     """
     # Generate cache key
     cache_key = generate_scout_cache_key(task, mode, working_directory)
@@ -137,7 +160,11 @@ def save_scout_report_to_cache(
 
     try:
         # Save the report
-        cache_file.write_text(scout_report_content)
+        bytes_written = write_payload(cache_file, scout_report_content)
+        record_cache_event(
+            SCOUT_NAMESPACE, 'write',
+            bytes_written=bytes_written
+        )
 
         # Save metadata
         metadata = {
@@ -146,6 +173,8 @@ def save_scout_report_to_cache(
             "mode": mode,
             "cache_key": cache_key
         }
+        if scout_duration_seconds is not None:
+            metadata["scout_duration_seconds"] = scout_duration_seconds
         save_cache_metadata(cache_file, metadata)
 
         print(f"💾 Scout report cached successfully")
@@ -176,6 +205,7 @@ def clear_scout_cache(working_directory: str) -> int:
             if meta_file.exists():
                 meta_file.unlink()
             deleted_count += 1
+            record_cache_event(SCOUT_NAMESPACE, 'eviction')
         except OSError:
             pass
 
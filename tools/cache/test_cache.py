@@ -8,6 +8,12 @@ Strategy:
 - Store test results with file hash snapshot
 - Cache HIT: All file hashes match → skip tests, reuse results
 - Cache MISS: Any file changed → run tests again
+- Results and hashes stored as compact JSON with transparent compression
+
+Per-test results:
+- Each test is keyed by the hashes of the files it covers (test impact map)
+- Passing results are reused for tests whose covered files are untouched
+- Only affected tests run; cached and fresh results merge into one report
 
 Benefits:
 - Skip test phase entirely when no code changed
@@ -21,7 +27,7 @@ import json
 import hashlib
 from pathlib import Path
 from typing import Optional, Dict, Any, List
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from . import (
     get_cache_dir,
@@ -30,6 +36,13 @@ from . import (
     load_cache_metadata,
     DEFAULT_CACHE_TTL_HOURS
 )
+from ..incremental.cache_codec import read_payload, write_payload, dumps_compact
+from ..incremental.test_impact_analyzer import TestCoverageMap, get_test_coverage_map_path
+from ..metrics.cache_metrics import (
+    TEST_NAMESPACE,
+    lookup_started,
+    record_cache_event
+)
 
 def hash_file(file_path: Path) -> str:
     """Generate SHA256 hash of a file's contents."""
@@ -113,23 +126,29 @@ def get_cached_test_results(
     Returns:
         Test results dict if cache hit, None if cache miss
     """
+    started_at = lookup_started()
     test_cache_file = get_test_cache_path(working_directory)
     hash_cache_file = get_file_hashes_path(working_directory)
 
     # Check if cache files exist and are valid
     if not is_cache_valid(test_cache_file, ttl_hours):
         print("⚠️ Test cache miss: No cached results or cache expired")
+        event = 'stale' if test_cache_file.exists() else 'miss'
+        record_cache_event(TEST_NAMESPACE, event, started_at)
         return None
 
     if not hash_cache_file.exists():
         print("⚠️ Test cache miss: No file hash snapshot")
+        record_cache_event(TEST_NAMESPACE, 'miss', started_at)
         return None
 
     # Load cached file hashes
     try:
-        cached_hashes = json.loads(hash_cache_file.read_text())
-    except (json.JSONDecodeError, OSError) as e:
+        hashes_bytes = hash_cache_file.stat().st_size
+        cached_hashes = json.loads(read_payload(hash_cache_file))
+    except (json.JSONDecodeError, OSError, ValueError) as e:
         print(f"⚠️ Test cache miss: Failed to load cached hashes: {e}")
+        record_cache_event(TEST_NAMESPACE, 'miss', started_at)
         return None
 
     # Compute current file hashes
@@ -156,11 +175,23 @@ def get_cached_test_results(
             for f in list(modified_files)[:5]:
                 print(f"     - {f}")
 
+        record_cache_event(
+            TEST_NAMESPACE, 'stale', started_at,
+            bytes_read=hashes_bytes
+        )
         return None
 
     # Load and return cached test results
     try:
-        test_results = json.loads(test_cache_file.read_text())
+        results_bytes = test_cache_file.stat().st_size
+        test_results = json.loads(read_payload(test_cache_file))
+
+        # A hit saves the whole test run
+        record_cache_event(
+            TEST_NAMESPACE, 'hit', started_at,
+            bytes_read=hashes_bytes + results_bytes,
+            time_saved_seconds=float(test_results.get('duration') or 0)
+        )
 
         # Load metadata
         metadata = load_cache_metadata(test_cache_file)
@@ -172,8 +203,9 @@ def get_cached_test_results(
 
         return test_results
 
-    except (json.JSONDecodeError, OSError) as e:
+    except (json.JSONDecodeError, OSError, ValueError) as e:
         print(f"⚠️ Test cache miss: Failed to load test results: {e}")
+        record_cache_event(TEST_NAMESPACE, 'miss', started_at)
         return None
 
 def save_test_results_to_cache(
@@ -198,10 +230,14 @@ def save_test_results_to_cache(
     try:
         # Compute and save file hashes
         file_hashes = compute_file_hashes(working_directory)
-        hash_cache_file.write_text(json.dumps(file_hashes, indent=2))
+        bytes_written = write_payload(hash_cache_file, dumps_compact(file_hashes))
 
         # Save test results
-        test_cache_file.write_text(json.dumps(test_results, indent=2))
+        bytes_written += write_payload(test_cache_file, dumps_compact(test_results))
+        record_cache_event(
+            TEST_NAMESPACE, 'write',
+            bytes_written=bytes_written
+        )
 
         # Save metadata
         metadata = {
@@ -219,6 +255,244 @@ def save_test_results_to_cache(
     except OSError as e:
         print(f"⚠️ Failed to save test results to cache: {e}")
 
+def get_per_test_cache_path(working_directory: str) -> Path:
+    """Get the file path for per-test results cache."""
+    cache_dir = get_cache_dir(working_directory)
+    return cache_dir / "test-results-per-test.json"
+
+def load_test_coverage_map(working_directory: str) -> Optional[TestCoverageMap]:
+    """Load the saved test impact map, or None if unavailable."""
+    map_path = get_test_coverage_map_path(working_directory)
+    if not map_path.exists():
+        return None
+
+    try:
+        return TestCoverageMap.from_dict(json.loads(map_path.read_text()))
+    except (json.JSONDecodeError, OSError):
+        return None
+
+def compute_test_keys(
+    working_directory: str,
+    coverage_map: TestCoverageMap,
+    test_ids: Optional[List[str]] = None
+) -> Dict[str, str]:
+    """
+    Compute a cache key per test from the hashes of the files it covers.
+
+    Each covered file is hashed once, however many tests cover it.
+
+    Args:
+        working_directory: Project working directory
+        coverage_map: Test impact map (test_id -> covered files)
+        test_ids: Tests to compute keys for (default: all tests in the map)
+
+    Returns:
+        Dict mapping test ID to SHA256 key
+    """
+    project_root = Path(working_directory)
+    if test_ids is None:
+        test_ids = list(coverage_map.tests.keys())
+
+    file_hashes: Dict[str, str] = {}
+    test_keys = {}
+
+    for test_id in test_ids:
+        covered_files = coverage_map.tests.get(test_id, {}).get('covers', [])
+        digest = hashlib.sha256(test_id.encode('utf-8'))
+
+        for rel_path in sorted(set(covered_files)):
+            if rel_path not in file_hashes:
+                file_hashes[rel_path] = hash_file(project_root / rel_path)
+            digest.update(f"\n{rel_path}:{file_hashes[rel_path]}".encode('utf-8'))
+
+        test_keys[test_id] = digest.hexdigest()
+
+    return test_keys
+
+def _load_per_test_entries(cache_file: Path) -> Dict[str, Dict[str, Any]]:
+    """Load per-test cache entries (empty dict if missing or unreadable)."""
+    if not cache_file.exists():
+        return {}
+
+    try:
+        return json.loads(read_payload(cache_file)).get('tests', {})
+    except (json.JSONDecodeError, OSError, ValueError, AttributeError):
+        return {}
+
+def get_cached_per_test_results(
+    working_directory: str,
+    coverage_map: Optional[TestCoverageMap] = None,
+    test_ids: Optional[List[str]] = None,
+    ttl_hours: int = DEFAULT_CACHE_TTL_HOURS
+) -> Dict[str, Any]:
+    """
+    Split tests into those with reusable cached results and those to run.
+
+    A cached result is reused only if it passed, is within TTL, and the
+    hashes of every file the test covers are unchanged.
+
+    Args:
+        working_directory: Project working directory
+        coverage_map: Test impact map (or None to load from file)
+        test_ids: Tests to consider (default: all tests in the map)
+        ttl_hours: Cache TTL in hours (default: 24)
+
+    Returns:
+        Dict with:
+            - cached: test_id -> cached result ({outcome, duration_seconds})
+            - to_run: test IDs that must be executed
+            - time_saved_seconds: summed duration of reused results
+    """
+    started_at = lookup_started()
+
+    if coverage_map is None:
+        coverage_map = load_test_coverage_map(working_directory)
+    if coverage_map is None:
+        print("⚠️ Per-test cache miss: No test coverage map")
+        record_cache_event(TEST_NAMESPACE, 'miss', started_at)
+        return {"cached": {}, "to_run": list(test_ids or []), "time_saved_seconds": 0.0}
+
+    if test_ids is None:
+        test_ids = list(coverage_map.tests.keys())
+
+    cache_file = get_per_test_cache_path(working_directory)
+    bytes_read = cache_file.stat().st_size if cache_file.exists() else 0
+    entries = _load_per_test_entries(cache_file)
+    current_keys = compute_test_keys(working_directory, coverage_map, test_ids)
+    cutoff = (datetime.now() - timedelta(hours=ttl_hours)).isoformat()
+
+    cached = {}
+    to_run = []
+
+    for test_id in test_ids:
+        entry = entries.get(test_id)
+        if (entry
+                and entry.get('outcome') == 'passed'
+                and entry.get('key') == current_keys.get(test_id)
+                and entry.get('cached_at', '') >= cutoff):
+            cached[test_id] = {
+                "outcome": entry['outcome'],
+                "duration_seconds": float(entry.get('duration_seconds') or 0)
+            }
+        else:
+            to_run.append(test_id)
+
+    time_saved = sum(r['duration_seconds'] for r in cached.values())
+
+    if cached:
+        record_cache_event(
+            TEST_NAMESPACE, 'hit', started_at,
+            bytes_read=bytes_read,
+            time_saved_seconds=time_saved
+        )
+    else:
+        event = 'stale' if entries else 'miss'
+        record_cache_event(TEST_NAMESPACE, event, started_at, bytes_read=bytes_read)
+
+    print(f"🧪 Per-test cache: {len(cached)} reused, {len(to_run)} to run")
+    if cached:
+        print(f"   Estimated time saved: {time_saved:.1f}s")
+
+    return {"cached": cached, "to_run": to_run, "time_saved_seconds": time_saved}
+
+def save_per_test_results(
+    working_directory: str,
+    results: Dict[str, Dict[str, Any]],
+    coverage_map: Optional[TestCoverageMap] = None
+) -> int:
+    """
+    Save per-test results keyed by the hashes of each test's covered files.
+
+    Entries for tests not in `results` are kept, so partial runs accumulate.
+
+    Args:
+        working_directory: Project working directory
+        results: test_id -> {"outcome": "passed"|"failed"|..., "duration_seconds": float}
+        coverage_map: Test impact map (or None to load from file)
+
+    Returns:
+        Number of test results saved
+    """
+    if coverage_map is None:
+        coverage_map = load_test_coverage_map(working_directory)
+    if coverage_map is None:
+        print("⚠️ Per-test results not cached: No test coverage map")
+        return 0
+
+    test_ids = [t for t in results if t in coverage_map.tests]
+    test_keys = compute_test_keys(working_directory, coverage_map, test_ids)
+    cache_file = get_per_test_cache_path(working_directory)
+    entries = _load_per_test_entries(cache_file)
+    cached_at = datetime.now().isoformat()
+
+    for test_id in test_ids:
+        result = results[test_id]
+        entries[test_id] = {
+            "key": test_keys[test_id],
+            "outcome": result.get('outcome', 'failed'),
+            "duration_seconds": float(result.get('duration_seconds') or 0),
+            "cached_at": cached_at
+        }
+
+    # Drop tests that no longer exist in the coverage map
+    entries = {t: e for t, e in entries.items() if t in coverage_map.tests}
+
+    try:
+        bytes_written = write_payload(cache_file, dumps_compact({"tests": entries}))
+        record_cache_event(TEST_NAMESPACE, 'write', bytes_written=bytes_written)
+    except OSError as e:
+        print(f"⚠️ Failed to save per-test results to cache: {e}")
+        return 0
+
+    print(f"💾 Per-test results cached: {len(test_ids)} tests")
+    return len(test_ids)
+
+def merge_test_results(
+    cached: Dict[str, Dict[str, Any]],
+    fresh: Dict[str, Dict[str, Any]],
+    test_command: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Merge cached and freshly executed per-test results into one report.
+
+    Fresh results take precedence over cached results for the same test.
+    The report uses the same keys as save_test_results_to_cache expects.
+
+    Args:
+        cached: test_id -> cached result (from get_cached_per_test_results)
+        fresh: test_id -> result from this run
+        test_command: Command used to run the fresh tests
+
+    Returns:
+        Test results dict with passed/total/duration/success plus per-test detail
+    """
+    tests = {}
+    for test_id, result in cached.items():
+        tests[test_id] = {**result, "source": "cached"}
+    for test_id, result in fresh.items():
+        tests[test_id] = {
+            "outcome": result.get('outcome', 'failed'),
+            "duration_seconds": float(result.get('duration_seconds') or 0),
+            "source": "fresh"
+        }
+
+    passed = sum(1 for r in tests.values() if r['outcome'] == 'passed')
+    executed = [r for r in tests.values() if r['source'] == 'fresh']
+    reused = [r for r in tests.values() if r['source'] == 'cached']
+
+    return {
+        "success": passed == len(tests),
+        "passed": passed,
+        "failed": len(tests) - passed,
+        "total": len(tests),
+        "duration": sum(r['duration_seconds'] for r in executed),
+        "executed_count": len(executed),
+        "cached_count": len(reused),
+        "time_saved_seconds": sum(r['duration_seconds'] for r in reused),
+        "test_command": test_command,
+        "tests": tests
+    }
+
 def clear_test_cache(working_directory: str) -> int:
     """
     Clear test cache.
@@ -232,7 +506,7 @@ def clear_test_cache(working_directory: str) -> int:
     cache_dir = get_cache_dir(working_directory)
     deleted_count = 0
 
-    for pattern in ["test-results.json", "file-hashes.json"]:
+    for pattern in ["test-results.json", "file-hashes.json", "test-results-per-test.json"]:
         file = cache_dir / pattern
         if file.exists():
             try:
@@ -242,6 +516,7 @@ def clear_test_cache(working_directory: str) -> int:
                 if meta_file.exists():
                     meta_file.unlink()
                 deleted_count += 1
+                record_cache_event(TEST_NAMESPACE, 'eviction')
             except OSError:
                 pass
 
@@ -261,8 +536,8 @@ def get_test_cache_stats(working_directory: str) -> Dict[str, Any]:
 
     # Load cached data
     try:
-        test_results = json.loads(test_cache_file.read_text())
-        file_hashes = json.loads(hash_cache_file.read_text()) if hash_cache_file.exists() else {}
+        test_results = json.loads(read_payload(test_cache_file))
+        file_hashes = json.loads(read_payload(hash_cache_file)) if hash_cache_file.exists() else {}
 
         return {
             "has_cached_results": True,
@@ -272,7 +547,7 @@ def get_test_cache_stats(working_directory: str) -> Dict[str, Any]:
             "last_test_total": test_results.get('total', 0),
             "last_test_success": test_results.get('success', False)
         }
-    except (json.JSONDecodeError, OSError):
+    except (json.JSONDecodeError, OSError, ValueError):
         return {
             "has_cached_results": False,
             "cache_valid": False,
@@ -285,6 +560,12 @@ __all__ = [
     'compute_file_hashes',
     'get_cached_test_results',
     'save_test_results_to_cache',
+    'get_per_test_cache_path',
+    'load_test_coverage_map',
+    'compute_test_keys',
+    'get_cached_per_test_results',
+    'save_per_test_results',
+    'merge_test_results',
     'clear_test_cache',
     'get_test_cache_stats'
 ]
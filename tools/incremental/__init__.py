@@ -9,6 +9,7 @@ Modules:
 - incremental_builder: Smart file preservation
 - test_impact_analyzer: Selective test execution
 - incremental_docs: Selective documentation updates
+- cache_codec: Transparent compression for cache payloads
 """
 
 from .global_scout_cache import (
@@ -21,6 +22,14 @@ from .global_scout_cache import (
     get_global_scout_cache_stats
 )
 
+from .cache_codec import (
+    encode_payload,
+    decode_payload,
+    write_payload,
+    read_payload,
+    dumps_compact
+)
+
 from .change_detector import (
     ChangeReport,
     capture_build_snapshot,
@@ -63,6 +72,13 @@ __all__ = [
     'clear_global_scout_cache',
     'get_global_scout_cache_stats',
 
+    # Cache Codec
+    'encode_payload',
+    'decode_payload',
+    'write_payload',
+    'read_payload',
+    'dumps_compact',
+
     # Change Detector
     'ChangeReport',
     'capture_build_snapshot',
@@ -0,0 +1,169 @@
+"""
+Cache Payload Codec - Phase 2
+
+Transparent compression for cache payloads (Scout reports, test results,
+global Scout cache entries).
+
+Format:
+- Encoded payloads start with a header: b"CFC1:<codec>\n" followed by the
+  (possibly compressed) bytes
+- Codecs: "zstd" (when the zstandard package is installed), "zlib", "raw"
+- Files without the header are read as plain UTF-8 text, so caches written
+  before compression was introduced keep working
+
+The codec used for writing can be forced with CF_CACHE_CODEC=zstd|zlib|raw.
+"""
+
+import os
+import json
+import zlib
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+PAYLOAD_MAGIC = b"CFC1:"
+
+# Payloads smaller than this are stored raw (compression would not pay off)
+MIN_COMPRESS_BYTES = 256
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+def available_codecs() -> list:
+    """List codecs usable in this environment."""
+    codecs = ['raw', 'zlib']
+    if zstandard is not None:
+        codecs.append('zstd')
+    return codecs
+
+
+def default_codec() -> str:
+    """
+    Select the codec for new payloads.
+
+    Returns:
+        CF_CACHE_CODEC if set and available, else zstd when installed, else zlib
+    """
+    requested = os.getenv('CF_CACHE_CODEC', '').strip().lower()
+    if requested in available_codecs():
+        return requested
+    return 'zstd' if zstandard is not None else 'zlib'
+
+
+def encode_payload(data: bytes, codec: Optional[str] = None) -> bytes:
+    """
+    Encode bytes with a codec header.
+
+    Args:
+        data: Raw payload
+        codec: Codec name (default: default_codec())
+
+    Returns:
+        Header + encoded payload
+    """
+    if codec is None:
+        codec = default_codec()
+    if len(data) < MIN_COMPRESS_BYTES:
+        codec = 'raw'
+
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError("zstd codec requires the zstandard package")
+        body = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    elif codec == 'zlib':
+        body = zlib.compress(data, ZLIB_LEVEL)
+    elif codec == 'raw':
+        body = data
+    else:
+        raise ValueError(f"Unknown cache codec: {codec}")
+
+    return PAYLOAD_MAGIC + codec.encode('ascii') + b"\n" + body
+
+
+def decode_payload(blob: bytes) -> bytes:
+    """
+    Decode bytes written by encode_payload (or legacy headerless bytes).
+
+    Args:
+        blob: Stored payload
+
+    Returns:
+        Raw payload
+
+    Raises:
+        ValueError: If the payload is corrupt or uses an unavailable codec
+    """
+    if not blob.startswith(PAYLOAD_MAGIC):
+        return blob
+
+    header_end = blob.index(b"\n")
+    codec = blob[len(PAYLOAD_MAGIC):header_end].decode('ascii')
+    body = blob[header_end + 1:]
+
+    if codec == 'raw':
+        return body
+    if codec == 'zlib':
+        try:
+            return zlib.decompress(body)
+        except zlib.error as e:
+            raise ValueError(f"Corrupt zlib cache payload: {e}")
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError("Cache entry is zstd-compressed but zstandard is not installed")
+        try:
+            return zstandard.ZstdDecompressor().decompress(body)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Corrupt zstd cache payload: {e}")
+
+    raise ValueError(f"Unknown cache codec: {codec}")
+
+
+def write_payload(path: Path, text: str, codec: Optional[str] = None) -> int:
+    """
+    Write text to a cache file with transparent compression.
+
+    Args:
+        path: Cache file path
+        text: Payload text
+        codec: Codec name (default: default_codec())
+
+    Returns:
+        Number of bytes written to disk
+    """
+    blob = encode_payload(text.encode('utf-8'), codec)
+    path.write_bytes(blob)
+    return len(blob)
+
+
+def read_payload(path: Path) -> str:
+    """
+    Read text from a cache file written by write_payload (or a legacy plain file).
+
+    Args:
+        path: Cache file path
+
+    Returns:
+        Payload text
+    """
+    return decode_payload(path.read_bytes()).decode('utf-8')
+
+
+def dumps_compact(data: Any) -> str:
+    """Serialize JSON without indentation for machine-only files."""
+    return json.dumps(data, separators=(',', ':'))
+
+
+__all__ = [
+    'available_codecs',
+    'default_codec',
+    'encode_payload',
+    'decode_payload',
+    'write_payload',
+    'read_payload',
+    'dumps_compact'
+]
@@ -17,6 +17,8 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from dataclasses import dataclass, asdict
 
+from .cache_codec import dumps_compact
+
 
 @dataclass
 class ChangeReport:
@@ -222,7 +224,7 @@ def capture_build_snapshot(working_directory: str) -> Dict[str, Any]:
     # Save snapshot
     snapshot_path = get_last_build_snapshot_path(working_directory)
     try:
-        snapshot_path.write_text(json.dumps(snapshot, indent=2))
+        snapshot_path.write_text(dumps_compact(snapshot))
         print(f"📸 Build snapshot captured: {len(file_hashes)} files")
         if git_sha:
             print(f"   Git SHA: {git_sha}")
@@ -8,6 +8,7 @@ Strategy:
 - Cache key: hash(normalized_task + project_type + tech_stack)
 - 7-day TTL (longer than local cache)
 - Semantic similarity matching for cache hits
+- Entries stored as compact JSON with transparent compression (cache_codec)
 """
 
 import json
@@ -16,6 +17,24 @@ from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timedelta
 
+try:
+    from ..metrics.cache_metrics import (
+        GLOBAL_SCOUT_NAMESPACE,
+        estimate_scout_time_saved,
+        lookup_started,
+        record_cache_event
+    )
+except ImportError:
+    # Imported as top-level 'incremental' package (tools/ on sys.path)
+    from metrics.cache_metrics import (
+        GLOBAL_SCOUT_NAMESPACE,
+        estimate_scout_time_saved,
+        lookup_started,
+        record_cache_event
+    )
+
+from .cache_codec import read_payload, write_payload, dumps_compact
+
 DEFAULT_GLOBAL_CACHE_TTL_HOURS = 168  # 7 days
 
 
@@ -146,22 +165,34 @@ def get_cached_scout_report_global(
     Returns:
         Scout report markdown if cache hit, None if cache miss
     """
+    started_at = lookup_started()
+
     # Generate cache key
     cache_key = generate_global_scout_key(task, project_type, tech_stack)
     cache_file = get_cache_entry_path(cache_key)
 
     # Check if valid
     if not is_cache_entry_valid(cache_file, ttl_hours):
+        event = 'stale' if cache_file.exists() else 'miss'
+        record_cache_event(GLOBAL_SCOUT_NAMESPACE, event, started_at)
         return None
 
     # Load cache entry
     try:
-        entry = json.loads(cache_file.read_text())
+        bytes_read = cache_file.stat().st_size
+        entry = json.loads(read_payload(cache_file))
+        scout_report = entry['scout_report']
 
         # Update access stats
         entry['accessed_count'] = entry.get('accessed_count', 0) + 1
         entry['last_accessed'] = datetime.now().isoformat()
-        cache_file.write_text(json.dumps(entry, indent=2))
+        write_payload(cache_file, dumps_compact(entry))
+
+        record_cache_event(
+            GLOBAL_SCOUT_NAMESPACE, 'hit', started_at,
+            bytes_read=bytes_read,
+            time_saved_seconds=estimate_scout_time_saved(entry.get('scout_duration_seconds'))
+        )
 
         # Log cache hit
         print(f"✅ Global Scout cache HIT! Reusing report from {entry.get('created_at', 'unknown')}")
@@ -171,10 +202,11 @@ def get_cached_scout_report_global(
         print(f"   Tech stack: {', '.join(entry.get('tech_stack', []))}")
         print(f"   Access count: {entry['accessed_count']}")
 
-        return entry['scout_report']
+        return scout_report
 
-    except (json.JSONDecodeError, OSError, KeyError) as e:
+    except (json.JSONDecodeError, OSError, KeyError, ValueError) as e:
         print(f"⚠️  Failed to read global Scout cache: {e}")
+        record_cache_event(GLOBAL_SCOUT_NAMESPACE, 'miss', started_at)
         return None
 
 
@@ -183,7 +215,8 @@ def save_scout_report_to_global_cache(
     project_type: str,
     tech_stack: List[str],
     scout_report: str,
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = None,
+    scout_duration_seconds: Optional[float] = None
 ) -> None:
     """
     Save Scout report to global cache.
@@ -194,6 +227,7 @@ def save_scout_report_to_global_cache(
         tech_stack: List of technologies
         scout_report: Scout report markdown content
         metadata: Optional metadata about the build
+        scout_duration_seconds: How long the Scout phase took (time a later hit saves)
     """
     # Generate cache key
     cache_key = generate_global_scout_key(task, project_type, tech_stack)
@@ -216,10 +250,16 @@ def save_scout_report_to_global_cache(
         "scout_report": scout_report,
         "metadata": metadata or {}
     }
+    if scout_duration_seconds is not None:
+        entry["scout_duration_seconds"] = scout_duration_seconds
 
     try:
         # Save entry
-        cache_file.write_text(json.dumps(entry, indent=2))
+        bytes_written = write_payload(cache_file, dumps_compact(entry))
+        record_cache_event(
+            GLOBAL_SCOUT_NAMESPACE, 'write',
+            bytes_written=bytes_written
+        )
 
         print(f"💾 Scout report saved to global cache")
         print(f"   Cache key: {cache_key}")
@@ -284,7 +324,7 @@ def find_similar_cached_reports(
             continue
 
         try:
-            entry = json.loads(cache_file.read_text())
+            entry = json.loads(read_payload(cache_file))
 
             # Check project type match
             if entry.get('project_type') != project_type:
@@ -309,7 +349,7 @@ def find_similar_cached_reports(
                     entry
                 ))
 
-        except (json.JSONDecodeError, KeyError):
+        except (json.JSONDecodeError, OSError, KeyError, ValueError):
             continue
 
     # Sort by similarity score (descending)
@@ -332,6 +372,7 @@ def clear_global_scout_cache() -> int:
         try:
             cache_file.unlink()
             deleted_count += 1
+            record_cache_event(GLOBAL_SCOUT_NAMESPACE, 'eviction')
         except OSError:
             pass
 
@@ -373,13 +414,13 @@ def get_global_scout_cache_stats() -> Dict[str, Any]:
 
             # Parse entry for stats
             try:
-                entry = json.loads(cache_file.read_text())
+                entry = json.loads(read_payload(cache_file))
                 proj_type = entry.get('project_type', 'unknown')
                 project_types[proj_type] = project_types.get(proj_type, 0) + 1
 
                 for tech in entry.get('tech_stack', []):
                     tech_counter[tech] = tech_counter.get(tech, 0) + 1
-            except (json.JSONDecodeError, OSError):
+            except (json.JSONDecodeError, OSError, ValueError):
                 pass
         else:
             expired += 1
@@ -19,6 +19,7 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 
 from .change_detector import ChangeReport
+from .cache_codec import dumps_compact
 
 
 @dataclass
@@ -236,7 +237,7 @@ def build_dependency_graph(
     # Save graph
     graph_path = get_build_graph_path(working_directory)
     try:
-        graph_path.write_text(json.dumps(graph.to_dict(), indent=2))
+        graph_path.write_text(dumps_compact(graph.to_dict()))
     except OSError as e:
         print(f"⚠️  Failed to save dependency graph: {e}")
 
@@ -18,6 +18,7 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 
 from .change_detector import ChangeReport
+from .cache_codec import dumps_compact
 
 
 @dataclass
@@ -170,7 +171,7 @@ def build_docs_manifest(working_directory: str) -> DocsManifest:
     # Save manifest
     manifest_path = get_docs_manifest_path(working_directory)
     try:
-        manifest_path.write_text(json.dumps(manifest.to_dict(), indent=2))
+        manifest_path.write_text(dumps_compact(manifest.to_dict()))
     except OSError as e:
         print(f"⚠️  Failed to save docs manifest: {e}")
 
@@ -19,6 +19,7 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 
 from .change_detector import ChangeReport
+from .cache_codec import dumps_compact
 
 
 @dataclass
@@ -215,7 +216,7 @@ def build_test_coverage_map(
     if coverage_map:
         map_path = get_test_coverage_map_path(working_directory)
         try:
-            map_path.write_text(json.dumps(coverage_map.to_dict(), indent=2))
+            map_path.write_text(dumps_compact(coverage_map.to_dict()))
             print(f"💾 Test coverage map saved: {map_path}")
         except OSError as e:
             print(f"⚠️  Failed to save coverage map: {e}")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Agent Update Coalescing for Context Foundry Livestream
+Batches agent progress reports from parallel builders
+
+Updates arriving within COALESCE_WINDOW seconds are merged per agent_id
+(later fields win), written with one UPSERT transaction, and then broadcast
+once per agent. With several builders reporting progress every few hundred
+milliseconds this turns a write per report into a write per window.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+# Seconds updates are collected before they are written and broadcast
+COALESCE_WINDOW = 0.25
+
+
+def merge_agent_update(pending: Optional[Dict[str, Any]], update: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge a newer update for the same agent into a pending one (metadata dicts are merged too)."""
+    if pending is None:
+        return dict(update)
+
+    merged = {**pending, **update}
+    if isinstance(pending.get('metadata'), dict) and isinstance(update.get('metadata'), dict):
+        merged['metadata'] = {**pending['metadata'], **update['metadata']}
+    return merged
+
+
+class AgentUpdateBuffer:
+    """Collects agent updates for a short window, then writes and broadcasts them together."""
+
+    def __init__(self, write: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+                 broadcast: Callable[[Dict[str, Any]], Any],
+                 window: float = COALESCE_WINDOW):
+        """
+        Initialize buffer.
+
+        Args:
+            write: Async callable persisting a list of merged updates (one transaction)
+            broadcast: Called with each merged update after it was written
+            window: Seconds to collect updates before writing
+        """
+        self.write = write
+        self.broadcast = broadcast
+        self.window = window
+
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._done: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.received = 0
+        self.written = 0
+        self.batches = 0
+
+    async def submit(self, updates: List[Dict[str, Any]]) -> int:
+        """
+        Queue updates and wait until the batch containing them is written.
+
+        Args:
+            updates: Agent update dicts (each with session_id and agent_id)
+
+        Returns:
+            Number of agents in the written batch
+
+        Raises:
+            Whatever the write raised (for every submitter in the batch)
+        """
+        for update in updates:
+            agent_id = update['agent_id']
+            self._pending[agent_id] = merge_agent_update(self._pending.get(agent_id), update)
+        self.received += len(updates)
+
+        if self._done is None:
+            self._done = asyncio.get_running_loop().create_future()
+            self._task = asyncio.create_task(self._flush_later())
+        return await asyncio.shield(self._done)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        await self.flush()
+
+    async def flush(self):
+        """Write and broadcast everything pending now"""
+        pending, done = self._pending, self._done
+        self._pending, self._done, self._task = {}, None, None
+        if done is None:
+            return
+
+        batch = list(pending.values())
+        try:
+            if batch:
+                await self.write(batch)
+        except Exception as e:
+            done.set_exception(e)
+            done.exception()  # retrieved here; submitters still see it
+            return
+
+        self.written += len(batch)
+        self.batches += 1
+        for update in batch:
+            try:
+                self.broadcast(update)
+            except Exception as e:
+                print(f"⚠️  Agent update broadcast failed: {e}")
+        done.set_result(len(batch))
+
+    async def close(self):
+        """Write anything still pending"""
+        task = self._task
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "received": self.received,
+            "written": self.written,
+            "batches": self.batches,
+            "pending": len(self._pending),
+        }
+
+
+__all__ = [
+    'AgentUpdateBuffer',
+    'merge_agent_update',
+]
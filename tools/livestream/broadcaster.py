@@ -5,17 +5,56 @@ Publishes real-time updates during execution
 """
 
 import json
-import requests
+import time
+import atexit
+import threading
+import urllib.request
+import urllib.error
+from collections import defaultdict, deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, Callable, List
-from collections import defaultdict
+from typing import Dict, Optional, Callable, Iterator, List
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+try:
+    from .replay import EventReplay
+except ImportError:
+    from replay import EventReplay
+
+
+# Events sent per HTTP request
+BATCH_SIZE = 100
+
+# Events waiting for the server before backpressure applies
+MAX_PENDING_EVENTS = 1000
+
+# Low-priority events are dropped once this many events are waiting
+LOW_PRIORITY_WATERMARK = MAX_PENDING_EVENTS // 2
+
+# Events that may be dropped under backpressure (the recording keeps them);
+# context_update is also coalesced: only the latest pending one is sent
+LOW_PRIORITY_EVENTS = {"log_line", "context_update"}
+COALESCED_EVENTS = {"context_update"}
+
+# HTTP timeout, and how long to stop sending after the server failed
+HTTP_TIMEOUT = 2.0
+SERVER_RETRY_SECONDS = 10.0
 
 
 class EventBroadcaster:
     """
     Broadcasts events to livestream server and records for replay.
 
+    emit() never waits on the network: events are appended to one open
+    recording handle and queued for a background thread that sends them in
+    batches over a keep-alive connection. When the server falls behind,
+    low-priority events (log_line, context_update) are coalesced or dropped
+    from the send queue; the recording always keeps every event.
+
     Usage:
         broadcaster = EventBroadcaster(session_id="my_session")
         broadcaster.emit("iteration_start", {"iteration": 5})
@@ -32,65 +71,316 @@ class EventBroadcaster:
         self.server_url = server_url
         self.enable_recording = enable_recording
 
-        # Event recording
+        # Event recording (one append handle, opened on first event)
         self.events_dir = Path(f"logs/events/{session_id}")
         if enable_recording:
             self.events_dir.mkdir(parents=True, exist_ok=True)
             self.events_file = self.events_dir / "events.jsonl"
+        self._events_handle = None
 
         # Subscribers (for in-process events)
         self.subscribers: Dict[str, List[Callable]] = defaultdict(list)
 
         # State tracking
         self.event_count = 0
+        self.sent_count = 0
+        self.dropped_count = 0
+
+        # Send pipeline: pending events drained by a background thread
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending: deque = deque()
+        self._agent_updates: Dict[str, Dict] = {}
+        self._in_flight = 0
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        self._session = None
+        self._batch_supported = True
+        self._agent_batch_supported = True
+        self._server_down_until = 0.0
 
     def emit(self, event_type: str, data: Optional[Dict] = None):
         """
-        Emit an event.
+        Emit an event (returns immediately; sending happens in the background).
 
         Args:
             event_type: Type of event (e.g., "iteration_start", "task_complete")
             data: Event data dictionary
         """
-        self.event_count += 1
+        with self._lock:
+            self.event_count += 1
 
-        event = {
-            "type": event_type,
-            "session_id": self.session_id,
-            "timestamp": datetime.now().isoformat(),
-            "sequence": self.event_count,
-            "data": data or {},
-        }
+            event = {
+                "type": event_type,
+                "session_id": self.session_id,
+                "timestamp": datetime.now().isoformat(),
+                "sequence": self.event_count,
+                "data": data or {},
+            }
 
-        # Record event
-        if self.enable_recording:
-            self._record_event(event)
+            # Record event
+            if self.enable_recording:
+                self._record_event(event)
 
-        # Broadcast to livestream server
-        self._broadcast_to_server(event)
+            # Queue for the livestream server
+            self._enqueue(event)
 
         # Notify local subscribers
         self._notify_subscribers(event_type, event)
 
     def _record_event(self, event: Dict):
-        """Record event to JSONL file for replay."""
+        """Record event to JSONL file for replay (caller holds the lock)."""
         try:
-            with open(self.events_file, "a") as f:
-                f.write(json.dumps(event) + "\n")
+            if self._events_handle is None:
+                self._events_handle = open(self.events_file, "a", buffering=64 * 1024)
+            self._events_handle.write(json.dumps(event) + "\n")
         except Exception as e:
             print(f"⚠️  Failed to record event: {e}")
 
-    def _broadcast_to_server(self, event: Dict):
-        """Broadcast event to livestream server via HTTP."""
+    def _enqueue(self, event: Dict):
+        """Queue an event for sending, applying backpressure (caller holds the lock)."""
+        if self._closed:
+            return
+
+        event_type = event["type"]
+        pending = self._pending
+
+        if event_type in COALESCED_EVENTS:
+            # Only the latest value matters: replace a pending one of the same type
+            # in place (it already holds a queue slot, so the watermark doesn't apply).
+            # The new value keeps the slot's sequence so the server still receives
+            # sequences in order; the recording keeps the event's own sequence.
+            for index in range(len(pending) - 1, -1, -1):
+                if pending[index]["type"] == event_type:
+                    pending[index] = {**event, "sequence": pending[index]["sequence"]}
+                    self.dropped_count += 1
+                    return
+
+        if event_type in LOW_PRIORITY_EVENTS and len(pending) >= LOW_PRIORITY_WATERMARK:
+            self.dropped_count += 1
+            return
+
+        if len(pending) >= MAX_PENDING_EVENTS:
+            # Make room: evict the oldest low-priority event, else the oldest event
+            for index, queued in enumerate(pending):
+                if queued["type"] in LOW_PRIORITY_EVENTS:
+                    del pending[index]
+                    break
+            else:
+                pending.popleft()
+            self.dropped_count += 1
+
+        pending.append(event)
+        self._start_worker()
+
+    def _start_worker(self):
+        """Start the sender thread on first use and wake it (caller holds the lock)."""
+        if self._worker is None:
+            self._worker = threading.Thread(
+                target=self._run, name=f"broadcaster-{self.session_id}", daemon=True
+            )
+            self._worker.start()
+            atexit.register(self.close)
+        self._wakeup.notify()
+
+    def agent_update(self, agent_id: str, **fields):
+        """
+        Report an agent's status (returns immediately).
+
+        Updates for the same agent that are still waiting to be sent are merged
+        (later fields win), and all pending agents go out in one request to
+        POST /api/agent-updates.
+
+        Args:
+            agent_id: Agent instance ID
+            **fields: Agent fields (agent_type, status, phase, progress_percent, tokens_used, ...)
+        """
+        with self._lock:
+            if self._closed:
+                return
+            update = self._agent_updates.get(agent_id)
+            if update is None:
+                update = self._agent_updates[agent_id] = {
+                    "session_id": self.session_id,
+                    "agent_id": agent_id,
+                }
+            update.update(fields)
+            self._start_worker()
+
+    def _run(self):
+        """Background thread: send pending events in batches until closed."""
+        while True:
+            with self._lock:
+                while not self._pending and not self._agent_updates and not self._closed:
+                    self._wakeup.wait()
+                if not self._pending and not self._agent_updates and self._closed:
+                    return
+
+                batch = [self._pending.popleft() for _ in range(min(BATCH_SIZE, len(self._pending)))]
+                agent_batch = list(self._agent_updates.values())
+                self._agent_updates = {}
+                self._in_flight = len(batch) + len(agent_batch)
+
+            sent = 0
+            try:
+                if batch:
+                    sent = self._broadcast_batch(batch)
+                if agent_batch:
+                    self._send_agent_updates(agent_batch)
+            finally:
+                with self._lock:
+                    self.sent_count += sent
+                    self.dropped_count += len(batch) - sent
+                    self._in_flight = 0
+                    if self._events_handle is not None:
+                        self._flush_recording()
+                    self._wakeup.notify_all()
+
+    def _flush_recording(self):
+        """Make recorded events visible to readers (caller holds the lock)."""
         try:
-            url = f"{self.server_url}/api/broadcast/{self.session_id}"
-            requests.post(url, json=event, timeout=1)
-        except requests.exceptions.ConnectionError:
-            # Server not running - that's okay
-            pass
+            self._events_handle.flush()
         except Exception as e:
-            # Don't let broadcast failures break execution
-            pass
+            print(f"⚠️  Failed to record event: {e}")
+
+    def _broadcast_batch(self, batch: List[Dict]) -> int:
+        """
+        Send a batch of events to the livestream server (one request when supported).
+
+        Returns:
+            Number of events delivered (the rest count as dropped)
+        """
+        if time.monotonic() < self._server_down_until:
+            # Server recently unreachable: don't stall on it (events stay recorded)
+            return 0
+
+        sent = 0
+        try:
+            if self._batch_supported:
+                status = self._post(f"/api/broadcast/{self.session_id}/batch", {"events": batch})
+                if status in (404, 405):
+                    # Older server without the batch endpoint
+                    self._batch_supported = False
+                else:
+                    self._check_status(status)
+                    return len(batch)
+
+            for event in batch:
+                self._check_status(self._post(f"/api/broadcast/{self.session_id}", event))
+                sent += 1
+        except Exception:
+            # Server not running or failing - that's okay, back off for a while
+            self._server_down_until = time.monotonic() + SERVER_RETRY_SECONDS
+
+        return sent
+
+    def _send_agent_updates(self, updates: List[Dict]) -> int:
+        """
+        Send merged agent updates (one request when the server supports batches).
+
+        Returns:
+            Number of agent updates delivered
+        """
+        if time.monotonic() < self._server_down_until:
+            return 0
+
+        sent = 0
+        try:
+            if self._agent_batch_supported:
+                status = self._post("/api/agent-updates", {"updates": updates})
+                if status in (404, 405):
+                    # Older server without the batch endpoint
+                    self._agent_batch_supported = False
+                else:
+                    self._check_status(status)
+                    return len(updates)
+
+            for update in updates:
+                self._check_status(self._post("/api/agent-update", update))
+                sent += 1
+        except Exception:
+            self._server_down_until = time.monotonic() + SERVER_RETRY_SECONDS
+
+        return sent
+
+    def _check_status(self, status: int):
+        if status >= 400:
+            raise IOError(f"Livestream server returned HTTP {status}")
+
+    def _post(self, path: str, payload) -> int:
+        """POST JSON to the livestream server over a keep-alive session; returns the HTTP status."""
+        url = f"{self.server_url}{path}"
+
+        if requests is not None:
+            if self._session is None:
+                self._session = requests.Session()
+            return self._session.post(url, json=payload, timeout=HTTP_TIMEOUT).status_code
+
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until queued events were sent (or dropped) and the recording is on disk.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if everything was flushed within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._pending or self._agent_updates or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._worker is None:
+                    break
+                self._wakeup.wait(remaining)
+            if self._events_handle is not None:
+                self._flush_recording()
+            return not self._pending and not self._agent_updates and not self._in_flight
+
+    def close(self, timeout: float = 5.0):
+        """Send remaining events, stop the background thread and close the recording."""
+        atexit.unregister(self.close)
+        self.flush(timeout)
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+            worker = self._worker
+        if worker is not None and worker is not threading.current_thread():
+            worker.join(timeout)
+
+        with self._lock:
+            if self._events_handle is not None:
+                try:
+                    self._events_handle.close()
+                except Exception:
+                    pass
+                self._events_handle = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def stats(self) -> Dict[str, int]:
+        """Emission counters"""
+        with self._lock:
+            return {
+                "emitted": self.event_count,
+                "sent": self.sent_count,
+                "dropped": self.dropped_count,
+                "pending": len(self._pending),
+                "agent_updates_pending": len(self._agent_updates),
+            }
 
     def _notify_subscribers(self, event_type: str, event: Dict):
         """Notify in-process subscribers."""
@@ -110,20 +400,22 @@ class EventBroadcaster:
         """
         self.subscribers[event_type].append(callback)
 
-    def load_events(self) -> List[Dict]:
-        """Load recorded events for replay."""
-        if not self.events_file.exists():
-            return []
+    def iter_events(self, since_sequence: Optional[int] = None,
+                    since_time: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Iterate recorded events from a sequence number or time (ISO format).
 
-        events = []
-        with open(self.events_file) as f:
-            for line in f:
-                try:
-                    events.append(json.loads(line))
-                except:
-                    pass
+        Seeks through the sparse index kept next to events.jsonl instead of
+        reading the file from the start.
+        """
+        if not self.enable_recording:
+            return iter(())
+        self.flush(timeout=0)
+        return EventReplay(self.events_file).iter_events(since_sequence, since_time)
 
-        return events
+    def load_events(self) -> List[Dict]:
+        """Load recorded events for replay."""
+        return list(self.iter_events())
 
     # Convenience methods for common events
 
@@ -211,6 +503,8 @@ def init_broadcaster(session_id: str, server_url: str = "http://localhost:8080")
         EventBroadcaster instance
     """
     global _broadcaster
+    if _broadcaster is not None:
+        _broadcaster.close()
     _broadcaster = EventBroadcaster(session_id, server_url)
     return _broadcaster
 
@@ -283,7 +577,9 @@ if __name__ == "__main__":
         summary={"tasks": len(tasks), "iterations": len(tasks) + 2}
     )
 
+    broadcaster.flush()
     print(f"\n📊 Total events emitted: {broadcaster.event_count}")
+    print(f"📡 Sent / dropped: {broadcaster.sent_count} / {broadcaster.dropped_count}")
 
     # Load and display events
     events = broadcaster.load_events()
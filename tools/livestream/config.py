@@ -26,6 +26,11 @@ MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:8000")
 # Range: 3-5 seconds for balanced freshness vs overhead
 POLL_INTERVAL_SECONDS = float(os.getenv("POLL_INTERVAL_SECONDS", "4"))
 
+# How often the metrics collector reconciles with MCP and rescans build files
+# (in seconds). File changes are collected as they happen; this sweep only
+# catches missed events and tasks without a watched directory.
+RECONCILE_INTERVAL_SECONDS = float(os.getenv("RECONCILE_INTERVAL_SECONDS", "60"))
+
 # WebSocket update interval (in seconds)
 # How often to push updates to connected clients
 WEBSOCKET_UPDATE_INTERVAL = 1.0
@@ -272,6 +277,7 @@ if __name__ == "__main__":
     print(f"Server: {LIVESTREAM_HOST}:{LIVESTREAM_PORT}")
     print(f"MCP Server: {MCP_SERVER_URL}")
     print(f"Poll Interval: {POLL_INTERVAL_SECONDS}s")
+    print(f"Reconcile Interval: {RECONCILE_INTERVAL_SECONDS}s")
     print(f"Database: {DATABASE_PATH}")
     print(f"Dark Mode: {DARK_MODE}")
     print(f"Token Budget: {TOKEN_BUDGET_LIMIT:,}")
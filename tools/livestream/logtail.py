@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Log Tailing for Context Foundry Livestream
+Reads the end of large session logs without reading the whole file
+
+tail_lines() reads fixed-size blocks backwards from the end of the file until
+it has seen enough newlines. TailCache keeps the last tail per file and
+revalidates it with (inode, size): an unchanged file is served from memory,
+and a file that only grew is updated by reading just the appended bytes.
+LogFollower polls a file for new complete lines, for streaming endpoints.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+# Bytes read per backwards step
+TAIL_BLOCK_SIZE = 64 * 1024
+
+# Files whose tails are kept in memory
+TAIL_CACHE_FILES = 32
+
+# Growth read incrementally before a cached tail is recomputed from the end
+MAX_APPEND_READ = 1024 * 1024
+
+# Bytes read per follow poll (the rest is picked up on the next poll)
+FOLLOW_MAX_READ = 256 * 1024
+
+
+def _decode(data: bytes) -> List[str]:
+    return [line.decode('utf-8', errors='replace') for line in data.splitlines(keepends=True)]
+
+
+def tail_lines(path: Path, count: int, size: Optional[int] = None,
+               block_size: int = TAIL_BLOCK_SIZE) -> Tuple[List[str], bool]:
+    """
+    Read the last lines of a file by seeking backwards from the end.
+
+    Args:
+        path: File to read
+        count: Number of lines wanted
+        size: Treat the file as this long (defaults to its current size)
+        block_size: Bytes read per step
+
+    Returns:
+        (lines with their line endings, True if the lines start at the
+        beginning of the file)
+    """
+    if count <= 0:
+        return [], False
+
+    with open(path, 'rb') as f:
+        if size is None:
+            size = f.seek(0, os.SEEK_END)
+        position = size
+        blocks: List[bytes] = []
+        newlines = 0
+
+        # count + 1 newlines guarantee the first returned line is complete
+        while position > 0 and newlines <= count:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            block = f.read(step)
+            blocks.append(block)
+            newlines += block.count(b'\n')
+
+    lines = _decode(b''.join(reversed(blocks)))
+    if position > 0 or len(lines) > count:
+        return lines[-count:], False
+    return lines, True
+
+
+class _TailEntry:
+    __slots__ = ('inode', 'size', 'lines', 'depth', 'complete')
+
+    def __init__(self, inode: int, size: int, lines: List[str], depth: int, complete: bool):
+        self.inode = inode
+        self.size = size
+        self.lines = lines
+        self.depth = depth          # lines requested (the tail holds at least this many, or the whole file)
+        self.complete = complete    # lines start at the beginning of the file
+
+
+class TailCache:
+    """Last lines of recently read files, revalidated by (inode, size)."""
+
+    def __init__(self, max_files: int = TAIL_CACHE_FILES):
+        self.max_files = max_files
+        self._entries: 'OrderedDict[str, _TailEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.appends = 0
+        self.misses = 0
+
+    def tail(self, path: Path, count: int) -> Tuple[List[str], int]:
+        """
+        Last lines of a file.
+
+        Args:
+            path: File to read
+            count: Number of lines wanted
+
+        Returns:
+            (lines with their line endings, file size the lines were read at)
+        """
+        key = str(path)
+        stat = os.stat(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.inode == stat.st_ino and (entry.complete or entry.depth >= count):
+                entry.depth = max(entry.depth, count)
+                if entry.size == stat.st_size:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return entry.lines[-count:], entry.size
+                if entry.size < stat.st_size <= entry.size + MAX_APPEND_READ:
+                    self.appends += 1
+                    self._append(path, entry, stat.st_size)
+                    self._entries.move_to_end(key)
+                    return entry.lines[-count:], entry.size
+
+            self.misses += 1
+            depth = max(count, entry.depth if entry is not None and entry.inode == stat.st_ino else 0)
+            lines, complete = tail_lines(path, depth, stat.st_size)
+            self._entries[key] = _TailEntry(stat.st_ino, stat.st_size, lines, depth, complete)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_files:
+                self._entries.popitem(last=False)
+            return lines[-count:], stat.st_size
+
+    def _append(self, path: Path, entry: _TailEntry, size: int):
+        """Extend a cached tail with the bytes appended since it was read"""
+        with open(path, 'rb') as f:
+            f.seek(entry.size)
+            data = f.read(size - entry.size)
+
+        new_lines = _decode(data)
+        lines = entry.lines
+        if lines and new_lines and not lines[-1].endswith('\n'):
+            # The previous last line was still being written
+            new_lines[0] = lines.pop() + new_lines[0]
+        lines.extend(new_lines)
+
+        if len(lines) > entry.depth:
+            del lines[:-entry.depth]
+            entry.complete = False
+        entry.size = size
+
+    def stats(self):
+        return {"files": len(self._entries), "hits": self.hits,
+                "appends": self.appends, "misses": self.misses}
+
+
+class LogFollower:
+    """Reads complete lines appended to a log file since the last poll."""
+
+    def __init__(self, path: Path, tail_cache: Optional[TailCache] = None):
+        self.path = Path(path)
+        self.tail_cache = tail_cache or TailCache(max_files=1)
+        self.inode: Optional[int] = None
+        self.offset = 0
+
+    def start(self, count: int) -> List[str]:
+        """
+        Position at the end of the file.
+
+        Args:
+            count: Number of existing lines to return first
+
+        Returns:
+            The last complete lines (a partial last line is left for poll())
+        """
+        lines, size = self.tail_cache.tail(self.path, max(count, 0) + 1)
+        self.inode = os.stat(self.path).st_ino
+        self.offset = size
+
+        if lines and not lines[-1].endswith('\n'):
+            self.offset -= len(lines.pop().encode('utf-8'))
+        return lines[-count:] if count > 0 else []
+
+    def poll(self, max_bytes: int = FOLLOW_MAX_READ) -> List[str]:
+        """
+        New complete lines since the last call.
+
+        A replaced (rotated) or truncated file is followed from its start.
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return []
+
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.inode = stat.st_ino
+            self.offset = 0
+        if stat.st_size == self.offset:
+            return []
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(min(stat.st_size - self.offset, max_bytes))
+
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            if len(data) < max_bytes:
+                return []  # line still being written
+            end = len(data)  # a single line longer than max_bytes: emit in pieces
+        self.offset += end
+        return _decode(data[:end])
+
+
+__all__ = [
+    'tail_lines',
+    'TailCache',
+    'LogFollower',
+]
@@ -1,27 +1,33 @@
 #!/usr/bin/env python3
 """
 Metrics Collector Service
-Background service that polls MCP server and stores metrics to SQLite
+Background service that collects build metrics and stores them to SQLite
+
+Collection is driven by file change events under .context-foundry/: each
+changed file is parsed on its own by the parser for its kind. A
+low-frequency reconciliation sweep (RECONCILE_INTERVAL_SECONDS) polls the
+MCP server as a backup for missed events and unwatched builds, and probes
+DISCOVERY_ROOTS for builds that were not launched through MCP.
 """
 
+import os
+import re
 import asyncio
-import time
 import json
-import threading
+import fnmatch
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import traceback
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler, FileModifiedEvent
 
 # Import our modules
 try:
     # Try relative imports first (when used as module)
     from .mcp_client import MCPClient, get_client
     from .metrics_db import MetricsDatabase, get_db
+    from ..watch_manager import ContextWatchManager
     from .config import (
-        POLL_INTERVAL_SECONDS,
+        RECONCILE_INTERVAL_SECONDS,
         TRACK_TOKEN_USAGE,
         TRACK_AGENT_PERFORMANCE,
         TRACK_DECISIONS,
@@ -31,10 +37,13 @@ try:
     )
 except ImportError:
     # Fall back to direct imports (when run as script)
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent.parent.parent))
     from mcp_client import MCPClient, get_client
     from metrics_db import MetricsDatabase, get_db
+    from tools.watch_manager import ContextWatchManager
     from config import (
-        POLL_INTERVAL_SECONDS,
+        RECONCILE_INTERVAL_SECONDS,
         TRACK_TOKEN_USAGE,
         TRACK_AGENT_PERFORMANCE,
         TRACK_DECISIONS,
@@ -44,86 +53,74 @@ except ImportError:
     )
 
 
-class PhaseFileWatcher(FileSystemEventHandler):
-    """
-    Watches .context-foundry/current-phase.json files for changes.
-    Triggers metrics collection when phase data updates.
-    """
-
-    def __init__(self, collector: 'MetricsCollector'):
-        super().__init__()
-        self.collector = collector
-        self.debounce_timers = {}  # Debounce rapid changes
-        self.debounce_delay = 0.1  # 100ms
-        self.loop = None  # asyncio event loop
-
-    def on_modified(self, event):
-        """Handle file modification events."""
-        if event.is_directory:
-            return
+# Files under .context-foundry/ that feed metrics, by kind
+CONTEXT_DIR_NAME = ".context-foundry"
+CONTEXT_FILE_PATTERNS = {
+    'phase': 'current-phase.json',
+    'build_log': 'build-log.md',
+    'test_results': 'test-results-iteration-*.md',
+    'feedback': 'feedback/build-feedback-*.json',
+    'patterns': 'patterns/common-issues.json',
+}
 
-        # Only watch current-phase.json files
-        if not event.src_path.endswith('current-phase.json'):
-            return
+# Directories whose projects (<root>/<project>/.context-foundry) are probed on
+# every sweep for builds not launched through MCP
+DISCOVERY_ROOTS = [Path.home() / "homelab"]
 
-        # Debounce rapid changes
-        file_path = event.src_path
+TEST_ITERATION_PATTERN = re.compile(r'test-results-iteration-(\d+)\.md$')
 
-        # Cancel existing timer for this file
-        if file_path in self.debounce_timers:
-            self.debounce_timers[file_path].cancel()
 
-        # Create new timer
-        timer = threading.Timer(
-            self.debounce_delay,
-            self._handle_phase_update,
-            args=[file_path]
-        )
-        timer.start()
-        self.debounce_timers[file_path] = timer
+def classify_context_file(file_path) -> Optional[Tuple[str, Path]]:
+    """
+    Identify a metrics file inside a .context-foundry directory.
 
-    def _handle_phase_update(self, file_path: str):
-        """Handle debounced phase file update."""
-        print(f"📂 Detected phase file change: {file_path}")
+    Args:
+        file_path: Path of a changed file
 
-        try:
-            # Read phase data
-            with open(file_path, 'r') as f:
-                phase_data = json.load(f)
-
-            # Extract session info
-            session_id = phase_data.get('session_id', 'unknown')
-
-            # Trigger metrics collection for this session
-            # Schedule coroutine in the collector's event loop
-            if self.collector.loop:
-                asyncio.run_coroutine_threadsafe(
-                    self.collector.collect_live_phase_update(session_id, phase_data),
-                    self.collector.loop
-                )
-        except Exception as e:
-            print(f"⚠️  Error handling phase update: {e}")
-            traceback.print_exc()
+    Returns:
+        (kind, .context-foundry directory), or None for any other file
+    """
+    path = Path(file_path)
+    for parent in path.parents:
+        if parent.name != CONTEXT_DIR_NAME:
+            continue
+
+        parts = path.relative_to(parent).parts
+        for kind, pattern in CONTEXT_FILE_PATTERNS.items():
+            pattern_parts = pattern.split('/')
+            if len(parts) == len(pattern_parts) and all(
+                    fnmatch.fnmatchcase(part, pattern_part)
+                    for part, pattern_part in zip(parts, pattern_parts)):
+                return kind, parent
+        return None
+    return None
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
 
 
 class MetricsCollector:
     """
     Background service that collects metrics from MCP tasks.
 
-    Runs in a loop:
-    1. Poll MCP for active tasks
-    2. Get detailed status for each task
-    3. Extract metrics
-    4. Store to SQLite
-    5. Sleep for poll_interval
-    6. Repeat
+    Event-driven:
+    1. The file watcher reports a changed .context-foundry/ file
+    2. Only the parser for that file runs, for the task owning the directory
+    3. A reconciliation sweep every reconcile_interval seconds polls MCP for
+       active tasks, updates their status, and re-parses only files whose
+       (mtime, size) changed since they were last parsed
     """
 
     def __init__(
         self,
         mcp_client: Optional[MCPClient] = None,
         db: Optional[MetricsDatabase] = None,
-        poll_interval: float = POLL_INTERVAL_SECONDS
+        reconcile_interval: float = RECONCILE_INTERVAL_SECONDS
     ):
         """
         Initialize metrics collector.
@@ -131,23 +128,28 @@ class MetricsCollector:
         Args:
             mcp_client: MCP client instance (or use singleton)
             db: Database instance (or use singleton)
-            poll_interval: How often to poll (in seconds)
+            reconcile_interval: Seconds between reconciliation sweeps
         """
         self.mcp_client = mcp_client or get_client()
         self.db = db or get_db()
-        self.poll_interval = poll_interval
+        self.reconcile_interval = reconcile_interval
         self.running = False
         self.tracked_tasks = set()  # Tasks we're currently tracking
-        self.observer = None  # Watchdog observer
-        self.watcher = None   # FileSystemEventHandler
-        self.watched_dirs = set()  # Directories being watched
+        self.tasks: Dict[str, Dict[str, Any]] = {}  # Latest known data per task
+        self.context_dirs: Dict[str, str] = {}  # .context-foundry dir -> task_id
+        self.file_signatures: Dict[str, Tuple[int, int]] = {}  # path -> (mtime_ns, size) last parsed
+        self.watch_manager: Optional[ContextWatchManager] = None  # Watches tracked builds' .context-foundry/
         self.loop = None  # asyncio event loop
 
+        self.events_handled = 0
+        self.files_parsed = 0
+        self.sweeps = 0
+
     async def start(self):
-        """Start the collector service with filesystem watching."""
+        """Start the collector service: file events plus a periodic reconciliation sweep."""
         self.running = True
         self.loop = asyncio.get_event_loop()  # Store event loop for cross-thread access
-        print(f"🔄 Metrics Collector started (poll interval: {self.poll_interval}s)")
+        print(f"🔄 Metrics Collector started (reconcile interval: {self.reconcile_interval}s)")
 
         # Start filesystem watcher
         self.start_file_watcher()
@@ -159,58 +161,57 @@ class MetricsCollector:
                 print(f"❌ Error in metrics collection: {e}")
                 traceback.print_exc()
 
-            # Sleep until next poll
-            await asyncio.sleep(self.poll_interval)
+            # Changes arrive as file events; sleep until the next sweep
+            await asyncio.sleep(self.reconcile_interval)
 
     def stop(self):
         """Stop the collector service."""
         self.running = False
 
-        if self.observer:
-            self.observer.stop()
-            self.observer.join()
+        if self.watch_manager:
+            self.watch_manager.stop()
 
         print("🛑 Metrics Collector stopped")
 
     def start_file_watcher(self):
-        """Start watching for .context-foundry/current-phase.json changes."""
-        self.watcher = PhaseFileWatcher(self)
-        self.watcher.loop = self.loop  # Give watcher access to event loop
-        self.observer = Observer()
-
-        # Watch common build directories
-        watch_paths = [
-            Path.home() / "homelab",  # Common build location
-            Path.cwd(),                # Current directory
-        ]
-
-        # Also watch checkpoints directory if it exists
-        checkpoints_dir = Path("checkpoints/ralph")
-        if checkpoints_dir.exists():
-            watch_paths.append(checkpoints_dir)
+        """
+        Watch the .context-foundry/ directories of tracked builds.
 
-        for watch_path in watch_paths:
-            if watch_path.exists():
-                try:
-                    self.observer.schedule(
-                        self.watcher,
-                        str(watch_path),
-                        recursive=True
-                    )
-                    self.watched_dirs.add(str(watch_path))
-                    print(f"👁️  Watching: {watch_path}")
-                except Exception as e:
-                    print(f"⚠️  Could not watch {watch_path}: {e}")
+        Only those directories (and their feedback/ and patterns/
+        subdirectories) are watched, non-recursively; builds are added and
+        removed as tasks are tracked and finalized.
+        """
+        self.watch_manager = ContextWatchManager(
+            self._on_context_file_change,
+            file_filter=lambda path: classify_context_file(path) is not None
+        )
 
-        self.observer.start()
-        print("✅ Filesystem watcher started")
+        self.discover_builds()
+        for context_dir in self.context_dirs:
+            self.watch_manager.add(context_dir)
+
+        if self.watch_manager.start():
+            print(f"✅ Filesystem watcher started ({self.watch_manager.watch_count} watches)")
+        else:
+            print("⚠️  watchdog not installed - collecting on reconciliation sweeps only")
+
+    def _on_context_file_change(self, path: Path):
+        """Debounced change from the watch manager (runs on its debounce scheduler thread)."""
+        if self.loop:
+            asyncio.run_coroutine_threadsafe(
+                self.handle_file_change(str(path)),
+                self.loop
+            )
 
     async def collect_metrics(self):
         """
-        Collect metrics from all active tasks.
+        Reconciliation sweep over all active tasks.
 
-        This is the main collection loop.
+        Catches tasks and file changes the watcher did not report; files whose
+        (mtime, size) are unchanged since they were last parsed are skipped.
         """
+        self.sweeps += 1
+
         # Get all active tasks from MCP
         tasks = self.mcp_client.list_active_tasks()
 
@@ -221,6 +222,7 @@ class MetricsCollector:
             if task_id not in self.tracked_tasks:
                 await self.initialize_task(task)
                 self.tracked_tasks.add(task_id)
+            self.track_task(task)
 
             # Update task status
             await self.update_task_status(task)
@@ -231,7 +233,142 @@ class MetricsCollector:
             # Check if task is complete
             if task.get("status") in ["completed", "failed", "timeout"]:
                 await self.finalize_task(task)
-                self.tracked_tasks.discard(task_id)
+                self.untrack_task(task_id)
+
+        # Watch directories of builds that have created .context-foundry/ since
+        if self.watch_manager:
+            self.discover_builds()
+            self.watch_manager.refresh()
+
+    def discover_builds(self) -> int:
+        """
+        Watch the .context-foundry directories of builds MCP does not report.
+
+        The current directory (which may itself be a build) and each project
+        under DISCOVERY_ROOTS are probed; a discovered build is tracked once
+        its current-phase.json changes.
+
+        Returns:
+            Number of directories newly registered with the watch manager
+        """
+        if not self.watch_manager:
+            return 0
+
+        candidates = []
+        for root in DISCOVERY_ROOTS:
+            candidates.extend(path for path in root.glob(f"*/{CONTEXT_DIR_NAME}") if path.is_dir())
+        # Registered even before it exists; refresh() watches it once it does
+        candidates.append(Path.cwd() / CONTEXT_DIR_NAME)
+
+        registered = set(self.watch_manager.directories())
+        added = 0
+        for context_dir in candidates:
+            if os.path.abspath(context_dir) not in registered:
+                self.watch_manager.add(context_dir)
+                added += 1
+        return added
+
+    def track_task(self, task: Dict[str, Any]):
+        """Remember a task's latest data and which .context-foundry directory belongs to it."""
+        task_id = task['task_id']
+        self.tasks[task_id] = {**self.tasks.get(task_id, {}), **task}
+
+        working_dir = task.get('working_directory', task.get('cwd'))
+        if working_dir:
+            context_dir = Path(working_dir) / CONTEXT_DIR_NAME
+            self.context_dirs[str(context_dir)] = task_id
+            if self.watch_manager:
+                self.watch_manager.add(context_dir)
+
+    def untrack_task(self, task_id: str):
+        """Forget a finished task (its files are no longer collected or watched)."""
+        self.tracked_tasks.discard(task_id)
+        self.tasks.pop(task_id, None)
+        for context_dir, owner in list(self.context_dirs.items()):
+            if owner == task_id:
+                del self.context_dirs[context_dir]
+                if self.watch_manager:
+                    self.watch_manager.remove(context_dir)
+                prefix = context_dir + os.sep
+                for path in [p for p in self.file_signatures if p.startswith(prefix)]:
+                    del self.file_signatures[path]
+
+    async def handle_file_change(self, file_path: str):
+        """
+        Collect metrics from one changed .context-foundry file.
+
+        Args:
+            file_path: Path reported by the file watcher
+        """
+        classified = classify_context_file(file_path)
+        if classified is None:
+            return
+        kind, context_dir = classified
+        path = Path(file_path)
+        self.events_handled += 1
+
+        try:
+            if kind == 'phase':
+                with open(path, 'r') as f:
+                    phase_data = json.load(f)
+                session_id = phase_data.get('session_id', 'unknown')
+                print(f"📂 Detected phase file change: {file_path}")
+                await self.collect_live_phase_update(session_id, phase_data, context_dir.parent)
+                return
+
+            task_id = self.context_dirs.get(str(context_dir))
+            if task_id is None:
+                # Not a tracked build yet: the phase file or the next sweep registers it
+                return
+
+            if kind == 'build_log':
+                if TRACK_AGENT_PERFORMANCE:
+                    await self.collect_agent_metrics(self.tasks[task_id])
+            else:
+                self.parse_context_file(task_id, kind, path)
+        except Exception as e:
+            print(f"⚠️  Error handling change to {file_path}: {e}")
+            traceback.print_exc()
+
+    def parse_context_file(self, task_id: str, kind: str, path: Path, force: bool = False) -> bool:
+        """
+        Run the parser for one metrics file if it changed since it was last parsed.
+
+        Args:
+            task_id: Task owning the file
+            kind: File kind (see CONTEXT_FILE_PATTERNS)
+            path: File to parse
+            force: Parse even if (mtime, size) are unchanged
+
+        Returns:
+            True if the file was parsed
+        """
+        signature = _file_signature(path)
+        if signature is None:
+            return False
+        key = str(path)
+        if not force and self.file_signatures.get(key) == signature:
+            return False
+
+        if kind == 'feedback':
+            if not TRACK_DECISIONS:
+                return False
+            self.record_feedback_file(task_id, path)
+        elif kind == 'test_results':
+            if not TRACK_TEST_ITERATIONS:
+                return False
+            match = TEST_ITERATION_PATTERN.search(path.name)
+            self.record_test_results(task_id, int(match.group(1)), path)
+        elif kind == 'patterns':
+            if not TRACK_PATTERN_EFFECTIVENESS:
+                return False
+            self.record_patterns(task_id, path)
+        else:
+            return False
+
+        self.file_signatures[key] = signature
+        self.files_parsed += 1
+        return True
 
     async def initialize_task(self, task: Dict[str, Any]):
         """
@@ -283,13 +420,15 @@ class MetricsCollector:
         except Exception as e:
             print(f"⚠️  Error updating task {task['task_id']}: {e}")
 
-    async def collect_live_phase_update(self, session_id: str, phase_data: Dict):
+    async def collect_live_phase_update(self, session_id: str, phase_data: Dict,
+                                        working_directory: Optional[Path] = None):
         """
         Collect metrics from live phase update (triggered by file watcher).
 
         Args:
             session_id: Session ID from phase data
             phase_data: Parsed current-phase.json content
+            working_directory: Build directory containing the phase file (if known)
         """
         print(f"📊 Collecting metrics for live session: {session_id}")
 
@@ -312,21 +451,37 @@ class MetricsCollector:
             Path.cwd()  # Current directory might be the project itself
         ]
 
-        for potential_path in potential_paths:
-            if (potential_path / ".context-foundry" / "current-phase.json").exists():
-                task['working_directory'] = str(potential_path)
-                break
+        if working_directory is not None:
+            task['working_directory'] = str(working_directory)
+        else:
+            for potential_path in potential_paths:
+                if (potential_path / ".context-foundry" / "current-phase.json").exists():
+                    task['working_directory'] = str(potential_path)
+                    break
 
-        # Initialize task if new
-        if session_id not in self.tracked_tasks:
+        # Initialize task if new (and parse the build files written so far)
+        is_new = session_id not in self.tracked_tasks
+        if is_new:
             await self.initialize_task(task)
             self.tracked_tasks.add(session_id)
+        self.track_task(task)
+
+        # A finished build is collected one last time and no longer watched
+        if task['status'] in ['completed', 'failed', 'timeout']:
+            await self.finalize_task(task)
+            self.untrack_task(session_id)
+            return
 
         # Update task status
         await self.update_task_status(task)
 
-        # Collect metrics
-        await self.collect_task_metrics(task)
+        # A phase change moves token usage and agent activity; other files have their own events
+        if TRACK_TOKEN_USAGE:
+            await self.collect_token_metrics(task)
+        if TRACK_AGENT_PERFORMANCE:
+            await self.collect_agent_metrics(task)
+        if is_new:
+            self.scan_context_files(session_id, task)
 
     async def collect_task_metrics(self, task: Dict[str, Any]):
         """
@@ -345,17 +500,37 @@ class MetricsCollector:
         if TRACK_AGENT_PERFORMANCE:
             await self.collect_agent_metrics(task)
 
-        # Collect decision data
-        if TRACK_DECISIONS:
-            await self.collect_decision_metrics(task)
+        # Decisions, test iterations and patterns: re-parse only changed files
+        self.scan_context_files(task_id, task)
+
+    def scan_context_files(self, task_id: str, task: Dict[str, Any], force: bool = False) -> int:
+        """
+        Parse a task's feedback, test-result and pattern files that changed.
+
+        Args:
+            task_id: Task ID
+            task: Task data (needs working_directory)
+            force: Parse every file, changed or not
 
-        # Collect test iterations
-        if TRACK_TEST_ITERATIONS:
-            await self.collect_test_metrics(task)
+        Returns:
+            Number of files parsed
+        """
+        working_dir = task.get('working_directory', task.get('cwd'))
+        if not working_dir:
+            return 0
 
-        # Collect pattern effectiveness
-        if TRACK_PATTERN_EFFECTIVENESS:
-            await self.collect_pattern_metrics(task)
+        context_dir = Path(working_dir) / CONTEXT_DIR_NAME
+        if not context_dir.exists():
+            return 0
+
+        parsed = 0
+        for kind in ('feedback', 'test_results', 'patterns'):
+            for path in sorted(context_dir.glob(CONTEXT_FILE_PATTERNS[kind])):
+                try:
+                    parsed += self.parse_context_file(task_id, kind, path, force=force)
+                except Exception as e:
+                    print(f"⚠️  Error reading {path}: {e}")
+        return parsed
 
     async def collect_token_metrics(self, task: Dict[str, Any]):
         """
@@ -370,17 +545,9 @@ class MetricsCollector:
             # Get token estimate
             token_data = self.mcp_client.estimate_token_usage(task_id)
 
-            # Get real latency from metrics DB
-            avg_latency_ms = 0
-            try:
-                from tools.metrics.metrics_db import get_metrics_db
-
-                metrics_db = get_metrics_db()
-                phase_stats = metrics_db.get_phase_totals(task.get('current_phase', 'Unknown'), days=7)
-                avg_latency_ms = phase_stats.get('avg_latency_ms', 0)
-            except ImportError:
-                # Metrics module not available
-                pass
+            # Get real latency from the token metrics (same database)
+            phase_stats = self.db.get_phase_totals(task.get('current_phase', 'Unknown'), days=7)
+            avg_latency_ms = phase_stats.get('avg_latency_ms', 0)
 
             # Store metric
             self.db.add_metric(task_id, {
@@ -439,145 +606,100 @@ class MetricsCollector:
         except Exception as e:
             print(f"⚠️  Error collecting agent metrics: {e}")
 
-    async def collect_decision_metrics(self, task: Dict[str, Any]):
+    def record_feedback_file(self, task_id: str, feedback_file: Path):
         """
-        Collect autonomous decision metrics.
+        Record autonomous decisions from one build-feedback-*.json file.
 
         Args:
-            task: Task data
+            task_id: Task ID
+            feedback_file: Feedback file
         """
-        try:
-            task_id = task['task_id']
-            working_dir = task.get('working_directory', task.get('cwd'))
-
-            if not working_dir:
-                return
-
-            # Read decisions from feedback files
-            feedback_dir = Path(working_dir) / ".context-foundry" / "feedback"
-            if not feedback_dir.exists():
-                return
-
-            for feedback_file in feedback_dir.glob("build-feedback-*.json"):
-                try:
-                    with open(feedback_file, 'r') as f:
-                        feedback = json.load(f)
-
-                    # Process decisions from feedback
-                    for issue in feedback.get("issues_found", []):
-                        # Example decision record
-                        self.db.add_decision(task_id, {
-                            'timestamp': feedback.get('timestamp', datetime.now().isoformat()),
-                            'phase': issue.get('detected_in_phase', 'Unknown'),
-                            'decision_type': 'issue_resolution',
-                            'decision_description': issue.get('issue', ''),
-                            'quality_rating': 3,  # Default - would need analysis
-                            'difficulty_rating': 3,
-                            'is_regrettable': False,
-                            'used_lessons_learned': bool(issue.get('applies_to_phases')),
-                            'pattern_ids': [issue.get('id', '')],
-                            'reasoning': issue.get('solution', ''),
-                            'outcome': 'applied'
-                        })
-                except Exception as e:
-                    print(f"⚠️  Error reading feedback file {feedback_file}: {e}")
-        except Exception as e:
-            print(f"⚠️  Error collecting decision metrics: {e}")
+        with open(feedback_file, 'r') as f:
+            feedback = json.load(f)
+
+        # A rewritten file keeps its earlier issues: record only new ones
+        recorded = {d.get('decision_description') for d in self.db.get_decisions(task_id)}
+
+        # Process decisions from feedback
+        for issue in feedback.get("issues_found", []):
+            if issue.get('issue', '') in recorded:
+                continue
+
+            # Example decision record
+            self.db.add_decision(task_id, {
+                'timestamp': feedback.get('timestamp', datetime.now().isoformat()),
+                'phase': issue.get('detected_in_phase', 'Unknown'),
+                'decision_type': 'issue_resolution',
+                'decision_description': issue.get('issue', ''),
+                'quality_rating': 3,  # Default - would need analysis
+                'difficulty_rating': 3,
+                'is_regrettable': False,
+                'used_lessons_learned': bool(issue.get('applies_to_phases')),
+                'pattern_ids': [issue.get('id', '')],
+                'reasoning': issue.get('solution', ''),
+                'outcome': 'applied'
+            })
 
-    async def collect_test_metrics(self, task: Dict[str, Any]):
+    def record_test_results(self, task_id: str, iteration: int, test_file: Path):
         """
-        Collect test iteration metrics.
+        Record one test iteration from test-results-iteration-N.md.
 
         Args:
-            task: Task data
+            task_id: Task ID
+            iteration: Iteration number N
+            test_file: Test results file
         """
-        try:
-            task_id = task['task_id']
-            working_dir = task.get('working_directory', task.get('cwd'))
-
-            if not working_dir:
-                return
-
-            # Check test iteration count
-            context_dir = Path(working_dir) / ".context-foundry"
-            if not context_dir.exists():
-                return
-
-            # Read test iteration files
-            for i in range(1, 10):  # Check up to 10 iterations
-                test_file = context_dir / f"test-results-iteration-{i}.md"
-                if not test_file.exists():
-                    break
-
-                # Check if we've already recorded this iteration
-                existing = self.db.get_test_iterations(task_id)
-                if any(t.get('iteration_number') == i for t in existing):
-                    continue
-
-                # Read test results (simplified)
-                with open(test_file, 'r') as f:
-                    content = f.read()
-
-                # Parse test results (basic parsing)
-                tests_passed = content.count('✓') + content.count('PASS')
-                tests_failed = content.count('✗') + content.count('FAIL')
-
-                self.db.add_test_iteration(task_id, {
-                    'iteration_number': i,
-                    'timestamp': datetime.now().isoformat(),
-                    'tests_run': tests_passed + tests_failed,
-                    'tests_passed': tests_passed,
-                    'tests_failed': tests_failed,
-                    'test_output': content[:500],  # First 500 chars
-                    'fixes_applied': [],
-                    'duration_seconds': 0
-                })
-        except Exception as e:
-            print(f"⚠️  Error collecting test metrics: {e}")
+        # Check if we've already recorded this iteration
+        existing = self.db.get_test_iterations(task_id)
+        if any(t.get('iteration_number') == iteration for t in existing):
+            return
 
-    async def collect_pattern_metrics(self, task: Dict[str, Any]):
+        # Read test results (simplified)
+        with open(test_file, 'r') as f:
+            content = f.read()
+
+        # Parse test results (basic parsing)
+        tests_passed = content.count('✓') + content.count('PASS')
+        tests_failed = content.count('✗') + content.count('FAIL')
+
+        self.db.add_test_iteration(task_id, {
+            'iteration_number': iteration,
+            'timestamp': datetime.now().isoformat(),
+            'tests_run': tests_passed + tests_failed,
+            'tests_passed': tests_passed,
+            'tests_failed': tests_failed,
+            'test_output': content[:500],  # First 500 chars
+            'fixes_applied': [],
+            'duration_seconds': 0
+        })
+
+    def record_patterns(self, task_id: str, common_issues_file: Path):
         """
-        Collect pattern effectiveness metrics.
+        Record pattern effectiveness from patterns/common-issues.json.
 
         Args:
-            task: Task data
+            task_id: Task ID
+            common_issues_file: Patterns file
         """
-        try:
-            task_id = task['task_id']
-            working_dir = task.get('working_directory', task.get('cwd'))
-
-            if not working_dir:
-                return
-
-            # Read pattern data
-            patterns_dir = Path(working_dir) / ".context-foundry" / "patterns"
-            if not patterns_dir.exists():
-                return
-
-            common_issues_file = patterns_dir / "common-issues.json"
-            if common_issues_file.exists():
-                with open(common_issues_file, 'r') as f:
-                    patterns_data = json.load(f)
-
-                for pattern in patterns_data.get("patterns", []):
-                    # Check if we've already recorded this pattern
-                    existing = self.db.get_pattern_effectiveness(task_id)
-                    if any(
-                        p.get('pattern_id') == pattern.get('pattern_id')
-                        for p in existing
-                    ):
-                        continue
-
-                    self.db.add_pattern_effectiveness(task_id, {
-                        'pattern_id': pattern.get('pattern_id', ''),
-                        'pattern_type': 'common-issue',
-                        'was_applied': pattern.get('auto_apply', False),
-                        'prevented_issue': True,  # Assume patterns prevent issues
-                        'issue_description': pattern.get('issue', ''),
-                        'timestamp': datetime.now().isoformat()
-                    })
-        except Exception as e:
-            print(f"⚠️  Error collecting pattern metrics: {e}")
+        with open(common_issues_file, 'r') as f:
+            patterns_data = json.load(f)
+
+        # Check which patterns we've already recorded
+        recorded = {p.get('pattern_id') for p in self.db.get_pattern_effectiveness(task_id)}
+
+        for pattern in patterns_data.get("patterns", []):
+            if pattern.get('pattern_id') in recorded:
+                continue
+            recorded.add(pattern.get('pattern_id'))
+
+            self.db.add_pattern_effectiveness(task_id, {
+                'pattern_id': pattern.get('pattern_id', ''),
+                'pattern_type': 'common-issue',
+                'was_applied': pattern.get('auto_apply', False),
+                'prevented_issue': True,  # Assume patterns prevent issues
+                'issue_description': pattern.get('issue', ''),
+                'timestamp': datetime.now().isoformat()
+            })
 
     async def finalize_task(self, task: Dict[str, Any]):
         """
@@ -605,7 +727,7 @@ async def run_collector_service():
     collector = MetricsCollector()
 
     print("🚀 Starting Metrics Collector Service")
-    print(f"📊 Poll Interval: {POLL_INTERVAL_SECONDS}s")
+    print(f"📊 Reconcile Interval: {RECONCILE_INTERVAL_SECONDS}s (file changes are collected as they happen)")
     print(f"💾 Database: {get_db().db_path}")
     print("Press Ctrl+C to stop\n")
 
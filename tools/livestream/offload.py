@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Blocking Work Offload for Context Foundry Livestream
+Runs file I/O and SQLite queries off the asyncio event loop
+
+Each BlockingPool is a bounded thread pool. Calls made with a key are
+coalesced: while a call for that key is in flight, identical requests await
+the same result instead of starting another computation. The server keeps
+separate pools for interactive reads and for historical analytics, so a slow
+analytics query can only occupy analytics workers and the dashboard stays
+responsive.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class BlockingPool:
+    """Bounded thread pool with per-key request coalescing."""
+
+    def __init__(self, name: str, max_workers: int):
+        """
+        Initialize pool (threads start on first use).
+
+        Args:
+            name: Thread name prefix (shows up in stack dumps)
+            max_workers: Maximum concurrent blocking calls
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.running = 0
+
+    async def run(self, fn: Callable[..., Any], *args, key: Optional[Hashable] = None, **kwargs) -> Any:
+        """
+        Run a blocking callable in the pool and await its result.
+
+        Args:
+            fn: Blocking callable
+            *args: Positional arguments for fn
+            key: Coalescing key; concurrent calls with the same key share one
+                computation (leave unset for writes and non-idempotent work)
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            fn's result (shared between coalesced callers: treat it as read-only)
+        """
+        if key is not None:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                # Shielded: one caller disconnecting must not cancel the others
+                return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        self.submitted += 1
+        self.running += 1
+        future = loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        future.add_done_callback(functools.partial(self._finished, key))
+
+        if key is None:
+            return await future
+
+        self._in_flight[key] = future
+        return await asyncio.shield(future)
+
+    def _finished(self, key: Optional[Hashable], future: asyncio.Future):
+        self.running -= 1
+        if key is not None and self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            # Mark exceptions retrieved when every awaiter has gone away
+            future.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Pool size, running calls, and submitted vs. coalesced request counts"""
+        return {
+            "workers": self.max_workers,
+            "running": self.running,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+        }
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work (running calls finish in their threads)"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+__all__ = [
+    'BlockingPool',
+]
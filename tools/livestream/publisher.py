@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+"""
+Livestream Session Publisher
+Server-side fan-out of session status to WebSocket subscribers
+
+Each session has one SessionPublisher. Status is computed once per change
+(phase update, broadcast, or a watched file changing) and serialized once;
+the same text frame is queued to every subscriber. Each subscriber has a
+bounded send queue drained by its own sender, so one slow viewer never
+delays the others: when its queue overflows it is dropped and reconnects.
+
+Protocol (server -> client):
+- {"type": "status", "epoch": e, "seq": n, "data": {...}}: full status snapshot
+- {"type": "patch", "epoch": e, "seq": n, "base": n - 1, "ops": [...]}: JSON
+  Patch (RFC 6902 add/replace/remove) turning status base into status seq;
+  only sent to clients that connect with ?protocol=patch
+- Events ({"type": "phase_update" | "agent_progress" | "log" | ...}) as before
+
+Sequence numbers are only meaningful within an epoch: each publisher (created
+when a session gains its first viewer, and again after a server restart)
+picks a new epoch and counts from 1.
+
+Protocol (client -> server):
+- {"type": "resync"}: send a full snapshot now (e.g. after a sequence gap)
+- {"type": "resync", "epoch": e, "seq": n}: replay the patches after n if e
+  is the current epoch and they are still held, otherwise send a snapshot
+  (also available as ?epoch=e&since=n when reconnecting)
+"""
+
+import sys
+import json
+import time
+import uuid
+import asyncio
+import inspect
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+# Frames buffered per subscriber before it is considered a slow consumer
+SUBSCRIBER_QUEUE_SIZE = 64
+
+# Seconds between watcher passes (cheap stat-based change checks)
+WATCH_INTERVAL = 1.0
+
+# Seconds after which status is recomputed even without a detected change
+# (keeps elapsed/remaining time fresh on open dashboards)
+REFRESH_INTERVAL = 5.0
+
+# WebSocket close code sent to dropped slow consumers ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Patch clients get a full snapshot after this many patches or seconds
+SNAPSHOT_EVERY = 50
+SNAPSHOT_INTERVAL = 300.0
+
+# Recent patches kept for replay to reconnecting clients
+PATCH_HISTORY = 64
+
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Serialize a message once for all subscribers (same format as send_json)"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def _pointer(path: str, key) -> str:
+    """Append a key to a JSON Pointer (RFC 6901 escaping)"""
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def diff_documents(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """
+    Compute JSON Patch operations turning old into new.
+
+    Objects are diffed key by key; a list that only grew at the end becomes
+    "add" operations at "/-"; any other changed value is replaced whole.
+
+    Args:
+        old: Previous document
+        new: Current document
+        path: JSON Pointer of the documents (root: "")
+
+    Returns:
+        List of patch operations (empty when equal)
+    """
+    if old == new:
+        return []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": _pointer(path, key)})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+            else:
+                ops.extend(diff_documents(old[key], value, _pointer(path, key)))
+        return ops
+
+    if (isinstance(old, list) and isinstance(new, list)
+            and len(new) > len(old) and new[:len(old)] == old):
+        return [{"op": "add", "path": f"{path}/-", "value": value} for value in new[len(old):]]
+
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(document: Any, ops: List[Dict[str, Any]]) -> Any:
+    """
+    Apply operations produced by diff_documents (in place where possible).
+
+    Args:
+        document: Document at the patch's base sequence
+        ops: Patch operations
+
+    Returns:
+        Patched document
+    """
+    for op in ops:
+        if op["path"] == "":
+            document = op["value"]
+            continue
+
+        *parents, last = [
+            part.replace('~1', '/').replace('~0', '~')
+            for part in op["path"].split('/')[1:]
+        ]
+        target = document
+        for part in parents:
+            target = target[int(part)] if isinstance(target, list) else target[part]
+
+        if isinstance(target, list):
+            if op["op"] == "remove":
+                del target[int(last)]
+            elif last == '-':
+                target.append(op["value"])
+            elif op["op"] == "add":
+                target.insert(int(last), op["value"])
+            else:
+                target[int(last)] = op["value"]
+        elif op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = op["value"]
+
+    return document
+
+
+class Subscriber:
+    """One WebSocket client with a bounded queue of pre-serialized frames."""
+
+    def __init__(self, websocket, max_queue: int = SUBSCRIBER_QUEUE_SIZE,
+                 patches: bool = False):
+        self.websocket = websocket
+        self.patches = patches
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = False
+        self.closed = False
+
+    def offer(self, frame: str) -> bool:
+        """
+        Queue a frame without waiting.
+
+        Returns:
+            False if the queue is full (the subscriber is too slow)
+        """
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self, dropped: bool = False):
+        """Stop the sender after it flushes already-queued frames (or at once if dropped)"""
+        if self.closed:
+            return
+        self.closed = True
+        self.dropped = dropped
+        if dropped:
+            # Discard the backlog; the client resynchronizes on reconnect
+            while not self.queue.empty():
+                self.queue.get_nowait()
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    async def run(self):
+        """Send queued frames until closed or the connection fails"""
+        try:
+            while True:
+                frame = await self.queue.get()
+                if frame is None:
+                    break
+                await self.websocket.send_text(frame)
+        except Exception:
+            # Disconnected client: the caller unsubscribes
+            pass
+
+        if self.dropped:
+            try:
+                await self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+            except Exception:
+                pass
+
+
+class SessionPublisher:
+    """Computes one session's status once per change and fans it out."""
+
+    def __init__(self, session_id: str, status_fn: Callable[[str], Any],
+                 signature_fn: Optional[Callable[[str], Any]] = None):
+        """
+        Initialize session publisher.
+
+        Args:
+            session_id: Session identifier
+            status_fn: Returns the status dict for a session (may be async)
+            signature_fn: Returns a cheap value that changes when status may
+                have changed (e.g. file mtimes); None disables watching
+        """
+        self.session_id = session_id
+        self.status_fn = status_fn
+        self.signature_fn = signature_fn
+
+        self.subscribers: Set[Subscriber] = set()
+        self.epoch = uuid.uuid4().hex[:12]
+        self.status: Optional[Dict[str, Any]] = None
+        self.status_text: Optional[str] = None
+        self.status_frame: Optional[str] = None
+        self.seq = 0
+        self.last_refresh = 0.0
+        self.last_signature = None
+        self.completed = False
+        self.dropped_count = 0
+
+        # Patch stream state: (seq, frame) of recent patches, snapshot cadence
+        self.patch_history = deque(maxlen=PATCH_HISTORY)
+        self.patches_since_snapshot = 0
+        self.last_snapshot = 0.0
+
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        # Concurrent first subscribers share one initial status computation
+        self._initial_lock = asyncio.Lock()
+        # Hub subscribes still waiting on the initial status
+        self.pending = 0
+
+    async def _compute_status(self) -> Dict[str, Any]:
+        status = self.status_fn(self.session_id)
+        if inspect.isawaitable(status):
+            status = await status
+        return status
+
+    def _set_status(self, status: Dict[str, Any], text: str):
+        """Record a new status version and build its snapshot frame"""
+        self.seq += 1
+        self.status = status
+        self.status_text = text
+        self.status_frame = f'{{"type":"status","epoch":"{self.epoch}","seq":{self.seq},"data":{text}}}'
+
+    async def refresh(self) -> bool:
+        """
+        Recompute status and publish it if it changed.
+
+        Legacy subscribers get the full snapshot; patch subscribers get a patch
+        against the previous sequence (or the snapshot, periodically or when
+        the patch would not be smaller).
+
+        Returns:
+            True if a new status was published
+        """
+        status = await self._compute_status()
+        now = time.monotonic()
+        self.last_refresh = now
+
+        text = encode_message(status)
+        if text == self.status_text:
+            return False
+
+        previous = self.status
+        self._set_status(status, text)
+
+        patch_frame = None
+        if previous is not None:
+            patch_frame = encode_message({
+                "type": "patch",
+                "epoch": self.epoch,
+                "seq": self.seq,
+                "base": self.seq - 1,
+                "ops": diff_documents(previous, status)
+            })
+            self.patch_history.append((self.seq, patch_frame))
+
+        snapshot_due = (
+            patch_frame is None
+            or len(patch_frame) >= len(self.status_frame)
+            or self.patches_since_snapshot >= SNAPSHOT_EVERY
+            or now - self.last_snapshot >= SNAPSHOT_INTERVAL
+        )
+        if snapshot_due:
+            self.patches_since_snapshot = 0
+            self.last_snapshot = now
+            self._fan_out(self.status_frame, self.status_frame)
+        else:
+            self.patches_since_snapshot += 1
+            self._fan_out(self.status_frame, patch_frame)
+
+        if status.get("is_complete") and not self.completed:
+            self.completed = True
+            self.publish({"type": "complete", "message": "Session completed!"})
+            for subscriber in list(self.subscribers):
+                subscriber.close()
+
+        return True
+
+    def notify(self):
+        """Schedule a status refresh (calls made before it runs coalesce into one)"""
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._refresh_pending())
+
+    async def _refresh_pending(self):
+        while self._dirty:
+            self._dirty = False
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Error refreshing session {self.session_id}: {e}", file=sys.stderr)
+
+    def check(self, now: Optional[float] = None):
+        """Watcher pass: refresh when the signature changed or the status is stale"""
+        now = time.monotonic() if now is None else now
+
+        if self.signature_fn is not None:
+            try:
+                signature = self.signature_fn(self.session_id)
+            except Exception:
+                signature = None
+            if signature != self.last_signature:
+                self.last_signature = signature
+                self.notify()
+                return
+
+        if now - self.last_refresh >= REFRESH_INTERVAL:
+            self.notify()
+
+    def publish(self, message: Dict[str, Any], legacy_only: bool = False) -> int:
+        """
+        Serialize an event once and queue it to every subscriber.
+
+        Args:
+            message: Event to send
+            legacy_only: Skip patch subscribers (the event only duplicates
+                what the next status patch carries)
+
+        Returns:
+            Number of subscribers the event was queued to
+        """
+        frame = encode_message(message)
+        return self._fan_out(frame, None if legacy_only else frame)
+
+    def _fan_out(self, frame: Optional[str], patch_frame: Optional[str]) -> int:
+        """Queue frame to legacy subscribers and patch_frame to patch subscribers (None: skip)"""
+        delivered = 0
+        for subscriber in list(self.subscribers):
+            selected = patch_frame if subscriber.patches else frame
+            if selected is None:
+                continue
+            if subscriber.offer(selected):
+                delivered += 1
+            elif not subscriber.closed:
+                # Slow consumer: drop it rather than buffering without bound
+                self.dropped_count += 1
+                subscriber.close(dropped=True)
+                self.subscribers.discard(subscriber)
+        return delivered
+
+    def resync(self, subscriber: Subscriber, since: Optional[int] = None,
+               epoch: Optional[str] = None) -> int:
+        """
+        Bring a subscriber up to date.
+
+        Replays the patches after since when the client's sequence is from
+        this publisher's epoch and all of them are still held, otherwise
+        queues a full snapshot.
+
+        Args:
+            subscriber: Subscriber to resynchronize
+            since: Last sequence the client applied (None: always snapshot)
+            epoch: Epoch of that sequence (other than the current one: snapshot)
+
+        Returns:
+            Number of frames queued
+        """
+        if self.status_frame is None:
+            return 0
+
+        if (subscriber.patches and since is not None and epoch == self.epoch
+                and 0 < since <= self.seq):
+            replay = [frame for seq, frame in self.patch_history if seq > since]
+            if len(replay) == self.seq - since:
+                for frame in replay:
+                    subscriber.offer(frame)
+                return len(replay)
+
+        subscriber.offer(self.status_frame)
+        return 1
+
+    async def subscribe(self, websocket, max_queue: int = SUBSCRIBER_QUEUE_SIZE,
+                        patches: bool = False, since: Optional[int] = None,
+                        epoch: Optional[str] = None) -> Subscriber:
+        """
+        Add a subscriber and queue the current status to it.
+
+        Args:
+            websocket: Accepted WebSocket (send_text/close)
+            max_queue: Frames buffered before the subscriber is dropped
+            patches: Send status changes as patches (?protocol=patch)
+            since: Last sequence a reconnecting patch client applied
+            epoch: Epoch of that sequence
+
+        Returns:
+            Subscriber (await its run() to send frames)
+        """
+        subscriber = Subscriber(websocket, max_queue, patches)
+
+        async with self._initial_lock:
+            if self.status_frame is None:
+                status = await self._compute_status()
+                self._set_status(status, encode_message(status))
+                self.last_refresh = self.last_snapshot = time.monotonic()
+                self.completed = bool(status.get("is_complete"))
+
+        self.resync(subscriber, since, epoch)
+        if self.completed:
+            subscriber.offer(encode_message({"type": "complete", "message": "Session completed!"}))
+            subscriber.close()
+        else:
+            self.subscribers.add(subscriber)
+
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        """Remove a subscriber"""
+        self.subscribers.discard(subscriber)
+        subscriber.close()
+
+
+class SessionHub:
+    """Session publishers by session ID, plus the shared change watcher."""
+
+    def __init__(self, status_fn: Callable[[str], Any],
+                 signature_fn: Optional[Callable[[str], Any]] = None):
+        """
+        Initialize hub.
+
+        Args:
+            status_fn: Returns the status dict for a session (may be async)
+            signature_fn: Returns a cheap change signature for a session (optional)
+        """
+        self.status_fn = status_fn
+        self.signature_fn = signature_fn
+        self.publishers: Dict[str, SessionPublisher] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def get(self, session_id: str) -> SessionPublisher:
+        """Get (or create) the publisher for a session"""
+        publisher = self.publishers.get(session_id)
+        if publisher is None:
+            publisher = SessionPublisher(session_id, self.status_fn, self.signature_fn)
+            self.publishers[session_id] = publisher
+        return publisher
+
+    async def subscribe(self, session_id: str, websocket, patches: bool = False,
+                        since: Optional[int] = None, epoch: Optional[str] = None) -> Subscriber:
+        """Subscribe a WebSocket to a session (see SessionPublisher.subscribe)"""
+        publisher = self.get(session_id)
+        # Keeps the publisher registered while the initial status is computed
+        publisher.pending += 1
+        try:
+            return await publisher.subscribe(websocket, patches=patches,
+                                             since=since, epoch=epoch)
+        finally:
+            publisher.pending -= 1
+            self._discard_if_idle(session_id, publisher)
+
+    def unsubscribe(self, session_id: str, subscriber: Subscriber):
+        """Unsubscribe; the session's publisher is discarded once it has no subscribers"""
+        publisher = self.publishers.get(session_id)
+        if publisher is None:
+            return
+        publisher.unsubscribe(subscriber)
+        self._discard_if_idle(session_id, publisher)
+
+    def _discard_if_idle(self, session_id: str, publisher: SessionPublisher):
+        """Drop a publisher with no subscribers and no subscribe in progress"""
+        if (not publisher.subscribers and not publisher.pending
+                and self.publishers.get(session_id) is publisher):
+            del self.publishers[session_id]
+
+    def publish(self, session_id: str, message: Dict[str, Any], legacy_only: bool = False) -> int:
+        """Fan an event out to a session's subscribers (0 if nobody is watching)"""
+        publisher = self.publishers.get(session_id)
+        return publisher.publish(message, legacy_only) if publisher else 0
+
+    def handle_client_message(self, session_id: str, subscriber: Subscriber,
+                              message: Dict[str, Any]) -> bool:
+        """
+        Handle a message sent by a WebSocket client.
+
+        Returns:
+            True if the message was understood
+        """
+        publisher = self.publishers.get(session_id)
+        if publisher is None or not isinstance(message, dict):
+            return False
+
+        if message.get("type") == "resync":
+            since = message.get("seq")
+            publisher.resync(subscriber, since if isinstance(since, int) else None,
+                             message.get("epoch"))
+            return True
+        return False
+
+    def notify(self, session_id: str):
+        """Schedule a status refresh for a watched session"""
+        publisher = self.publishers.get(session_id)
+        if publisher is not None:
+            publisher.notify()
+
+    def subscriber_count(self, session_id: Optional[str] = None) -> int:
+        """Subscribers of one session, or of all sessions"""
+        if session_id is not None:
+            publisher = self.publishers.get(session_id)
+            return len(publisher.subscribers) if publisher else 0
+        return sum(len(publisher.subscribers) for publisher in self.publishers.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Publisher and subscriber counts (for health checks)"""
+        return {
+            "sessions": len(self.publishers),
+            "subscribers": self.subscriber_count(),
+            "dropped_slow_consumers": sum(p.dropped_count for p in self.publishers.values())
+        }
+
+    async def watch(self, interval: float = WATCH_INTERVAL):
+        """Check every watched session for changes, forever (one loop for all sessions)"""
+        while True:
+            for publisher in list(self.publishers.values()):
+                publisher.check()
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float = WATCH_INTERVAL) -> asyncio.Task:
+        """Start the watcher on the running event loop"""
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.get_running_loop().create_task(self.watch(interval))
+        return self._watch_task
+
+    async def stop(self):
+        """Stop the watcher"""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+
+__all__ = [
+    'diff_documents',
+    'apply_patch',
+    'Subscriber',
+    'SessionPublisher',
+    'SessionHub',
+    'encode_message',
+]
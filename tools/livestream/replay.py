@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Event Replay for Context Foundry Livestream
+Indexed access to recorded events.jsonl files
+
+Each events file gets a sparse index next to it (events.jsonl.idx): the
+sequence number, timestamp and byte offset of every Nth event. Seeking to a
+sequence number or a point in time reads the index, jumps to the nearest
+indexed offset and scans forward from there, so scrubbing through a
+multi-hour session never loads the whole file. The index is extended
+incrementally as the file grows and rebuilt when the file is replaced or
+truncated.
+"""
+
+import os
+import re
+import json
+import asyncio
+import functools
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+# One index entry per this many events
+INDEX_INTERVAL = 256
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+
+# Replay pacing: gaps between events are divided by the speed and capped
+DEFAULT_REPLAY_SPEED = 1.0
+MAX_REPLAY_GAP = 5.0
+
+# Events read per blocking call while a replay plays
+REPLAY_PAGE_SIZE = 500
+
+# Top-level fields as written by EventBroadcaster (json.dumps, data last)
+SEQUENCE_PATTERN = re.compile(rb'"sequence":\s*(\d+)')
+TIMESTAMP_PATTERN = re.compile(rb'"timestamp":\s*"([^"]*)"')
+
+
+def _event_position(line: bytes) -> Tuple[Optional[int], Optional[str]]:
+    """Extract (sequence, timestamp) from a raw event line without decoding all of it"""
+    sequence = SEQUENCE_PATTERN.search(line)
+    timestamp = TIMESTAMP_PATTERN.search(line)
+    if sequence and timestamp:
+        return int(sequence.group(1)), timestamp.group(1).decode('utf-8', errors='ignore')
+
+    try:
+        event = json.loads(line)
+        return event.get("sequence"), event.get("timestamp")
+    except ValueError:
+        return None, None
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO timestamp as naive local time (the format events are recorded in)"""
+    try:
+        parsed = datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+    if parsed is not None and parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+class EventIndex:
+    """Sparse sequence/timestamp -> byte offset index for one events file."""
+
+    def __init__(self, events_file: Path, interval: int = INDEX_INTERVAL):
+        """
+        Initialize index (call refresh() to bring it up to date).
+
+        Args:
+            events_file: Path to events.jsonl
+            interval: Events between index entries
+        """
+        self.events_file = Path(events_file)
+        self.index_file = self.events_file.with_name(self.events_file.name + INDEX_SUFFIX)
+        self.interval = interval
+        self._reset()
+
+    def _reset(self, inode: int = 0):
+        self.inode = inode
+        self.size = 0
+        self.count = 0
+        self.entries: List[Tuple[int, str, int]] = []  # (sequence, timestamp, offset)
+        self.first_sequence: Optional[int] = None
+        self.last_sequence: Optional[int] = None
+        self.first_time: Optional[str] = None
+        self.last_time: Optional[str] = None
+        self.ordered = True  # sequences and timestamps never decrease
+
+    def load(self) -> bool:
+        """Load the saved index; False if missing, stale format or unreadable"""
+        try:
+            data = json.loads(self.index_file.read_text())
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != INDEX_VERSION or data.get("interval") != self.interval:
+            return False
+
+        self.inode = data["inode"]
+        self.size = data["size"]
+        self.count = data["count"]
+        self.entries = [tuple(entry) for entry in data["entries"]]
+        self.first_sequence = data["first_sequence"]
+        self.last_sequence = data["last_sequence"]
+        self.first_time = data["first_time"]
+        self.last_time = data["last_time"]
+        self.ordered = data["ordered"]
+        return True
+
+    def save(self):
+        """Write the index next to the events file (atomically)"""
+        data = {
+            "version": INDEX_VERSION,
+            "interval": self.interval,
+            "inode": self.inode,
+            "size": self.size,
+            "count": self.count,
+            "first_sequence": self.first_sequence,
+            "last_sequence": self.last_sequence,
+            "first_time": self.first_time,
+            "last_time": self.last_time,
+            "ordered": self.ordered,
+            "entries": self.entries,
+        }
+        temp_file = self.index_file.with_name(self.index_file.name + ".tmp")
+        try:
+            temp_file.write_text(json.dumps(data, separators=(",", ":")))
+            os.replace(temp_file, self.index_file)
+        except OSError as e:
+            print(f"⚠️  Failed to save event index: {e}")
+
+    def refresh(self) -> 'EventIndex':
+        """
+        Index events appended since the last refresh.
+
+        Rebuilds from scratch when the events file was replaced (new inode)
+        or truncated. Only complete lines are indexed.
+
+        Returns:
+            self
+        """
+        if not self.entries and not self.size:
+            self.load()
+
+        try:
+            stat = self.events_file.stat()
+        except OSError:
+            self._reset()
+            return self
+
+        if stat.st_ino != self.inode or stat.st_size < self.size:
+            self._reset(stat.st_ino)
+        if stat.st_size == self.size:
+            return self
+
+        with open(self.events_file, 'rb') as f:
+            f.seek(self.size)
+            offset = self.size
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # partial line still being written
+
+                sequence, timestamp = _event_position(line)
+                if sequence is not None:
+                    self._add(sequence, timestamp, offset)
+                offset += len(line)
+
+        self.size = offset
+        self.save()
+        return self
+
+    def _add(self, sequence: int, timestamp: Optional[str], offset: int):
+        if self.count == 0:
+            self.first_sequence, self.first_time = sequence, timestamp
+        elif (sequence < self.last_sequence
+              or (timestamp and self.last_time and timestamp < self.last_time)):
+            self.ordered = False
+
+        if self.count % self.interval == 0:
+            self.entries.append((sequence, timestamp or "", offset))
+
+        self.count += 1
+        self.last_sequence = sequence
+        if timestamp:
+            self.last_time = timestamp
+
+    def seek_offset(self, sequence: Optional[int] = None, timestamp: Optional[str] = None) -> int:
+        """
+        Byte offset to start scanning from to reach a sequence or time.
+
+        Args:
+            sequence: First sequence wanted
+            timestamp: First time wanted (ISO format, as recorded)
+
+        Returns:
+            Offset of the last indexed event at or before the target (0 when
+            the file is not ordered and the index cannot be trusted)
+        """
+        if not self.entries or not self.ordered:
+            return 0
+
+        if sequence is not None:
+            position = bisect_right([entry[0] for entry in self.entries], sequence) - 1
+        elif timestamp is not None:
+            position = bisect_right([entry[1] for entry in self.entries], timestamp) - 1
+        else:
+            return 0
+
+        return self.entries[max(position, 0)][2]
+
+    def summary(self) -> Dict[str, Any]:
+        """Event count and the sequence/time range covered"""
+        return {
+            "events": self.count,
+            "first_sequence": self.first_sequence,
+            "last_sequence": self.last_sequence,
+            "first_time": self.first_time,
+            "last_time": self.last_time,
+            "bytes": self.size,
+            "index_entries": len(self.entries),
+        }
+
+
+class EventReplay:
+    """Reads a session's recorded events from any sequence or time point."""
+
+    def __init__(self, events_file: Path, interval: int = INDEX_INTERVAL):
+        """
+        Initialize replay.
+
+        Args:
+            events_file: Path to events.jsonl
+            interval: Events between index entries
+        """
+        self.events_file = Path(events_file)
+        self.index = EventIndex(self.events_file, interval)
+
+    def exists(self) -> bool:
+        return self.events_file.exists()
+
+    def summary(self) -> Dict[str, Any]:
+        """Refresh the index and summarize the recording"""
+        return self.index.refresh().summary()
+
+    def iter_events(self, since_sequence: Optional[int] = None,
+                    since_time: Optional[str] = None,
+                    until_time: Optional[str] = None,
+                    limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Iterate recorded events from a starting point.
+
+        Args:
+            since_sequence: First sequence to return
+            since_time: First time to return (ISO format)
+            until_time: Stop after this time (ISO format)
+            limit: Maximum events returned
+
+        Yields:
+            Event dicts, in file order
+        """
+        returned = 0
+        for event, _ in self._scan(since_sequence, since_time, until_time):
+            yield event
+            returned += 1
+            if limit is not None and returned >= limit:
+                break
+
+    def read_page(self, since_sequence: Optional[int] = None,
+                  since_time: Optional[str] = None,
+                  offset: Optional[int] = None,
+                  limit: int = REPLAY_PAGE_SIZE) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Read one page of events (blocking; callers on an event loop offload it).
+
+        Args:
+            since_sequence: First sequence to return
+            since_time: First time to return (ISO format)
+            offset: Byte offset returned by the previous page (None: seek via the index)
+            limit: Maximum events returned
+
+        Returns:
+            (events, offset to read the next page from, or None when caught up)
+        """
+        entries, next_offset = self.read_entries(since_sequence, since_time, offset, limit)
+        return [event for event, _ in entries], next_offset
+
+    def read_entries(self, since_sequence: Optional[int] = None,
+                     since_time: Optional[str] = None,
+                     offset: Optional[int] = None,
+                     limit: int = REPLAY_PAGE_SIZE) -> Tuple[List[Tuple[Dict, int]], Optional[int]]:
+        """
+        Like read_page, but each event comes with the byte offset just past it
+        (where reading resumes after that event).
+
+        Returns:
+            ([(event, offset)], offset to read the next page from, or None when caught up)
+        """
+        entries = []
+        for event, end in self._scan(since_sequence, since_time, None, offset):
+            entries.append((event, end))
+            if len(entries) >= limit:
+                return entries, end
+        return entries, None
+
+    def _scan(self, since_sequence: Optional[int], since_time: Optional[str],
+              until_time: Optional[str], offset: Optional[int] = None) -> Iterator[Tuple[Dict, int]]:
+        """Yield (event, offset just past it) for matching events"""
+        if not self.events_file.exists():
+            return
+
+        since = _parse_time(since_time)
+        until = _parse_time(until_time)
+        if offset is None:
+            index = self.index.refresh()
+            offset = index.seek_offset(since_sequence, since.isoformat() if since else None)
+
+        with open(self.events_file, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+
+                if since_sequence is not None and event.get("sequence", 0) < since_sequence:
+                    continue
+                event_time = _parse_time(event.get("timestamp")) if (since or until) else None
+                if since and event_time and event_time < since:
+                    continue
+                if until and event_time and event_time > until:
+                    break
+
+                yield event, offset
+
+
+async def _as_async(events: Iterable[Dict]) -> AsyncIterator[Dict]:
+    for event in events:
+        yield event
+
+
+async def _run_in_executor(fn: Callable[..., Any], *args) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args))
+
+
+async def pace_events(events: Union[Iterable[Dict], AsyncIterator[Dict]],
+                      send: Callable[[Dict], Awaitable[None]],
+                      speed: float = DEFAULT_REPLAY_SPEED,
+                      max_gap: float = MAX_REPLAY_GAP) -> Optional[Dict]:
+    """
+    Send events with their original spacing, scaled by speed.
+
+    Args:
+        events: Events to send (iterable or async iterator)
+        send: Async callable sending one event
+        speed: Playback speed multiplier (<= 0: as fast as possible)
+        max_gap: Longest wait between two events, in seconds (idle periods are skipped)
+
+    Returns:
+        Last event sent (None if there were none)
+    """
+    previous_time = None
+    last = None
+
+    source = events if hasattr(events, '__aiter__') else _as_async(events)
+    async for event in source:
+        event_time = _parse_time(event.get("timestamp"))
+        if speed > 0 and previous_time is not None and event_time is not None:
+            gap = (event_time - previous_time).total_seconds() / speed
+            if gap > 0:
+                await asyncio.sleep(min(gap, max_gap))
+        if event_time is not None:
+            previous_time = event_time
+
+        await send({"type": "replay_event", "data": event})
+        last = event
+
+    return last
+
+
+async def _paged_events(replay: EventReplay, run_blocking: Callable[..., Awaitable[Any]],
+                        since_sequence: Optional[int],
+                        since_time: Optional[str],
+                        offset: Optional[int] = None,
+                        cursor: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict]:
+    """
+    Events read page by page through run_blocking (file reads stay off the loop).
+
+    cursor["offset"] is set to the byte offset just past each event as it is
+    yielded, so playback can later resume right after the last event sent.
+    """
+    while True:
+        entries, offset = await run_blocking(replay.read_entries, since_sequence, since_time,
+                                             offset, REPLAY_PAGE_SIZE)
+        for event, end in entries:
+            if cursor is not None:
+                cursor["offset"] = end
+            yield event
+        if offset is None:
+            return
+
+
+async def serve_replay(replay: EventReplay,
+                       send: Callable[[Dict], Awaitable[None]],
+                       receive: Callable[[], Awaitable[Dict]],
+                       since_sequence: Optional[int] = None,
+                       since_time: Optional[str] = None,
+                       speed: float = DEFAULT_REPLAY_SPEED,
+                       run_blocking: Callable[..., Awaitable[Any]] = _run_in_executor):
+    """
+    Stream a recording to a client that can scrub while it plays.
+
+    Index refreshes and event reads are blocking file I/O; they go through
+    run_blocking (fn, *args -> awaitable result; default: the loop's
+    executor) one page at a time, so a seek never stalls the event loop.
+
+    Client messages:
+        {"type": "seek", "sequence": n} or {"type": "seek", "time": iso}: restart there
+        {"type": "speed", "value": x}: change speed from the next event on
+        {"type": "pause"} / {"type": "resume"}
+
+    Server messages: {"type": "replay_start", "summary": ...}, replay_event
+    messages, and {"type": "replay_end", "last_sequence": n} when caught up.
+
+    Returns when receive() raises (client disconnected).
+    """
+    await send({"type": "replay_start", "summary": await run_blocking(replay.summary)})
+
+    position = {"sequence": since_sequence, "time": since_time, "offset": None}
+    # Offset past the event being sent; committed to last_sent once it went out
+    cursor: Dict[str, Any] = {}
+    last_sent: Dict[str, Any] = {}
+    paused = False
+
+    async def record_send(message: Dict):
+        await send(message)
+        last_sent["sequence"] = message["data"].get("sequence")
+        last_sent["offset"] = cursor.get("offset")
+
+    async def play():
+        events = _paged_events(replay, run_blocking, position["sequence"], position["time"],
+                               position["offset"], cursor)
+        last = await pace_events(events, record_send, speed)
+        await send({"type": "replay_end",
+                    "last_sequence": last.get("sequence") if last else last_sent.get("sequence")})
+
+    player: Optional[asyncio.Task] = None
+    try:
+        while True:
+            if player is None and not paused:
+                player = asyncio.create_task(play())
+
+            message = await receive()
+            kind = message.get("type") if isinstance(message, dict) else None
+
+            if kind == "seek":
+                position = {"sequence": message.get("sequence"), "time": message.get("time"),
+                            "offset": None}
+                last_sent.clear()
+            elif kind == "speed":
+                speed = float(message.get("value", DEFAULT_REPLAY_SPEED))
+            elif kind == "pause":
+                paused = True
+            elif kind == "resume":
+                paused = False
+            else:
+                continue
+
+            # Restart playback from the new position (or where it stopped)
+            if player is not None:
+                player.cancel()
+                try:
+                    await player
+                except asyncio.CancelledError:
+                    pass
+                player = None
+            # Resume by byte offset: sequences may restart within one file
+            if kind in ("speed", "pause", "resume") and last_sent.get("offset") is not None:
+                position = dict(position, offset=last_sent["offset"])
+    finally:
+        if player is not None:
+            player.cancel()
+
+
+__all__ = [
+    'EventIndex',
+    'EventReplay',
+    'pace_events',
+    'serve_replay',
+]
@@ -8,12 +8,11 @@ import os
 import sys
 import json
 import asyncio
-import hashlib
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Dict, List, Set, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
@@ -21,6 +20,21 @@ import uvicorn
 # Add parent directory for imports
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+try:
+    from .publisher import SessionHub
+    from .replay import EventReplay, serve_replay
+    from .offload import BlockingPool
+    from .logtail import TailCache, LogFollower
+    from .session_index import SessionIndex, checkpoint_signature
+    from .agent_updates import AgentUpdateBuffer
+except ImportError:
+    from publisher import SessionHub
+    from replay import EventReplay, serve_replay
+    from offload import BlockingPool
+    from logtail import TailCache, LogFollower
+    from session_index import SessionIndex, checkpoint_signature
+    from agent_updates import AgentUpdateBuffer
+
 app = FastAPI(title="Context Foundry Livestream")
 
 # CORS for development
@@ -32,30 +46,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Active WebSocket connections per session
-connections: Dict[str, Set[WebSocket]] = {}
-
-# Change detection: store last sent data hashes per connection
-last_sent_hashes: Dict[str, str] = {}
-
 # Base paths
 CHECKPOINTS_DIR = Path("checkpoints/ralph")
 LOGS_DIR = Path("logs")
+EVENTS_DIR = LOGS_DIR / "events"
 DASHBOARD_FILE = Path(__file__).parent / "dashboard.html"
 
+# Blocking work (file reads, SQLite, MCP HTTP calls) runs in bounded thread pools;
+# historical analytics get their own workers so they cannot starve the dashboard
+IO_WORKERS = int(os.getenv("LIVESTREAM_IO_WORKERS", "8"))
+ANALYTICS_WORKERS = int(os.getenv("LIVESTREAM_ANALYTICS_WORKERS", "2"))
 
-def hash_data(data: Dict) -> str:
-    """
-    Create SHA256 hash of data for change detection.
-
-    Args:
-        data: Dictionary to hash
-
-    Returns:
-        Hex digest of SHA256 hash
-    """
-    data_str = json.dumps(data, sort_keys=True)
-    return hashlib.sha256(data_str.encode()).hexdigest()
+# Seconds between checks for new lines on /api/logs/{session_id}/follow
+FOLLOW_INTERVAL = 0.5
+FOLLOW_KEEPALIVE = 15.0
 
 
 class SessionMonitor:
@@ -64,13 +68,27 @@ class SessionMonitor:
     def __init__(self):
         self.sessions: Dict[str, Dict] = {}
         self.last_update: Dict[str, float] = {}
+        self.tail_cache = TailCache()
+        self.checkpoint_index = SessionIndex(CHECKPOINTS_DIR)
 
-    def discover_sessions(self) -> List[Dict]:
-        """Discover all sessions from checkpoints and live phase updates."""
+    def discover_sessions(self, live_sessions: Optional[List[Tuple[str, Dict]]] = None) -> List[Dict]:
+        """
+        Discover all sessions from checkpoints and live phase updates.
+
+        Checkpoint sessions come from the session index: their files are only
+        re-read after they change.
+
+        Args:
+            live_sessions: Snapshot of self.sessions.items(), taken on the event
+                loop when this runs in a worker thread (phase updates insert
+                sessions on the loop meanwhile)
+        """
         sessions = []
+        if live_sessions is None:
+            live_sessions = list(self.sessions.items())
 
         # First, add live sessions from phase-update API
-        for session_id, session_data in self.sessions.items():
+        for session_id, session_data in live_sessions:
             session_info = {
                 "id": session_id,
                 "project": session_id,
@@ -87,48 +105,10 @@ class SessionMonitor:
             }
             sessions.append(session_info)
 
-        # Then, add checkpoint-based sessions
-        if CHECKPOINTS_DIR.exists():
-            for session_dir in CHECKPOINTS_DIR.iterdir():
-                if not session_dir.is_dir():
-                    continue
-
-                state_file = session_dir / "state.json"
-                progress_file = session_dir / "progress.json"
+        # Then, add checkpoint-based sessions (from the in-memory index)
+        sessions.extend(self.checkpoint_index.sessions())
 
-                if not state_file.exists():
-                    continue
-
-                try:
-                    with open(state_file) as f:
-                        state = json.load(f)
-
-                    progress = {}
-                    if progress_file.exists():
-                        with open(progress_file) as f:
-                            progress = json.load(f)
-
-                    session_info = {
-                        "id": session_dir.name,
-                        "project": state.get("project_name", "Unknown"),
-                        "task": state.get("task_description", ""),
-                        "phase": state.get("current_phase", "unknown"),
-                        "iterations": state.get("iterations", 0),
-                        "start_time": state.get("start_time"),
-                        "last_update": state.get("last_iteration_time"),
-                        "completed_tasks": len(progress.get("completed", [])),
-                        "total_tasks": len(progress.get("completed", []))
-                        + len(progress.get("remaining", [])),
-                        "is_complete": (session_dir / "COMPLETE").exists(),
-                        "source": "checkpoint"
-                    }
-
-                    sessions.append(session_info)
-
-                except Exception as e:
-                    print(f"Error reading session {session_dir.name}: {e}")
-
-        return sorted(sessions, key=lambda x: x.get("last_update", ""), reverse=True)
+        return sorted(sessions, key=lambda x: x.get("last_update") or "", reverse=True)
 
     def get_session_status(self, session_id: str) -> Dict:
         """Get detailed status for a session (live or checkpoint-based)."""
@@ -271,26 +251,40 @@ class SessionMonitor:
         except Exception as e:
             return {"error": str(e)}
 
-    def get_session_logs(self, session_id: str, tail_lines: int = 50) -> List[str]:
-        """Get recent logs for a session."""
+    def get_session_signature(self, session_id: str):
+        """
+        Cheap change signature for a session (no file contents are read).
+
+        Live sessions change with each phase update; checkpoint sessions when
+        state.json, progress.json or the COMPLETE marker change.
+        """
+        if session_id in self.sessions:
+            return self.sessions[session_id].get("last_updated")
+
+        return checkpoint_signature(CHECKPOINTS_DIR / session_id)
+
+    def get_log_file(self, session_id: str) -> Optional[Path]:
+        """Log file for a session (the newest overnight log when it has no log dir)."""
         log_dir = LOGS_DIR / f"ralph_{session_id}"
 
         if not log_dir.exists():
             # Try overnight logs
             overnight_logs = list(LOGS_DIR.glob("overnight_*.log"))
-            if overnight_logs:
-                log_file = overnight_logs[0]
-            else:
-                return []
-        else:
-            log_file = log_dir / "session.jsonl"
-            if not log_file.exists():
-                return []
+            if not overnight_logs:
+                return None
+            return max(overnight_logs, key=lambda path: path.stat().st_mtime)
+
+        log_file = log_dir / "session.jsonl"
+        return log_file if log_file.exists() else None
 
+    def get_session_logs(self, session_id: str, tail_lines: int = 50) -> List[str]:
+        """Get recent logs for a session (reads backwards from the end of the file)."""
         try:
-            with open(log_file) as f:
-                lines = f.readlines()
-                return lines[-tail_lines:]
+            log_file = self.get_log_file(session_id)
+            if log_file is None:
+                return []
+            lines, _ = self.tail_cache.tail(log_file, tail_lines)
+            return lines
         except Exception as e:
             return [f"Error reading logs: {e}"]
 
@@ -298,6 +292,25 @@ class SessionMonitor:
 # Global monitor
 monitor = SessionMonitor()
 
+io_pool = BlockingPool("livestream-io", IO_WORKERS)
+analytics_pool = BlockingPool("livestream-analytics", ANALYTICS_WORKERS)
+
+
+async def discover_sessions() -> List[Dict]:
+    """Session list (concurrent requests share one directory scan)."""
+    # Copied on the loop: phase_update inserts sessions while the scan runs
+    live_sessions = list(monitor.sessions.items())
+    return await io_pool.run(monitor.discover_sessions, live_sessions, key="sessions")
+
+
+async def load_session_status(session_id: str) -> Dict:
+    """Session status (concurrent requests share one read of the checkpoint files)."""
+    return await io_pool.run(monitor.get_session_status, session_id, key=("status", session_id))
+
+
+# Per-session status publishers (one status computation per change, fanned out to all viewers)
+hub = SessionHub(load_session_status, monitor.get_session_signature)
+
 
 @app.get("/", response_class=HTMLResponse)
 async def dashboard():
@@ -310,73 +323,98 @@ async def dashboard():
 @app.get("/api/sessions")
 async def get_sessions():
     """Get list of all sessions."""
-    sessions = monitor.discover_sessions()
+    sessions = await discover_sessions()
     return JSONResponse({"sessions": sessions, "count": len(sessions)})
 
 
 @app.get("/api/status/{session_id}")
 async def get_status(session_id: str):
     """Get detailed status for a session."""
-    status = monitor.get_session_status(session_id)
+    status = await load_session_status(session_id)
     return JSONResponse(status)
 
 
 @app.get("/api/logs/{session_id}")
 async def get_logs(session_id: str, lines: int = 50):
     """Get recent logs for a session."""
-    logs = monitor.get_session_logs(session_id, lines)
+    logs = await io_pool.run(monitor.get_session_logs, session_id, lines,
+                             key=("logs", session_id, lines))
     return JSONResponse({"session_id": session_id, "logs": logs})
 
 
-@app.websocket("/ws/{session_id}")
-async def websocket_endpoint(websocket: WebSocket, session_id: str):
-    """WebSocket for real-time updates with change detection."""
-    await websocket.accept()
+@app.get("/api/logs/{session_id}/follow")
+async def follow_logs(session_id: str, lines: int = 50):
+    """
+    Stream a session's log as Server-Sent Events.
 
-    # Add to connections
-    if session_id not in connections:
-        connections[session_id] = set()
-    connections[session_id].add(websocket)
+    The first event carries the last ?lines= lines, then each event carries
+    the complete lines appended since the previous one ({"lines": [...]}).
+    """
+    log_file = await io_pool.run(monitor.get_log_file, session_id)
+    if log_file is None:
+        return JSONResponse({"error": "No logs for session"}, status_code=404)
 
-    # Track last hash for this connection (use id() for unique key)
-    connection_key = f"{session_id}_{id(websocket)}"
-    last_hash = None
+    follower = LogFollower(log_file, monitor.tail_cache)
+    initial = await io_pool.run(follower.start, max(0, lines))
 
-    try:
-        # Send initial status
-        status = monitor.get_session_status(session_id)
-        current_hash = hash_data(status)
-        await websocket.send_json({"type": "status", "data": status})
-        last_hash = current_hash
+    async def stream():
+        yield f"data: {json.dumps({'lines': initial})}\n\n"
+        idle = 0.0
+        while True:
+            await asyncio.sleep(FOLLOW_INTERVAL)
+            new_lines = await io_pool.run(follower.poll)
+            if new_lines:
+                idle = 0.0
+                yield f"data: {json.dumps({'lines': new_lines})}\n\n"
+            else:
+                idle += FOLLOW_INTERVAL
+                if idle >= FOLLOW_KEEPALIVE:
+                    idle = 0.0
+                    yield ": keepalive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
 
-        # Keep connection alive and send updates ONLY if changed
+
+async def receive_client_messages(websocket: WebSocket, session_id: str, subscriber):
+    """Handle messages from a WebSocket client (resync requests) until it disconnects."""
+    try:
         while True:
-            # Poll for updates every second
-            await asyncio.sleep(1)
+            message = await websocket.receive_json()
+            hub.handle_client_message(session_id, subscriber, message)
+    except WebSocketDisconnect:
+        subscriber.close()
+    except Exception:
+        # Malformed frame or closed socket: stop reading, the sender ends on its own
+        subscriber.close()
 
-            # Get latest status
-            status = monitor.get_session_status(session_id)
-            current_hash = hash_data(status)
 
-            # CHANGE DETECTION: Only send if data changed
-            if current_hash != last_hash:
-                await websocket.send_json({"type": "status", "data": status})
-                last_hash = current_hash
+@app.websocket("/ws/{session_id}")
+async def websocket_endpoint(websocket: WebSocket, session_id: str,
+                             protocol: Optional[str] = None, since: Optional[int] = None,
+                             epoch: Optional[str] = None):
+    """
+    WebSocket for real-time updates.
 
-            # Check if session is complete
-            if status.get("is_complete"):
-                await websocket.send_json(
-                    {"type": "complete", "message": "Session completed!"}
-                )
-                break
+    Status is computed once per change by the session's publisher and the same
+    frames are sent to every viewer; viewers that fall behind are dropped
+    (close code 1013) and get a fresh status when they reconnect.
 
-    except WebSocketDisconnect:
-        connections[session_id].remove(websocket)
-        if not connections[session_id]:
-            del connections[session_id]
-        # Clean up hash tracking
-        if connection_key in last_sent_hashes:
-            del last_sent_hashes[connection_key]
+    With ?protocol=patch, status changes arrive as sequence-numbered JSON
+    patches with periodic full snapshots; a client that sees a gap sends
+    {"type": "resync"}, and a reconnecting client passes ?epoch=<epoch>&since=<last seq>
+    (sequences from another epoch, e.g. before a restart, get a snapshot).
+    """
+    await websocket.accept()
+
+    subscriber = await hub.subscribe(session_id, websocket,
+                                     patches=(protocol == "patch"), since=since, epoch=epoch)
+    receiver = asyncio.create_task(receive_client_messages(websocket, session_id, subscriber))
+    try:
+        await subscriber.run()
+    finally:
+        receiver.cancel()
+        hub.unsubscribe(session_id, subscriber)
 
 
 @app.post("/api/broadcast/{session_id}")
@@ -385,14 +423,88 @@ async def broadcast_event(session_id: str, event: Dict):
     Broadcast event to all connected clients for a session.
     Called by broadcaster.py during execution.
     """
-    if session_id in connections:
-        for connection in connections[session_id]:
-            try:
-                await connection.send_json(event)
-            except:
-                pass
+    broadcast_count = hub.publish(session_id, event)
+    hub.notify(session_id)
 
-    return {"broadcasted": len(connections.get(session_id, []))}
+    return {"broadcasted": broadcast_count}
+
+
+@app.post("/api/broadcast/{session_id}/batch")
+async def broadcast_events(session_id: str, batch: Dict):
+    """
+    Broadcast a batch of events ({"events": [...]}) in order.
+    Called by broadcaster.py's background sender (one request per batch).
+    """
+    events = batch.get("events") or []
+    for event in events:
+        hub.publish(session_id, event)
+    if events:
+        hub.notify(session_id)
+
+    return {"broadcasted": hub.subscriber_count(session_id), "events": len(events)}
+
+
+def get_event_replay(session_id: str) -> Optional[EventReplay]:
+    """Replay reader for a session's recorded events (None if nothing was recorded)."""
+    if session_id in (".", "..") or "/" in session_id or "\\" in session_id:
+        return None
+    replay = EventReplay(EVENTS_DIR / session_id / "events.jsonl")
+    return replay if replay.exists() else None
+
+
+@app.get("/api/replay/{session_id}")
+async def get_replay_summary(session_id: str):
+    """Event count and sequence/time range of a session's recording (for the scrubber)."""
+    replay = get_event_replay(session_id)
+    if replay is None:
+        return JSONResponse({"error": "No recorded events"}, status_code=404)
+    summary = await io_pool.run(replay.summary, key=("replay", session_id))
+    return JSONResponse({"session_id": session_id, **summary})
+
+
+@app.get("/api/replay/{session_id}/events")
+async def get_replay_events(session_id: str, since_seq: Optional[int] = None,
+                            since_time: Optional[str] = None, limit: int = 500):
+    """Page through recorded events from a sequence number or ISO time."""
+    replay = get_event_replay(session_id)
+    if replay is None:
+        return JSONResponse({"error": "No recorded events"}, status_code=404)
+
+    limit = max(1, min(limit, 5000))
+    events = await io_pool.run(lambda: list(replay.iter_events(since_seq, since_time, limit=limit)),
+                               key=("replay_events", session_id, since_seq, since_time, limit))
+    next_seq = events[-1].get("sequence", 0) + 1 if events else since_seq
+    return JSONResponse({"session_id": session_id, "events": events, "next_seq": next_seq})
+
+
+@app.websocket("/ws/replay/{session_id}")
+async def replay_endpoint(websocket: WebSocket, session_id: str,
+                          since_seq: Optional[int] = None, since_time: Optional[str] = None,
+                          speed: float = 1.0):
+    """
+    Replay a recorded session with its original timing (scaled by ?speed=,
+    0 = as fast as possible), starting at ?since_seq= or ?since_time=.
+
+    The client scrubs with {"type": "seek", "sequence"|"time": ...},
+    {"type": "speed", "value": x}, {"type": "pause"} and {"type": "resume"}.
+    """
+    await websocket.accept()
+
+    replay = get_event_replay(session_id)
+    if replay is None:
+        await websocket.send_json({"type": "error", "message": "No recorded events"})
+        await websocket.close()
+        return
+
+    try:
+        # Index refreshes and page reads run in io_pool, off the event loop
+        await serve_replay(replay, websocket.send_json, websocket.receive_json,
+                           since_seq, since_time, speed, run_blocking=io_pool.run)
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        # Malformed client frame or closed socket
+        pass
 
 
 @app.post("/api/phase-update")
@@ -418,18 +530,14 @@ async def phase_update(phase_data: Dict):
         "last_updated": datetime.now().isoformat()
     }
 
-    # Broadcast to connected clients
-    broadcast_count = 0
-    if session_id in connections:
-        for connection in connections[session_id]:
-            try:
-                await connection.send_json({
-                    "type": "phase_update",
-                    "data": monitor.sessions[session_id]
-                })
-                broadcast_count += 1
-            except:
-                pass
+    # Broadcast to connected clients (serialized once), then refresh their status;
+    # patch clients skip the full session dict and receive only the status patch
+    hub.publish(session_id, {
+        "type": "phase_update",
+        "data": monitor.sessions[session_id]
+    }, legacy_only=True)
+    hub.notify(session_id)
+    broadcast_count = hub.subscriber_count(session_id)
 
     return {
         "status": "received",
@@ -444,8 +552,12 @@ async def health():
     """Health check."""
     return {
         "status": "healthy",
-        "sessions": len(monitor.discover_sessions()),
-        "connections": sum(len(conns) for conns in connections.values()),
+        "sessions": len(await discover_sessions()),
+        "connections": hub.subscriber_count(),
+        "publisher": hub.stats(),
+        "workers": {"io": io_pool.stats(), "analytics": analytics_pool.stats()},
+        "session_index": monitor.checkpoint_index.stats(),
+        "agent_updates": agent_updates.stats(),
     }
 
 
@@ -537,7 +649,7 @@ async def get_session_phases(session_id: str):
         return JSONResponse(phase_breakdown)
 
     # Fall back to checkpoint-based session
-    status = monitor.get_session_status(session_id)
+    status = await load_session_status(session_id)
     if "error" in status:
         return JSONResponse({"error": "Session not found"}, status_code=404)
 
@@ -556,7 +668,7 @@ async def get_session_phases(session_id: str):
 @app.get("/api/sessions/active")
 async def get_active_sessions():
     """Get only active/running sessions."""
-    sessions = monitor.discover_sessions()
+    sessions = await discover_sessions()
     active = [s for s in sessions if not s.get('is_complete') and s.get('status') != 'failed']
     return JSONResponse({"sessions": active, "count": len(active)})
 
@@ -564,7 +676,7 @@ async def get_active_sessions():
 @app.get("/api/sessions/completed")
 async def get_completed_sessions():
     """Get only completed sessions."""
-    sessions = monitor.discover_sessions()
+    sessions = await discover_sessions()
     completed = [s for s in sessions if s.get('is_complete') or s.get('status') == 'completed']
     return JSONResponse({"sessions": completed, "count": len(completed)})
 
@@ -572,7 +684,7 @@ async def get_completed_sessions():
 @app.get("/api/sessions/failed")
 async def get_failed_sessions():
     """Get only failed sessions."""
-    sessions = monitor.discover_sessions()
+    sessions = await discover_sessions()
     failed = [s for s in sessions if s.get('status') == 'failed']
     return JSONResponse({"sessions": failed, "count": len(failed)})
 
@@ -588,8 +700,8 @@ async def get_session_agents(session_id: str):
         return JSONResponse({"error": "Multi-agent features require MCP enhancement"}, status_code=503)
 
     try:
-        db = get_db()
-        agents = db.get_session_agents(session_id)
+        agents = await io_pool.run(lambda: get_db().get_session_agents(session_id),
+                                   key=("agents", session_id))
         active_agents = [a for a in agents if a['status'] in ['spawning', 'active', 'idle']]
 
         return JSONResponse({
@@ -602,6 +714,26 @@ async def get_session_agents(session_id: str):
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+def load_agent_detail(agent_id: str) -> Optional[Dict]:
+    """Agent instance with elapsed/remaining time estimates (runs in the I/O pool)."""
+    agent = get_db().get_agent_instance(agent_id)
+
+    # Calculate elapsed seconds if agent is still running
+    if agent and agent['start_time'] and not agent['end_time']:
+        start_time = datetime.fromisoformat(agent['start_time'].replace('Z', '+00:00'))
+        elapsed_seconds = int((datetime.now(timezone.utc) - start_time).total_seconds())
+        agent['elapsed_seconds'] = elapsed_seconds
+
+        # Estimate remaining time based on progress
+        if agent['progress_percent'] > 0:
+            estimated_total = elapsed_seconds / (agent['progress_percent'] / 100.0)
+            agent['estimated_remaining_seconds'] = int(estimated_total - elapsed_seconds)
+        else:
+            agent['estimated_remaining_seconds'] = 0
+
+    return agent
+
+
 @app.get("/api/agent/{agent_id}")
 async def get_agent_detail(agent_id: str):
     """Get detailed status for a specific agent."""
@@ -609,26 +741,11 @@ async def get_agent_detail(agent_id: str):
         return JSONResponse({"error": "Multi-agent features require MCP enhancement"}, status_code=503)
 
     try:
-        db = get_db()
-        agent = db.get_agent_instance(agent_id)
+        agent = await io_pool.run(load_agent_detail, agent_id, key=("agent", agent_id))
 
         if not agent:
             return JSONResponse({"error": "Agent not found"}, status_code=404)
 
-        # Calculate elapsed seconds if agent is still running
-        if agent['start_time'] and not agent['end_time']:
-            from datetime import datetime, timezone
-            start_time = datetime.fromisoformat(agent['start_time'].replace('Z', '+00:00'))
-            elapsed_seconds = int((datetime.now(timezone.utc) - start_time).total_seconds())
-            agent['elapsed_seconds'] = elapsed_seconds
-
-            # Estimate remaining time based on progress
-            if agent['progress_percent'] > 0:
-                estimated_total = elapsed_seconds / (agent['progress_percent'] / 100.0)
-                agent['estimated_remaining_seconds'] = int(estimated_total - elapsed_seconds)
-            else:
-                agent['estimated_remaining_seconds'] = 0
-
         return JSONResponse(agent)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -641,8 +758,7 @@ async def get_all_instances():
         return JSONResponse({"error": "Multi-agent features require MCP enhancement"}, status_code=503)
 
     try:
-        db = get_db()
-        instances = db.get_all_instances()
+        instances = await io_pool.run(lambda: get_db().get_all_instances(), key="instances")
 
         return JSONResponse({
             "instances": instances,
@@ -652,6 +768,33 @@ async def get_all_instances():
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+async def write_agent_updates(updates: List[Dict]):
+    """Persist a coalesced batch of agent updates (one UPSERT transaction, in the I/O pool)."""
+    await io_pool.run(lambda: get_db().upsert_agent_instances(updates))
+
+
+def broadcast_agent_update(update: Dict):
+    """Send one coalesced agent update to the session's viewers."""
+    hub.publish(update["session_id"], {
+        "type": "agent_progress",
+        "session_id": update["session_id"],
+        "data": update
+    })
+
+
+# Rapid reports for the same agent within the window are merged, written together, then broadcast
+agent_updates = AgentUpdateBuffer(write_agent_updates, broadcast_agent_update)
+
+
+def invalid_agent_updates(updates: Any) -> Optional[JSONResponse]:
+    """400 response if updates is not a list of dicts with session_id and agent_id."""
+    if not isinstance(updates, list) or not all(
+            isinstance(update, dict) and update.get("session_id") and update.get("agent_id")
+            for update in updates):
+        return JSONResponse({"error": "session_id and agent_id required"}, status_code=400)
+    return None
+
+
 @app.post("/api/agent-update")
 async def agent_update(agent_data: Dict):
     """
@@ -661,61 +804,46 @@ async def agent_update(agent_data: Dict):
     if not MCP_ENHANCED:
         return JSONResponse({"error": "Multi-agent features require MCP enhancement"}, status_code=503)
 
+    error = invalid_agent_updates([agent_data])
+    if error is not None:
+        return error
+
     try:
-        db = get_db()
-        session_id = agent_data.get("session_id")
-        agent_id = agent_data.get("agent_id")
-
-        if not session_id or not agent_id:
-            return JSONResponse({"error": "session_id and agent_id required"}, status_code=400)
-
-        # Check if agent exists
-        existing_agent = db.get_agent_instance(agent_id)
-
-        if existing_agent:
-            # Update existing agent
-            updates = {}
-            for key in ['status', 'phase', 'progress_percent', 'tokens_used', 'token_percentage', 'error_message']:
-                if key in agent_data:
-                    updates[key] = agent_data[key]
-
-            # Calculate token percentage if tokens_used provided
-            if 'tokens_used' in updates and existing_agent.get('tokens_limit'):
-                updates['token_percentage'] = (updates['tokens_used'] / existing_agent['tokens_limit']) * 100
-
-            # Set end_time if status is completed or failed
-            if updates.get('status') in ['completed', 'failed']:
-                updates['end_time'] = datetime.now().isoformat()
-                if existing_agent.get('start_time'):
-                    from datetime import datetime as dt
-                    start = dt.fromisoformat(existing_agent['start_time'].replace('Z', '+00:00'))
-                    end = dt.now(timezone.utc)
-                    updates['duration_seconds'] = int((end - start).total_seconds())
-
-            db.update_agent_instance(agent_id, updates)
-        else:
-            # Create new agent instance
-            db.create_agent_instance(agent_data)
-
-        # Broadcast agent update to connected clients
-        broadcast_count = 0
-        if session_id in connections:
-            event = {
-                "type": "agent_progress",
-                "session_id": session_id,
-                "data": agent_data
-            }
-            for connection in connections[session_id]:
-                try:
-                    await connection.send_json(event)
-                    broadcast_count += 1
-                except:
-                    pass
+        await agent_updates.submit([agent_data])
+
+        return JSONResponse({
+            "status": "updated",
+            "agent_id": agent_data["agent_id"],
+            "broadcasted_to": hub.subscriber_count(agent_data["session_id"])
+        })
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@app.post("/api/agent-updates")
+async def agent_updates_batch(batch: Dict):
+    """
+    Receive a batch of agent updates ({"updates": [...]}) in one request.
+
+    Updates are merged per agent_id with others arriving in the same short
+    window, written as a single UPSERT transaction and broadcast once per agent.
+    """
+    if not MCP_ENHANCED:
+        return JSONResponse({"error": "Multi-agent features require MCP enhancement"}, status_code=503)
 
+    updates = batch.get("updates")
+    error = invalid_agent_updates(updates)
+    if error is not None:
+        return error
+    if not updates:
+        return JSONResponse({"status": "updated", "agents": 0})
+
+    try:
+        written = await agent_updates.submit(updates)
         return JSONResponse({
             "status": "updated",
-            "agent_id": agent_id,
-            "broadcasted_to": broadcast_count
+            "agents": len({update["agent_id"] for update in updates}),
+            "batch_size": written
         })
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -729,14 +857,14 @@ async def agent_update(agent_data: Dict):
 try:
     # Try relative imports first (when used as module)
     from .mcp_client import get_client
-    from .metrics_db import get_db
+    from .metrics_db import get_db, start_retention
     from .config import TOKEN_BUDGET_LIMIT, get_token_status
     MCP_ENHANCED = True
 except ImportError:
     try:
         # Fall back to direct imports (when run as script)
         from mcp_client import get_client
-        from metrics_db import get_db
+        from metrics_db import get_db, start_retention
         from config import TOKEN_BUDGET_LIMIT, get_token_status
         MCP_ENHANCED = True
     except ImportError:
@@ -751,8 +879,7 @@ async def get_mcp_tasks():
         return JSONResponse({"error": "MCP enhanced features not available"}, status_code=503)
 
     try:
-        mcp_client = get_client()
-        tasks = mcp_client.list_active_tasks()
+        tasks = await io_pool.run(lambda: get_client().list_active_tasks(), key="mcp_tasks")
         return JSONResponse({"tasks": tasks, "count": len(tasks)})
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -765,64 +892,72 @@ async def get_mcp_task(task_id: str):
         return JSONResponse({"error": "MCP enhanced features not available"}, status_code=503)
 
     try:
-        mcp_client = get_client()
-        task = mcp_client.get_task_status(task_id)
+        task = await io_pool.run(lambda: get_client().get_task_status(task_id),
+                                 key=("mcp_task", task_id))
         return JSONResponse(task)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
-@app.get("/api/metrics/{task_id}")
-async def get_task_metrics(task_id: str):
-    """Get comprehensive metrics for a task."""
-    if not MCP_ENHANCED:
-        return JSONResponse({"error": "MCP enhanced features not available"}, status_code=503)
+def load_task_metrics(task_id: str) -> Optional[Dict]:
+    """Gather task metrics, decisions and analytics (runs in the analytics pool)."""
+    db = get_db()
+    mcp_client = get_client()
 
-    try:
-        db = get_db()
-        mcp_client = get_client()
+    # Get task data
+    task_data = db.get_task(task_id)
+    if not task_data:
+        return None
 
-        # Get task data
-        task_data = db.get_task(task_id)
-        if not task_data:
-            return JSONResponse({"error": "Task not found"}, status_code=404)
+    # Get metrics
+    metrics = db.get_metrics(task_id)
+    latest_metric = db.get_latest_metric(task_id)
 
-        # Get metrics
-        metrics = db.get_metrics(task_id)
-        latest_metric = db.get_latest_metric(task_id)
+    # Get decisions
+    decisions = db.get_decisions(task_id)
+    decision_analytics = db.get_decision_analytics(task_id)
 
-        # Get decisions
-        decisions = db.get_decisions(task_id)
-        decision_analytics = db.get_decision_analytics(task_id)
+    # Get agent performance
+    agent_performance = db.get_agent_performance(task_id)
 
-        # Get agent performance
-        agent_performance = db.get_agent_performance(task_id)
+    # Get test iterations
+    test_iterations = db.get_test_iterations(task_id)
 
-        # Get test iterations
-        test_iterations = db.get_test_iterations(task_id)
+    # Get pattern effectiveness
+    pattern_effectiveness = db.get_pattern_effectiveness(task_id)
 
-        # Get pattern effectiveness
-        pattern_effectiveness = db.get_pattern_effectiveness(task_id)
+    # Get token estimate
+    token_estimate = mcp_client.estimate_token_usage(task_id)
+    token_status = get_token_status(token_estimate['estimated_tokens'])
 
-        # Get token estimate
-        token_estimate = mcp_client.estimate_token_usage(task_id)
-        token_status = get_token_status(token_estimate['estimated_tokens'])
+    return {
+        "task": task_data,
+        "metrics": {
+            "latest": latest_metric,
+            "history": metrics[-20:] if len(metrics) > 20 else metrics,  # Last 20
+            "token_usage": token_status,
+        },
+        "decisions": {
+            "recent": decisions[-10:] if len(decisions) > 10 else decisions,  # Last 10
+            "analytics": decision_analytics
+        },
+        "agent_performance": agent_performance,
+        "test_iterations": test_iterations,
+        "pattern_effectiveness": pattern_effectiveness
+    }
 
-        return JSONResponse({
-            "task": task_data,
-            "metrics": {
-                "latest": latest_metric,
-                "history": metrics[-20:] if len(metrics) > 20 else metrics,  # Last 20
-                "token_usage": token_status,
-            },
-            "decisions": {
-                "recent": decisions[-10:] if len(decisions) > 10 else decisions,  # Last 10
-                "analytics": decision_analytics
-            },
-            "agent_performance": agent_performance,
-            "test_iterations": test_iterations,
-            "pattern_effectiveness": pattern_effectiveness
-        })
+
+@app.get("/api/metrics/{task_id}")
+async def get_task_metrics(task_id: str):
+    """Get comprehensive metrics for a task."""
+    if not MCP_ENHANCED:
+        return JSONResponse({"error": "MCP enhanced features not available"}, status_code=503)
+
+    try:
+        metrics = await analytics_pool.run(load_task_metrics, task_id, key=("metrics", task_id))
+        if metrics is None:
+            return JSONResponse({"error": "Task not found"}, status_code=404)
+        return JSONResponse(metrics)
     except Exception as e:
         import traceback
         return JSONResponse({
@@ -838,13 +973,12 @@ async def get_historical_metrics(limit: int = 100):
         return JSONResponse({"error": "MCP enhanced features not available"}, status_code=503)
 
     try:
-        db = get_db()
+        def load_history():
+            db = get_db()
+            # All tasks plus summary stats
+            return db.get_all_tasks(limit), db.get_summary_stats()
 
-        # Get all tasks
-        tasks = db.get_all_tasks(limit)
-
-        # Get summary stats
-        stats = db.get_summary_stats()
+        tasks, stats = await analytics_pool.run(load_history, key=("historical", limit))
 
         return JSONResponse({
             "tasks": tasks,
@@ -862,9 +996,8 @@ async def get_decision_analytics(task_id: Optional[str] = None):
         return JSONResponse({"error": "MCP enhanced features not available"}, status_code=503)
 
     try:
-        db = get_db()
-
-        analytics = db.get_decision_analytics(task_id)
+        analytics = await analytics_pool.run(lambda: get_db().get_decision_analytics(task_id),
+                                             key=("decision_analytics", task_id))
 
         return JSONResponse({
             "analytics": analytics,
@@ -881,9 +1014,8 @@ async def get_agent_analytics(agent_type: Optional[str] = None):
         return JSONResponse({"error": "MCP enhanced features not available"}, status_code=503)
 
     try:
-        db = get_db()
-
-        analytics = db.get_agent_analytics(agent_type)
+        analytics = await analytics_pool.run(lambda: get_db().get_agent_analytics(agent_type),
+                                             key=("agent_analytics", agent_type))
 
         return JSONResponse({
             "analytics": analytics,
@@ -900,9 +1032,8 @@ async def get_token_usage_status(task_id: str):
         return JSONResponse({"error": "MCP enhanced features not available"}, status_code=503)
 
     try:
-        mcp_client = get_client()
-
-        token_estimate = mcp_client.estimate_token_usage(task_id)
+        token_estimate = await io_pool.run(lambda: get_client().estimate_token_usage(task_id),
+                                           key=("token_estimate", task_id))
         token_status = get_token_status(token_estimate['estimated_tokens'])
 
         return JSONResponse(token_status)
@@ -917,10 +1048,20 @@ async def get_token_usage_status(task_id: str):
 # Global metrics collector instance
 metrics_collector_task = None
 
+# Background retention for the metrics database
+retention_worker = None
+
 @app.on_event("startup")
 async def startup_event():
     """Start background services on server startup."""
-    global metrics_collector_task
+    global metrics_collector_task, retention_worker
+
+    # Watch subscribed sessions for changes (one loop for all sessions)
+    hub.start()
+
+    # Keep the session index current from filesystem events (stat sweeps otherwise)
+    if monitor.checkpoint_index.start_watching():
+        print("👀 Watching checkpoints for session changes", file=sys.stderr)
 
     if MCP_ENHANCED:
         print("🔄 Starting metrics collector...", file=sys.stderr)
@@ -935,11 +1076,23 @@ async def startup_event():
         except Exception as e:
             print(f"⚠️  Failed to start metrics collector: {e}", file=sys.stderr)
 
+        try:
+            retention_worker = start_retention()
+            print("🗂️  Metrics retention started", file=sys.stderr)
+        except Exception as e:
+            print(f"⚠️  Failed to start metrics retention: {e}", file=sys.stderr)
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Stop background services on server shutdown."""
-    global metrics_collector_task
+    global metrics_collector_task, retention_worker
+
+    await agent_updates.close()
+    await hub.stop()
+    monitor.checkpoint_index.stop_watching()
+    io_pool.shutdown()
+    analytics_pool.shutdown()
 
     if metrics_collector_task:
         print("🛑 Stopping metrics collector...", file=sys.stderr)
@@ -949,6 +1102,11 @@ async def shutdown_event():
         except asyncio.CancelledError:
             pass
 
+    if retention_worker:
+        # The worker finishes its current batch before stopping
+        retention_worker.stop()
+        retention_worker = None
+
 
 def main():
     """Start the livestream server."""
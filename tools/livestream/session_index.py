@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Session Index for Context Foundry Livestream
+In-memory index of checkpoint sessions (checkpoints/ralph/<session>/)
+
+Each session's summary is parsed from state.json and progress.json once
+and then served from memory. Entries are revalidated by a stat signature
+(mtime and size of state.json, progress.json and the COMPLETE marker) so a
+session's files are only re-read after they change.
+
+With watchdog installed, a directory watcher marks changed sessions and
+only those are revalidated; a full stat sweep still runs every
+WATCHED_REVALIDATE_INTERVAL seconds in case an event was missed. Without
+watchdog, the sweep runs at most every REVALIDATE_INTERVAL seconds.
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+# Seconds between stat sweeps without / with a directory watcher
+REVALIDATE_INTERVAL = 2.0
+WATCHED_REVALIDATE_INTERVAL = 60.0
+
+# Files whose changes change a session's summary
+SIGNATURE_FILES = ("state.json", "progress.json", "COMPLETE")
+
+
+def checkpoint_signature(session_dir: Path) -> Tuple:
+    """Cheap change signature for a checkpoint session (stat only, no reads)."""
+    signature = []
+    for name in SIGNATURE_FILES:
+        try:
+            stat = (session_dir / name).stat()
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def load_checkpoint_session(session_dir: Path) -> Optional[Dict[str, Any]]:
+    """
+    Session summary from a checkpoint directory.
+
+    Returns:
+        Session info dict (None if the directory has no state.json or it
+        cannot be read)
+    """
+    state_file = session_dir / "state.json"
+    progress_file = session_dir / "progress.json"
+
+    if not state_file.exists():
+        return None
+
+    try:
+        with open(state_file) as f:
+            state = json.load(f)
+
+        progress = {}
+        if progress_file.exists():
+            with open(progress_file) as f:
+                progress = json.load(f)
+
+        return {
+            "id": session_dir.name,
+            "project": state.get("project_name", "Unknown"),
+            "task": state.get("task_description", ""),
+            "phase": state.get("current_phase", "unknown"),
+            "iterations": state.get("iterations", 0),
+            "start_time": state.get("start_time"),
+            "last_update": state.get("last_iteration_time"),
+            "completed_tasks": len(progress.get("completed", [])),
+            "total_tasks": len(progress.get("completed", []))
+            + len(progress.get("remaining", [])),
+            "is_complete": (session_dir / "COMPLETE").exists(),
+            "source": "checkpoint"
+        }
+
+    except Exception as e:
+        print(f"Error reading session {session_dir.name}: {e}")
+        return None
+
+
+class _CheckpointEventHandler(FileSystemEventHandler):
+    """Marks the session a filesystem event belongs to as changed."""
+
+    def __init__(self, index: 'SessionIndex'):
+        super().__init__()
+        self.index = index
+
+    def on_any_event(self, event):
+        for path in (getattr(event, 'src_path', None), getattr(event, 'dest_path', None)):
+            if path:
+                self.index.invalidate_path(Path(os.fsdecode(path)))
+
+
+class SessionIndex:
+    """Checkpoint session summaries, kept in memory and revalidated by stat signature."""
+
+    def __init__(self, root: Path, revalidate_interval: float = REVALIDATE_INTERVAL,
+                 watched_revalidate_interval: float = WATCHED_REVALIDATE_INTERVAL):
+        """
+        Initialize index (sessions are loaded on first use).
+
+        Args:
+            root: Checkpoints directory (one subdirectory per session)
+            revalidate_interval: Seconds between stat sweeps without a watcher
+            watched_revalidate_interval: Seconds between fallback sweeps with a watcher
+        """
+        self.root = Path(root)
+        self.revalidate_interval = revalidate_interval
+        self.watched_revalidate_interval = watched_revalidate_interval
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Tuple, Optional[Dict[str, Any]]]] = {}
+        self._sessions: List[Dict[str, Any]] = []
+        self._dirty: Set[str] = set()
+        self._last_sweep: Optional[float] = None
+        self._observer = None
+
+        self.sweeps = 0
+        self.reloads = 0
+
+    @property
+    def watching(self) -> bool:
+        return self._observer is not None
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        """
+        Checkpoint session summaries (revalidated as needed, usually from memory).
+
+        Returns:
+            Session info dicts (shared: treat as read-only)
+        """
+        with self._lock:
+            interval = self.watched_revalidate_interval if self.watching else self.revalidate_interval
+            if self._last_sweep is None or time.monotonic() - self._last_sweep >= interval:
+                self._sweep()
+            elif self._dirty:
+                self._revalidate_dirty()
+            return self._sessions
+
+    def invalidate(self, session_id: Optional[str] = None):
+        """Mark one session (or, with no id, the whole index) for revalidation."""
+        with self._lock:
+            if session_id is None:
+                self._last_sweep = None
+            else:
+                self._dirty.add(session_id)
+
+    def invalidate_path(self, path: Path):
+        """Mark the session a changed path under the root belongs to."""
+        try:
+            relative = path.relative_to(self.root)
+        except ValueError:
+            return
+        if relative.parts:
+            self.invalidate(relative.parts[0])
+
+    def _sweep(self):
+        """Stat every session directory, re-reading only those whose files changed"""
+        entries: Dict[str, Tuple[Tuple, Optional[Dict[str, Any]]]] = {}
+        try:
+            with os.scandir(self.root) as it:
+                session_dirs = [Path(entry.path) for entry in it if entry.is_dir()]
+        except OSError:
+            session_dirs = []
+
+        for session_dir in session_dirs:
+            entries[session_dir.name] = self._validated(session_dir)
+
+        self._entries = entries
+        self._dirty.clear()
+        self._last_sweep = time.monotonic()
+        self.sweeps += 1
+        self._rebuild()
+
+    def _revalidate_dirty(self):
+        for session_id in self._dirty:
+            session_dir = self.root / session_id
+            if session_dir.is_dir():
+                self._entries[session_id] = self._validated(session_dir)
+            else:
+                self._entries.pop(session_id, None)
+        self._dirty.clear()
+        self._rebuild()
+
+    def _validated(self, session_dir: Path) -> Tuple[Tuple, Optional[Dict[str, Any]]]:
+        signature = checkpoint_signature(session_dir)
+        cached = self._entries.get(session_dir.name)
+        if cached is not None and cached[0] == signature:
+            return cached
+
+        self.reloads += 1
+        return signature, load_checkpoint_session(session_dir)
+
+    def _rebuild(self):
+        self._sessions = [info for _, info in self._entries.values() if info is not None]
+
+    def start_watching(self) -> bool:
+        """
+        Watch the checkpoints directory for changes (requires watchdog).
+
+        Returns:
+            True if a watcher is running
+        """
+        if self._observer is not None:
+            return True
+        if Observer is None or not self.root.exists():
+            return False
+
+        observer = Observer()
+        observer.schedule(_CheckpointEventHandler(self), str(self.root), recursive=True)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        return True
+
+    def stop_watching(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "watching": self.watching,
+            "sweeps": self.sweeps,
+            "reloads": self.reloads,
+        }
+
+
+__all__ = [
+    'SessionIndex',
+    'checkpoint_signature',
+    'load_checkpoint_session',
+]
@@ -0,0 +1,134 @@
+"""
+Tests for coalesced agent-update ingestion
+"""
+import asyncio
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent_updates import AgentUpdateBuffer, merge_agent_update
+from broadcaster import EventBroadcaster
+
+
+class TestAgentUpdateBuffer:
+    """Test per-agent coalescing before writing and broadcasting."""
+
+    def test_merge_agent_update(self):
+        merged = merge_agent_update(
+            {"agent_id": "a", "status": "active", "progress_percent": 10, "metadata": {"x": 1}},
+            {"agent_id": "a", "progress_percent": 20, "metadata": {"y": 2}},
+        )
+        assert merged == {"agent_id": "a", "status": "active", "progress_percent": 20,
+                          "metadata": {"x": 1, "y": 2}}
+
+    def test_coalesces_updates_within_window(self):
+        writes = []
+        broadcasts = []
+
+        async def write(updates):
+            writes.append(updates)
+
+        async def scenario():
+            buffer = AgentUpdateBuffer(write, broadcasts.append, window=0.05)
+            results = await asyncio.gather(
+                buffer.submit([{"session_id": "s", "agent_id": "builder-1", "progress_percent": 10}]),
+                buffer.submit([{"session_id": "s", "agent_id": "builder-1", "progress_percent": 30},
+                               {"session_id": "s", "agent_id": "builder-2", "status": "active"}]),
+                buffer.submit([{"session_id": "s", "agent_id": "builder-1", "status": "completed"}]),
+            )
+            return buffer, results
+
+        buffer, results = asyncio.run(scenario())
+
+        assert len(writes) == 1
+        assert {update["agent_id"]: update for update in writes[0]}["builder-1"] == {
+            "session_id": "s", "agent_id": "builder-1", "progress_percent": 30, "status": "completed"}
+        assert len(broadcasts) == 2
+        assert results == [2, 2, 2]
+        assert buffer.stats() == {"received": 4, "written": 2, "batches": 1, "pending": 0}
+
+    def test_write_errors_reach_every_submitter(self):
+        broadcasts = []
+
+        async def write(updates):
+            raise RuntimeError("database is locked")
+
+        async def scenario():
+            buffer = AgentUpdateBuffer(write, broadcasts.append, window=0.01)
+            return await asyncio.gather(
+                buffer.submit([{"session_id": "s", "agent_id": "a"}]),
+                buffer.submit([{"session_id": "s", "agent_id": "b"}]),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert broadcasts == []
+
+    def test_close_flushes_pending(self):
+        writes = []
+
+        async def write(updates):
+            writes.append(updates)
+
+        async def scenario():
+            buffer = AgentUpdateBuffer(write, lambda update: None, window=60)
+            submitted = asyncio.create_task(buffer.submit([{"session_id": "s", "agent_id": "a"}]))
+            await asyncio.sleep(0)
+            await buffer.close()
+            return await submitted
+
+        assert asyncio.run(scenario()) == 1
+        assert len(writes) == 1
+
+
+class TestBroadcasterAgentUpdates:
+    """Test the client helper batching agent reports."""
+
+    def test_agent_updates_are_merged_and_batched(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        broadcaster = EventBroadcaster("test-session", enable_recording=False)
+        requests = []
+        monkeypatch.setattr(broadcaster, "_post", lambda path, payload: requests.append((path, payload)) or 200)
+
+        with monkeypatch.context() as held:
+            # Hold the sender so both reports for builder-1 are pending together
+            held.setattr(broadcaster, "_start_worker", lambda: None)
+            broadcaster.agent_update("builder-1", agent_type="Builder", progress_percent=10)
+            broadcaster.agent_update("builder-1", progress_percent=50)
+            broadcaster.agent_update("tester-1", agent_type="Tester", status="active")
+        with broadcaster._lock:
+            broadcaster._start_worker()
+        assert broadcaster.flush(timeout=5)
+        broadcaster.close()
+
+        assert len(requests) == 1
+        path, payload = requests[0]
+        assert path == "/api/agent-updates"
+        updates = {update["agent_id"]: update for update in payload["updates"]}
+        assert updates["builder-1"] == {"session_id": "test-session", "agent_id": "builder-1",
+                                        "agent_type": "Builder", "progress_percent": 50}
+        assert updates["tester-1"]["status"] == "active"
+
+    def test_falls_back_to_single_updates(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        broadcaster = EventBroadcaster("test-session", enable_recording=False)
+        requests = []
+
+        def post(path, payload):
+            requests.append(path)
+            return 404 if path == "/api/agent-updates" else 200
+
+        monkeypatch.setattr(broadcaster, "_post", post)
+        with monkeypatch.context() as held:
+            held.setattr(broadcaster, "_start_worker", lambda: None)
+            broadcaster.agent_update("builder-1", status="active")
+            broadcaster.agent_update("builder-2", status="active")
+        with broadcaster._lock:
+            broadcaster._start_worker()
+        assert broadcaster.flush(timeout=5)
+        broadcaster.close()
+
+        assert requests == ["/api/agent-updates", "/api/agent-update", "/api/agent-update"]
@@ -0,0 +1,168 @@
+"""
+Tests for non-blocking, batched event emission
+"""
+import threading
+import time
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import broadcaster as broadcaster_module
+from broadcaster import EventBroadcaster
+
+
+class RecordingTransport:
+    """Stands in for the HTTP POST; can hold requests to simulate a slow server."""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.requests = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, path, payload):
+        self.release.wait(5)
+        self.requests.append((path, payload))
+        return self.status
+
+
+class TestEventBroadcaster:
+    """Test the background emission pipeline."""
+
+    def setup_method(self):
+        self.transport = RecordingTransport()
+
+    def make_broadcaster(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        broadcaster = EventBroadcaster("test-session")
+        broadcaster._post = self.transport
+        return broadcaster
+
+    def test_events_recorded_and_sent_in_batches(self, tmp_path, monkeypatch):
+        broadcaster = self.make_broadcaster(tmp_path, monkeypatch)
+        self.transport.release.clear()
+
+        for i in range(10):
+            broadcaster.iteration_start(i)
+        self.transport.release.set()
+        assert broadcaster.flush()
+
+        events = broadcaster.load_events()
+        assert [e["sequence"] for e in events] == list(range(1, 11))
+
+        sent = [e for path, payload in self.transport.requests for e in payload["events"]]
+        assert [e["sequence"] for e in sent] == list(range(1, 11))
+        assert all(path.endswith("/batch") for path, _ in self.transport.requests)
+        assert len(self.transport.requests) < 10  # batched behind the first request
+
+        broadcaster.close()
+
+    def test_emit_does_not_wait_for_server(self, tmp_path, monkeypatch):
+        broadcaster = self.make_broadcaster(tmp_path, monkeypatch)
+        self.transport.release.clear()
+
+        start = time.monotonic()
+        for i in range(100):
+            broadcaster.log_line(f"line {i}")
+        assert time.monotonic() - start < 0.5
+
+        self.transport.release.set()
+        broadcaster.close()
+
+    def test_low_priority_events_coalesced_and_dropped(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(broadcaster_module, "LOW_PRIORITY_WATERMARK", 5)
+        broadcaster = self.make_broadcaster(tmp_path, monkeypatch)
+        self.transport.release.clear()
+
+        broadcaster.phase_change("scout")  # taken by the worker, held in flight
+        time.sleep(0.1)
+        for percent in (10, 20, 30):
+            broadcaster.context_update(percent, percent * 1000)
+        for i in range(10):
+            broadcaster.log_line(f"line {i}")
+        broadcaster.task_complete("Setup", 40)
+
+        self.transport.release.set()
+        broadcaster.close()
+
+        sent = [e for _, payload in self.transport.requests for e in payload["events"]]
+        context_updates = [e["data"]["percent"] for e in sent if e["type"] == "context_update"]
+        assert context_updates == [30]
+        assert sum(1 for e in sent if e["type"] == "log_line") == 4
+        assert sent[-1]["type"] == "task_complete"
+
+        # The recording keeps everything
+        lines = (tmp_path / "logs/events/test-session/events.jsonl").read_text().splitlines()
+        assert len(lines) == 15
+        assert broadcaster.stats()["dropped"] == 2 + 6
+
+    def test_coalesced_update_survives_watermark(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(broadcaster_module, "LOW_PRIORITY_WATERMARK", 3)
+        broadcaster = self.make_broadcaster(tmp_path, monkeypatch)
+        self.transport.release.clear()
+
+        broadcaster.phase_change("scout")  # taken by the worker, held in flight
+        time.sleep(0.1)
+        broadcaster.context_update(10, 10000)
+        for i in range(5):
+            broadcaster.task_complete(f"Task {i}", 10)
+        # Over the watermark: the pending context update is replaced, not lost
+        broadcaster.context_update(20, 20000)
+
+        self.transport.release.set()
+        broadcaster.close()
+
+        sent = [e for _, payload in self.transport.requests for e in payload["events"]]
+        assert [e["data"]["percent"] for e in sent if e["type"] == "context_update"] == [20]
+        sequences = [e["sequence"] for e in sent]
+        assert sequences == sorted(sequences)
+
+    def test_close_unregisters_exit_handler(self, tmp_path, monkeypatch):
+        handlers = []
+
+        class FakeAtexit:
+            register = staticmethod(handlers.append)
+            unregister = staticmethod(lambda fn: handlers.remove(fn) if fn in handlers else None)
+
+        monkeypatch.setattr(broadcaster_module, "atexit", FakeAtexit)
+        broadcaster = self.make_broadcaster(tmp_path, monkeypatch)
+        broadcaster.iteration_start(1)
+        assert handlers == [broadcaster.close]
+
+        broadcaster.close()
+        assert handlers == []
+
+    def test_falls_back_to_single_posts(self, tmp_path, monkeypatch):
+        broadcaster = self.make_broadcaster(tmp_path, monkeypatch)
+
+        def old_server(path, payload):
+            self.transport.requests.append((path, payload))
+            return 404 if path.endswith("/batch") else 200
+
+        broadcaster._post = old_server
+        broadcaster.iteration_start(1)
+        broadcaster.iteration_start(2)
+        broadcaster.close()
+
+        single = [payload for path, payload in self.transport.requests if not path.endswith("/batch")]
+        assert [payload["sequence"] for payload in single] == [1, 2]
+        assert broadcaster.stats()["sent"] == 2
+
+    def test_server_failure_backs_off(self, tmp_path, monkeypatch):
+        broadcaster = self.make_broadcaster(tmp_path, monkeypatch)
+
+        def down(path, payload):
+            self.transport.requests.append(path)
+            raise ConnectionError("refused")
+
+        broadcaster._post = down
+        broadcaster.iteration_start(1)
+        broadcaster.flush()
+        broadcaster.iteration_start(2)
+        broadcaster.close()
+
+        assert len(self.transport.requests) == 1
+        assert broadcaster.stats()["dropped"] == 2
+        assert len(broadcaster.load_events()) == 2
@@ -0,0 +1,162 @@
+"""
+Tests for reverse-seeking log tails and log following
+"""
+import os
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import logtail
+from logtail import tail_lines, TailCache, LogFollower
+
+
+def write_lines(path, start, count, mode="a"):
+    with open(path, mode) as f:
+        for i in range(start, start + count):
+            f.write(f"line {i} " + "x" * (i % 50) + "\n")
+
+
+def expected(start, count):
+    return [f"line {i} " + "x" * (i % 50) + "\n" for i in range(start, start + count)]
+
+
+class TestTailLines:
+    """Test reading backwards from the end of a file."""
+
+    def test_matches_readlines(self, tmp_path):
+        log_file = tmp_path / "session.log"
+        write_lines(log_file, 0, 5000)
+
+        for count in (1, 50, 4999, 5000, 6000):
+            lines, complete = tail_lines(log_file, count, block_size=1024)
+            assert lines == log_file.read_text().splitlines(keepends=True)[-count:]
+            assert complete == (count >= 5000)
+
+    def test_reads_only_the_end(self, tmp_path, monkeypatch):
+        log_file = tmp_path / "session.log"
+        write_lines(log_file, 0, 20000)
+
+        reads = []
+        real_open = open
+
+        class CountingFile:
+            def __init__(self, f):
+                self.f = f
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self.f.close()
+
+            def seek(self, *args):
+                return self.f.seek(*args)
+
+            def read(self, size):
+                data = self.f.read(size)
+                reads.append(len(data))
+                return data
+
+        monkeypatch.setattr(logtail, "open", lambda path, mode: CountingFile(real_open(path, mode)),
+                            raising=False)
+        lines, _ = tail_lines(log_file, 50, block_size=4096)
+
+        assert lines == expected(19950, 50)
+        assert sum(reads) < 3 * 4096 < log_file.stat().st_size
+
+    def test_partial_last_line_and_empty_file(self, tmp_path):
+        log_file = tmp_path / "session.log"
+        log_file.write_text("one\ntwo\nthr")
+        assert tail_lines(log_file, 2)[0] == ["two\n", "thr"]
+
+        log_file.write_text("")
+        assert tail_lines(log_file, 10) == ([], True)
+
+
+class TestTailCache:
+    """Test (inode, size) revalidation."""
+
+    def test_hit_append_and_rewrite(self, tmp_path):
+        log_file = tmp_path / "session.log"
+        write_lines(log_file, 0, 1000)
+        cache = TailCache()
+
+        assert cache.tail(log_file, 50)[0] == expected(950, 50)
+        assert cache.tail(log_file, 20)[0] == expected(980, 20)
+        assert cache.stats()["hits"] == 1
+
+        write_lines(log_file, 1000, 10)
+        lines, size = cache.tail(log_file, 50)
+        assert lines == expected(960, 50)
+        assert size == log_file.stat().st_size
+        assert cache.stats()["appends"] == 1
+
+        # Replaced file: new inode, recomputed
+        replacement = tmp_path / "new.log"
+        write_lines(replacement, 0, 3)
+        os.replace(replacement, log_file)
+        assert cache.tail(log_file, 50)[0] == expected(0, 3)
+        assert cache.stats()["misses"] == 2
+
+    def test_deeper_request_recomputes(self, tmp_path):
+        log_file = tmp_path / "session.log"
+        write_lines(log_file, 0, 1000)
+        cache = TailCache()
+
+        cache.tail(log_file, 10)
+        assert cache.tail(log_file, 100)[0] == expected(900, 100)
+        assert cache.stats()["misses"] == 2
+
+    def test_small_file_grows_past_first_request(self, tmp_path):
+        log_file = tmp_path / "session.log"
+        write_lines(log_file, 0, 5)
+        cache = TailCache()
+
+        cache.tail(log_file, 3)
+        cache.tail(log_file, 10)  # whole file is cached
+        write_lines(log_file, 5, 20)
+        assert cache.tail(log_file, 10)[0] == expected(15, 10)
+
+
+class TestLogFollower:
+    """Test following appended lines."""
+
+    def test_start_then_poll(self, tmp_path):
+        log_file = tmp_path / "session.log"
+        write_lines(log_file, 0, 100)
+        follower = LogFollower(log_file)
+
+        assert follower.start(5) == expected(95, 5)
+        assert follower.poll() == []
+
+        write_lines(log_file, 100, 3)
+        with open(log_file, "a") as f:
+            f.write("partial")
+        assert follower.poll() == expected(100, 3)
+
+        with open(log_file, "a") as f:
+            f.write(" done\n")
+        assert follower.poll() == ["partial done\n"]
+
+    def test_partial_line_at_start_is_not_split(self, tmp_path):
+        log_file = tmp_path / "session.log"
+        log_file.write_text("one\ntwo\nthr")
+        follower = LogFollower(log_file)
+
+        assert follower.start(10) == ["one\n", "two\n"]
+        with open(log_file, "a") as f:
+            f.write("ee\n")
+        assert follower.poll() == ["three\n"]
+
+    def test_follows_rotation(self, tmp_path):
+        log_file = tmp_path / "session.log"
+        write_lines(log_file, 0, 10)
+        follower = LogFollower(log_file)
+        follower.start(0)
+
+        rotated = tmp_path / "rotated.log"
+        write_lines(rotated, 500, 2)
+        os.replace(rotated, log_file)
+        assert follower.poll() == expected(500, 2)
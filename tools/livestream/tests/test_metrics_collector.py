@@ -0,0 +1,195 @@
+"""
+Tests for event-driven metrics collection
+"""
+import asyncio
+import json
+import os
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import metrics_collector
+from metrics_collector import ContextWatchManager, MetricsCollector, classify_context_file
+from metrics_db import MetricsDatabase
+
+
+class FakeMCPClient:
+    """MCP client returning a fixed list of active tasks."""
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+
+    def list_active_tasks(self):
+        return self.tasks
+
+
+class FakeObserver:
+    """Records scheduled watch paths instead of watching."""
+
+    def __init__(self):
+        self.scheduled = {}
+
+    def schedule(self, handler, path, recursive=False):
+        self.scheduled[path] = recursive
+        return path
+
+    def unschedule(self, watch):
+        del self.scheduled[watch]
+
+    def start(self):
+        pass
+
+
+def make_build(tmp_path):
+    context_dir = tmp_path / "build" / ".context-foundry"
+    (context_dir / "feedback").mkdir(parents=True)
+    (context_dir / "patterns").mkdir()
+    return context_dir
+
+
+def make_collector(tmp_path, context_dir):
+    task = {"task_id": "task-1", "status": "running",
+            "working_directory": str(context_dir.parent)}
+    db = MetricsDatabase(str(tmp_path / "metrics.db"))
+    return MetricsCollector(mcp_client=FakeMCPClient([task]), db=db)
+
+
+def write_feedback(context_dir, *issues):
+    (context_dir / "feedback" / "build-feedback-1.json").write_text(json.dumps({
+        "timestamp": "2025-01-01T10:00:00",
+        "issues_found": [{"id": f"i{n}", "issue": issue, "detected_in_phase": "Test"}
+                         for n, issue in enumerate(issues)],
+    }))
+
+
+class TestClassifyContextFile:
+    """Test mapping changed paths to parsers."""
+
+    def test_known_files(self, tmp_path):
+        context_dir = tmp_path / ".context-foundry"
+        assert classify_context_file(context_dir / "current-phase.json") == ("phase", context_dir)
+        assert classify_context_file(context_dir / "build-log.md")[0] == "build_log"
+        assert classify_context_file(context_dir / "test-results-iteration-2.md")[0] == "test_results"
+        assert classify_context_file(context_dir / "feedback" / "build-feedback-x.json")[0] == "feedback"
+        assert classify_context_file(context_dir / "patterns" / "common-issues.json")[0] == "patterns"
+
+    def test_other_files(self, tmp_path):
+        context_dir = tmp_path / ".context-foundry"
+        assert classify_context_file(context_dir / "notes.md") is None
+        assert classify_context_file(context_dir / "sub" / "current-phase.json") is None
+        assert classify_context_file(tmp_path / "current-phase.json") is None
+
+
+class TestMetricsCollector:
+    """Test per-file parsing and the reconciliation sweep."""
+
+    def test_sweep_parses_only_changed_files(self, tmp_path):
+        context_dir = make_build(tmp_path)
+        write_feedback(context_dir, "missing import")
+        (context_dir / "test-results-iteration-1.md").write_text("PASS\nPASS\nFAIL\n")
+        collector = make_collector(tmp_path, context_dir)
+
+        asyncio.run(collector.collect_metrics())
+        assert collector.files_parsed == 2
+        iterations = collector.db.get_test_iterations("task-1")
+        assert [(t["iteration_number"], t["tests_passed"], t["tests_failed"]) for t in iterations] == [(1, 2, 1)]
+
+        # Nothing changed: the next sweep reads no files
+        asyncio.run(collector.collect_metrics())
+        assert collector.files_parsed == 2
+        assert collector.sweeps == 2
+
+    def test_file_event_runs_one_parser(self, tmp_path):
+        context_dir = make_build(tmp_path)
+        collector = make_collector(tmp_path, context_dir)
+        asyncio.run(collector.collect_metrics())
+
+        write_feedback(context_dir, "missing import")
+        feedback_file = context_dir / "feedback" / "build-feedback-1.json"
+        asyncio.run(collector.handle_file_change(str(feedback_file)))
+        assert collector.files_parsed == 1
+        assert len(collector.db.get_decisions("task-1")) == 1
+
+        # A rewritten feedback file records only its new issues
+        write_feedback(context_dir, "missing import", "wrong port")
+        os.utime(feedback_file, ns=(0, 1))
+        asyncio.run(collector.handle_file_change(str(feedback_file)))
+        decisions = collector.db.get_decisions("task-1")
+        assert [d["decision_description"] for d in decisions] == ["missing import", "wrong port"]
+        assert collector.events_handled == 2
+
+    def test_events_for_untracked_builds_are_ignored(self, tmp_path):
+        context_dir = make_build(tmp_path)
+        collector = make_collector(tmp_path, context_dir)
+        write_feedback(context_dir, "missing import")
+
+        asyncio.run(collector.handle_file_change(str(context_dir / "feedback" / "build-feedback-1.json")))
+        assert collector.files_parsed == 0
+
+    def test_completed_task_is_untracked(self, tmp_path):
+        context_dir = make_build(tmp_path)
+        collector = make_collector(tmp_path, context_dir)
+        (context_dir / "test-results-iteration-1.md").write_text("PASS\n")
+        asyncio.run(collector.collect_metrics())
+
+        collector.mcp_client.tasks[0]["status"] = "completed"
+        asyncio.run(collector.collect_metrics())
+        assert collector.tracked_tasks == set()
+        assert collector.context_dirs == {}
+        assert collector.file_signatures == {}
+
+    def test_watches_follow_tracked_builds(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(metrics_collector, "DISCOVERY_ROOTS", [])
+        context_dir = make_build(tmp_path)
+        (context_dir.parent / "node_modules").mkdir()
+        collector = make_collector(tmp_path, context_dir)
+        observer = FakeObserver()
+        collector.watch_manager = ContextWatchManager(collector._on_context_file_change, observer=observer)
+        collector.watch_manager.start()
+
+        asyncio.run(collector.collect_metrics())
+        assert observer.scheduled == {str(context_dir): False,
+                                      str(context_dir / "feedback"): False,
+                                      str(context_dir / "patterns"): False}
+
+        collector.mcp_client.tasks[0]["status"] = "completed"
+        asyncio.run(collector.collect_metrics())
+        assert observer.scheduled == {}
+
+    def test_finished_live_session_is_untracked(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(metrics_collector, "TRACK_TOKEN_USAGE", False)
+        monkeypatch.setattr(metrics_collector, "TRACK_AGENT_PERFORMANCE", False)
+        context_dir = make_build(tmp_path)
+        collector = make_collector(tmp_path, context_dir)
+        phase_file = context_dir / "current-phase.json"
+
+        phase_file.write_text(json.dumps({"session_id": "live-1", "status": "running"}))
+        asyncio.run(collector.handle_file_change(str(phase_file)))
+        assert collector.tracked_tasks == {"live-1"}
+        assert collector.context_dirs == {str(context_dir): "live-1"}
+
+        phase_file.write_text(json.dumps({"session_id": "live-1", "status": "completed"}))
+        asyncio.run(collector.handle_file_change(str(phase_file)))
+        assert collector.tracked_tasks == set()
+        assert collector.context_dirs == {}
+        assert collector.db.get_task("live-1")["status"] == "completed"
+
+    def test_sweep_discovers_builds_outside_mcp(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(metrics_collector, "DISCOVERY_ROOTS", [tmp_path / "homelab"])
+        collector = MetricsCollector(mcp_client=FakeMCPClient([]),
+                                     db=MetricsDatabase(str(tmp_path / "metrics.db")))
+        observer = FakeObserver()
+        collector.watch_manager = ContextWatchManager(collector._on_context_file_change, observer=observer)
+        collector.watch_manager.start()
+
+        asyncio.run(collector.collect_metrics())
+        assert observer.scheduled == {}
+
+        context_dir = tmp_path / "homelab" / "todo-app" / ".context-foundry"
+        context_dir.mkdir(parents=True)
+        asyncio.run(collector.collect_metrics())
+        assert str(context_dir) in observer.scheduled
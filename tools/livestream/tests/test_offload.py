@@ -0,0 +1,126 @@
+"""
+Tests for the blocking-work thread pools
+"""
+import asyncio
+import threading
+import time
+from pathlib import Path
+import sys
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from offload import BlockingPool
+
+
+class SlowQuery:
+    """Blocking callable that counts calls and tracks peak concurrency."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, value):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return {"value": value}
+
+
+class TestBlockingPool:
+    """Test offloading and request coalescing."""
+
+    def test_runs_off_the_event_loop(self):
+        pool = BlockingPool("test-io", 2)
+
+        async def scenario():
+            loop_thread = threading.get_ident()
+            worker_thread = await pool.run(threading.get_ident)
+            return loop_thread, worker_thread
+
+        loop_thread, worker_thread = asyncio.run(scenario())
+        pool.shutdown()
+        assert loop_thread != worker_thread
+
+    def test_coalesces_identical_requests(self):
+        pool = BlockingPool("test-io", 4)
+        query = SlowQuery()
+
+        async def scenario():
+            return await asyncio.gather(*(pool.run(query, "a", key=("status", "a")) for _ in range(5)))
+
+        results = asyncio.run(scenario())
+        pool.shutdown()
+
+        assert query.calls == 1
+        assert all(result is results[0] for result in results)
+        assert pool.stats()["coalesced"] == 4
+
+    def test_distinct_keys_and_unkeyed_calls_run_separately(self):
+        pool = BlockingPool("test-io", 4)
+        query = SlowQuery()
+
+        async def scenario():
+            await asyncio.gather(pool.run(query, "a", key="a"), pool.run(query, "b", key="b"),
+                                 pool.run(query, "a"), pool.run(query, "a"))
+            # A finished key is not cached: the next request recomputes
+            await pool.run(query, "a", key="a")
+
+        asyncio.run(scenario())
+        pool.shutdown()
+        assert query.calls == 5
+
+    def test_bounded_concurrency(self):
+        pool = BlockingPool("test-analytics", 2)
+        query = SlowQuery(delay=0.02)
+
+        async def scenario():
+            await asyncio.gather(*(pool.run(query, i) for i in range(8)))
+
+        asyncio.run(scenario())
+        pool.shutdown()
+        assert query.calls == 8
+        assert query.peak <= 2
+
+    def test_errors_reach_every_waiter_and_clear_the_key(self):
+        pool = BlockingPool("test-io", 2)
+
+        def failing():
+            time.sleep(0.02)
+            raise ValueError("database is locked")
+
+        async def scenario():
+            results = await asyncio.gather(pool.run(failing, key="k"), pool.run(failing, key="k"),
+                                           return_exceptions=True)
+            assert all(isinstance(result, ValueError) for result in results)
+            return await pool.run(lambda: "recovered", key="k")
+
+        assert asyncio.run(scenario()) == "recovered"
+        pool.shutdown()
+
+    def test_cancelled_waiter_does_not_cancel_shared_work(self):
+        pool = BlockingPool("test-io", 2)
+        query = SlowQuery(delay=0.05)
+
+        async def scenario():
+            first = asyncio.create_task(pool.run(query, "a", key="a"))
+            await asyncio.sleep(0)
+            second = asyncio.create_task(pool.run(query, "a", key="a"))
+            await asyncio.sleep(0)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(scenario()) == {"value": "a"}
+        pool.shutdown()
+        assert query.calls == 1
@@ -0,0 +1,307 @@
+"""
+Tests for the livestream session publisher (WebSocket fan-out)
+"""
+import asyncio
+import json
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from publisher import SessionHub, SessionPublisher, apply_patch, diff_documents
+
+
+class FakeWebSocket:
+    """Collects frames; optionally blocks on send to simulate a slow client."""
+
+    def __init__(self, blocked: bool = False):
+        self.frames = []
+        self.closed_with = None
+        self.unblock = asyncio.Event()
+        if not blocked:
+            self.unblock.set()
+
+    async def send_text(self, frame):
+        await self.unblock.wait()
+        self.frames.append(json.loads(frame))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+class CountingStatus:
+    """Status function that counts how often status is computed."""
+
+    def __init__(self):
+        self.calls = 0
+        self.phase = "Scout"
+        self.complete = False
+
+    def __call__(self, session_id):
+        self.calls += 1
+        return {"id": session_id, "phase": self.phase, "is_complete": self.complete,
+                "notes": [f"note {i}" for i in range(50)]}
+
+
+async def drain():
+    """Let queued tasks run."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestSessionPublisher:
+    """Test status fan-out to subscribers."""
+
+    def test_status_computed_once_for_all_viewers(self):
+        async def scenario():
+            status = CountingStatus()
+            hub = SessionHub(status)
+            sockets = [FakeWebSocket() for _ in range(10)]
+            subscribers = [await hub.subscribe("s1", ws) for ws in sockets]
+            senders = [asyncio.create_task(sub.run()) for sub in subscribers]
+
+            status.phase = "Builder"
+            hub.notify("s1")
+            hub.notify("s1")  # coalesced with the first
+            await drain()
+
+            assert status.calls == 2  # initial snapshot + one refresh
+            for ws in sockets:
+                assert [f["data"]["phase"] for f in ws.frames] == ["Scout", "Builder"]
+
+            for sub in subscribers:
+                hub.unsubscribe("s1", sub)
+            await asyncio.gather(*senders)
+            assert hub.subscriber_count() == 0
+            assert "s1" not in hub.publishers
+
+        asyncio.run(scenario())
+
+    def test_unchanged_status_not_resent(self):
+        async def scenario():
+            status = CountingStatus()
+            publisher = SessionPublisher("s1", status)
+            ws = FakeWebSocket()
+            sub = await publisher.subscribe(ws)
+            sender = asyncio.create_task(sub.run())
+
+            assert await publisher.refresh() is False
+            await drain()
+            assert len(ws.frames) == 1
+
+            publisher.unsubscribe(sub)
+            await sender
+
+        asyncio.run(scenario())
+
+    def test_slow_consumer_dropped(self):
+        async def scenario():
+            publisher = SessionPublisher("s1", CountingStatus())
+            fast, slow = FakeWebSocket(), FakeWebSocket(blocked=True)
+            fast_sub = await publisher.subscribe(fast)
+            slow_sub = await publisher.subscribe(slow, max_queue=2)
+            senders = [asyncio.create_task(fast_sub.run()), asyncio.create_task(slow_sub.run())]
+
+            for i in range(5):
+                publisher.publish({"type": "log", "data": f"line {i}"})
+                await drain()
+
+            assert slow_sub not in publisher.subscribers
+            assert publisher.dropped_count == 1
+            assert len(fast.frames) == 6
+
+            slow.unblock.set()
+            publisher.unsubscribe(fast_sub)
+            await asyncio.gather(*senders)
+            assert slow.closed_with == 1013
+
+        asyncio.run(scenario())
+
+    def test_completion_closes_subscribers(self):
+        async def scenario():
+            status = CountingStatus()
+            hub = SessionHub(status)
+            ws = FakeWebSocket()
+            sub = await hub.subscribe("s1", ws)
+            sender = asyncio.create_task(sub.run())
+
+            status.complete = True
+            hub.notify("s1")
+            await asyncio.wait_for(sender, 1)
+
+            assert [f["type"] for f in ws.frames] == ["status", "status", "complete"]
+
+        asyncio.run(scenario())
+
+    def test_watcher_refreshes_on_signature_change(self):
+        async def scenario():
+            status = CountingStatus()
+            signature = {"value": 1}
+            publisher = SessionPublisher("s1", status, lambda session_id: signature["value"])
+            sub = await publisher.subscribe(FakeWebSocket())
+
+            publisher.check()  # first signature observed
+            await drain()
+            publisher.check()  # unchanged, status still fresh
+            await drain()
+            assert status.calls == 2
+
+            signature["value"] = 2
+            publisher.check()
+            await drain()
+            assert status.calls == 3
+
+            publisher.unsubscribe(sub)
+
+        asyncio.run(scenario())
+
+
+class TestStatusPatches:
+    """Test sequence-numbered patch updates and resync."""
+
+    def test_diff_and_apply_round_trip(self):
+        old = {"phase": "Scout", "tasks": {"completed": ["a"], "total": 3},
+               "notes": ["x", "y"], "a/b": 1, "gone": True}
+        new = {"phase": "Builder", "tasks": {"completed": ["a", "b"], "total": 3},
+               "notes": ["y"], "a/b": 2, "added": {"k": None}}
+
+        ops = diff_documents(old, new)
+
+        assert {"op": "add", "path": "/tasks/completed/-", "value": "b"} in ops
+        assert {"op": "replace", "path": "/a~1b", "value": 2} in ops
+        assert apply_patch(json.loads(json.dumps(old)), ops) == new
+        assert diff_documents(new, new) == []
+
+    def test_patch_subscriber_reconstructs_status(self):
+        async def scenario():
+            status = CountingStatus()
+            publisher = SessionPublisher("s1", status)
+            legacy_ws, patch_ws = FakeWebSocket(), FakeWebSocket()
+            legacy = await publisher.subscribe(legacy_ws)
+            patched = await publisher.subscribe(patch_ws, patches=True)
+            senders = [asyncio.create_task(legacy.run()), asyncio.create_task(patched.run())]
+
+            status.phase = "Builder"
+            await publisher.refresh()
+            publisher.publish({"type": "phase_update", "data": {}}, legacy_only=True)
+            await drain()
+
+            assert [f["type"] for f in legacy_ws.frames] == ["status", "status", "phase_update"]
+            assert [f["type"] for f in patch_ws.frames] == ["status", "patch"]
+
+            snapshot, patch = patch_ws.frames
+            assert (snapshot["seq"], patch["base"], patch["seq"]) == (1, 1, 2)
+            assert apply_patch(snapshot["data"], patch["ops"]) == legacy_ws.frames[1]["data"]
+
+            publisher.unsubscribe(legacy)
+            publisher.unsubscribe(patched)
+            await asyncio.gather(*senders)
+
+        asyncio.run(scenario())
+
+    def test_periodic_snapshot(self, monkeypatch):
+        import publisher as publisher_module
+        monkeypatch.setattr(publisher_module, "SNAPSHOT_EVERY", 2)
+
+        async def scenario():
+            status = CountingStatus()
+            publisher = SessionPublisher("s1", status)
+            ws = FakeWebSocket()
+            sub = await publisher.subscribe(ws, patches=True)
+            sender = asyncio.create_task(sub.run())
+
+            for i in range(3):
+                status.phase = f"Phase {i}"
+                await publisher.refresh()
+            await drain()
+
+            assert [f["type"] for f in ws.frames] == ["status", "patch", "patch", "status"]
+
+            publisher.unsubscribe(sub)
+            await sender
+
+        asyncio.run(scenario())
+
+    def test_reconnect_replays_or_snapshots(self):
+        async def scenario():
+            status = CountingStatus()
+            hub = SessionHub(status)
+            keeper = await hub.subscribe("s1", FakeWebSocket())  # keeps the publisher alive
+            for i in range(3):
+                status.phase = f"Phase {i}"
+                await hub.get("s1").refresh()
+
+            epoch = hub.get("s1").epoch
+
+            # Reconnect after seq 2: only patches 3 and 4 are replayed
+            ws = FakeWebSocket()
+            sub = await hub.subscribe("s1", ws, patches=True, since=2, epoch=epoch)
+            # Unknown sequence: full snapshot
+            ws_old = FakeWebSocket()
+            sub_old = await hub.subscribe("s1", ws_old, patches=True, since=99, epoch=epoch)
+            # Explicit resync request: snapshot
+            assert hub.handle_client_message("s1", sub, {"type": "resync"})
+
+            for subscriber in (keeper, sub, sub_old):
+                hub.unsubscribe("s1", subscriber)
+            await asyncio.gather(sub.run(), sub_old.run())
+
+            assert [(f["type"], f["seq"]) for f in ws.frames] == [("patch", 3), ("patch", 4), ("status", 4)]
+            assert [(f["type"], f["seq"]) for f in ws_old.frames] == [("status", 4)]
+            assert {f["epoch"] for f in ws.frames} == {epoch}
+
+        asyncio.run(scenario())
+
+    def test_concurrent_first_subscribers_share_publisher(self):
+        async def scenario():
+            counting = CountingStatus()
+            gate = asyncio.Event()
+
+            async def slow_status(session_id):
+                await gate.wait()
+                return counting(session_id)
+
+            hub = SessionHub(slow_status)
+            first = asyncio.create_task(hub.subscribe("s1", FakeWebSocket()))
+            second = asyncio.create_task(hub.subscribe("s1", FakeWebSocket()))
+            await drain()
+            gate.set()
+            sub1 = await first
+
+            # The first viewer leaves while the second is still subscribing
+            hub.unsubscribe("s1", sub1)
+            sub2 = await second
+
+            publisher = hub.publishers["s1"]
+            assert sub2 in publisher.subscribers
+            assert counting.calls == 1
+            assert publisher.seq == 1
+
+            hub.unsubscribe("s1", sub2)
+            assert "s1" not in hub.publishers
+
+        asyncio.run(scenario())
+
+    def test_reconnect_to_new_publisher_snapshots(self):
+        async def scenario():
+            status = CountingStatus()
+            hub = SessionHub(status)
+            ws = FakeWebSocket()
+            sub = await hub.subscribe("s1", ws, patches=True)
+            hub.unsubscribe("s1", sub)
+            await sub.run()
+            epoch, seq = ws.frames[-1]["epoch"], ws.frames[-1]["seq"]
+
+            # Last viewer left: the next publisher counts from 1 again
+            status.phase = "Builder"
+            ws2 = FakeWebSocket()
+            sub2 = await hub.subscribe("s1", ws2, patches=True, since=seq, epoch=epoch)
+            hub.unsubscribe("s1", sub2)
+            await sub2.run()
+
+            assert [(f["type"], f["seq"]) for f in ws2.frames] == [("status", 1)]
+            assert ws2.frames[0]["epoch"] != epoch
+            assert ws2.frames[0]["data"]["phase"] == "Builder"
+
+        asyncio.run(scenario())
@@ -0,0 +1,311 @@
+"""
+Tests for indexed event replay
+"""
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import replay as replay_module
+from replay import EventIndex, EventReplay, pace_events, serve_replay
+
+
+START = datetime(2025, 1, 1, 10, 0, 0)
+
+
+def write_events(path, first, count, start=START):
+    """Append events first..first+count-1, one second apart."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        for sequence in range(first, first + count):
+            event = {
+                "type": "log_line",
+                "session_id": "test-session",
+                "timestamp": (start + timedelta(seconds=sequence)).isoformat(),
+                "sequence": sequence,
+                "data": {"line": f"line {sequence}", "sequence": -1},
+            }
+            f.write(json.dumps(event) + "\n")
+
+
+class TestEventIndex:
+    """Test the sparse offset index."""
+
+    def test_builds_sparse_index(self, tmp_path):
+        events_file = tmp_path / "events.jsonl"
+        write_events(events_file, 1, 100)
+
+        index = EventIndex(events_file, interval=10).refresh()
+
+        assert index.count == 100
+        assert len(index.entries) == 10
+        assert (index.first_sequence, index.last_sequence) == (1, 100)
+        assert index.index_file.exists()
+
+        with open(events_file, "rb") as f:
+            for sequence, _, offset in index.entries:
+                f.seek(offset)
+                assert json.loads(f.readline())["sequence"] == sequence
+
+    def test_extends_incrementally_and_persists(self, tmp_path, monkeypatch):
+        events_file = tmp_path / "events.jsonl"
+        write_events(events_file, 1, 50)
+        EventIndex(events_file, interval=10).refresh()
+
+        write_events(events_file, 51, 50)
+        scanned = []
+        original = replay_module._event_position
+        monkeypatch.setattr(replay_module, "_event_position",
+                            lambda line: scanned.append(line) or original(line))
+
+        # A fresh instance loads the saved index and scans only the new lines
+        index = EventIndex(events_file, interval=10).refresh()
+
+        assert len(scanned) == 50
+        assert index.count == 100
+        assert len(index.entries) == 10
+
+    def test_partial_line_is_not_indexed(self, tmp_path):
+        events_file = tmp_path / "events.jsonl"
+        write_events(events_file, 1, 5)
+        with open(events_file, "a") as f:
+            f.write('{"sequence": 6, "timestamp": "2025')
+
+        index = EventIndex(events_file, interval=1).refresh()
+        assert index.count == 5
+        assert index.size < events_file.stat().st_size
+
+    def test_rebuilds_after_truncation(self, tmp_path):
+        events_file = tmp_path / "events.jsonl"
+        write_events(events_file, 1, 50)
+        EventIndex(events_file, interval=10).refresh()
+
+        events_file.write_text("")
+        write_events(events_file, 1, 5)
+        index = EventIndex(events_file, interval=10).refresh()
+
+        assert index.count == 5
+        assert index.last_sequence == 5
+
+    def test_seek_offset(self, tmp_path):
+        events_file = tmp_path / "events.jsonl"
+        write_events(events_file, 1, 100)
+        index = EventIndex(events_file, interval=10).refresh()
+
+        assert index.seek_offset(sequence=35) == index.entries[3][2]
+        assert index.seek_offset(sequence=1) == 0
+        assert index.seek_offset(timestamp=(START + timedelta(seconds=72)).isoformat()) == index.entries[7][2]
+
+
+class TestEventReplay:
+    """Test reading events from a sequence or time point."""
+
+    def test_iter_from_sequence(self, tmp_path):
+        events_file = tmp_path / "events.jsonl"
+        write_events(events_file, 1, 1000)
+
+        events = list(EventReplay(events_file, interval=64).iter_events(since_sequence=500, limit=3))
+        assert [event["sequence"] for event in events] == [500, 501, 502]
+
+    def test_iter_time_range(self, tmp_path):
+        events_file = tmp_path / "events.jsonl"
+        write_events(events_file, 1, 300)
+
+        replay = EventReplay(events_file, interval=64)
+        events = list(replay.iter_events(
+            since_time=(START + timedelta(seconds=200)).isoformat(),
+            until_time=(START + timedelta(seconds=204)).isoformat(),
+        ))
+        assert [event["sequence"] for event in events] == [200, 201, 202, 203, 204]
+
+    def test_unordered_file_falls_back_to_full_scan(self, tmp_path):
+        # A restarted broadcaster appends a second run starting again at 1
+        events_file = tmp_path / "events.jsonl"
+        write_events(events_file, 1, 100)
+        write_events(events_file, 1, 100, start=START + timedelta(hours=1))
+
+        replay = EventReplay(events_file, interval=10)
+        assert replay.summary()["events"] == 200
+        assert replay.index.seek_offset(sequence=50) == 0
+
+        events = list(replay.iter_events(since_sequence=98))
+        assert [event["sequence"] for event in events] == [98, 99, 100, 98, 99, 100]
+
+    def test_read_page_continues_from_offset(self, tmp_path):
+        events_file = tmp_path / "events.jsonl"
+        write_events(events_file, 1, 100)
+        write_events(events_file, 1, 100, start=START + timedelta(hours=1))
+        replay = EventReplay(events_file, interval=10)
+
+        pages = []
+        offset = None
+        while True:
+            events, offset = replay.read_page(since_sequence=95, offset=offset, limit=4)
+            pages.append([event["sequence"] for event in events])
+            if offset is None:
+                break
+        assert pages == [[95, 96, 97, 98], [99, 100, 95, 96], [97, 98, 99, 100], []]
+
+    def test_missing_file(self, tmp_path):
+        assert list(EventReplay(tmp_path / "missing.jsonl").iter_events()) == []
+
+    def test_broadcaster_load_events(self, tmp_path, monkeypatch):
+        import broadcaster as broadcaster_module
+        monkeypatch.chdir(tmp_path)
+        broadcaster = broadcaster_module.EventBroadcaster("test-session")
+        monkeypatch.setattr(broadcaster, "_post", lambda path, payload: 200)
+
+        for i in range(5):
+            broadcaster.emit("log_line", {"line": str(i)})
+        broadcaster.close()
+
+        assert [event["sequence"] for event in broadcaster.load_events()] == [1, 2, 3, 4, 5]
+        assert [event["sequence"] for event in broadcaster.iter_events(since_sequence=4)] == [4, 5]
+
+
+class TestReplayStreaming:
+    """Test paced replay and client scrubbing."""
+
+    def test_pace_events_scales_gaps(self, monkeypatch):
+        sleeps = []
+
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+
+        monkeypatch.setattr(replay_module.asyncio, "sleep", fake_sleep)
+        events = [{"sequence": 1, "timestamp": START.isoformat()},
+                  {"sequence": 2, "timestamp": (START + timedelta(seconds=2)).isoformat()},
+                  {"sequence": 3, "timestamp": (START + timedelta(seconds=60)).isoformat()}]
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        last = asyncio.run(pace_events(iter(events), send, speed=4, max_gap=5))
+
+        assert sleeps == [0.5, 5]
+        assert last["sequence"] == 3
+        assert [message["data"]["sequence"] for message in sent] == [1, 2, 3]
+
+    def test_serve_replay_seek(self, tmp_path):
+        events_file = tmp_path / "events.jsonl"
+        write_events(events_file, 1, 20)
+        replay = EventReplay(events_file, interval=4)
+
+        async def scenario():
+            sent = []
+            inbox = asyncio.Queue()
+            ended = asyncio.Event()
+
+            async def send(message):
+                sent.append(message)
+                if message["type"] == "replay_end":
+                    ended.set()
+
+            async def receive():
+                message = await inbox.get()
+                if message is None:
+                    raise ConnectionError("client disconnected")
+                return message
+
+            server = asyncio.create_task(serve_replay(replay, send, receive, since_sequence=15, speed=0))
+            await asyncio.wait_for(ended.wait(), 5)
+            first_pass = [m["data"]["sequence"] for m in sent if m["type"] == "replay_event"]
+
+            sent.clear()
+            ended.clear()
+            await inbox.put({"type": "seek", "sequence": 18})
+            await asyncio.wait_for(ended.wait(), 5)
+            second_pass = [m["data"]["sequence"] for m in sent if m["type"] == "replay_event"]
+
+            await inbox.put(None)
+            try:
+                await server
+            except ConnectionError:
+                pass
+            return first_pass, second_pass
+
+        first_pass, second_pass = asyncio.run(scenario())
+        assert first_pass == [15, 16, 17, 18, 19, 20]
+        assert second_pass == [18, 19, 20]
+
+    def test_serve_replay_reads_off_the_loop(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(replay_module, "REPLAY_PAGE_SIZE", 3)
+        events_file = tmp_path / "events.jsonl"
+        write_events(events_file, 1, 10)
+        replay = EventReplay(events_file, interval=4)
+
+        async def scenario():
+            loop_thread = threading.get_ident()
+            sent, calls = [], []
+            ended = asyncio.Event()
+
+            async def run_blocking(fn, *args):
+                result = await asyncio.to_thread(fn, *args)
+                calls.append(fn.__name__)
+                return result
+
+            async def send(message):
+                sent.append(message)
+                if message["type"] == "replay_end":
+                    ended.set()
+
+            async def receive():
+                await asyncio.Event().wait()
+
+            original_scan = replay._scan
+
+            def scan(*args):
+                assert threading.get_ident() != loop_thread
+                return original_scan(*args)
+
+            replay._scan = scan
+            server = asyncio.create_task(serve_replay(replay, send, receive, speed=0,
+                                                      run_blocking=run_blocking))
+            await asyncio.wait_for(ended.wait(), 5)
+            server.cancel()
+            return sent, calls
+
+        sent, calls = asyncio.run(scenario())
+        assert [m["data"]["sequence"] for m in sent if m["type"] == "replay_event"] == list(range(1, 11))
+        assert calls[0] == "summary"
+        assert calls.count("read_entries") > 1
+
+    def test_speed_change_resumes_after_restarted_sequences(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(replay_module, "REPLAY_PAGE_SIZE", 3)
+        events_file = tmp_path / "events.jsonl"
+        write_events(events_file, 1, 5)
+        # A second run recorded into the same file restarts at sequence 1
+        write_events(events_file, 1, 5, start=START + timedelta(minutes=5))
+        replay = EventReplay(events_file, interval=4)
+
+        async def scenario():
+            sent = []
+            inbox = asyncio.Queue()
+            ended = asyncio.Event()
+
+            async def send(message):
+                if message["type"] == "replay_end":
+                    ended.set()
+                if message["type"] != "replay_event":
+                    return
+                sent.append((message["data"]["sequence"], message["data"]["timestamp"]))
+                if len(sent) == 7:
+                    inbox.put_nowait({"type": "speed", "value": 0})
+
+            async def receive():
+                return await inbox.get()
+
+            server = asyncio.create_task(serve_replay(replay, send, receive, speed=0))
+            await asyncio.wait_for(ended.wait(), 5)
+            server.cancel()
+            return sent
+
+        sent = asyncio.run(scenario())
+        assert [sequence for sequence, _ in sent] == [1, 2, 3, 4, 5, 1, 2, 3, 4, 5]
+        assert len(set(sent)) == 10
@@ -0,0 +1,111 @@
+"""
+Tests for the in-memory checkpoint session index
+"""
+import json
+import shutil
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import session_index
+from session_index import SessionIndex
+
+
+def write_session(root, session_id, iterations=1, completed=("a",), remaining=("b",)):
+    session_dir = root / session_id
+    session_dir.mkdir(parents=True, exist_ok=True)
+    (session_dir / "state.json").write_text(json.dumps({
+        "project_name": session_id,
+        "current_phase": "Builder",
+        "iterations": iterations,
+        "last_iteration_time": f"2025-01-01T10:00:{iterations:02d}",
+    }))
+    (session_dir / "progress.json").write_text(json.dumps({
+        "completed": list(completed),
+        "remaining": list(remaining),
+    }))
+    return session_dir
+
+
+class CountingLoader:
+    """Wraps load_checkpoint_session to count file reads."""
+
+    def __init__(self, monkeypatch):
+        self.loaded = []
+        original = session_index.load_checkpoint_session
+
+        def load(session_dir):
+            self.loaded.append(session_dir.name)
+            return original(session_dir)
+
+        monkeypatch.setattr(session_index, "load_checkpoint_session", load)
+
+
+class TestSessionIndex:
+    """Test stat-signature revalidation and watcher invalidation."""
+
+    def test_loads_each_session_once(self, tmp_path, monkeypatch):
+        for i in range(5):
+            write_session(tmp_path, f"session-{i}")
+        (tmp_path / "no-state").mkdir()
+        loader = CountingLoader(monkeypatch)
+        index = SessionIndex(tmp_path, revalidate_interval=0)
+
+        sessions = index.sessions()
+        assert sorted(s["id"] for s in sessions) == [f"session-{i}" for i in range(5)]
+        assert sessions[0]["total_tasks"] == 2
+
+        # Unchanged files: every sweep is stat-only
+        index.sessions()
+        index.sessions()
+        assert len(loader.loaded) == 6
+
+    def test_reloads_only_changed_sessions(self, tmp_path, monkeypatch):
+        for i in range(3):
+            write_session(tmp_path, f"session-{i}")
+        loader = CountingLoader(monkeypatch)
+        index = SessionIndex(tmp_path, revalidate_interval=0)
+        index.sessions()
+        loader.loaded.clear()
+
+        write_session(tmp_path, "session-1", iterations=12, completed=("a", "b"), remaining=())
+        (tmp_path / "session-2" / "COMPLETE").touch()
+        shutil.rmtree(tmp_path / "session-0")
+        write_session(tmp_path, "session-3")
+
+        sessions = {s["id"]: s for s in index.sessions()}
+        assert sorted(loader.loaded) == ["session-1", "session-2", "session-3"]
+        assert set(sessions) == {"session-1", "session-2", "session-3"}
+        assert sessions["session-1"]["iterations"] == 12
+        assert sessions["session-2"]["is_complete"] is True
+
+    def test_serves_from_memory_between_sweeps(self, tmp_path, monkeypatch):
+        write_session(tmp_path, "session-0")
+        index = SessionIndex(tmp_path, revalidate_interval=3600)
+        index.sessions()
+
+        write_session(tmp_path, "session-1")
+        assert [s["id"] for s in index.sessions()] == ["session-0"]
+        assert index.stats()["sweeps"] == 1
+
+        # A watcher event for the new session revalidates just that session
+        index.invalidate_path(tmp_path / "session-1" / "state.json")
+        assert sorted(s["id"] for s in index.sessions()) == ["session-0", "session-1"]
+        assert index.stats()["sweeps"] == 1
+
+        # Forced full sweep
+        shutil.rmtree(tmp_path / "session-0")
+        index.invalidate()
+        assert [s["id"] for s in index.sessions()] == ["session-1"]
+
+    def test_paths_outside_root_are_ignored(self, tmp_path):
+        index = SessionIndex(tmp_path / "checkpoints")
+        index.invalidate_path(tmp_path / "elsewhere" / "state.json")
+        assert index._dirty == set()
+
+    def test_missing_root(self, tmp_path):
+        index = SessionIndex(tmp_path / "missing")
+        assert index.sessions() == []
+        assert index.start_watching() is False
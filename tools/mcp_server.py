@@ -2466,6 +2466,114 @@ def share_patterns_to_community(
         }, indent=2)
 
 
+# ============================================================================
+# Cache Instrumentation
+# ============================================================================
+
+
+@mcp.tool()
+def get_cache_stats(working_directory: Optional[str] = None, days: int = 30) -> str:
+    """
+    Get cache hit/miss/latency statistics for the Scout, global Scout and test caches.
+
+    Args:
+        working_directory: Project directory to include local cache stats for (optional)
+        days: Look-back window for hit/miss counters (default: 30)
+
+    Returns:
+        JSON string with per-namespace counters (hits, misses, stale, evictions,
+        bytes read/written, lookup latency histogram, time saved) and cache sizes
+
+    Examples:
+        # Hit ratios across all projects
+        stats = get_cache_stats()
+
+        # Include local cache sizes for one project
+        stats = get_cache_stats("/Users/name/homelab/my-app", days=7)
+    """
+    try:
+        from tools.cache import get_global_scout_cache_stats
+        from tools.cache.cache_manager import CacheManager
+        from tools.metrics.cache_metrics import get_cache_metrics
+
+        result = {
+            "status": "success",
+            "days": days,
+            "namespaces": get_cache_metrics(days=days),
+            "global_scout_cache": get_global_scout_cache_stats()
+        }
+
+        if working_directory:
+            result["project_cache"] = CacheManager(working_directory).get_stats(days=days)
+
+        return json.dumps(result, indent=2)
+
+    except Exception as e:
+        import traceback
+        return json.dumps({
+            "status": "error",
+            "error": str(e),
+            "traceback": traceback.format_exc()
+        }, indent=2)
+
+
+# ============================================================================
+# Metrics Export
+# ============================================================================
+
+
+@mcp.tool()
+def export_metrics(
+    output_dir: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    project: Optional[str] = None,
+    format: Optional[str] = None,
+    tables: Optional[str] = None
+) -> str:
+    """
+    Export metrics tables to files for offline analysis (notebooks, BI tools).
+
+    Tables are streamed in chunks, one file per table plus manifest.json:
+    Parquet when pyarrow is installed, otherwise gzip-compressed CSV/NDJSON.
+
+    Args:
+        output_dir: Directory to write export files into
+        start_date: First local day included (YYYY-MM-DD, optional)
+        end_date: Last local day included (YYYY-MM-DD, optional)
+        project: Only this project (optional)
+        format: "parquet", "csv" or "ndjson" (default: parquet if available, else csv)
+        tables: Comma-separated table names (default: all)
+
+    Returns:
+        JSON string with the export manifest (files, formats, row counts)
+
+    Examples:
+        # Last quarter of API calls for cost analysis
+        export_metrics("/tmp/cf-export", start_date="2026-07-01", tables="api_calls,builds")
+    """
+    try:
+        from tools.metrics.export import export_metrics as run_export
+
+        manifest = run_export(
+            output_dir,
+            tables=[t.strip() for t in tables.split(",") if t.strip()] if tables else None,
+            start_date=start_date,
+            end_date=end_date,
+            project=project,
+            fmt=format
+        )
+        return json.dumps({"status": "success", **manifest}, indent=2)
+
+    except Exception as e:
+        import traceback
+        return json.dumps({
+            "status": "error",
+            "error": str(e),
+            "traceback": traceback.format_exc()
+        }, indent=2)
+
+
 @mcp.resource("logs://latest")
 def get_latest_logs() -> str:
     """Get the most recent build logs."""
@@ -2508,6 +2616,8 @@ if __name__ == "__main__":
     print("   - merge_project_patterns: Merge project patterns into global storage", file=sys.stderr)
     print("   - migrate_all_project_patterns: Migrate all project patterns to global storage", file=sys.stderr)
     print("   - share_patterns_to_community: Automatically share patterns to community (creates PR)", file=sys.stderr)
+    print("   - get_cache_stats: Cache hit ratios, latency and size statistics", file=sys.stderr)
+    print("   - export_metrics: Stream metrics tables to Parquet/CSV/NDJSON for offline analysis", file=sys.stderr)
     print("💡 Configure in Claude Desktop or Claude Code CLI to use this server!", file=sys.stderr)
 
     mcp.run()
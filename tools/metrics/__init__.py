@@ -5,26 +5,40 @@ This module provides comprehensive metrics collection, cost tracking,
 and budget monitoring for autonomous builds.
 
 Components:
-- LogParser: Extract token usage from Claude API logs
-- MetricsDatabase: SQLite storage for build metrics
+- LogParser: Extract token usage from Claude API logs (TokenUsage records, TokenUsageBatch columns)
+- MetricsDatabase: SQLite storage for build, task and agent metrics (shared with livestream)
+- db_pool: Shared SQLite connection pool (WAL, one writer, per-thread readers)
 - CostCalculator: Calculate costs with model-specific pricing
 - MetricsCollector: Real-time collection orchestrator
+- cache_metrics: Hit/miss/latency instrumentation for the caches
+- retention: Monthly partitions, downsampling and background retention
+- export: Streaming Parquet/CSV/NDJSON export for offline analysis
 """
 
-from .log_parser import LogParser, TokenUsage, APICallMetrics
+from .log_parser import LogParser, TokenUsage, TokenUsageBatch, APICallMetrics
 from .metrics_db import MetricsDatabase, get_metrics_db
 from .cost_calculator import CostCalculator, get_cost_calculator
 from .collector import MetricsCollector
+from .cache_metrics import record_cache_event, get_cache_metrics
+from .retention import RetentionPolicy, RetentionManager
+from .export import MetricsExporter, export_metrics
 
 __all__ = [
     'LogParser',
     'TokenUsage',
+    'TokenUsageBatch',
     'APICallMetrics',
     'MetricsDatabase',
     'get_metrics_db',
     'CostCalculator',
     'get_cost_calculator',
     'MetricsCollector',
+    'record_cache_event',
+    'get_cache_metrics',
+    'RetentionPolicy',
+    'RetentionManager',
+    'MetricsExporter',
+    'export_metrics',
 ]
 
 __version__ = '1.0.0'
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Cache Metrics Module
+Hit/miss/latency instrumentation for the Scout, global Scout and test caches
+"""
+
+import time
+import threading
+from typing import Dict, Any, Optional
+
+from .metrics_db import MetricsDatabase, get_metrics_db
+
+
+# Cache namespaces
+SCOUT_NAMESPACE = 'scout'
+GLOBAL_SCOUT_NAMESPACE = 'global_scout'
+TEST_NAMESPACE = 'test'
+
+# Phase whose work a Scout cache hit avoids
+SCOUT_PHASE_NAME = 'Scout'
+
+# Database used for recording (None = singleton metrics database)
+_stats_db: Optional[MetricsDatabase] = None
+_stats_enabled = True
+_stats_lock = threading.Lock()
+
+
+def configure_cache_metrics(db: Optional[MetricsDatabase] = None, enabled: bool = True):
+    """
+    Configure where cache events are recorded.
+
+    Args:
+        db: MetricsDatabase to record into (default: singleton metrics database)
+        enabled: Set False to turn instrumentation off
+    """
+    global _stats_db, _stats_enabled
+
+    with _stats_lock:
+        _stats_db = db
+        _stats_enabled = enabled
+
+
+def _get_stats_db() -> MetricsDatabase:
+    """Get the database cache events are recorded into"""
+    return _stats_db or get_metrics_db()
+
+
+def lookup_started() -> float:
+    """Start timing a cache lookup (pass the result to record_cache_event)"""
+    return time.perf_counter()
+
+
+def record_cache_event(namespace: str, event: str,
+                       started_at: Optional[float] = None,
+                       bytes_read: int = 0, bytes_written: int = 0,
+                       time_saved_seconds: float = 0.0):
+    """
+    Record a cache event. Never raises: instrumentation must not break caching.
+
+    Args:
+        namespace: Cache namespace
+        event: One of 'hit', 'miss', 'stale', 'eviction', 'write'
+        started_at: Value from lookup_started() for lookups (records latency)
+        bytes_read: Bytes read from the cache
+        bytes_written: Bytes written to the cache
+        time_saved_seconds: Work avoided by a hit, when known
+    """
+    if not _stats_enabled:
+        return
+
+    latency_ms = None
+    if started_at is not None:
+        latency_ms = (time.perf_counter() - started_at) * 1000
+
+    try:
+        _get_stats_db().record_cache_event(
+            namespace,
+            event,
+            latency_ms=latency_ms,
+            bytes_read=bytes_read,
+            bytes_written=bytes_written,
+            time_saved_seconds=time_saved_seconds
+        )
+    except Exception:
+        pass
+
+
+def estimate_scout_time_saved(stored_seconds: Optional[float] = None, days: int = 30) -> float:
+    """
+    Seconds of Scout work a cache hit avoided. Never raises.
+
+    Args:
+        stored_seconds: Scout duration saved with the cached report, when known
+        days: Window for the fallback average
+
+    Returns:
+        stored_seconds, else the average recorded Scout phase duration (0.0 if unknown)
+    """
+    if stored_seconds is not None:
+        return float(stored_seconds)
+    if not _stats_enabled:
+        return 0.0
+
+    try:
+        totals = _get_stats_db().get_phase_totals(SCOUT_PHASE_NAME, days)
+        return float(totals.get('avg_duration_seconds') or 0.0)
+    except Exception:
+        return 0.0
+
+
+def get_cache_metrics(namespace: Optional[str] = None, days: int = 30) -> Dict[str, Dict[str, Any]]:
+    """
+    Get recorded cache counters per namespace.
+
+    Args:
+        namespace: Restrict to a single namespace (default: all)
+        days: Number of days to look back
+
+    Returns:
+        Dict mapping namespace to counters (empty if the database is unavailable)
+    """
+    try:
+        return _get_stats_db().get_cache_stats(namespace, days)
+    except Exception:
+        return {}
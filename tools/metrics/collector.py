@@ -13,14 +13,18 @@ from datetime import datetime
 import json
 import time
 
-from .log_parser import LogParser, TokenUsage
+from .log_parser import LogParser, LogCheckpoint, TokenUsage, TokenUsageBatch
 from .metrics_db import MetricsDatabase, get_metrics_db
 from .cost_calculator import CostCalculator, get_cost_calculator
+from .retention import RetentionPolicy, RetentionWorker, start_retention_worker
 
 
 class MetricsCollector:
     """Real-time metrics collection orchestrator"""
 
+    # API calls per transaction when importing a log file
+    LOG_BATCH_SIZE = 500
+
     def __init__(self,
                  db: Optional[MetricsDatabase] = None,
                  calculator: Optional[CostCalculator] = None):
@@ -102,47 +106,34 @@ class MetricsCollector:
 
     def _batch_writer(self, phase_id: int, model: str, batch_size: int, timeout: float):
         """Background thread for batch writing API calls"""
-        batch = []
+        batch = TokenUsageBatch()
         last_write = time.time()
 
         while not self._shutdown.is_set() or not self._usage_queue.empty():
             try:
-                # Get usage from queue (with timeout)
-                usage = self._usage_queue.get(timeout=0.5)
-                batch.append(usage)
-
-                # Write batch if full or timeout reached
-                if len(batch) >= batch_size or (time.time() - last_write) > timeout:
-                    self._write_batch(phase_id, batch, model)
-                    batch = []
-                    last_write = time.time()
+                # Get usage from queue (with timeout), then drain whatever else is queued
+                batch.append(self._usage_queue.get(timeout=0.5))
+                while len(batch) < batch_size:
+                    batch.append(self._usage_queue.get_nowait())
 
             except queue.Empty:
-                # Timeout - check if we should flush partial batch
-                if batch and (time.time() - last_write) > timeout:
-                    self._write_batch(phase_id, batch, model)
-                    batch = []
-                    last_write = time.time()
+                pass
+
+            # Write batch if full or timeout reached
+            if len(batch) >= batch_size or (batch and (time.time() - last_write) > timeout):
+                self._write_batch(phase_id, batch, model)
+                batch = TokenUsageBatch()
+                last_write = time.time()
 
         # Write remaining items
         if batch:
             self._write_batch(phase_id, batch, model)
 
-    def _write_batch(self, phase_id: int, usages: list[TokenUsage], model: str):
-        """Write batch of API calls to database"""
-        for usage in usages:
-            cost = self.calculator.calculate_cost(usage, model)
-
-            self.db.record_api_call(
-                phase_id=phase_id,
-                model=model,
-                tokens_input=usage.input_tokens,
-                tokens_output=usage.output_tokens,
-                tokens_cached=usage.cache_read_tokens,
-                cost=cost,
-                latency_ms=None,  # TODO: Calculate from timestamps
-                request_id=usage.request_id
-            )
+    def _write_batch(self, phase_id: int, batch: TokenUsageBatch, model: str,
+                     checkpoint: Optional[LogCheckpoint] = None) -> int:
+        """Write batch of API calls (and the log checkpoint after them) in one transaction"""
+        costs = self.calculator.calculate_usage_costs(batch, model)
+        return self.db.record_usage_batch(phase_id, batch, costs, model, checkpoint=checkpoint)
 
     def _update_phase_totals(self, phase_id: int, usage: TokenUsage, model: str):
         """Update phase totals with new usage (for real-time display)"""
@@ -204,64 +195,63 @@ class MetricsCollector:
             }
 
     def collect_from_log_file(self, log_file: Path, session_id: str,
-                              phase_name: str, model: str = 'claude-sonnet-4'):
+                              phase_name: str, model: str = 'claude-sonnet-4',
+                              complete: bool = False) -> int:
         """
-        Collect metrics from existing log file.
+        Collect metrics from a log file, parsing only bytes not collected yet.
+
+        The byte offset reached is checkpointed per build and log file, so
+        calling this again on a growing log records only the new API calls
+        (under the same phase). Rotated or truncated logs are parsed again
+        from the start.
 
         Args:
             log_file: Path to log file
             session_id: Session ID
             phase_name: Phase name
             model: Model used
+            complete: The log is finished (also parse a last line without newline)
+
+        Returns:
+            Number of API calls recorded by this call
         """
-        # Ensure build exists
-        build = self.db.get_build(session_id)
-        if not build:
-            build_id = self.db.create_build(session_id)
-        else:
-            build_id = build['id']
+        path = str(Path(log_file).resolve())
 
-        # Create phase
-        phase_id = self.db.create_phase(
-            build_id,
-            phase_name,
-            started_at=datetime.now().isoformat()
-        )
+        saved = self.db.get_log_checkpoint(session_id, path)
+        if saved:
+            phase_id = saved['phase_id']
+            checkpoint = LogCheckpoint(path, saved['inode'], saved['offset'],
+                                       saved['fingerprint'], saved['fingerprint_size'])
+        else:
+            # Ensure build exists
+            build = self.db.get_build(session_id)
+            if not build:
+                build_id = self.db.create_build(session_id)
+            else:
+                build_id = build['id']
 
-        # Parse log file
-        total_cost = 0.0
-        total_input = 0
-        total_output = 0
-        total_cached = 0
-
-        for usage in self.parser.parse_log_file(str(log_file)):
-            cost = self.calculator.calculate_cost(usage, model)
-
-            self.db.record_api_call(
-                phase_id=phase_id,
-                model=model,
-                tokens_input=usage.input_tokens,
-                tokens_output=usage.output_tokens,
-                tokens_cached=usage.cache_read_tokens,
-                cost=cost,
-                request_id=usage.request_id
+            # Create phase
+            phase_id = self.db.create_phase(
+                build_id,
+                phase_name,
+                started_at=datetime.now().isoformat()
             )
+            checkpoint = None
 
-            total_cost += cost
-            total_input += usage.input_tokens
-            total_output += usage.output_tokens
-            total_cached += usage.cache_read_tokens
+        # Parse new log lines, writing API calls in bulk batches together with the
+        # checkpoint (record_usage_batch also maintains the phase and build totals)
+        recorded = 0
+        for batch, checkpoint in self.parser.parse_log_file_incremental(
+                path, checkpoint, self.LOG_BATCH_SIZE, complete):
+            recorded += self._write_batch(phase_id, batch, model, checkpoint)
 
-        # Update phase totals
         self.db.update_phase(
             phase_id,
-            tokens_input=total_input,
-            tokens_output=total_output,
-            tokens_cached=total_cached,
-            cost=total_cost,
             completed_at=datetime.now().isoformat()
         )
 
+        return recorded
+
     def finalize_build(self, session_id: str, status: str = 'completed'):
         """
         Finalize build metrics.
@@ -293,6 +283,20 @@ class MetricsCollector:
         for alert in alerts:
             print(alert)
 
+    def start_retention(self, policy: Optional[RetentionPolicy] = None,
+                        interval: float = 300.0) -> RetentionWorker:
+        """
+        Start background retention (downsampling and partitioning) for the database.
+
+        Args:
+            policy: Retention windows (default: RetentionPolicy())
+            interval: Seconds between idle passes
+
+        Returns:
+            Running RetentionWorker (call stop() to end it)
+        """
+        return start_retention_worker(self.db, policy, interval)
+
     def start_monitoring(self, working_directory: str):
         """
         Start filesystem watcher for live updates.
@@ -352,7 +356,7 @@ def collect_metrics_for_build(working_directory: str, session_id: str):
     for log_file in cf_dir.glob('*.log'):
         # Try to extract phase from filename
         phase_name = log_file.stem.replace('-', ' ').title()
-        collector.collect_from_log_file(log_file, session_id, phase_name)
+        collector.collect_from_log_file(log_file, session_id, phase_name, complete=True)
 
     # Finalize
     collector.finalize_build(session_id)
@@ -6,11 +6,21 @@ Calculate costs from token usage with model-specific pricing
 
 import json
 import threading
+from array import array
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence, Tuple, Union
 from datetime import datetime, timedelta
 
-from .log_parser import TokenUsage
+from .log_parser import TokenUsage, TokenUsageBatch
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Pricing fields, in the order of rate tuples used by the columnar APIs
+RATE_FIELDS = ('input_per_mtok', 'output_per_mtok', 'cache_write_per_mtok', 'cache_read_per_mtok')
 
 
 class CostCalculator:
@@ -29,6 +39,12 @@ class CostCalculator:
 
         self.config_path = Path(config_path)
         self.config = self._load_config()
+        self._rates: Dict[str, Tuple[float, float, float, float]] = {}
+
+    def reload_config(self):
+        """Reload pricing_config.json (e.g. after a price update)"""
+        self.config = self._load_config()
+        self._rates = {}
 
     def _load_config(self) -> Dict[str, Any]:
         """Load pricing configuration from JSON file"""
@@ -97,55 +113,195 @@ class CostCalculator:
         if model is None:
             model = usage.model or 'default'
 
-        pricing = self.get_model_pricing(model)
+        rate_in, rate_out, rate_cw, rate_cr = self.get_model_rates(model)
 
         # Calculate costs per component (rates are per million tokens)
-        input_cost = (usage.input_tokens / 1_000_000) * pricing.get('input_per_mtok', 0)
-        output_cost = (usage.output_tokens / 1_000_000) * pricing.get('output_per_mtok', 0)
-        cache_write_cost = (usage.cache_write_tokens / 1_000_000) * pricing.get('cache_write_per_mtok', 0)
-        cache_read_cost = (usage.cache_read_tokens / 1_000_000) * pricing.get('cache_read_per_mtok', 0)
+        input_cost = (usage.input_tokens / 1_000_000) * rate_in
+        output_cost = (usage.output_tokens / 1_000_000) * rate_out
+        cache_write_cost = (usage.cache_write_tokens / 1_000_000) * rate_cw
+        cache_read_cost = (usage.cache_read_tokens / 1_000_000) * rate_cr
 
         total_cost = input_cost + output_cost + cache_write_cost + cache_read_cost
 
         return round(total_cost, 6)  # Round to 6 decimal places ($0.000001)
 
-    def calculate_batch_cost(self, usages: list[TokenUsage], model: Optional[str] = None) -> Dict[str, Any]:
+    def get_model_rates(self, model: Optional[str]) -> Tuple[float, float, float, float]:
         """
-        Calculate total cost for multiple API calls.
+        Get a model's rates as a tuple (resolved once per model and cached).
 
         Args:
-            usages: List of TokenUsage objects
-            model: Model name (if all calls use same model)
+            model: Model identifier (None = default)
 
         Returns:
-            Dict with breakdown and total
+            (input, output, cache_write, cache_read) USD per million tokens
+        """
+        model = model or 'default'
+        rates = self._rates.get(model)
+        if rates is None:
+            pricing = self.get_model_pricing(model)
+            rates = tuple(float(pricing.get(field, 0)) for field in RATE_FIELDS)
+            self._rates[model] = rates
+        return rates
+
+    def calculate_costs(self, models: Union[str, None, Sequence[Optional[str]]],
+                        input_tokens: Sequence[int], output_tokens: Sequence[int],
+                        cache_write_tokens: Optional[Sequence[int]] = None,
+                        cache_read_tokens: Optional[Sequence[int]] = None):
+        """
+        Calculate per-call costs from columnar token counts in one pass.
+
+        Pricing is resolved once per distinct model. Uses NumPy when installed
+        (vectorized), otherwise a single loop over typed arrays.
+
+        Args:
+            models: One model for all calls, or a model per call
+            input_tokens: Input tokens per call
+            output_tokens: Output tokens per call
+            cache_write_tokens: Cache-write tokens per call (default: zeros)
+            cache_read_tokens: Cache-read tokens per call (default: zeros)
+
+        Returns:
+            Costs in USD rounded to 6 decimals (numpy.ndarray or array('d'))
+        """
+        count = len(input_tokens)
+        single_model = models is None or isinstance(models, str)
+
+        if numpy is not None:
+            columns = [
+                numpy.asarray(column, dtype=numpy.float64) / 1_000_000 if column is not None
+                else numpy.zeros(count)
+                for column in (input_tokens, output_tokens, cache_write_tokens, cache_read_tokens)
+            ]
+            if single_model:
+                rates = numpy.array(self.get_model_rates(models))
+            else:
+                names = numpy.array([model or 'default' for model in models], dtype=object)
+                distinct, inverse = numpy.unique(names, return_inverse=True)
+                rates = numpy.array([self.get_model_rates(model) for model in distinct])[inverse].T
+            # Same summation order as calculate_cost; an empty batch stays an empty array
+            costs = numpy.zeros(count)
+            for column, rate in zip(columns, rates):
+                costs += column * rate
+            # Python's round(): numpy.round (scale, rint, unscale) differs in the last digit
+            return numpy.array([round(cost, 6) for cost in costs.tolist()], dtype=numpy.float64)
+
+        zeros = array('q', bytes(8 * count))
+        columns = [
+            array('q', column) if column is not None else zeros
+            for column in (input_tokens, output_tokens, cache_write_tokens, cache_read_tokens)
+        ]
+        costs = array('d', bytes(8 * count))
+        rates = self.get_model_rates(models) if single_model else None
+
+        for i, (tokens_in, tokens_out, tokens_cw, tokens_cr) in enumerate(zip(*columns)):
+            rate_in, rate_out, rate_cw, rate_cr = rates or self.get_model_rates(models[i])
+            costs[i] = round(
+                (tokens_in / 1_000_000) * rate_in + (tokens_out / 1_000_000) * rate_out
+                + (tokens_cw / 1_000_000) * rate_cw + (tokens_cr / 1_000_000) * rate_cr,
+                6
+            )
+
+        return costs
+
+    def calculate_columnar_cost(self, models: Union[str, None, Sequence[Optional[str]]],
+                                input_tokens: Sequence[int], output_tokens: Sequence[int],
+                                cache_write_tokens: Optional[Sequence[int]] = None,
+                                cache_read_tokens: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+        """
+        Calculate per-call costs and totals from columnar token counts.
+
+        Args:
+            models: One model for all calls, or a model per call
+            input_tokens: Input tokens per call
+            output_tokens: Output tokens per call
+            cache_write_tokens: Cache-write tokens per call (default: zeros)
+            cache_read_tokens: Cache-read tokens per call (default: zeros)
+
+        Returns:
+            Same totals as calculate_batch_cost, plus 'costs' (per-call costs)
         """
-        total_cost = 0.0
-        total_input = 0
-        total_output = 0
-        total_cache_read = 0
-        total_cache_write = 0
-
-        for usage in usages:
-            call_model = model or usage.model or 'default'
-            cost = self.calculate_cost(usage, call_model)
-
-            total_cost += cost
-            total_input += usage.input_tokens
-            total_output += usage.output_tokens
-            total_cache_read += usage.cache_read_tokens
-            total_cache_write += usage.cache_write_tokens
+        costs = self.calculate_costs(models, input_tokens, output_tokens,
+                                     cache_write_tokens, cache_read_tokens)
+
+        total_input = int(sum(input_tokens))
+        total_output = int(sum(output_tokens))
 
         return {
-            'total_cost': round(total_cost, 6),
+            'total_cost': round(float(sum(costs)), 6),
             'total_input_tokens': total_input,
             'total_output_tokens': total_output,
-            'total_cache_read_tokens': total_cache_read,
-            'total_cache_write_tokens': total_cache_write,
+            'total_cache_read_tokens': int(sum(cache_read_tokens)) if cache_read_tokens is not None else 0,
+            'total_cache_write_tokens': int(sum(cache_write_tokens)) if cache_write_tokens is not None else 0,
             'total_tokens': total_input + total_output,
-            'call_count': len(usages)
+            'call_count': len(input_tokens),
+            'costs': costs
         }
 
+    def calculate_usage_costs(self, usages: Union[TokenUsageBatch, Sequence[TokenUsage]],
+                              model: Optional[str] = None):
+        """
+        Calculate per-call costs for a batch of usages in one pass.
+
+        Args:
+            usages: TokenUsageBatch (used as-is) or a sequence of TokenUsage objects
+            model: Model name (if all calls use same model; else each usage's model)
+
+        Returns:
+            Costs in USD rounded to 6 decimals (see calculate_costs)
+        """
+        batch = usages if isinstance(usages, TokenUsageBatch) else TokenUsageBatch(usages)
+        return self.calculate_costs(
+            model if model else batch.models,
+            batch.input_tokens,
+            batch.output_tokens,
+            batch.cache_write_tokens,
+            batch.cache_read_tokens
+        )
+
+    def calculate_batch_cost(self, usages: Union[TokenUsageBatch, Sequence[TokenUsage]],
+                             model: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Calculate total cost for multiple API calls.
+
+        Args:
+            usages: TokenUsageBatch or list of TokenUsage objects
+            model: Model name (if all calls use same model)
+
+        Returns:
+            Dict with breakdown and total
+        """
+        batch = usages if isinstance(usages, TokenUsageBatch) else TokenUsageBatch(usages)
+        result = self.calculate_columnar_cost(
+            model if model else batch.models,
+            batch.input_tokens,
+            batch.output_tokens,
+            batch.cache_write_tokens,
+            batch.cache_read_tokens
+        )
+        del result['costs']
+        return result
+
+    def reprice_history(self, db, start_date: Optional[str] = None,
+                        end_date: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Recompute stored API call costs with the current pricing, in SQL.
+
+        Pricing is resolved in Python once per distinct model (partial model
+        matching), then one UPDATE per table applies it. Calls recorded before
+        cache-write tokens were stored, and calls already moved to retention
+        partitions, keep their stored cost.
+
+        Args:
+            db: MetricsDatabase instance
+            start_date: First local day repriced (YYYY-MM-DD, optional)
+            end_date: Last local day repriced (YYYY-MM-DD, optional)
+
+        Returns:
+            Dict with calls_repriced, calls_skipped and cost_delta
+        """
+        rates = {model: self.get_model_rates(model) for model in db.get_api_call_models()}
+        return db.reprice_api_calls(rates, start_date, end_date)
+
     def estimate_remaining_budget(self, current_cost: float, period: str = "monthly") -> Dict[str, Any]:
         """
         Calculate remaining budget for period.
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Database Access Module
+Shared SQLite connection pool for the metrics databases (one writer, many readers)
+"""
+
+import sqlite3
+import threading
+import weakref
+from pathlib import Path
+from typing import Dict, Optional, Set
+from contextlib import contextmanager
+
+
+# Connection tuning applied to every pooled connection
+BUSY_TIMEOUT_SECONDS = 30.0
+CACHE_SIZE_KB = 8192               # PRAGMA cache_size (negative value = KiB)
+MMAP_SIZE_BYTES = 64 * 1024 * 1024
+
+# Pools by resolved database path
+_pools: Dict[str, 'ConnectionPool'] = {}
+_pools_lock = threading.Lock()
+
+
+class _ReaderSlot:
+    """A thread's reader connection (closed once the thread's locals are dropped)"""
+
+    __slots__ = ('connection', 'generation', '__weakref__')
+
+    def __init__(self, connection: sqlite3.Connection, generation: int):
+        self.connection = connection
+        self.generation = generation
+
+
+class ConnectionPool:
+    """
+    Pooled SQLite connections for one database file.
+
+    - WAL journaling so readers never block the writer (or each other)
+    - synchronous=NORMAL (durable across application crashes under WAL)
+    - One reader connection per thread, reused across calls and closed
+      when the thread exits
+    - One writer connection shared by all threads, serialized by a lock;
+      write transactions start with BEGIN IMMEDIATE so writers from other
+      processes wait on busy_timeout instead of failing mid-transaction
+    """
+
+    def __init__(self, db_path: str, busy_timeout: float = BUSY_TIMEOUT_SECONDS):
+        """
+        Initialize connection pool.
+
+        Args:
+            db_path: Path to database file
+            busy_timeout: Seconds to wait on a locked database
+        """
+        self.db_path = Path(db_path)
+        self.busy_timeout = busy_timeout
+
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._readers: Set[sqlite3.Connection] = set()
+        self._readers_lock = threading.Lock()
+        self._generation = 0
+        self._refs = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a tuned connection"""
+        conn = sqlite3.connect(
+            str(self.db_path),
+            check_same_thread=False,
+            timeout=self.busy_timeout
+        )
+        conn.row_factory = sqlite3.Row
+
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.DatabaseError:
+            # Filesystems without shared memory support keep rollback journaling
+            pass
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def reader(self) -> sqlite3.Connection:
+        """Get this thread's reader connection (opened on first use)"""
+        slot = getattr(self._local, 'reader', None)
+        if slot is None or slot.generation != self._generation:
+            conn = self._connect()
+            with self._readers_lock:
+                self._readers.add(conn)
+            slot = _ReaderSlot(conn, self._generation)
+            # Thread-local values are dropped when their thread exits
+            weakref.finalize(slot, self._drop_reader, conn)
+            self._local.reader = slot
+        return slot.connection
+
+    def _drop_reader(self, conn: sqlite3.Connection):
+        """Close a reader connection whose thread is gone (or was replaced)"""
+        with self._readers_lock:
+            self._readers.discard(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def write(self, foreign_keys: bool = True, attach: Optional[Dict[str, str]] = None):
+        """
+        Run a write transaction on the shared writer connection.
+
+        Nested calls from the same thread join the outer transaction.
+
+        Args:
+            foreign_keys: Enforce foreign key constraints for this transaction
+            attach: Databases attached for this transaction (alias -> path);
+                    only allowed on the outermost transaction
+
+        Yields:
+            Writer connection (committed on success, rolled back on error)
+        """
+        with self._write_lock:
+            depth = getattr(self._local, 'write_depth', 0)
+
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+
+            if depth > 0:
+                if attach:
+                    raise ValueError("Databases can only be attached outside a transaction")
+                self._local.write_depth = depth + 1
+                try:
+                    yield conn
+                finally:
+                    self._local.write_depth = depth
+                return
+
+            # ATTACH/DETACH cannot run inside a transaction
+            attached = []
+            try:
+                for alias, path in (attach or {}).items():
+                    conn.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+                    attached.append(alias)
+
+                conn.execute(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}")
+                conn.execute("BEGIN IMMEDIATE")
+                self._local.write_depth = 1
+                try:
+                    yield conn
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+                finally:
+                    self._local.write_depth = 0
+            finally:
+                for alias in attached:
+                    conn.execute(f"DETACH DATABASE {alias}")
+
+    def acquire(self) -> 'ConnectionPool':
+        """Register a user of the pool (see release)"""
+        with self._readers_lock:
+            self._refs += 1
+        return self
+
+    def release(self):
+        """Unregister a user of the pool; the last one closes its connections"""
+        with self._readers_lock:
+            self._refs = max(0, self._refs - 1)
+            last = self._refs == 0
+        if last:
+            self.close()
+
+    def close(self):
+        """Close all pooled connections (the pool reopens them on next use)"""
+        with self._write_lock:
+            if self._writer is not None:
+                try:
+                    self._writer.close()
+                except sqlite3.Error:
+                    pass
+                self._writer = None
+
+            with self._readers_lock:
+                for conn in self._readers:
+                    try:
+                        conn.close()
+                    except sqlite3.Error:
+                        pass
+                self._readers = set()
+                self._generation += 1
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """
+    Get the shared connection pool for a database file.
+
+    Args:
+        db_path: Path to database file
+
+    Each caller holds a reference until it calls release(), so closing one
+    database object leaves connections other objects still use open.
+
+    Returns:
+        ConnectionPool shared by every caller using the same file
+    """
+    key = str(Path(db_path).expanduser().resolve())
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(key)
+            _pools[key] = pool
+        return pool.acquire()
+
+
+__all__ = [
+    'ConnectionPool',
+    'get_pool',
+]
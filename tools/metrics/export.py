@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Export Module
+Streaming columnar export of the metrics database for offline analysis
+
+Each table is read in chunks (cursor.fetchmany) and written incrementally,
+so exports never materialize the whole database in memory:
+
+- Parquet (zstd-compressed) when pyarrow is installed
+- gzip-compressed CSV or NDJSON otherwise
+
+Filters: inclusive local date range and project (matched against the build
+working directory basename or the livestream task project name). Raw rows
+already moved to monthly partitions by retention are included for
+api_calls and metrics when no project filter is given.
+"""
+
+import csv
+import gzip
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Iterator, Optional
+
+from .metrics_db import MetricsDatabase, get_metrics_db, _local_day_sql
+from .retention import RetentionManager
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+DEFAULT_CHUNK_SIZE = 10000
+
+FORMAT_EXTENSIONS = {
+    'parquet': '.parquet',
+    'csv': '.csv.gz',
+    'ndjson': '.ndjson.gz',
+}
+
+# Builds belonging to a project (:project bound by name, :project_path as
+# '%/' + the name with LIKE wildcards escaped)
+_PROJECT_BUILDS = """
+    (b.working_directory = :project
+     OR b.working_directory LIKE :project_path ESCAPE '\\'
+     OR b.session_id IN (SELECT task_id FROM tasks WHERE project_name = :project))
+"""
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards (for patterns with ESCAPE '\\')"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+# table -> (SELECT ... FROM ... , day expression, project filter or None, ORDER BY)
+EXPORT_TABLES = {
+    'builds': (
+        "SELECT b.* FROM builds b",
+        "b.rollup_day", _PROJECT_BUILDS, "b.id",
+    ),
+    'phases': (
+        "SELECT p.*, b.session_id FROM phases p JOIN builds b ON b.id = p.build_id",
+        "p.rollup_day", _PROJECT_BUILDS, "p.id",
+    ),
+    'api_calls': (
+        "SELECT c.id, c.phase_id, c.model, c.tokens_input, c.tokens_output, c.tokens_cached, "
+        "c.cost, c.latency_ms, c.request_id, c.timestamp, c.agent_id, c.tokens_cache_write, "
+        "p.phase_name "
+        "FROM api_calls c LEFT JOIN phases p ON p.id = c.phase_id "
+        "LEFT JOIN builds b ON b.id = p.build_id",
+        _local_day_sql('c.timestamp'), _PROJECT_BUILDS, "c.id",
+    ),
+    'build_rollups': ("SELECT r.* FROM build_rollups r", "r.day", None, "r.day"),
+    'phase_rollups': ("SELECT r.* FROM phase_rollups r", "r.day", None, "r.day, r.phase_name"),
+    'model_rollups': ("SELECT r.* FROM model_rollups r", "r.day", None, "r.day, r.model"),
+    'tasks': (
+        "SELECT t.* FROM tasks t",
+        _local_day_sql('t.created_at'), "t.project_name = :project", "t.rowid",
+    ),
+    'metrics': (
+        "SELECT m.* FROM metrics m",
+        _local_day_sql('m.timestamp'),
+        "m.task_id IN (SELECT task_id FROM tasks WHERE project_name = :project)", "m.id",
+    ),
+    'decisions': (
+        "SELECT d.* FROM decisions d",
+        _local_day_sql('d.timestamp'),
+        "d.task_id IN (SELECT task_id FROM tasks WHERE project_name = :project)", "d.id",
+    ),
+    'agent_instances': (
+        "SELECT a.* FROM agent_instances a",
+        _local_day_sql('a.created_at'),
+        "a.session_id IN (SELECT task_id FROM tasks WHERE project_name = :project)", "a.id",
+    ),
+}
+
+
+def available_formats() -> List[str]:
+    """List export formats usable in this environment"""
+    formats = ['csv', 'ndjson']
+    if pyarrow is not None:
+        formats.insert(0, 'parquet')
+    return formats
+
+
+def default_format() -> str:
+    """Parquet when pyarrow is installed, else gzip CSV"""
+    return 'parquet' if pyarrow is not None else 'csv'
+
+
+def _arrow_type(declared: str):
+    """Arrow type for a SQLite declared column type"""
+    declared = (declared or '').upper()
+    if 'INT' in declared or 'BOOL' in declared:
+        return pyarrow.int64()
+    if any(name in declared for name in ('REAL', 'FLOA', 'DOUB')):
+        return pyarrow.float64()
+    return pyarrow.string()
+
+
+def _coerce(value: Any, arrow_type) -> Any:
+    """Coerce a SQLite value to the column's Arrow type (SQLite typing is per value)"""
+    if value is None:
+        return None
+    try:
+        if arrow_type == pyarrow.int64():
+            return int(value)
+        if arrow_type == pyarrow.float64():
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+class _ParquetSink:
+    """Chunked Parquet writer"""
+
+    def __init__(self, path: Path, columns: List[str], declared_types: Dict[str, str]):
+        self.columns = columns
+        self.schema = pyarrow.schema([
+            (column, _arrow_type(declared_types.get(column, ''))) for column in columns
+        ])
+        self.writer = pyarrow.parquet.ParquetWriter(str(path), self.schema, compression='zstd')
+
+    def write(self, rows: List[tuple]):
+        arrays = []
+        for index, field in enumerate(self.schema):
+            arrays.append(pyarrow.array([_coerce(row[index], field.type) for row in rows], type=field.type))
+        self.writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class _CsvSink:
+    """Chunked gzip CSV writer"""
+
+    def __init__(self, path: Path, columns: List[str], declared_types: Dict[str, str]):
+        self.file = gzip.open(path, 'wt', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows: List[tuple]):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _NdjsonSink:
+    """Chunked gzip NDJSON writer"""
+
+    def __init__(self, path: Path, columns: List[str], declared_types: Dict[str, str]):
+        self.file = gzip.open(path, 'wb')
+        self.columns = columns
+
+    def write(self, rows: List[tuple]):
+        records = (dict(zip(self.columns, row)) for row in rows)
+        if orjson is not None:
+            self.file.write(b''.join(orjson.dumps(record) + b'\n' for record in records))
+        else:
+            self.file.write(''.join(json.dumps(record) + '\n' for record in records).encode('utf-8'))
+
+    def close(self):
+        self.file.close()
+
+
+_SINKS = {'parquet': _ParquetSink, 'csv': _CsvSink, 'ndjson': _NdjsonSink}
+
+
+class MetricsExporter:
+    """Stream metrics tables to columnar files"""
+
+    def __init__(self, db: Optional[MetricsDatabase] = None,
+                 retention: Optional[RetentionManager] = None):
+        """
+        Initialize exporter.
+
+        Args:
+            db: MetricsDatabase to export (default: singleton metrics database)
+            retention: RetentionManager whose partitions are included (default: db's archive)
+        """
+        self.db = db or get_metrics_db()
+        self.retention = retention or RetentionManager(str(self.db.db_path))
+
+    def _declared_types(self, table: str) -> Dict[str, str]:
+        conn = self.db.reader()
+        types = {row['name']: row['type'] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if table == 'api_calls':
+            types['phase_name'] = 'TEXT'
+        elif table == 'phases':
+            types['session_id'] = 'TEXT'
+        return types
+
+    def _query(self, table: str, start_date: Optional[str], end_date: Optional[str],
+               project: Optional[str]):
+        """Build the filtered SELECT for a table"""
+        select, day_expr, project_filter, order = EXPORT_TABLES[table]
+        where = []
+        params: Dict[str, Any] = {}
+
+        if start_date:
+            where.append(f"{day_expr} >= :start_date")
+            params['start_date'] = start_date
+        if end_date:
+            where.append(f"{day_expr} <= :end_date")
+            params['end_date'] = end_date
+        if project:
+            where.append(project_filter)
+            params['project'] = project
+            params['project_path'] = '%/' + _escape_like(project)
+
+        sql = select
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql + f" ORDER BY {order}", params
+
+    def _archived_rows(self, table: str, columns: List[str], start_date: Optional[str],
+                       end_date: Optional[str]) -> Iterator[tuple]:
+        """Archived raw rows (retention partitions) in export column order"""
+        for row in self.retention.iter_archived(table, start_date=start_date, end_date=end_date):
+            yield tuple(row.get(column) for column in columns)
+
+    def export_table(self, table: str, output_dir: Path, fmt: str,
+                     start_date: Optional[str] = None, end_date: Optional[str] = None,
+                     project: Optional[str] = None, include_archive: bool = True,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Stream one table to a file.
+
+        Returns:
+            Dict with path, format and rows written
+        """
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown metrics table: {table}")
+        if project and EXPORT_TABLES[table][2] is None:
+            return {'table': table, 'skipped': 'not filterable by project'}
+
+        sql, params = self._query(table, start_date, end_date, project)
+        cursor = self.db.reader().execute(sql, params)
+        columns = [description[0] for description in cursor.description]
+
+        path = output_dir / f"{table}{FORMAT_EXTENSIONS[fmt]}"
+        temp_path = path.with_name(path.name + '.tmp')
+        sink = _SINKS[fmt](temp_path, columns, self._declared_types(table))
+        rows_written = 0
+
+        try:
+            if include_archive and not project and table in ('api_calls', 'metrics'):
+                chunk = []
+                for row in self._archived_rows(table, columns, start_date, end_date):
+                    chunk.append(row)
+                    if len(chunk) >= chunk_size:
+                        sink.write(chunk)
+                        rows_written += len(chunk)
+                        chunk = []
+                if chunk:
+                    sink.write(chunk)
+                    rows_written += len(chunk)
+
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                sink.write([tuple(row) for row in rows])
+                rows_written += len(rows)
+        except BaseException:
+            sink.close()
+            temp_path.unlink(missing_ok=True)
+            raise
+
+        sink.close()
+        os.replace(temp_path, path)
+
+        return {'table': table, 'path': str(path), 'format': fmt, 'rows': rows_written}
+
+    def export(self, output_dir: str, tables: Optional[List[str]] = None,
+               start_date: Optional[str] = None, end_date: Optional[str] = None,
+               project: Optional[str] = None, fmt: Optional[str] = None,
+               include_archive: bool = True,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Export metrics tables to a directory (one file per table plus manifest.json).
+
+        Args:
+            output_dir: Directory to write into (created if missing)
+            tables: Tables to export (default: all)
+            start_date: First local day included ('YYYY-MM-DD')
+            end_date: Last local day included ('YYYY-MM-DD')
+            project: Restrict to one project
+            fmt: 'parquet', 'csv' or 'ndjson' (default: parquet if available, else csv)
+            include_archive: Include raw rows moved to retention partitions
+            chunk_size: Rows per fetch/write
+
+        Returns:
+            Manifest dict (also written to manifest.json)
+        """
+        fmt = fmt or default_format()
+        if fmt not in available_formats():
+            raise ValueError(f"Export format '{fmt}' not available (available: {', '.join(available_formats())})")
+
+        out = Path(output_dir).expanduser()
+        out.mkdir(parents=True, exist_ok=True)
+
+        manifest = {
+            'exported_at': datetime.now().isoformat(),
+            'database': str(self.db.db_path),
+            'format': fmt,
+            'filters': {'start_date': start_date, 'end_date': end_date, 'project': project},
+            'tables': [
+                self.export_table(table, out, fmt, start_date, end_date, project,
+                                  include_archive, chunk_size)
+                for table in (tables or list(EXPORT_TABLES))
+            ]
+        }
+
+        (out / 'manifest.json').write_text(json.dumps(manifest, indent=2))
+        return manifest
+
+
+def export_metrics(output_dir: str, **kwargs) -> Dict[str, Any]:
+    """Export the default metrics database (see MetricsExporter.export)"""
+    return MetricsExporter().export(output_dir, **kwargs)
+
+
+__all__ = [
+    'MetricsExporter',
+    'export_metrics',
+    'available_formats',
+    'default_format',
+    'EXPORT_TABLES',
+]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export metrics tables for offline analysis")
+    parser.add_argument('output_dir', help="Directory to write export files into")
+    parser.add_argument('--db', help="Metrics database path")
+    parser.add_argument('--start', help="First day included (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Last day included (YYYY-MM-DD)")
+    parser.add_argument('--project', help="Only this project")
+    parser.add_argument('--format', choices=list(FORMAT_EXTENSIONS), help="Output format")
+    parser.add_argument('--tables', nargs='+', choices=list(EXPORT_TABLES), help="Tables to export")
+    parser.add_argument('--no-archive', action='store_true', help="Skip retention partitions")
+    args = parser.parse_args()
+
+    exporter = MetricsExporter(MetricsDatabase(args.db) if args.db else None)
+    result = exporter.export(
+        args.output_dir,
+        tables=args.tables,
+        start_date=args.start,
+        end_date=args.end,
+        project=args.project,
+        fmt=args.format,
+        include_archive=not args.no_archive
+    )
+
+    print(f"📦 Exported metrics ({result['format']}) to {args.output_dir}")
+    for entry in result['tables']:
+        if 'skipped' in entry:
+            print(f"   ⏭️  {entry['table']}: skipped ({entry['skipped']})")
+        else:
+            print(f"   ✅ {entry['table']}: {entry['rows']} rows")
@@ -4,16 +4,34 @@ Log Parser Module
 Extract token usage and metrics from Claude API logs
 """
 
+import os
 import re
+import sys
 import json
-from typing import Optional, Dict, Any, Generator
+import zlib
+from array import array
+from typing import Optional, Dict, Any, Generator, Iterable, Iterator, List, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
+# Fastest available JSON decoder (both raise ValueError subclasses on bad input)
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Leading bytes hashed to recognise a log file rewritten in place
+FINGERPRINT_BYTES = 1024
+
+# Bytes read per chunk by incremental parsing
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True, slots=True)
 class TokenUsage:
-    """Token usage data from API response"""
+    """Token usage data from API response (immutable, slotted)"""
     input_tokens: int
     output_tokens: int
     cache_read_tokens: int = 0
@@ -41,6 +59,120 @@ class TokenUsage:
         }
 
 
+class TokenUsageBatch:
+    """
+    Columnar container for many TokenUsage records.
+
+    Token counts live in typed arrays (8 bytes per value) and model names are
+    interned, so a batch holds thousands of calls without one object per call.
+    Batches are what the parser, collector queue, cost calculator and database
+    pass around; iterating or indexing rebuilds TokenUsage records on demand.
+    """
+
+    __slots__ = ('input_tokens', 'output_tokens', 'cache_read_tokens',
+                 'cache_write_tokens', 'request_ids', 'timestamps', 'models')
+
+    def __init__(self, usages: Iterable[TokenUsage] = ()):
+        """
+        Initialize batch.
+
+        Args:
+            usages: Initial TokenUsage records
+        """
+        self.input_tokens = array('q')
+        self.output_tokens = array('q')
+        self.cache_read_tokens = array('q')
+        self.cache_write_tokens = array('q')
+        self.request_ids: List[Optional[str]] = []
+        self.timestamps: List[Optional[str]] = []
+        self.models: List[Optional[str]] = []
+        self.extend(usages)
+
+    def append(self, usage: TokenUsage):
+        """Add one TokenUsage record"""
+        self.input_tokens.append(usage.input_tokens)
+        self.output_tokens.append(usage.output_tokens)
+        self.cache_read_tokens.append(usage.cache_read_tokens)
+        self.cache_write_tokens.append(usage.cache_write_tokens)
+        self.request_ids.append(usage.request_id)
+        self.timestamps.append(usage.timestamp)
+        self.models.append(sys.intern(usage.model) if usage.model else usage.model)
+
+    def extend(self, usages: Iterable[TokenUsage]):
+        """Add TokenUsage records (or the contents of another batch)"""
+        if isinstance(usages, TokenUsageBatch):
+            for name in self.__slots__:
+                getattr(self, name).extend(getattr(usages, name))
+            return
+        for usage in usages:
+            self.append(usage)
+
+    def clear(self):
+        """Remove all records (keeps the batch object for reuse)"""
+        for name in self.__slots__:
+            del getattr(self, name)[:]
+
+    def __len__(self) -> int:
+        return len(self.input_tokens)
+
+    def __getitem__(self, index: int) -> TokenUsage:
+        return TokenUsage(
+            input_tokens=self.input_tokens[index],
+            output_tokens=self.output_tokens[index],
+            cache_read_tokens=self.cache_read_tokens[index],
+            cache_write_tokens=self.cache_write_tokens[index],
+            request_id=self.request_ids[index],
+            timestamp=self.timestamps[index],
+            model=self.models[index]
+        )
+
+    def __iter__(self) -> Iterator[TokenUsage]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def total_tokens(self) -> int:
+        """Total tokens across the batch (input + output, excluding cache)"""
+        return sum(self.input_tokens) + sum(self.output_tokens)
+
+    def totals(self) -> Dict[str, int]:
+        """Summed token counts for the batch"""
+        return {
+            'input_tokens': sum(self.input_tokens),
+            'output_tokens': sum(self.output_tokens),
+            'cache_read_tokens': sum(self.cache_read_tokens),
+            'cache_write_tokens': sum(self.cache_write_tokens),
+            'total_tokens': self.total_tokens,
+            'call_count': len(self)
+        }
+
+
+@dataclass
+class LogCheckpoint:
+    """
+    Position reached in a log file by incremental parsing.
+
+    offset is the byte offset of the first unparsed line. inode and a CRC32 of
+    the file's leading bytes identify the file, so rotation (new inode) and
+    truncation or in-place rewrites restart parsing from byte 0.
+    """
+    path: str
+    inode: int = 0
+    offset: int = 0
+    fingerprint: int = 0
+    fingerprint_size: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'path': self.path,
+            'inode': self.inode,
+            'offset': self.offset,
+            'fingerprint': self.fingerprint,
+            'fingerprint_size': self.fingerprint_size
+        }
+
+
 @dataclass
 class APICallMetrics:
     """Complete API call metrics including timing"""
@@ -65,6 +197,11 @@ class LogParser:
     LEGACY_OUTPUT_PATTERN = re.compile(r'output[_\s]tokens?:\s*(\d+)', re.IGNORECASE)
     LEGACY_CACHE_PATTERN = re.compile(r'cache[_\s]read[_\s]tokens?:\s*(\d+)', re.IGNORECASE)
 
+    # Cheap prefilters: most log lines contain neither marker and skip all parsing
+    USAGE_MARKER = '"usage"'
+    LEGACY_PREFILTER = re.compile(r'tokens?:', re.IGNORECASE)
+    LINE_PREFILTER_BYTES = re.compile(rb'"usage"|tokens?:', re.IGNORECASE)
+
     # Timestamp pattern
     TIMESTAMP_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2}[T\s]\d{2}:\d{2}:\d{2})')
 
@@ -90,83 +227,97 @@ class LogParser:
             if isinstance(line, bytes):
                 line = line.decode('utf-8', errors='ignore')
 
-            line = line.strip()
+            usage = self.parse_line(line)
+            if usage:
+                yield usage
 
-            if not line:
-                continue
+    def parse_line(self, line: str) -> Optional[TokenUsage]:
+        """
+        Extract token usage from one log line (tiered, cheapest checks first).
+
+        1. Substring prefilter: lines without '"usage"' skip JSON work entirely
+        2. JSON API response, decoded at most once
+        3. Legacy text format, only for lines mentioning "token(s):"
+
+        Args:
+            line: Log line
 
-            # Try single-line JSON parsing first
+        Returns:
+            TokenUsage object or None
+        """
+        usage = None
+        if self.USAGE_MARKER in line:
             usage = self.parse_api_response(line)
-            if usage:
-                yield usage
-            else:
-                # Try legacy format
-                usage = self.parse_legacy_format(line)
-                if usage:
-                    yield usage
+        if usage is None and self.LEGACY_PREFILTER.search(line):
+            usage = self.parse_legacy_format(line)
+        return usage
 
     def parse_api_response(self, line: str) -> Optional[TokenUsage]:
         """
         Extract token usage from API response JSON.
 
+        The line is decoded at most once (orjson when installed); a usage object
+        nested below the top level is recovered with a regex on the raw text.
+
         Args:
             line: Log line containing JSON response
 
         Returns:
             TokenUsage object or None if not found
         """
+        if self.USAGE_MARKER not in line:
+            return None
+
+        data = None
+        if line.lstrip().startswith('{'):
+            try:
+                data = _json_loads(line)
+            except ValueError:
+                data = None
+
+            if isinstance(data, dict) and isinstance(data.get('usage'), dict):
+                return self._extract_usage_from_dict(data, line)
+
+        # Usage nested inside the response (or the line is not pure JSON)
+        usage_match = self.USAGE_FIELD_PATTERN.search(line)
+        if not usage_match:
+            return None
+
         try:
-            # Try direct JSON parsing first
-            if line.strip().startswith('{'):
-                data = json.loads(line)
-                if 'usage' in data:
-                    return self._extract_usage_from_dict(data)
-
-            # Try regex extraction
-            usage_match = self.USAGE_FIELD_PATTERN.search(line)
-            if usage_match:
-                usage_json = usage_match.group(1)
-                usage_data = json.loads(usage_json)
-
-                # Extract from main response if available
-                try:
-                    full_data = json.loads(line)
-                    request_id = full_data.get('id')
-                    model = full_data.get('model')
-                except:
-                    request_id = None
-                    model = None
-
-                return TokenUsage(
-                    input_tokens=usage_data.get('input_tokens', 0),
-                    output_tokens=usage_data.get('output_tokens', 0),
-                    cache_read_tokens=usage_data.get('cache_read_input_tokens', 0),
-                    cache_write_tokens=usage_data.get('cache_creation_input_tokens', 0),
-                    request_id=request_id,
-                    model=model,
-                    timestamp=self._extract_timestamp(line)
-                )
-
-        except (json.JSONDecodeError, KeyError, ValueError):
-            pass
+            usage_data = _json_loads(usage_match.group(1))
+        except ValueError:
+            return None
+        if not isinstance(usage_data, dict):
+            return None
 
-        return None
+        # Request id and model come from the top-level response when it parsed
+        if not isinstance(data, dict):
+            data = {}
 
-    def _extract_usage_from_dict(self, data: Dict) -> Optional[TokenUsage]:
-        """Extract usage from parsed JSON dict"""
-        if 'usage' not in data:
+        return self._build_usage(usage_data, data.get('id'), data.get('model'), line)
+
+    def _extract_usage_from_dict(self, data: Dict, text: Optional[str] = None) -> Optional[TokenUsage]:
+        """Extract usage from parsed JSON dict (text: raw line, for the timestamp)"""
+        usage = data.get('usage')
+        if not isinstance(usage, dict):
             return None
 
-        usage = data['usage']
+        return self._build_usage(
+            usage, data.get('id'), data.get('model'),
+            text if text is not None else str(data)
+        )
 
+    def _build_usage(self, usage: Dict, request_id: Optional[str],
+                     model: Optional[str], text: str) -> TokenUsage:
+        """Build a TokenUsage from an API usage object"""
         return TokenUsage(
             input_tokens=usage.get('input_tokens', 0),
             output_tokens=usage.get('output_tokens', 0),
             cache_read_tokens=usage.get('cache_read_input_tokens', 0),
             cache_write_tokens=usage.get('cache_creation_input_tokens', 0),
-            request_id=data.get('id'),
-            model=data.get('model'),
-            timestamp=self._extract_timestamp(str(data))
+            request_id=request_id,
+            model=model,
+            timestamp=self._extract_timestamp(text)
         )
 
     def parse_legacy_format(self, line: str) -> Optional[TokenUsage]:
@@ -259,15 +410,9 @@ class LogParser:
                 break
 
             if line:
-                line = line.strip()
-                # Try to parse
-                usage = self.parse_api_response(line)
+                usage = self.parse_line(line)
                 if usage:
                     yield usage
-                else:
-                    usage = self.parse_legacy_format(line)
-                    if usage:
-                        yield usage
 
     def parse_log_file(self, file_path: str) -> Generator[TokenUsage, None, None]:
         """
@@ -281,13 +426,107 @@ class LogParser:
         """
         with open(file_path, 'r') as f:
             for line in f:
-                usage = self.parse_api_response(line)
+                usage = self.parse_line(line)
                 if usage:
                     yield usage
+
+    def parse_log_file_batches(self, file_path: str,
+                               batch_size: int = 500) -> Generator[TokenUsageBatch, None, None]:
+        """
+        Parse existing log file into columnar batches.
+
+        Args:
+            file_path: Path to log file
+            batch_size: Maximum API calls per batch
+
+        Yields:
+            TokenUsageBatch objects (the last one may be partial)
+        """
+        batch = TokenUsageBatch()
+        for usage in self.parse_log_file(file_path):
+            batch.append(usage)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = TokenUsageBatch()
+
+        if batch:
+            yield batch
+
+    def parse_log_file_incremental(self, file_path: str,
+                                   checkpoint: Optional[LogCheckpoint] = None,
+                                   batch_size: int = 500,
+                                   complete: bool = False
+                                   ) -> Generator[Tuple[TokenUsageBatch, LogCheckpoint], None, None]:
+        """
+        Parse only the part of a log file written since a checkpoint.
+
+        Parsing resumes at checkpoint.offset when the file is the same one (same
+        inode, not shorter than the offset, same leading bytes); otherwise the
+        file was rotated, truncated or rewritten and parsing restarts at byte 0.
+        A last line without a newline may still be being written and is left
+        for the next call, unless complete is set.
+
+        Args:
+            file_path: Path to log file
+            checkpoint: Checkpoint returned by a previous call (None: start at byte 0)
+            batch_size: Maximum API calls per batch
+            complete: The log is finished; also parse a trailing unterminated line
+
+        Yields:
+            (TokenUsageBatch, LogCheckpoint) pairs. Each checkpoint covers its
+            batch and everything before it; the last pair is always yielded,
+            possibly with an empty batch.
+        """
+        path = str(file_path)
+
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            head = f.read(FINGERPRINT_BYTES)
+
+            offset = 0
+            if (checkpoint is not None
+                    and checkpoint.inode == stat.st_ino
+                    and checkpoint.offset <= stat.st_size
+                    and zlib.crc32(head[:checkpoint.fingerprint_size]) == checkpoint.fingerprint):
+                offset = checkpoint.offset
+
+            def checkpoint_at(position: int) -> LogCheckpoint:
+                size = min(len(head), position)
+                return LogCheckpoint(path, stat.st_ino, position, zlib.crc32(head[:size]), size)
+
+            batch = TokenUsageBatch()
+            position = offset
+            pending = b''
+            f.seek(offset)
+
+            while True:
+                chunk = f.read(READ_CHUNK_BYTES)
+                if chunk:
+                    data = pending + chunk
+                    end = data.rfind(b'\n') + 1
+                    pending = data[end:]
+                    lines = data[:end].split(b'\n')[:-1] if end else []
                 else:
-                    usage = self.parse_legacy_format(line)
+                    # End of file: an unterminated last line only counts when complete
+                    lines = [pending] if complete and pending else []
+                    pending = b''
+
+                for raw in lines:
+                    position += len(raw) + (1 if chunk else 0)
+                    if not self.LINE_PREFILTER_BYTES.search(raw):
+                        continue
+
+                    usage = self.parse_line(raw.decode('utf-8', errors='ignore'))
                     if usage:
-                        yield usage
+                        batch.append(usage)
+                        if len(batch) >= batch_size:
+                            yield batch, checkpoint_at(position)
+                            batch = TokenUsageBatch()
+
+                if not chunk:
+                    break
+
+            yield batch, checkpoint_at(position)
 
 
 def parse_usage_string(usage_str: str) -> Optional[TokenUsage]:
@@ -300,12 +539,4 @@ def parse_usage_string(usage_str: str) -> Optional[TokenUsage]:
     Returns:
         TokenUsage object or None
     """
-    parser = LogParser()
-
-    # Try JSON first
-    usage = parser.parse_api_response(usage_str)
-    if usage:
-        return usage
-
-    # Try legacy format
-    return parser.parse_legacy_format(usage_str)
+    return LogParser().parse_line(usage_str)
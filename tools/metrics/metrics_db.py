@@ -9,15 +9,69 @@ import threading
 import json
 from pathlib import Path
 from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
 from contextlib import contextmanager
+from itertools import repeat
+
+from .db_pool import get_pool
 
 
 # Database schema version
-SCHEMA_VERSION = 1
+SCHEMA_VERSION = 6
+
+# Cache event name -> cache_stats counter column
+CACHE_EVENT_COLUMNS = {
+    'hit': 'hits',
+    'miss': 'misses',
+    'stale': 'stale',
+    'eviction': 'evictions',
+    'write': 'writes',
+}
+
+# Lookup latency histogram: (bucket label, upper bound in ms, column)
+_LATENCY_BOUNDS = [
+    ('<=1ms', 1.0, 'latency_le_1ms'),
+    ('<=10ms', 10.0, 'latency_le_10ms'),
+    ('<=100ms', 100.0, 'latency_le_100ms'),
+    ('<=1000ms', 1000.0, 'latency_le_1000ms'),
+]
+LATENCY_BUCKETS = [(label, column) for label, _, column in _LATENCY_BOUNDS] + [('>1000ms', 'latency_gt_1000ms')]
+
+# Range ends at or after this time cover the whole day (rollups are per local day)
+END_OF_DAY = time(23, 59, 59)
+
+
+def _local_day_sql(column: str) -> str:
+    """
+    SQL expression for the local calendar day of a timestamp column.
+
+    Timestamps are either CURRENT_TIMESTAMP defaults (UTC, 'YYYY-MM-DD HH:MM:SS')
+    or local datetime.isoformat() values ('YYYY-MM-DDTHH:MM:SS...').
+    """
+    return (f"CASE WHEN instr({column}, 'T') > 0 THEN date({column}) "
+            f"ELSE date({column}, 'localtime') END")
+
 
-# Thread-local storage for connections
-_thread_local = threading.local()
+def _local_time_sql(column: str) -> str:
+    """SQL expression for a timestamp column as local 'YYYY-MM-DD HH:MM:SS'"""
+    return (f"CASE WHEN instr({column}, 'T') > 0 THEN datetime({column}) "
+            f"ELSE datetime({column}, 'localtime') END")
+
+
+def _parse_local_datetime(value: str) -> datetime:
+    """Parse an ISO date/datetime as naive local time"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _latency_bucket(latency_ms: float) -> str:
+    """Return the cache_stats histogram column for a lookup latency"""
+    for _, bound, column in _LATENCY_BOUNDS:
+        if latency_ms <= bound:
+            return column
+    return 'latency_gt_1000ms'
 
 
 class MetricsDatabase:
@@ -33,78 +87,75 @@ class MetricsDatabase:
         if db_path is None:
             db_path = str(Path.home() / '.context-foundry' / 'metrics.db')
 
-        self.db_path = Path(db_path)
+        self.db_path = Path(db_path).expanduser()
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._pool = get_pool(str(self.db_path))
+        self._pool_released = False
 
         # Initialize schema
         self._initialize_schema()
 
     def _get_connection(self) -> sqlite3.Connection:
-        """Get thread-local database connection"""
-        if not hasattr(_thread_local, 'connection') or not hasattr(_thread_local, 'db_path') or _thread_local.db_path != str(self.db_path):
-            # Close old connection if it exists and path changed
-            if hasattr(_thread_local, 'connection'):
-                try:
-                    _thread_local.connection.close()
-                except:
-                    pass
-
-            _thread_local.connection = sqlite3.connect(
-                str(self.db_path),
-                check_same_thread=False,
-                timeout=30.0
-            )
-            _thread_local.connection.row_factory = sqlite3.Row
-            # Enable foreign keys
-            _thread_local.connection.execute("PRAGMA foreign_keys = ON")
-            _thread_local.db_path = str(self.db_path)
-        return _thread_local.connection
+        """Get this thread's pooled reader connection"""
+        return self._pool.reader()
+
+    def reader(self) -> sqlite3.Connection:
+        """
+        Get a connection for read-only queries (exports, ad-hoc reports).
+
+        The connection is this thread's pooled reader: don't close it or
+        write through it (writes go through the database's methods).
+        """
+        return self._pool.reader()
 
     def close(self):
-        """Close database connection"""
-        if hasattr(_thread_local, 'connection'):
-            try:
-                _thread_local.connection.close()
-                delattr(_thread_local, 'connection')
-                if hasattr(_thread_local, 'db_path'):
-                    delattr(_thread_local, 'db_path')
-            except:
-                pass
+        """Release pooled connections (closed once no other database on the file uses them)"""
+        if not self._pool_released:
+            self._pool_released = True
+            self._pool.release()
 
     @contextmanager
-    def _transaction(self):
-        """Context manager for database transactions"""
-        conn = self._get_connection()
-        try:
+    def _transaction(self, foreign_keys: bool = True):
+        """
+        Context manager for database transactions (on the shared writer connection).
+
+        Livestream records (tasks, decisions, agent instances) are written with
+        foreign_keys=False: they may arrive before the task row they reference.
+        """
+        with self._pool.write(foreign_keys=foreign_keys) as conn:
             yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
 
     def _initialize_schema(self):
         """Initialize database schema with migrations"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        # Create schema_version table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS schema_version (
-                version INTEGER PRIMARY KEY,
-                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Check current version
-        cursor.execute("SELECT MAX(version) as version FROM schema_version")
-        row = cursor.fetchone()
-        current_version = row['version'] if row['version'] is not None else 0
-
-        # Apply migrations
-        if current_version < 1:
-            self._migrate_to_v1(conn)
+        with self._transaction() as conn:
+            cursor = conn.cursor()
 
-        conn.commit()
+            # Create schema_version table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # Check current version
+            cursor.execute("SELECT MAX(version) as version FROM schema_version")
+            row = cursor.fetchone()
+            current_version = row['version'] if row['version'] is not None else 0
+
+            # Apply migrations
+            if current_version < 1:
+                self._migrate_to_v1(conn)
+            if current_version < 2:
+                self._migrate_to_v2(conn)
+            if current_version < 3:
+                self._migrate_to_v3(conn)
+            if current_version < 4:
+                self._migrate_to_v4(conn)
+            if current_version < 5:
+                self._migrate_to_v5(conn)
+            if current_version < 6:
+                self._migrate_to_v6(conn)
 
     def _migrate_to_v1(self, conn: sqlite3.Connection):
         """Migrate to schema version 1"""
@@ -193,6 +244,539 @@ class MetricsDatabase:
         # Mark version as applied
         cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (1,))
 
+    def _migrate_to_v2(self, conn: sqlite3.Connection):
+        """Migrate to schema version 2 (cache instrumentation)"""
+        cursor = conn.cursor()
+
+        # cache_stats table: one row of counters per cache namespace per day
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS cache_stats (
+                namespace TEXT NOT NULL,
+                day DATE NOT NULL,
+                hits INTEGER DEFAULT 0,
+                misses INTEGER DEFAULT 0,
+                stale INTEGER DEFAULT 0,
+                evictions INTEGER DEFAULT 0,
+                writes INTEGER DEFAULT 0,
+                bytes_read INTEGER DEFAULT 0,
+                bytes_written INTEGER DEFAULT 0,
+                lookup_count INTEGER DEFAULT 0,
+                lookup_ms_total REAL DEFAULT 0.0,
+                lookup_ms_max REAL DEFAULT 0.0,
+                latency_le_1ms INTEGER DEFAULT 0,
+                latency_le_10ms INTEGER DEFAULT 0,
+                latency_le_100ms INTEGER DEFAULT 0,
+                latency_le_1000ms INTEGER DEFAULT 0,
+                latency_gt_1000ms INTEGER DEFAULT 0,
+                time_saved_seconds REAL DEFAULT 0.0,
+                PRIMARY KEY (namespace, day)
+            )
+        """)
+
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_cache_stats_day ON cache_stats(day)")
+
+        cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (2,))
+
+    def _migrate_to_v3(self, conn: sqlite3.Connection):
+        """
+        Migrate to schema version 3 (rollup tables).
+
+        Rollups are maintained by triggers on insert/update, so every write
+        path (create_phase, update_phase, record_api_call, bulk ingest) keeps
+        them current. Deleting raw rows does not reduce rollups: they are the
+        long-term history once raw rows are removed by retention.
+
+        Build rollups also keep the day's MIN/MAX build cost, so
+        get_cost_summary never scans raw builds for whole days. Each change to
+        a build's cost or day recomputes its day's min/max with one index seek
+        on (rollup_day, total_cost).
+        """
+        cursor = conn.cursor()
+        today = "date('now', 'localtime')"
+        phase_day = f"COALESCE({_local_day_sql('NEW.started_at')}, {today})"
+        build_day = f"COALESCE({_local_day_sql('NEW.created_at')}, {today})"
+        call_day = f"COALESCE({_local_day_sql('NEW.timestamp')}, {today})"
+
+        # Local day each phase/build is rolled up under
+        cursor.execute("ALTER TABLE phases ADD COLUMN rollup_day DATE")
+        cursor.execute("ALTER TABLE builds ADD COLUMN rollup_day DATE")
+        cursor.execute(f"UPDATE phases SET rollup_day = COALESCE({_local_day_sql('started_at')}, {today})")
+        cursor.execute(f"UPDATE builds SET rollup_day = COALESCE({_local_day_sql('created_at')}, {today})")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_builds_rollup_day ON builds(rollup_day)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_builds_rollup_day_cost ON builds(rollup_day, total_cost)")
+
+        # Per build, per day
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS build_rollups (
+                day DATE PRIMARY KEY,
+                builds INTEGER DEFAULT 0,
+                tokens_input INTEGER DEFAULT 0,
+                tokens_output INTEGER DEFAULT 0,
+                tokens_cached INTEGER DEFAULT 0,
+                cost REAL DEFAULT 0.0,
+                min_cost REAL,
+                max_cost REAL
+            )
+        """)
+
+        # Per phase name, per day
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS phase_rollups (
+                phase_name TEXT NOT NULL,
+                day DATE NOT NULL,
+                runs INTEGER DEFAULT 0,
+                tokens_input INTEGER DEFAULT 0,
+                tokens_output INTEGER DEFAULT 0,
+                tokens_cached INTEGER DEFAULT 0,
+                cost REAL DEFAULT 0.0,
+                duration_total INTEGER DEFAULT 0,
+                duration_count INTEGER DEFAULT 0,
+                api_calls INTEGER DEFAULT 0,
+                latency_ms_total INTEGER DEFAULT 0,
+                latency_count INTEGER DEFAULT 0,
+                PRIMARY KEY (phase_name, day)
+            )
+        """)
+
+        # Per model, per day
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS model_rollups (
+                model TEXT NOT NULL,
+                day DATE NOT NULL,
+                api_calls INTEGER DEFAULT 0,
+                tokens_input INTEGER DEFAULT 0,
+                tokens_output INTEGER DEFAULT 0,
+                tokens_cached INTEGER DEFAULT 0,
+                cost REAL DEFAULT 0.0,
+                latency_ms_total INTEGER DEFAULT 0,
+                latency_count INTEGER DEFAULT 0,
+                PRIMARY KEY (model, day)
+            )
+        """)
+
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_phase_rollups_day ON phase_rollups(day)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_model_rollups_day ON model_rollups(day)")
+
+        # Backfill from existing raw rows
+        cursor.execute("""
+            INSERT INTO build_rollups (
+                day, builds, tokens_input, tokens_output, tokens_cached, cost, min_cost, max_cost
+            )
+            SELECT rollup_day, COUNT(*), SUM(COALESCE(total_tokens_input, 0)),
+                   SUM(COALESCE(total_tokens_output, 0)), SUM(COALESCE(total_tokens_cached, 0)),
+                   SUM(COALESCE(total_cost, 0.0)), MIN(total_cost), MAX(total_cost)
+            FROM builds GROUP BY rollup_day
+        """)
+        cursor.execute("""
+            INSERT INTO phase_rollups (
+                phase_name, day, runs, tokens_input, tokens_output, tokens_cached, cost,
+                duration_total, duration_count, api_calls, latency_ms_total, latency_count
+            )
+            SELECT p.phase_name, p.rollup_day, COUNT(*),
+                   SUM(COALESCE(p.tokens_input, 0)), SUM(COALESCE(p.tokens_output, 0)),
+                   SUM(COALESCE(p.tokens_cached, 0)), SUM(COALESCE(p.cost, 0.0)),
+                   SUM(COALESCE(p.duration_seconds, 0)), COUNT(p.duration_seconds),
+                   COALESCE(SUM(a.calls), 0), COALESCE(SUM(a.latency_total), 0),
+                   COALESCE(SUM(a.latency_count), 0)
+            FROM phases p
+            LEFT JOIN (
+                SELECT phase_id, COUNT(*) AS calls,
+                       SUM(COALESCE(latency_ms, 0)) AS latency_total,
+                       COUNT(latency_ms) AS latency_count
+                FROM api_calls GROUP BY phase_id
+            ) a ON a.phase_id = p.id
+            GROUP BY p.phase_name, p.rollup_day
+        """)
+        cursor.execute(f"""
+            INSERT INTO model_rollups (
+                model, day, api_calls, tokens_input, tokens_output, tokens_cached, cost,
+                latency_ms_total, latency_count
+            )
+            SELECT model, COALESCE({_local_day_sql('timestamp')}, {today}), COUNT(*),
+                   SUM(COALESCE(tokens_input, 0)), SUM(COALESCE(tokens_output, 0)),
+                   SUM(COALESCE(tokens_cached, 0)), SUM(COALESCE(cost, 0.0)),
+                   SUM(COALESCE(latency_ms, 0)), COUNT(latency_ms)
+            FROM api_calls GROUP BY 1, 2
+        """)
+
+        # Builds: new build, totals changed, build moved to another day
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_builds_rollup_insert AFTER INSERT ON builds
+            BEGIN
+                UPDATE builds SET rollup_day = {build_day} WHERE id = NEW.id;
+                INSERT INTO build_rollups (day, builds, tokens_input, tokens_output, tokens_cached, cost)
+                VALUES ({build_day}, 1, COALESCE(NEW.total_tokens_input, 0),
+                        COALESCE(NEW.total_tokens_output, 0), COALESCE(NEW.total_tokens_cached, 0),
+                        COALESCE(NEW.total_cost, 0.0))
+                ON CONFLICT(day) DO UPDATE SET
+                    builds = builds + 1,
+                    tokens_input = tokens_input + excluded.tokens_input,
+                    tokens_output = tokens_output + excluded.tokens_output,
+                    tokens_cached = tokens_cached + excluded.tokens_cached,
+                    cost = cost + excluded.cost;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_builds_rollup_totals
+            AFTER UPDATE OF total_tokens_input, total_tokens_output, total_tokens_cached, total_cost ON builds
+            WHEN OLD.created_at IS NEW.created_at
+            BEGIN
+                INSERT INTO build_rollups (day, builds, tokens_input, tokens_output, tokens_cached, cost)
+                VALUES (OLD.rollup_day, 0,
+                        COALESCE(NEW.total_tokens_input, 0) - COALESCE(OLD.total_tokens_input, 0),
+                        COALESCE(NEW.total_tokens_output, 0) - COALESCE(OLD.total_tokens_output, 0),
+                        COALESCE(NEW.total_tokens_cached, 0) - COALESCE(OLD.total_tokens_cached, 0),
+                        COALESCE(NEW.total_cost, 0.0) - COALESCE(OLD.total_cost, 0.0))
+                ON CONFLICT(day) DO UPDATE SET
+                    tokens_input = tokens_input + excluded.tokens_input,
+                    tokens_output = tokens_output + excluded.tokens_output,
+                    tokens_cached = tokens_cached + excluded.tokens_cached,
+                    cost = cost + excluded.cost;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_builds_rollup_moved AFTER UPDATE OF created_at ON builds
+            WHEN OLD.created_at IS NOT NEW.created_at
+            BEGIN
+                UPDATE builds SET rollup_day = {build_day} WHERE id = NEW.id;
+                INSERT INTO build_rollups (day, builds, tokens_input, tokens_output, tokens_cached, cost)
+                VALUES (OLD.rollup_day, -1, -COALESCE(OLD.total_tokens_input, 0),
+                        -COALESCE(OLD.total_tokens_output, 0), -COALESCE(OLD.total_tokens_cached, 0),
+                        -COALESCE(OLD.total_cost, 0.0))
+                ON CONFLICT(day) DO UPDATE SET
+                    builds = builds + excluded.builds,
+                    tokens_input = tokens_input + excluded.tokens_input,
+                    tokens_output = tokens_output + excluded.tokens_output,
+                    tokens_cached = tokens_cached + excluded.tokens_cached,
+                    cost = cost + excluded.cost;
+                INSERT INTO build_rollups (day, builds, tokens_input, tokens_output, tokens_cached, cost)
+                VALUES ({build_day}, 1, COALESCE(NEW.total_tokens_input, 0),
+                        COALESCE(NEW.total_tokens_output, 0), COALESCE(NEW.total_tokens_cached, 0),
+                        COALESCE(NEW.total_cost, 0.0))
+                ON CONFLICT(day) DO UPDATE SET
+                    builds = builds + 1,
+                    tokens_input = tokens_input + excluded.tokens_input,
+                    tokens_output = tokens_output + excluded.tokens_output,
+                    tokens_cached = tokens_cached + excluded.tokens_cached,
+                    cost = cost + excluded.cost;
+            END
+        """)
+
+        # Phases: new run, totals/duration changed
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_phases_rollup_insert AFTER INSERT ON phases
+            BEGIN
+                UPDATE phases SET rollup_day = {phase_day} WHERE id = NEW.id;
+                INSERT INTO phase_rollups (
+                    phase_name, day, runs, tokens_input, tokens_output, tokens_cached, cost,
+                    duration_total, duration_count
+                )
+                VALUES (NEW.phase_name, {phase_day}, 1, COALESCE(NEW.tokens_input, 0),
+                        COALESCE(NEW.tokens_output, 0), COALESCE(NEW.tokens_cached, 0),
+                        COALESCE(NEW.cost, 0.0), COALESCE(NEW.duration_seconds, 0),
+                        NEW.duration_seconds IS NOT NULL)
+                ON CONFLICT(phase_name, day) DO UPDATE SET
+                    runs = runs + 1,
+                    tokens_input = tokens_input + excluded.tokens_input,
+                    tokens_output = tokens_output + excluded.tokens_output,
+                    tokens_cached = tokens_cached + excluded.tokens_cached,
+                    cost = cost + excluded.cost,
+                    duration_total = duration_total + excluded.duration_total,
+                    duration_count = duration_count + excluded.duration_count;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_phases_rollup_update
+            AFTER UPDATE OF tokens_input, tokens_output, tokens_cached, cost, duration_seconds ON phases
+            BEGIN
+                INSERT INTO phase_rollups (
+                    phase_name, day, runs, tokens_input, tokens_output, tokens_cached, cost,
+                    duration_total, duration_count
+                )
+                VALUES (OLD.phase_name, OLD.rollup_day, 0,
+                        COALESCE(NEW.tokens_input, 0) - COALESCE(OLD.tokens_input, 0),
+                        COALESCE(NEW.tokens_output, 0) - COALESCE(OLD.tokens_output, 0),
+                        COALESCE(NEW.tokens_cached, 0) - COALESCE(OLD.tokens_cached, 0),
+                        COALESCE(NEW.cost, 0.0) - COALESCE(OLD.cost, 0.0),
+                        COALESCE(NEW.duration_seconds, 0) - COALESCE(OLD.duration_seconds, 0),
+                        (NEW.duration_seconds IS NOT NULL) - (OLD.duration_seconds IS NOT NULL))
+                ON CONFLICT(phase_name, day) DO UPDATE SET
+                    tokens_input = tokens_input + excluded.tokens_input,
+                    tokens_output = tokens_output + excluded.tokens_output,
+                    tokens_cached = tokens_cached + excluded.tokens_cached,
+                    cost = cost + excluded.cost,
+                    duration_total = duration_total + excluded.duration_total,
+                    duration_count = duration_count + excluded.duration_count;
+            END
+        """)
+
+        # API calls: per model totals and per phase latency
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_api_calls_rollup_insert AFTER INSERT ON api_calls
+            BEGIN
+                INSERT INTO model_rollups (
+                    model, day, api_calls, tokens_input, tokens_output, tokens_cached, cost,
+                    latency_ms_total, latency_count
+                )
+                VALUES (NEW.model, {call_day}, 1, COALESCE(NEW.tokens_input, 0),
+                        COALESCE(NEW.tokens_output, 0), COALESCE(NEW.tokens_cached, 0),
+                        COALESCE(NEW.cost, 0.0), COALESCE(NEW.latency_ms, 0),
+                        NEW.latency_ms IS NOT NULL)
+                ON CONFLICT(model, day) DO UPDATE SET
+                    api_calls = api_calls + 1,
+                    tokens_input = tokens_input + excluded.tokens_input,
+                    tokens_output = tokens_output + excluded.tokens_output,
+                    tokens_cached = tokens_cached + excluded.tokens_cached,
+                    cost = cost + excluded.cost,
+                    latency_ms_total = latency_ms_total + excluded.latency_ms_total,
+                    latency_count = latency_count + excluded.latency_count;
+                UPDATE phase_rollups SET
+                    api_calls = api_calls + 1,
+                    latency_ms_total = latency_ms_total + COALESCE(NEW.latency_ms, 0),
+                    latency_count = latency_count + (NEW.latency_ms IS NOT NULL)
+                WHERE (phase_name, day) = (SELECT phase_name, rollup_day FROM phases WHERE id = NEW.phase_id);
+            END
+        """)
+
+        # Day's min/max build cost; also fires for new builds (the insert
+        # trigger sets rollup_day with an UPDATE)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_builds_rollup_cost_range
+            AFTER UPDATE OF total_cost, rollup_day ON builds
+            WHEN NEW.rollup_day IS NOT NULL
+            BEGIN
+                INSERT INTO build_rollups (day, min_cost, max_cost)
+                SELECT NEW.rollup_day, MIN(total_cost), MAX(total_cost)
+                FROM builds WHERE rollup_day = NEW.rollup_day
+                ON CONFLICT(day) DO UPDATE SET
+                    min_cost = excluded.min_cost,
+                    max_cost = excluded.max_cost;
+                UPDATE build_rollups SET
+                    min_cost = (SELECT MIN(total_cost) FROM builds WHERE rollup_day = OLD.rollup_day),
+                    max_cost = (SELECT MAX(total_cost) FROM builds WHERE rollup_day = OLD.rollup_day)
+                WHERE day = OLD.rollup_day AND OLD.rollup_day IS NOT NEW.rollup_day;
+            END
+        """)
+
+        cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (3,))
+
+    def _migrate_to_v4(self, conn: sqlite3.Connection):
+        """
+        Migrate to schema version 4 (livestream tables in the same schema).
+
+        Tasks, time-series metrics, decisions and agent instances used to be
+        created by a separate livestream database class in the same file; they
+        are now part of this migration chain. Existing tables are kept as is.
+        Builds and tasks share the session id (builds.session_id = tasks.task_id),
+        and API calls can name the agent instance that made them.
+        """
+        cursor = conn.cursor()
+
+        # Tasks table - Main task tracking
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                project_name TEXT,
+                task_description TEXT,
+                working_directory TEXT,
+                status TEXT,
+                phases_completed TEXT,
+                current_phase TEXT,
+                start_time TEXT,
+                end_time TEXT,
+                duration_seconds INTEGER,
+                github_url TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Metrics table - Time-series metrics per task
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT,
+                timestamp TEXT,
+                phase TEXT,
+                token_usage INTEGER,
+                token_percentage REAL,
+                latency_ms REAL,
+                context_resets INTEGER,
+                elapsed_seconds INTEGER,
+                estimated_remaining_seconds INTEGER,
+                FOREIGN KEY (task_id) REFERENCES tasks(task_id)
+            )
+        """)
+
+        # Decisions table - Autonomous decision tracking
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS decisions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT,
+                timestamp TEXT,
+                phase TEXT,
+                decision_type TEXT,
+                decision_description TEXT,
+                quality_rating INTEGER,
+                difficulty_rating INTEGER,
+                is_regrettable BOOLEAN,
+                used_lessons_learned BOOLEAN,
+                pattern_ids TEXT,
+                reasoning TEXT,
+                outcome TEXT,
+                FOREIGN KEY (task_id) REFERENCES tasks(task_id)
+            )
+        """)
+
+        # Agent performance table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS agent_performance (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT,
+                agent_type TEXT,
+                phase TEXT,
+                start_time TEXT,
+                end_time TEXT,
+                duration_seconds INTEGER,
+                success BOOLEAN,
+                issues_found INTEGER,
+                issues_fixed INTEGER,
+                files_created INTEGER,
+                files_modified INTEGER,
+                lines_of_code INTEGER,
+                tokens_used INTEGER,
+                FOREIGN KEY (task_id) REFERENCES tasks(task_id)
+            )
+        """)
+
+        # Test iterations table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS test_iterations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT,
+                iteration_number INTEGER,
+                timestamp TEXT,
+                tests_run INTEGER,
+                tests_passed INTEGER,
+                tests_failed INTEGER,
+                test_output TEXT,
+                fixes_applied TEXT,
+                duration_seconds INTEGER,
+                FOREIGN KEY (task_id) REFERENCES tasks(task_id)
+            )
+        """)
+
+        # Pattern effectiveness table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS pattern_effectiveness (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT,
+                pattern_id TEXT,
+                pattern_type TEXT,
+                was_applied BOOLEAN,
+                prevented_issue BOOLEAN,
+                issue_description TEXT,
+                timestamp TEXT,
+                FOREIGN KEY (task_id) REFERENCES tasks(task_id)
+            )
+        """)
+
+        # Agent instances table - NEW for multi-agent monitoring
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS agent_instances (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                agent_id TEXT UNIQUE NOT NULL,
+                agent_type TEXT NOT NULL,
+                agent_name TEXT,
+                status TEXT NOT NULL,
+                phase TEXT,
+                progress_percent REAL DEFAULT 0.0,
+                tokens_used INTEGER DEFAULT 0,
+                tokens_limit INTEGER DEFAULT 200000,
+                token_percentage REAL DEFAULT 0.0,
+                start_time TEXT,
+                end_time TEXT,
+                duration_seconds INTEGER,
+                parent_agent_id TEXT,
+                error_message TEXT,
+                metadata TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (session_id) REFERENCES tasks(task_id)
+            )
+        """)
+
+        # Create indexes for performance
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_metrics_task_id
+            ON metrics(task_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_decisions_task_id
+            ON decisions(task_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_agent_perf_task_id
+            ON agent_performance(task_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_test_iter_task_id
+            ON test_iterations(task_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_agent_instances_session
+            ON agent_instances(session_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_agent_instances_status
+            ON agent_instances(status)
+        """)
+
+        # Link API calls to agent instances
+        cursor.execute("ALTER TABLE api_calls ADD COLUMN agent_id TEXT")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_api_calls_agent ON api_calls(agent_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_decisions_phase ON decisions(task_id, phase)")
+
+        cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (4,))
+
+    def _migrate_to_v5(self, conn: sqlite3.Connection):
+        """
+        Migrate to schema version 5 (cache-write tokens per API call).
+
+        Cache writes are billed at their own rate; storing them lets costs be
+        recomputed in SQL when pricing changes (reprice_api_calls). Existing
+        rows get NULL: their stored cost may include cache writes that were
+        never counted, so they are not repriced.
+        """
+        cursor = conn.cursor()
+        cursor.execute("ALTER TABLE api_calls ADD COLUMN tokens_cache_write INTEGER")
+        cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (5,))
+
+    def _migrate_to_v6(self, conn: sqlite3.Connection):
+        """
+        Migrate to schema version 6 (log parsing checkpoints).
+
+        One row per collected log file: the phase its calls are recorded under
+        and the byte offset / inode / leading-bytes CRC reached so far, so
+        re-collecting a growing log only parses the new bytes.
+        """
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS log_checkpoints (
+                phase_id INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                inode INTEGER NOT NULL DEFAULT 0,
+                offset INTEGER NOT NULL DEFAULT 0,
+                fingerprint INTEGER NOT NULL DEFAULT 0,
+                fingerprint_size INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (phase_id, path),
+                FOREIGN KEY (phase_id) REFERENCES phases(id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_log_checkpoints_path ON log_checkpoints(path)")
+        cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (6,))
+
     def create_build(self, session_id: str, **kwargs) -> int:
         """
         Create new build record.
@@ -312,7 +896,8 @@ class MetricsDatabase:
 
     def record_api_call(self, phase_id: int, model: str, tokens_input: int,
                        tokens_output: int, tokens_cached: int, cost: float,
-                       latency_ms: Optional[int] = None, request_id: Optional[str] = None):
+                       latency_ms: Optional[int] = None, request_id: Optional[str] = None,
+                       agent_id: Optional[str] = None, tokens_cache_write: int = 0):
         """
         Record individual API call.
 
@@ -325,6 +910,8 @@ class MetricsDatabase:
             cost: Call cost in USD
             latency_ms: Latency in milliseconds
             request_id: API request ID
+            agent_id: Agent instance that made the call
+            tokens_cache_write: Cache-write tokens
         """
         with self._transaction() as conn:
             cursor = conn.cursor()
@@ -332,10 +919,166 @@ class MetricsDatabase:
             cursor.execute("""
                 INSERT INTO api_calls (
                     phase_id, model, tokens_input, tokens_output, tokens_cached,
-                    cost, latency_ms, request_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    cost, latency_ms, request_id, agent_id, tokens_cache_write
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (phase_id, model, tokens_input, tokens_output, tokens_cached,
-                  cost, latency_ms, request_id))
+                  cost, latency_ms, request_id, agent_id, tokens_cache_write))
+
+    def record_api_calls_bulk(self, phase_id: int, calls: List[Dict[str, Any]]) -> int:
+        """
+        Record a batch of API calls in a single transaction.
+
+        Inserts all calls with one executemany and adds their totals to the
+        parent phase and build aggregates in the same transaction.
+
+        Args:
+            phase_id: Phase ID
+            calls: API calls, each a dict with model, tokens_input, tokens_output,
+                tokens_cached, cost and optional tokens_cache_write / latency_ms /
+                request_id / agent_id
+
+        Returns:
+            Number of calls recorded
+        """
+        if not calls:
+            return 0
+
+        rows = [
+            (phase_id, call['model'], call.get('tokens_input', 0), call.get('tokens_output', 0),
+             call.get('tokens_cached', 0), call.get('cost', 0.0),
+             call.get('latency_ms'), call.get('request_id'), call.get('agent_id'),
+             call.get('tokens_cache_write', 0))
+            for call in calls
+        ]
+
+        return self._insert_api_call_rows(
+            phase_id, rows,
+            sum(row[2] or 0 for row in rows),
+            sum(row[3] or 0 for row in rows),
+            sum(row[4] or 0 for row in rows),
+            sum(row[5] or 0.0 for row in rows)
+        )
+
+    def record_usage_batch(self, phase_id: int, batch, costs, model: Optional[str] = None,
+                           agent_id: Optional[str] = None, checkpoint=None) -> int:
+        """
+        Record a columnar batch of API calls in a single transaction.
+
+        Same effect as record_api_calls_bulk, but reads the typed token arrays of
+        a TokenUsageBatch directly instead of one dict per call.
+
+        Args:
+            phase_id: Phase ID
+            batch: TokenUsageBatch with the calls' token counts
+            costs: Per-call costs aligned with the batch (e.g. from CostCalculator.calculate_usage_costs)
+            model: Model for every call (default: each call's own model, else 'unknown')
+            agent_id: Agent that made the calls (optional)
+            checkpoint: LogCheckpoint reached after these calls, saved in the same
+                transaction so calls are never recorded twice (optional)
+
+        Returns:
+            Number of calls recorded
+        """
+        models = [model] * len(batch) if model else [m or 'unknown' for m in batch.models]
+        costs = [float(cost) for cost in costs]
+        rows = list(zip(
+            repeat(phase_id), models, batch.input_tokens, batch.output_tokens,
+            batch.cache_read_tokens, costs, repeat(None), batch.request_ids,
+            repeat(agent_id), batch.cache_write_tokens
+        ))
+        if not rows and checkpoint is None:
+            return 0
+
+        with self._transaction():
+            if rows:
+                self._insert_api_call_rows(
+                    phase_id, rows,
+                    sum(batch.input_tokens), sum(batch.output_tokens),
+                    sum(batch.cache_read_tokens), sum(costs)
+                )
+            if checkpoint is not None:
+                self.save_log_checkpoint(phase_id, checkpoint)
+
+        return len(rows)
+
+    def save_log_checkpoint(self, phase_id: int, checkpoint):
+        """
+        Save how far a log file has been parsed.
+
+        Args:
+            phase_id: Phase the log's API calls are recorded under
+            checkpoint: LogCheckpoint (path, inode, offset, fingerprint, fingerprint_size)
+        """
+        with self._transaction() as conn:
+            conn.execute("""
+                INSERT INTO log_checkpoints (
+                    phase_id, path, inode, offset, fingerprint, fingerprint_size, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (phase_id, path) DO UPDATE SET
+                    inode = excluded.inode,
+                    offset = excluded.offset,
+                    fingerprint = excluded.fingerprint,
+                    fingerprint_size = excluded.fingerprint_size,
+                    updated_at = excluded.updated_at
+            """, (phase_id, checkpoint.path, checkpoint.inode, checkpoint.offset,
+                  checkpoint.fingerprint, checkpoint.fingerprint_size))
+
+    def get_log_checkpoint(self, session_id: str, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the parsing checkpoint of a build's log file.
+
+        Args:
+            session_id: Session identifier
+            path: Log file path (as saved)
+
+        Returns:
+            Dict with phase_id, path, inode, offset, fingerprint, fingerprint_size
+            and updated_at, or None if the log was never collected for the build
+        """
+        conn = self._get_connection()
+        row = conn.execute("""
+            SELECT lc.* FROM log_checkpoints lc
+            JOIN phases p ON p.id = lc.phase_id
+            JOIN builds b ON b.id = p.build_id
+            WHERE b.session_id = ? AND lc.path = ?
+            ORDER BY lc.updated_at DESC
+            LIMIT 1
+        """, (session_id, path)).fetchone()
+
+        return dict(row) if row else None
+
+    def _insert_api_call_rows(self, phase_id: int, rows: List[tuple], tokens_input: int,
+                              tokens_output: int, tokens_cached: int, cost: float) -> int:
+        """Insert api_calls rows and add their totals to the phase and build (one transaction)"""
+        with self._transaction() as conn:
+            cursor = conn.cursor()
+
+            cursor.executemany("""
+                INSERT INTO api_calls (
+                    phase_id, model, tokens_input, tokens_output, tokens_cached,
+                    cost, latency_ms, request_id, agent_id, tokens_cache_write
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+
+            cursor.execute("""
+                UPDATE phases SET
+                    tokens_input = COALESCE(tokens_input, 0) + ?,
+                    tokens_output = COALESCE(tokens_output, 0) + ?,
+                    tokens_cached = COALESCE(tokens_cached, 0) + ?,
+                    cost = COALESCE(cost, 0.0) + ?
+                WHERE id = ?
+            """, (tokens_input, tokens_output, tokens_cached, cost, phase_id))
+
+            cursor.execute("""
+                UPDATE builds SET
+                    total_tokens_input = COALESCE(total_tokens_input, 0) + ?,
+                    total_tokens_output = COALESCE(total_tokens_output, 0) + ?,
+                    total_tokens_cached = COALESCE(total_tokens_cached, 0) + ?,
+                    total_cost = COALESCE(total_cost, 0.0) + ?
+                WHERE id = (SELECT build_id FROM phases WHERE id = ?)
+            """, (tokens_input, tokens_output, tokens_cached, cost, phase_id))
+
+        return len(rows)
 
     def get_build_metrics(self, session_id: str) -> Dict[str, Any]:
         """
@@ -401,13 +1144,19 @@ class MetricsDatabase:
             'phases': phases
         }
 
+    def _rollup_since_day(self, days: int) -> str:
+        """First local day included in a days-long rollup window"""
+        return (datetime.now().date() - timedelta(days=days)).isoformat()
+
     def get_phase_totals(self, phase_name: str, days: int = 30) -> Dict[str, Any]:
         """
         Get aggregated totals for a phase across all builds in time period.
 
+        Reads the per-phase daily rollups (O(days), independent of build count).
+
         Args:
             phase_name: Phase name
-            days: Number of days to look back
+            days: Number of days to look back (whole local days)
 
         Returns:
             Dict with aggregated metrics
@@ -415,56 +1164,44 @@ class MetricsDatabase:
         conn = self._get_connection()
         cursor = conn.cursor()
 
-        since_date = (datetime.now() - timedelta(days=days)).isoformat()
-
         cursor.execute("""
             SELECT
-                COUNT(*) as total_runs,
-                SUM(tokens_input) as total_tokens_input,
-                SUM(tokens_output) as total_tokens_output,
-                SUM(tokens_cached) as total_tokens_cached,
-                SUM(cost) as total_cost,
-                AVG(duration_seconds) as avg_duration_seconds
-            FROM phases
-            WHERE phase_name = ? AND started_at >= ?
-        """, (phase_name, since_date))
-
-        row = cursor.fetchone()
-
-        if row:
-            result = dict(row)
-            result['total_tokens'] = (result['total_tokens_input'] or 0) + (result['total_tokens_output'] or 0)
-
-            # Get average latency from API calls
-            cursor.execute("""
-                SELECT AVG(latency_ms) as avg_latency_ms
-                FROM api_calls
-                INNER JOIN phases ON api_calls.phase_id = phases.id
-                WHERE phases.phase_name = ? AND phases.started_at >= ?
-            """, (phase_name, since_date))
-
-            latency_row = cursor.fetchone()
-            result['avg_latency_ms'] = latency_row['avg_latency_ms'] if latency_row else 0
-
-            return result
-
-        return {
-            'total_runs': 0,
-            'total_tokens': 0,
-            'total_tokens_input': 0,
-            'total_tokens_output': 0,
-            'total_tokens_cached': 0,
-            'total_cost': 0.0,
-            'avg_duration_seconds': 0,
-            'avg_latency_ms': 0
-        }
+                COALESCE(SUM(runs), 0) as total_runs,
+                COALESCE(SUM(tokens_input), 0) as total_tokens_input,
+                COALESCE(SUM(tokens_output), 0) as total_tokens_output,
+                COALESCE(SUM(tokens_cached), 0) as total_tokens_cached,
+                COALESCE(SUM(cost), 0.0) as total_cost,
+                SUM(duration_total) as duration_total,
+                SUM(duration_count) as duration_count,
+                SUM(api_calls) as api_calls,
+                SUM(latency_ms_total) as latency_ms_total,
+                SUM(latency_count) as latency_count
+            FROM phase_rollups
+            WHERE phase_name = ? AND day >= ?
+        """, (phase_name, self._rollup_since_day(days)))
+
+        row = dict(cursor.fetchone())
+
+        duration_total = row.pop('duration_total') or 0
+        duration_count = row.pop('duration_count') or 0
+        latency_ms_total = row.pop('latency_ms_total') or 0
+        latency_count = row.pop('latency_count') or 0
+
+        row['total_api_calls'] = row.pop('api_calls') or 0
+        row['total_tokens'] = row['total_tokens_input'] + row['total_tokens_output']
+        row['avg_duration_seconds'] = duration_total / duration_count if duration_count else 0
+        row['avg_latency_ms'] = latency_ms_total / latency_count if latency_count else 0
+
+        return row
 
     def get_total_metrics(self, days: int = 30) -> Dict[str, Any]:
         """
         Get total metrics across all builds in time period.
 
+        Reads the per-day build rollups (O(days), independent of build count).
+
         Args:
-            days: Number of days to look back
+            days: Number of days to look back (whole local days)
 
         Returns:
             Dict with total metrics
@@ -472,67 +1209,81 @@ class MetricsDatabase:
         conn = self._get_connection()
         cursor = conn.cursor()
 
-        since_date = (datetime.now() - timedelta(days=days)).isoformat()
-
         cursor.execute("""
             SELECT
-                COUNT(*) as total_builds,
-                SUM(total_tokens_input) as total_tokens_input,
-                SUM(total_tokens_output) as total_tokens_output,
-                SUM(total_tokens_cached) as total_tokens_cached,
-                SUM(total_cost) as total_cost
-            FROM builds
-            WHERE created_at >= ?
-        """, (since_date,))
+                COALESCE(SUM(builds), 0) as total_builds,
+                COALESCE(SUM(tokens_input), 0) as total_tokens_input,
+                COALESCE(SUM(tokens_output), 0) as total_tokens_output,
+                COALESCE(SUM(tokens_cached), 0) as total_tokens_cached,
+                COALESCE(SUM(cost), 0.0) as total_cost
+            FROM build_rollups
+            WHERE day >= ?
+        """, (self._rollup_since_day(days),))
+
+        result = dict(cursor.fetchone())
+        result['total_tokens'] = result['total_tokens_input'] + result['total_tokens_output']
+        return result
+
+    def get_model_totals(self, days: int = 30) -> Dict[str, Dict[str, Any]]:
+        """
+        Get API call totals per model in time period.
 
-        row = cursor.fetchone()
+        Args:
+            days: Number of days to look back (whole local days)
 
-        if row:
+        Returns:
+            Dict mapping model to totals
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT
+                model,
+                SUM(api_calls) as total_api_calls,
+                SUM(tokens_input) as total_tokens_input,
+                SUM(tokens_output) as total_tokens_output,
+                SUM(tokens_cached) as total_tokens_cached,
+                SUM(cost) as total_cost,
+                SUM(latency_ms_total) as latency_ms_total,
+                SUM(latency_count) as latency_count
+            FROM model_rollups
+            WHERE day >= ?
+            GROUP BY model
+            ORDER BY total_cost DESC
+        """, (self._rollup_since_day(days),))
+
+        totals = {}
+        for row in cursor.fetchall():
             result = dict(row)
-            result['total_tokens'] = (result['total_tokens_input'] or 0) + (result['total_tokens_output'] or 0)
-            return result
+            model = result.pop('model')
+            latency_ms_total = result.pop('latency_ms_total') or 0
+            latency_count = result.pop('latency_count') or 0
+            result['total_tokens'] = result['total_tokens_input'] + result['total_tokens_output']
+            result['avg_latency_ms'] = latency_ms_total / latency_count if latency_count else 0
+            totals[model] = result
 
-        return {
-            'total_builds': 0,
-            'total_tokens': 0,
-            'total_tokens_input': 0,
-            'total_tokens_output': 0,
-            'total_tokens_cached': 0,
-            'total_cost': 0.0
-        }
+        return totals
 
     def get_cost_summary(self, start_date: str, end_date: str) -> Dict[str, Any]:
         """
         Get cost summary for date range.
 
+        Whole days inside the range (counts, totals and min/max cost) come from
+        the daily build rollups; only the partial days at either end are read
+        from raw builds.
+
         Args:
-            start_date: Start date (ISO format)
-            end_date: End date (ISO format)
+            start_date: Start date (ISO format, local time)
+            end_date: End date (ISO format, local time)
 
         Returns:
             Dict with cost summary
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT
-                COUNT(*) as build_count,
-                SUM(total_tokens_input + total_tokens_output) as total_tokens,
-                SUM(total_cost) as total_cost,
-                AVG(total_cost) as avg_cost_per_build,
-                MIN(total_cost) as min_cost,
-                MAX(total_cost) as max_cost
-            FROM builds
-            WHERE created_at >= ? AND created_at <= ?
-        """, (start_date, end_date))
-
-        row = cursor.fetchone()
+        start = _parse_local_datetime(start_date)
+        end = _parse_local_datetime(end_date)
 
-        if row:
-            return dict(row)
-
-        return {
+        summary = {
             'build_count': 0,
             'total_tokens': 0,
             'total_cost': 0.0,
@@ -540,31 +1291,323 @@ class MetricsDatabase:
             'min_cost': 0.0,
             'max_cost': 0.0
         }
+        if end < start:
+            return summary
+
+        start_day = start.date().isoformat()
+        end_day = end.date().isoformat()
+        start_ts = start.strftime('%Y-%m-%d %H:%M:%S')
+        end_ts = end.strftime('%Y-%m-%d %H:%M:%S')
 
-    def cleanup_old_data(self, days: int = 90) -> int:
+        # Whole days: after a partial start day, before a partial end day
+        full_from = start_day if start.time() == time.min else (start.date() + timedelta(days=1)).isoformat()
+        full_to = end_day if end.time() >= END_OF_DAY else (end.date() - timedelta(days=1)).isoformat()
+        partial_days = [day for day in {start_day, end_day} if not full_from <= day <= full_to]
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        build_count = 0
+        total_tokens = 0
+        total_cost = 0.0
+        min_costs = []
+        max_costs = []
+
+        if full_from <= full_to:
+            cursor.execute("""
+                SELECT
+                    COALESCE(SUM(builds), 0) as build_count,
+                    COALESCE(SUM(tokens_input + tokens_output), 0) as total_tokens,
+                    COALESCE(SUM(cost), 0.0) as total_cost,
+                    MIN(min_cost) as min_cost,
+                    MAX(max_cost) as max_cost
+                FROM build_rollups
+                WHERE day >= ? AND day <= ?
+            """, (full_from, full_to))
+            row = cursor.fetchone()
+            build_count += row['build_count']
+            total_tokens += row['total_tokens']
+            total_cost += row['total_cost']
+            min_costs.append(row['min_cost'])
+            max_costs.append(row['max_cost'])
+
+        created_at = _local_time_sql('created_at')
+        if partial_days:
+            cursor.execute(f"""
+                SELECT
+                    COUNT(*) as build_count,
+                    COALESCE(SUM(COALESCE(total_tokens_input, 0) + COALESCE(total_tokens_output, 0)), 0) as total_tokens,
+                    COALESCE(SUM(total_cost), 0.0) as total_cost,
+                    MIN(total_cost) as min_cost,
+                    MAX(total_cost) as max_cost
+                FROM builds
+                WHERE rollup_day IN ({', '.join(['?'] * len(partial_days))})
+                  AND {created_at} >= ? AND {created_at} <= ?
+            """, (*partial_days, start_ts, end_ts))
+            row = cursor.fetchone()
+            build_count += row['build_count']
+            total_tokens += row['total_tokens']
+            total_cost += row['total_cost']
+            min_costs.append(row['min_cost'])
+            max_costs.append(row['max_cost'])
+
+        if build_count == 0:
+            return summary
+
+        min_costs = [cost for cost in min_costs if cost is not None]
+        max_costs = [cost for cost in max_costs if cost is not None]
+
+        summary.update({
+            'build_count': build_count,
+            'total_tokens': total_tokens,
+            'total_cost': total_cost,
+            'avg_cost_per_build': total_cost / build_count,
+            'min_cost': min(min_costs) if min_costs else 0.0,
+            'max_cost': max(max_costs) if max_costs else 0.0
+        })
+        return summary
+
+    def get_api_call_models(self) -> List[str]:
+        """Distinct models with recorded API calls"""
+        conn = self._get_connection()
+        return [row[0] for row in conn.execute("SELECT DISTINCT model FROM api_calls")]
+
+    def reprice_api_calls(self, rates: Dict[str, tuple],
+                          start_date: Optional[str] = None,
+                          end_date: Optional[str] = None) -> Dict[str, Any]:
         """
-        Delete records older than specified days.
+        Recompute API call costs from token counts with new rates, in SQL.
+
+        Phase, build and model totals (and their rollups) are adjusted by the
+        same deltas in the same transaction.
+
+        Calls with unknown cache-write tokens (NULL, recorded before schema
+        version 5) keep their stored cost. Raw calls already moved to
+        retention partitions are not repriced either, so totals for days
+        older than the raw retention window keep the old prices.
 
         Args:
-            days: Retention period in days
+            rates: model -> (input, output, cache_write, cache_read) USD per million tokens
+            start_date: First local day repriced (YYYY-MM-DD, optional)
+            end_date: Last local day repriced (YYYY-MM-DD, optional)
 
         Returns:
-            Number of builds deleted
+            Dict with calls_repriced, calls_skipped (unknown cache writes) and cost_delta
         """
+        call_day = _local_day_sql('c.timestamp')
+        where = []
+        params: List[Any] = []
+        if start_date:
+            where.append(f"{call_day} >= ?")
+            params.append(start_date)
+        if end_date:
+            where.append(f"{call_day} <= ?")
+            params.append(end_date)
+
         with self._transaction() as conn:
-            cursor = conn.cursor()
+            conn.execute("DROP TABLE IF EXISTS temp.reprice_rates")
+            conn.execute("DROP TABLE IF EXISTS temp.repriced")
+            conn.execute("""
+                CREATE TEMP TABLE reprice_rates (
+                    model TEXT PRIMARY KEY, input REAL, output REAL, cache_write REAL, cache_read REAL
+                )
+            """)
+            conn.executemany("INSERT INTO temp.reprice_rates VALUES (?, ?, ?, ?, ?)",
+                             [(model, *model_rates) for model, model_rates in rates.items()])
+
+            # Same formula and rounding as CostCalculator.calculate_cost
+            conn.execute(f"""
+                CREATE TEMP TABLE repriced AS
+                SELECT id, phase_id, model, day, old_cost, new_cost FROM (
+                    SELECT c.id, c.phase_id, c.model, COALESCE({call_day}, date('now', 'localtime')) AS day,
+                           COALESCE(c.cost, 0.0) AS old_cost,
+                           ROUND(COALESCE(c.tokens_input, 0) / 1000000.0 * r.input
+                                 + COALESCE(c.tokens_output, 0) / 1000000.0 * r.output
+                                 + COALESCE(c.tokens_cache_write, 0) / 1000000.0 * r.cache_write
+                                 + COALESCE(c.tokens_cached, 0) / 1000000.0 * r.cache_read, 6) AS new_cost
+                    FROM api_calls c JOIN temp.reprice_rates r ON r.model = c.model
+                    WHERE {' AND '.join(where + ['c.tokens_cache_write IS NOT NULL'])}
+                ) WHERE new_cost != old_cost
+            """, params)
+            skipped = conn.execute(f"""
+                SELECT COUNT(*) FROM api_calls c
+                WHERE {' AND '.join(where + ['c.tokens_cache_write IS NULL'])}
+            """, params).fetchone()[0]
+
+            conn.execute("""
+                UPDATE api_calls SET cost = r.new_cost
+                FROM temp.repriced r WHERE api_calls.id = r.id
+            """)
+            conn.execute("""
+                UPDATE phases SET cost = COALESCE(cost, 0.0) + d.delta
+                FROM (SELECT phase_id, SUM(new_cost - old_cost) AS delta
+                      FROM temp.repriced GROUP BY phase_id) d
+                WHERE phases.id = d.phase_id
+            """)
+            conn.execute("""
+                UPDATE builds SET total_cost = COALESCE(total_cost, 0.0) + d.delta
+                FROM (SELECT p.build_id, SUM(r.new_cost - r.old_cost) AS delta
+                      FROM temp.repriced r JOIN phases p ON p.id = r.phase_id
+                      GROUP BY p.build_id) d
+                WHERE builds.id = d.build_id
+            """)
+            conn.execute("""
+                UPDATE model_rollups SET cost = cost + d.delta
+                FROM (SELECT model, day, SUM(new_cost - old_cost) AS delta
+                      FROM temp.repriced GROUP BY model, day) d
+                WHERE model_rollups.model = d.model AND model_rollups.day = d.day
+            """)
+
+            row = conn.execute("""
+                SELECT COUNT(*), COALESCE(SUM(new_cost - old_cost), 0.0) FROM temp.repriced
+            """).fetchone()
+
+            conn.execute("DROP TABLE temp.repriced")
+            conn.execute("DROP TABLE temp.reprice_rates")
+
+        return {'calls_repriced': row[0], 'calls_skipped': skipped, 'cost_delta': round(row[1], 6)}
+
+    def record_cache_event(self, namespace: str, event: str,
+                           latency_ms: Optional[float] = None,
+                           bytes_read: int = 0, bytes_written: int = 0,
+                           time_saved_seconds: float = 0.0):
+        """
+        Record a cache event into the daily counters for a namespace.
 
-            cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
+        Args:
+            namespace: Cache namespace (scout, global_scout, test, ...)
+            event: One of 'hit', 'miss', 'stale', 'eviction', 'write'
+            latency_ms: Lookup latency in milliseconds (lookups only)
+            bytes_read: Bytes read from the cache
+            bytes_written: Bytes written to the cache
+            time_saved_seconds: Work avoided by a hit, when known
+        """
+        if event not in CACHE_EVENT_COLUMNS:
+            raise ValueError(f"Unknown cache event: {event}")
+
+        counters = {
+            CACHE_EVENT_COLUMNS[event]: 1,
+            'bytes_read': bytes_read,
+            'bytes_written': bytes_written,
+            'time_saved_seconds': time_saved_seconds,
+        }
 
-            # Delete old builds (cascades to phases and api_calls)
-            cursor.execute("""
-                DELETE FROM builds
-                WHERE created_at < ? AND status IN ('completed', 'failed')
-            """, (cutoff_date,))
+        lookup_ms_max = 0.0
+        if latency_ms is not None:
+            counters['lookup_count'] = 1
+            counters['lookup_ms_total'] = latency_ms
+            counters[_latency_bucket(latency_ms)] = 1
+            lookup_ms_max = latency_ms
+
+        columns = list(counters.keys())
+        day = datetime.now().date().isoformat()
+
+        with self._transaction() as conn:
+            conn.execute(f"""
+                INSERT INTO cache_stats (namespace, day, {', '.join(columns)}, lookup_ms_max)
+                VALUES (?, ?, {', '.join(['?'] * len(columns))}, ?)
+                ON CONFLICT(namespace, day) DO UPDATE SET
+                    {', '.join(f"{c} = {c} + excluded.{c}" for c in columns)},
+                    lookup_ms_max = MAX(lookup_ms_max, excluded.lookup_ms_max)
+            """, [namespace, day] + [counters[c] for c in columns] + [lookup_ms_max])
+
+    def get_cache_stats(self, namespace: Optional[str] = None, days: int = 30) -> Dict[str, Dict[str, Any]]:
+        """
+        Get aggregated cache counters per namespace.
 
-            deleted_count = cursor.rowcount
+        Args:
+            namespace: Restrict to a single namespace (default: all)
+            days: Number of days to look back
+
+        Returns:
+            Dict mapping namespace to counters, hit ratio and latency histogram
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
 
-            return deleted_count
+        since_day = (datetime.now() - timedelta(days=days)).date().isoformat()
+        params: List[Any] = [since_day]
+        where = "WHERE day >= ?"
+        if namespace:
+            where += " AND namespace = ?"
+            params.append(namespace)
+
+        cursor.execute(f"""
+            SELECT
+                namespace,
+                SUM(hits) as hits,
+                SUM(misses) as misses,
+                SUM(stale) as stale,
+                SUM(evictions) as evictions,
+                SUM(writes) as writes,
+                SUM(bytes_read) as bytes_read,
+                SUM(bytes_written) as bytes_written,
+                SUM(lookup_count) as lookup_count,
+                SUM(lookup_ms_total) as lookup_ms_total,
+                MAX(lookup_ms_max) as lookup_ms_max,
+                SUM(latency_le_1ms) as latency_le_1ms,
+                SUM(latency_le_10ms) as latency_le_10ms,
+                SUM(latency_le_100ms) as latency_le_100ms,
+                SUM(latency_le_1000ms) as latency_le_1000ms,
+                SUM(latency_gt_1000ms) as latency_gt_1000ms,
+                SUM(time_saved_seconds) as time_saved_seconds
+            FROM cache_stats
+            {where}
+            GROUP BY namespace
+        """, params)
+
+        stats = {}
+        for row in cursor.fetchall():
+            row = dict(row)
+            name = row.pop('namespace')
+            lookups = row['hits'] + row['misses'] + row['stale']
+            row['hit_ratio'] = round(row['hits'] / lookups, 4) if lookups else 0.0
+            row['avg_lookup_ms'] = (
+                round(row['lookup_ms_total'] / row['lookup_count'], 3)
+                if row['lookup_count'] else 0.0
+            )
+            row['avg_time_saved_per_hit'] = (
+                round(row['time_saved_seconds'] / row['hits'], 3)
+                if row['hits'] else 0.0
+            )
+            row['latency_histogram'] = {
+                bucket: row.pop(column) for bucket, column in LATENCY_BUCKETS
+            }
+            stats[name] = row
+
+        return stats
+
+    def cleanup_old_data(self, days: int = 90, batch_size: int = 500) -> int:
+        """
+        Delete records older than specified days.
+
+        Deletes in small transactions so writers are never blocked for long.
+        Rollups are kept; see retention.py for downsampling raw history.
+
+        Args:
+            days: Retention period in days
+            batch_size: Builds deleted per transaction
+
+        Returns:
+            Number of builds deleted
+        """
+        cutoff_day = (datetime.now() - timedelta(days=days)).date().isoformat()
+        deleted_count = 0
+
+        while True:
+            with self._transaction() as conn:
+                # Delete old builds (cascades to phases and api_calls)
+                cursor = conn.execute("""
+                    DELETE FROM builds WHERE id IN (
+                        SELECT id FROM builds
+                        WHERE rollup_day < ? AND status IN ('completed', 'failed')
+                        LIMIT ?
+                    )
+                """, (cutoff_day, batch_size))
+
+            deleted_count += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                return deleted_count
 
     def export_all_metrics(self) -> Dict[str, List[Dict]]:
         """Export all metrics for backup/analysis"""
@@ -590,6 +1633,624 @@ class MetricsDatabase:
             'exported_at': datetime.now().isoformat()
         }
 
+    # ============================================================================
+    # Task Operations
+    # ============================================================================
+
+    def create_task(self, task_data: Dict[str, Any]) -> str:
+        """Create a new task record."""
+        with self._transaction(foreign_keys=False) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO tasks (
+                    task_id, project_name, task_description, working_directory,
+                    status, phases_completed, current_phase, start_time
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                task_data['task_id'],
+                task_data.get('project_name'),
+                task_data.get('task_description'),
+                task_data.get('working_directory'),
+                task_data.get('status', 'running'),
+                json.dumps(task_data.get('phases_completed', [])),
+                task_data.get('current_phase'),
+                task_data.get('start_time', datetime.now().isoformat())
+            ))
+        return task_data['task_id']
+
+    def update_task(self, task_id: str, updates: Dict[str, Any]):
+        """Update task record."""
+        with self._transaction(foreign_keys=False) as conn:
+            cursor = conn.cursor()
+
+            # Build dynamic UPDATE query
+            set_clause = ", ".join([f"{key} = ?" for key in updates.keys()])
+            values = list(updates.values()) + [task_id]
+
+            cursor.execute(f"""
+                UPDATE tasks SET {set_clause}
+                WHERE task_id = ?
+            """, values)
+
+    def get_task(self, task_id: str) -> Optional[Dict]:
+        """Get task by ID."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+    def get_all_tasks(self, limit: int = 100) -> List[Dict]:
+        """Get all tasks, most recent first."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT * FROM tasks
+            ORDER BY created_at DESC
+            LIMIT ?
+        """, (limit,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    # ============================================================================
+    # Task Metrics (Livestream Time Series)
+    # ============================================================================
+
+    def add_metric(self, task_id: str, metric_data: Dict[str, Any]):
+        """Add a metrics data point."""
+        with self._transaction(foreign_keys=False) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO metrics (
+                    task_id, timestamp, phase, token_usage, token_percentage,
+                    latency_ms, context_resets, elapsed_seconds, estimated_remaining_seconds
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                task_id,
+                metric_data.get('timestamp', datetime.now().isoformat()),
+                metric_data.get('phase'),
+                metric_data.get('token_usage'),
+                metric_data.get('token_percentage'),
+                metric_data.get('latency_ms'),
+                metric_data.get('context_resets', 0),
+                metric_data.get('elapsed_seconds'),
+                metric_data.get('estimated_remaining_seconds')
+            ))
+
+    def get_metrics(self, task_id: str) -> List[Dict]:
+        """Get all metrics for a task."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT * FROM metrics
+            WHERE task_id = ?
+            ORDER BY timestamp ASC
+        """, (task_id,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def get_latest_metric(self, task_id: str) -> Optional[Dict]:
+        """Get most recent metric for a task."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT * FROM metrics
+            WHERE task_id = ?
+            ORDER BY timestamp DESC
+            LIMIT 1
+        """, (task_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+    # ============================================================================
+    # Decision Tracking
+    # ============================================================================
+
+    def add_decision(self, task_id: str, decision_data: Dict[str, Any]):
+        """Add a decision record."""
+        with self._transaction(foreign_keys=False) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO decisions (
+                    task_id, timestamp, phase, decision_type, decision_description,
+                    quality_rating, difficulty_rating, is_regrettable,
+                    used_lessons_learned, pattern_ids, reasoning, outcome
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                task_id,
+                decision_data.get('timestamp', datetime.now().isoformat()),
+                decision_data.get('phase'),
+                decision_data.get('decision_type'),
+                decision_data.get('decision_description'),
+                decision_data.get('quality_rating'),
+                decision_data.get('difficulty_rating'),
+                decision_data.get('is_regrettable', False),
+                decision_data.get('used_lessons_learned', False),
+                json.dumps(decision_data.get('pattern_ids', [])),
+                decision_data.get('reasoning'),
+                decision_data.get('outcome')
+            ))
+
+    def get_decisions(self, task_id: str) -> List[Dict]:
+        """Get all decisions for a task."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT * FROM decisions
+            WHERE task_id = ?
+            ORDER BY timestamp ASC
+        """, (task_id,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def get_decision_analytics(self, task_id: Optional[str] = None) -> Dict:
+        """Get decision analytics."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        where_clause = "WHERE task_id = ?" if task_id else ""
+        params = (task_id,) if task_id else ()
+
+        cursor.execute(f"""
+            SELECT
+                COUNT(*) as total_decisions,
+                AVG(quality_rating) as avg_quality,
+                AVG(difficulty_rating) as avg_difficulty,
+                SUM(CASE WHEN is_regrettable = 1 THEN 1 ELSE 0 END) as regrettable_count,
+                SUM(CASE WHEN used_lessons_learned = 1 THEN 1 ELSE 0 END) as lessons_used_count
+            FROM decisions
+            {where_clause}
+        """, params)
+
+        row = cursor.fetchone()
+        return dict(row) if row else {}
+
+    # ============================================================================
+    # Agent Performance
+    # ============================================================================
+
+    def add_agent_performance(self, task_id: str, agent_data: Dict[str, Any]):
+        """Add agent performance record."""
+        with self._transaction(foreign_keys=False) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO agent_performance (
+                    task_id, agent_type, phase, start_time, end_time,
+                    duration_seconds, success, issues_found, issues_fixed,
+                    files_created, files_modified, lines_of_code, tokens_used
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                task_id,
+                agent_data.get('agent_type'),
+                agent_data.get('phase'),
+                agent_data.get('start_time'),
+                agent_data.get('end_time'),
+                agent_data.get('duration_seconds'),
+                agent_data.get('success', True),
+                agent_data.get('issues_found', 0),
+                agent_data.get('issues_fixed', 0),
+                agent_data.get('files_created', 0),
+                agent_data.get('files_modified', 0),
+                agent_data.get('lines_of_code', 0),
+                agent_data.get('tokens_used', 0)
+            ))
+
+    def get_agent_performance(self, task_id: str) -> List[Dict]:
+        """Get agent performance records for a task."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT * FROM agent_performance
+            WHERE task_id = ?
+            ORDER BY start_time ASC
+        """, (task_id,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def get_agent_analytics(self, agent_type: Optional[str] = None) -> Dict:
+        """Get agent performance analytics."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        where_clause = "WHERE agent_type = ?" if agent_type else ""
+        params = (agent_type,) if agent_type else ()
+
+        cursor.execute(f"""
+            SELECT
+                agent_type,
+                COUNT(*) as total_executions,
+                AVG(duration_seconds) as avg_duration,
+                SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as success_count,
+                AVG(issues_found) as avg_issues_found,
+                AVG(issues_fixed) as avg_issues_fixed,
+                AVG(tokens_used) as avg_tokens_used
+            FROM agent_performance
+            {where_clause}
+            GROUP BY agent_type
+        """, params)
+
+        return [dict(row) for row in cursor.fetchall()]
+
+    # ============================================================================
+    # Test Iterations
+    # ============================================================================
+
+    def add_test_iteration(self, task_id: str, test_data: Dict[str, Any]):
+        """Add test iteration record."""
+        with self._transaction(foreign_keys=False) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO test_iterations (
+                    task_id, iteration_number, timestamp, tests_run,
+                    tests_passed, tests_failed, test_output, fixes_applied,
+                    duration_seconds
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                task_id,
+                test_data.get('iteration_number'),
+                test_data.get('timestamp', datetime.now().isoformat()),
+                test_data.get('tests_run', 0),
+                test_data.get('tests_passed', 0),
+                test_data.get('tests_failed', 0),
+                test_data.get('test_output'),
+                json.dumps(test_data.get('fixes_applied', [])),
+                test_data.get('duration_seconds')
+            ))
+
+    def get_test_iterations(self, task_id: str) -> List[Dict]:
+        """Get test iterations for a task."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT * FROM test_iterations
+            WHERE task_id = ?
+            ORDER BY iteration_number ASC
+        """, (task_id,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    # ============================================================================
+    # Pattern Effectiveness
+    # ============================================================================
+
+    def add_pattern_effectiveness(self, task_id: str, pattern_data: Dict[str, Any]):
+        """Add pattern effectiveness record."""
+        with self._transaction(foreign_keys=False) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO pattern_effectiveness (
+                    task_id, pattern_id, pattern_type, was_applied,
+                    prevented_issue, issue_description, timestamp
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                task_id,
+                pattern_data.get('pattern_id'),
+                pattern_data.get('pattern_type'),
+                pattern_data.get('was_applied', False),
+                pattern_data.get('prevented_issue', False),
+                pattern_data.get('issue_description'),
+                pattern_data.get('timestamp', datetime.now().isoformat())
+            ))
+
+    def get_pattern_effectiveness(self, task_id: Optional[str] = None) -> List[Dict]:
+        """Get pattern effectiveness records."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        if task_id:
+            cursor.execute("""
+                SELECT * FROM pattern_effectiveness
+                WHERE task_id = ?
+                ORDER BY timestamp ASC
+            """, (task_id,))
+        else:
+            cursor.execute("""
+                SELECT * FROM pattern_effectiveness
+                ORDER BY timestamp DESC
+                LIMIT 100
+            """)
+
+        return [dict(row) for row in cursor.fetchall()]
+
+    # ============================================================================
+    # Agent Instances (Multi-Agent Monitoring)
+    # ============================================================================
+
+    def create_agent_instance(self, agent_data: Dict[str, Any]) -> str:
+        """Create a new agent instance record."""
+        with self._transaction(foreign_keys=False) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO agent_instances (
+                    session_id, agent_id, agent_type, agent_name, status,
+                    phase, progress_percent, tokens_used, tokens_limit,
+                    token_percentage, start_time, parent_agent_id, metadata
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                agent_data['session_id'],
+                agent_data['agent_id'],
+                agent_data['agent_type'],
+                agent_data.get('agent_name', agent_data['agent_type']),
+                agent_data.get('status', 'spawning'),
+                agent_data.get('phase'),
+                agent_data.get('progress_percent', 0.0),
+                agent_data.get('tokens_used', 0),
+                agent_data.get('tokens_limit', 200000),
+                agent_data.get('token_percentage', 0.0),
+                agent_data.get('start_time', datetime.now().isoformat()),
+                agent_data.get('parent_agent_id'),
+                json.dumps(agent_data.get('metadata', {}))
+            ))
+        return agent_data['agent_id']
+
+    def update_agent_instance(self, agent_id: str, updates: Dict[str, Any]):
+        """Update agent instance record."""
+        with self._transaction(foreign_keys=False) as conn:
+            cursor = conn.cursor()
+
+            # Always update the updated_at timestamp
+            updates['updated_at'] = datetime.now().isoformat()
+
+            # Build dynamic UPDATE query
+            set_clause = ", ".join([f"{key} = ?" for key in updates.keys()])
+            values = list(updates.values()) + [agent_id]
+
+            cursor.execute(f"""
+                UPDATE agent_instances SET {set_clause}
+                WHERE agent_id = ?
+            """, values)
+
+    def upsert_agent_instances(self, updates: List[Dict[str, Any]]) -> int:
+        """
+        Create or update many agent instances in one transaction.
+
+        Each update needs session_id and agent_id; other fields are optional.
+        New agents get the same defaults as create_agent_instance. For existing
+        agents, fields left out (or None) keep their stored value:
+        token_percentage follows tokens_used when the agent has a token limit,
+        and a 'completed' or 'failed' status sets end_time and duration_seconds.
+
+        Args:
+            updates: Agent update dicts (at most one per agent_id)
+
+        Returns:
+            Number of agents written
+        """
+        now = datetime.now().isoformat()
+        fields = ('agent_type', 'agent_name', 'status', 'phase', 'progress_percent',
+                  'tokens_used', 'tokens_limit', 'token_percentage', 'start_time',
+                  'parent_agent_id', 'error_message')
+
+        rows = []
+        for update in updates:
+            row = {field: update.get(field) for field in fields}
+            row['session_id'] = update['session_id']
+            row['agent_id'] = update['agent_id']
+            row['metadata'] = json.dumps(update['metadata']) if update.get('metadata') is not None else None
+            row['now'] = now
+            rows.append(row)
+
+        with self._transaction(foreign_keys=False) as conn:
+            conn.executemany("""
+                INSERT INTO agent_instances (
+                    session_id, agent_id, agent_type, agent_name, status,
+                    phase, progress_percent, tokens_used, tokens_limit,
+                    token_percentage, start_time, parent_agent_id,
+                    error_message, metadata, updated_at
+                ) VALUES (
+                    :session_id, :agent_id, COALESCE(:agent_type, 'unknown'),
+                    COALESCE(:agent_name, :agent_type, 'unknown'), COALESCE(:status, 'spawning'),
+                    :phase, COALESCE(:progress_percent, 0.0), COALESCE(:tokens_used, 0),
+                    COALESCE(:tokens_limit, 200000), COALESCE(:token_percentage, 0.0),
+                    COALESCE(:start_time, :now), :parent_agent_id,
+                    :error_message, COALESCE(:metadata, '{}'), :now
+                )
+                ON CONFLICT(agent_id) DO UPDATE SET
+                    status = COALESCE(:status, status),
+                    phase = COALESCE(:phase, phase),
+                    progress_percent = COALESCE(:progress_percent, progress_percent),
+                    tokens_used = COALESCE(:tokens_used, tokens_used),
+                    token_percentage = CASE
+                        WHEN :tokens_used IS NOT NULL AND tokens_limit > 0
+                        THEN :tokens_used * 100.0 / tokens_limit
+                        ELSE COALESCE(:token_percentage, token_percentage)
+                    END,
+                    error_message = COALESCE(:error_message, error_message),
+                    metadata = COALESCE(:metadata, metadata),
+                    end_time = CASE
+                        WHEN :status IN ('completed', 'failed') THEN :now ELSE end_time
+                    END,
+                    duration_seconds = CASE
+                        WHEN :status IN ('completed', 'failed') AND start_time IS NOT NULL
+                        THEN CAST(ROUND((julianday(:now) - julianday(start_time)) * 86400) AS INTEGER)
+                        ELSE duration_seconds
+                    END,
+                    updated_at = :now
+            """, rows)
+
+        return len(rows)
+
+    def get_agent_instance(self, agent_id: str) -> Optional[Dict]:
+        """Get agent instance by ID."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM agent_instances WHERE agent_id = ?", (agent_id,))
+        row = cursor.fetchone()
+        if row:
+            result = dict(row)
+            # Parse JSON metadata
+            if result.get('metadata'):
+                result['metadata'] = json.loads(result['metadata'])
+            return result
+        return None
+
+    def get_session_agents(self, session_id: str) -> List[Dict]:
+        """Get all agent instances for a session."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT * FROM agent_instances
+            WHERE session_id = ?
+            ORDER BY created_at ASC
+        """, (session_id,))
+        agents = [dict(row) for row in cursor.fetchall()]
+        # Parse JSON metadata for each agent
+        for agent in agents:
+            if agent.get('metadata'):
+                agent['metadata'] = json.loads(agent['metadata'])
+        return agents
+
+    def get_active_agents(self, session_id: Optional[str] = None) -> List[Dict]:
+        """Get all active agent instances (optionally filtered by session)."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        if session_id:
+            cursor.execute("""
+                SELECT * FROM agent_instances
+                WHERE session_id = ? AND status IN ('spawning', 'active', 'idle')
+                ORDER BY created_at ASC
+            """, (session_id,))
+        else:
+            cursor.execute("""
+                SELECT * FROM agent_instances
+                WHERE status IN ('spawning', 'active', 'idle')
+                ORDER BY session_id, created_at ASC
+            """)
+        agents = [dict(row) for row in cursor.fetchall()]
+        # Parse JSON metadata
+        for agent in agents:
+            if agent.get('metadata'):
+                agent['metadata'] = json.loads(agent['metadata'])
+        return agents
+
+    def get_all_instances(self) -> List[Dict]:
+        """Get all unique session instances with summary stats."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                t.task_id as session_id,
+                t.project_name,
+                t.status,
+                t.current_phase,
+                t.start_time,
+                t.duration_seconds,
+                COUNT(DISTINCT a.agent_id) as agents_total,
+                SUM(CASE WHEN a.status IN ('spawning', 'active', 'idle') THEN 1 ELSE 0 END) as agents_active,
+                AVG(a.progress_percent) as progress_percent
+            FROM tasks t
+            LEFT JOIN agent_instances a ON t.task_id = a.session_id
+            GROUP BY t.task_id
+            ORDER BY t.start_time DESC
+        """)
+        return [dict(row) for row in cursor.fetchall()]
+
+    # ============================================================================
+    # Analytics & Reporting
+    # ============================================================================
+
+    def get_summary_stats(self) -> Dict:
+        """Get overall summary statistics."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        stats = {}
+
+        # Task stats
+        cursor.execute("""
+            SELECT
+                COUNT(*) as total_tasks,
+                SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed_tasks,
+                AVG(duration_seconds) as avg_duration
+            FROM tasks
+        """)
+        stats['tasks'] = dict(cursor.fetchone())
+
+        # Token stats
+        cursor.execute("""
+            SELECT
+                AVG(token_usage) as avg_tokens,
+                MAX(token_usage) as max_tokens,
+                AVG(token_percentage) as avg_percentage
+            FROM metrics
+        """)
+        stats['tokens'] = dict(cursor.fetchone())
+
+        # Decision stats
+        cursor.execute("""
+            SELECT
+                COUNT(*) as total_decisions,
+                AVG(quality_rating) as avg_quality,
+                SUM(CASE WHEN used_lessons_learned = 1 THEN 1 ELSE 0 END) as lessons_used
+            FROM decisions
+        """)
+        stats['decisions'] = dict(cursor.fetchone())
+
+        return stats
+
+    # ============================================================================
+    # Cross-cutting Analytics
+    # ============================================================================
+
+    def get_agent_costs(self, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get token usage and cost per agent instance from its recorded API calls.
+
+        Args:
+            session_id: Restrict to one session (default: all sessions)
+
+        Returns:
+            List of dicts with agent identity and API call totals, most expensive first
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        where_clause = "WHERE a.session_id = ?" if session_id else ""
+        params = (session_id,) if session_id else ()
+
+        cursor.execute(f"""
+            SELECT
+                a.agent_id,
+                a.session_id,
+                a.agent_type,
+                a.status,
+                COUNT(c.id) as api_calls,
+                COALESCE(SUM(c.tokens_input), 0) as tokens_input,
+                COALESCE(SUM(c.tokens_output), 0) as tokens_output,
+                COALESCE(SUM(c.tokens_cached), 0) as tokens_cached,
+                COALESCE(SUM(c.cost), 0.0) as cost
+            FROM agent_instances a
+            LEFT JOIN api_calls c ON c.agent_id = a.agent_id
+            {where_clause}
+            GROUP BY a.agent_id
+            ORDER BY cost DESC
+        """, params)
+
+        return [dict(row) for row in cursor.fetchall()]
+
+    def get_decision_tokens(self, task_id: str) -> List[Dict[str, Any]]:
+        """
+        Get each decision with the tokens and cost of the phase it was made in.
+
+        Args:
+            task_id: Task/session id (matches builds.session_id)
+
+        Returns:
+            List of decision dicts with phase_tokens and phase_cost, in time order
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT
+                d.*,
+                COALESCE(SUM(p.tokens_input + p.tokens_output), 0) as phase_tokens,
+                COALESCE(SUM(p.cost), 0.0) as phase_cost
+            FROM decisions d
+            LEFT JOIN builds b ON b.session_id = d.task_id
+            LEFT JOIN phases p ON p.build_id = b.id AND p.phase_name = d.phase
+            WHERE d.task_id = ?
+            GROUP BY d.id
+            ORDER BY d.timestamp ASC
+        """, (task_id,))
+
+        return [dict(row) for row in cursor.fetchall()]
+
 
 # Singleton instance
 _db_instance = None
@@ -0,0 +1,599 @@
+#!/usr/bin/env python3
+"""
+Retention Module
+Time-partitioned retention and downsampling for metrics history
+
+Raw per-call rows (api_calls) and livestream time series (metrics) are kept in
+the main database only for a short window. Older rows are moved, in small
+rowid-ordered batches, into monthly partition databases next to the main file:
+
+    ~/.context-foundry/metrics-archive/2026-09.db
+
+and folded into hourly aggregates in the same transaction that removes them
+from the main database. Hourly aggregates past their window are compacted
+into daily aggregates. Expired months are dropped by deleting the partition
+file, never by row deletes. Daily phase/model/build rollups are untouched by
+retention (they are the long-term history).
+"""
+
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Iterator, Optional
+
+from .db_pool import get_pool
+from .metrics_db import MetricsDatabase, _local_day_sql, _local_time_sql
+
+
+# SQLite allows 10 attached databases by default; leave room for callers
+MAX_PARTITIONS_PER_BATCH = 6
+
+# Raw tables that are partitioned: table -> (aggregate table, columns copied)
+RAW_TABLES = {
+    'api_calls': (
+        'api_call_aggregates',
+        ['id', 'phase_id', 'model', 'tokens_input', 'tokens_output', 'tokens_cached',
+         'cost', 'latency_ms', 'request_id', 'timestamp', 'agent_id', 'tokens_cache_write'],
+    ),
+    'metrics': (
+        'task_metric_aggregates',
+        ['id', 'task_id', 'timestamp', 'phase', 'token_usage', 'token_percentage',
+         'latency_ms', 'context_resets', 'elapsed_seconds', 'estimated_remaining_seconds'],
+    ),
+}
+
+AGGREGATE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS api_call_aggregates (
+        resolution TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        model TEXT NOT NULL,
+        phase_name TEXT NOT NULL,
+        api_calls INTEGER DEFAULT 0,
+        tokens_input INTEGER DEFAULT 0,
+        tokens_output INTEGER DEFAULT 0,
+        tokens_cached INTEGER DEFAULT 0,
+        cost REAL DEFAULT 0.0,
+        latency_ms_total INTEGER DEFAULT 0,
+        latency_count INTEGER DEFAULT 0,
+        PRIMARY KEY (resolution, bucket, model, phase_name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS task_metric_aggregates (
+        resolution TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        phase TEXT NOT NULL,
+        samples INTEGER DEFAULT 0,
+        token_usage_total INTEGER DEFAULT 0,
+        token_usage_max INTEGER DEFAULT 0,
+        token_percentage_max REAL DEFAULT 0.0,
+        latency_ms_total REAL DEFAULT 0.0,
+        latency_count INTEGER DEFAULT 0,
+        context_resets_max INTEGER DEFAULT 0,
+        elapsed_seconds_max INTEGER DEFAULT 0,
+        PRIMARY KEY (resolution, bucket, task_id, phase)
+    )
+    """,
+]
+
+# Upsert clauses that fold one aggregate row into another
+_API_CALL_MERGE = """
+    api_calls = api_calls + excluded.api_calls,
+    tokens_input = tokens_input + excluded.tokens_input,
+    tokens_output = tokens_output + excluded.tokens_output,
+    tokens_cached = tokens_cached + excluded.tokens_cached,
+    cost = cost + excluded.cost,
+    latency_ms_total = latency_ms_total + excluded.latency_ms_total,
+    latency_count = latency_count + excluded.latency_count
+"""
+
+_TASK_METRIC_MERGE = """
+    samples = samples + excluded.samples,
+    token_usage_total = token_usage_total + excluded.token_usage_total,
+    token_usage_max = MAX(token_usage_max, excluded.token_usage_max),
+    token_percentage_max = MAX(token_percentage_max, excluded.token_percentage_max),
+    latency_ms_total = latency_ms_total + excluded.latency_ms_total,
+    latency_count = latency_count + excluded.latency_count,
+    context_resets_max = MAX(context_resets_max, excluded.context_resets_max),
+    elapsed_seconds_max = MAX(elapsed_seconds_max, excluded.elapsed_seconds_max)
+"""
+
+
+@dataclass
+class RetentionPolicy:
+    """How long each resolution of metrics history is kept"""
+    raw_days: int = 14          # raw rows in the main database
+    hourly_days: int = 90       # hourly aggregates (then compacted to daily)
+    archive_months: int = 12    # monthly raw partitions (then dropped)
+    build_days: int = 365       # finished builds/phases in the main database
+    batch_size: int = 1000      # rows moved/deleted per transaction
+
+
+def _months_before(day: datetime, months: int) -> str:
+    """Month key `months` calendar months before `day`"""
+    index = day.year * 12 + (day.month - 1) - months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class RetentionManager:
+    """Incremental retention for one metrics database file"""
+
+    def __init__(self, db_path: Optional[str] = None,
+                 policy: Optional[RetentionPolicy] = None,
+                 archive_dir: Optional[str] = None):
+        """
+        Initialize retention manager.
+
+        Args:
+            db_path: Path to database file (default: ~/.context-foundry/metrics.db)
+            policy: Retention windows (default: RetentionPolicy())
+            archive_dir: Directory of monthly partitions (default: <db stem>-archive next to the db)
+        """
+        if db_path is None:
+            db_path = str(Path.home() / '.context-foundry' / 'metrics.db')
+
+        self.db_path = Path(db_path).expanduser()
+        self.policy = policy or RetentionPolicy()
+        self.archive_dir = Path(archive_dir) if archive_dir else \
+            self.db_path.parent / f"{self.db_path.stem}-archive"
+
+        # Writes go through the shared single-writer pool of the database file
+        self._pool = get_pool(str(self.db_path))
+        self._pool_released = False
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    # ------------------------------------------------------------------
+    # Connections and partitions
+    # ------------------------------------------------------------------
+
+    def _write(self, attach: Optional[Dict[str, str]] = None):
+        """Write transaction on the pool's writer (aggregate tables created on first use)"""
+        if not self._schema_ready:
+            with self._pool.write() as conn:
+                for statement in AGGREGATE_SCHEMA:
+                    conn.execute(statement)
+            self._schema_ready = True
+        return self._pool.write(attach=attach)
+
+    def close(self):
+        """Release pooled connections (closed once no other user of the file needs them)"""
+        if not self._pool_released:
+            self._pool_released = True
+            self._pool.release()
+
+    def partition_path(self, month: str) -> Path:
+        """Path of the partition database for a month ('YYYY-MM')"""
+        return self.archive_dir / f"{month}.db"
+
+    def list_partitions(self) -> List[str]:
+        """Months with a partition database, oldest first"""
+        if not self.archive_dir.exists():
+            return []
+        return sorted(path.stem for path in self.archive_dir.glob('????-??.db'))
+
+    def _table_exists(self, conn: sqlite3.Connection, table: str, schema: str = 'main') -> bool:
+        row = conn.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        return row is not None
+
+    def _create_partition_tables(self, conn: sqlite3.Connection, alias: str):
+        """Create the raw tables of an attached month partition on first use"""
+        for table, (_, columns) in RAW_TABLES.items():
+            if not self._table_exists(conn, table):
+                continue
+            if not self._table_exists(conn, table, alias):
+                # Same columns as the live table, plus the phase name for api_calls
+                # (phases may be deleted before the partition is)
+                extra = ", phase_name TEXT" if table == 'api_calls' else ""
+                conn.execute(
+                    f"CREATE TABLE {alias}.{table} ({columns[0]} INTEGER PRIMARY KEY, "
+                    f"{', '.join(columns[1:])}{extra})"
+                )
+
+    # ------------------------------------------------------------------
+    # Downsampling raw rows into partitions
+    # ------------------------------------------------------------------
+
+    def _aggregate_insert(self, table: str, resolution_sql: str, ids_sql: str) -> str:
+        """INSERT ... SELECT folding raw rows (selected by ids_sql) into aggregates"""
+        local_time = _local_time_sql('r.timestamp')
+        bucket = f"strftime({resolution_sql}, {local_time})"
+
+        if table == 'api_calls':
+            return f"""
+                INSERT INTO api_call_aggregates (
+                    resolution, bucket, model, phase_name, api_calls, tokens_input,
+                    tokens_output, tokens_cached, cost, latency_ms_total, latency_count
+                )
+                SELECT 'hour', {bucket}, r.model, COALESCE(p.phase_name, ''), COUNT(*),
+                       SUM(COALESCE(r.tokens_input, 0)), SUM(COALESCE(r.tokens_output, 0)),
+                       SUM(COALESCE(r.tokens_cached, 0)), SUM(COALESCE(r.cost, 0.0)),
+                       SUM(COALESCE(r.latency_ms, 0)), COUNT(r.latency_ms)
+                FROM api_calls r LEFT JOIN phases p ON p.id = r.phase_id
+                WHERE r.id IN ({ids_sql})
+                GROUP BY 2, 3, 4
+                ON CONFLICT(resolution, bucket, model, phase_name) DO UPDATE SET {_API_CALL_MERGE}
+            """
+
+        return f"""
+            INSERT INTO task_metric_aggregates (
+                resolution, bucket, task_id, phase, samples, token_usage_total, token_usage_max,
+                token_percentage_max, latency_ms_total, latency_count, context_resets_max,
+                elapsed_seconds_max
+            )
+            SELECT 'hour', {bucket}, COALESCE(r.task_id, ''), COALESCE(r.phase, ''), COUNT(*),
+                   SUM(COALESCE(r.token_usage, 0)), MAX(COALESCE(r.token_usage, 0)),
+                   MAX(COALESCE(r.token_percentage, 0.0)), SUM(COALESCE(r.latency_ms, 0.0)),
+                   COUNT(r.latency_ms), MAX(COALESCE(r.context_resets, 0)),
+                   MAX(COALESCE(r.elapsed_seconds, 0))
+            FROM metrics r
+            WHERE r.id IN ({ids_sql})
+            GROUP BY 2, 3, 4
+            ON CONFLICT(resolution, bucket, task_id, phase) DO UPDATE SET {_TASK_METRIC_MERGE}
+        """
+
+    def downsample_step(self, table: str, now: Optional[datetime] = None) -> int:
+        """
+        Move one batch of expired raw rows into partitions and hourly aggregates.
+
+        Rows are scanned in rowid order (≈ insertion order); the batch stops at
+        the first row still inside the raw window, so each step is O(batch).
+
+        Args:
+            table: 'api_calls' or 'metrics'
+            now: Reference time (default: now)
+
+        Returns:
+            Number of raw rows moved
+        """
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=self.policy.raw_days)).strftime('%Y-%m-%d %H:%M:%S')
+        columns = RAW_TABLES[table][1]
+
+        with self._lock:
+            conn = self._pool.reader()
+            if not self._table_exists(conn, table):
+                return 0
+
+            local_time = _local_time_sql('timestamp')
+            rows = conn.execute(f"""
+                SELECT id, {local_time} AS local_time
+                FROM {table} ORDER BY id LIMIT ?
+            """, (self.policy.batch_size,)).fetchall()
+
+            # Leading run of expired rows, limited to a few months per batch
+            months: Dict[str, List[int]] = {}
+            for row in rows:
+                if row['local_time'] is None or row['local_time'] >= cutoff:
+                    break
+                month = row['local_time'][:7]
+                if month not in months and len(months) >= MAX_PARTITIONS_PER_BATCH:
+                    break
+                months.setdefault(month, []).append(row['id'])
+
+            if not months:
+                return 0
+
+            aliases = {month: f"part{i}" for i, month in enumerate(sorted(months))}
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+
+            moved = 0
+            with self._write(attach={alias: str(self.partition_path(month))
+                                     for month, alias in aliases.items()}) as conn:
+                for month, ids in months.items():
+                    placeholders = ', '.join(['?'] * len(ids))
+                    alias = aliases[month]
+                    self._create_partition_tables(conn, alias)
+                    if table == 'api_calls':
+                        select = ', '.join(f"r.{c}" for c in columns) + ", p.phase_name"
+                        conn.execute(f"""
+                            INSERT OR IGNORE INTO {alias}.api_calls ({', '.join(columns)}, phase_name)
+                            SELECT {select} FROM api_calls r LEFT JOIN phases p ON p.id = r.phase_id
+                            WHERE r.id IN ({placeholders})
+                        """, ids)
+                    else:
+                        conn.execute(f"""
+                            INSERT OR IGNORE INTO {alias}.{table} ({', '.join(columns)})
+                            SELECT {', '.join(columns)} FROM {table} WHERE id IN ({placeholders})
+                        """, ids)
+
+                    conn.execute(self._aggregate_insert(table, "'%Y-%m-%d %H:00'", placeholders), ids)
+                    cursor = conn.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", ids)
+                    moved += cursor.rowcount
+
+            return moved
+
+    # ------------------------------------------------------------------
+    # Compaction, partition drops, finished builds
+    # ------------------------------------------------------------------
+
+    def compact_step(self, now: Optional[datetime] = None) -> int:
+        """
+        Compact hourly aggregates past the hourly window into daily aggregates.
+
+        Returns:
+            Number of hourly rows compacted
+        """
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=self.policy.hourly_days)).strftime('%Y-%m-%d')
+        compacted = 0
+
+        with self._lock, self._write() as conn:
+            for table, keys, merge, values in (
+                ('api_call_aggregates', 'model, phase_name', _API_CALL_MERGE,
+                 'SUM(api_calls), SUM(tokens_input), SUM(tokens_output), SUM(tokens_cached), '
+                 'SUM(cost), SUM(latency_ms_total), SUM(latency_count)'),
+                ('task_metric_aggregates', 'task_id, phase', _TASK_METRIC_MERGE,
+                 'SUM(samples), SUM(token_usage_total), MAX(token_usage_max), '
+                 'MAX(token_percentage_max), SUM(latency_ms_total), SUM(latency_count), '
+                 'MAX(context_resets_max), MAX(elapsed_seconds_max)'),
+            ):
+                where = "resolution = 'hour' AND bucket < ?"
+                columns = [c[1] for c in conn.execute(f"PRAGMA table_info({table})")]
+                conn.execute(f"""
+                    INSERT INTO {table} ({', '.join(columns)})
+                    SELECT 'day', substr(bucket, 1, 10), {keys}, {values}
+                    FROM {table} WHERE {where}
+                    GROUP BY substr(bucket, 1, 10), {keys}
+                    ON CONFLICT(resolution, bucket, {keys}) DO UPDATE SET {merge}
+                """, (cutoff,))
+                cursor = conn.execute(f"DELETE FROM {table} WHERE {where}", (cutoff,))
+                compacted += cursor.rowcount
+
+        return compacted
+
+    def drop_expired_partitions(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        Drop monthly partitions older than the archive window (deletes the files).
+
+        Returns:
+            Months dropped
+        """
+        now = now or datetime.now()
+        oldest_kept = _months_before(now, self.policy.archive_months)
+        dropped = []
+
+        for month in self.list_partitions():
+            if month >= oldest_kept:
+                break
+            path = self.partition_path(month)
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                Path(str(path) + suffix).unlink(missing_ok=True)
+            dropped.append(month)
+
+        return dropped
+
+    def delete_finished_builds_step(self, days: Optional[int] = None,
+                                    now: Optional[datetime] = None) -> int:
+        """
+        Delete one batch of finished builds older than `days` (cascades to phases).
+
+        Returns:
+            Number of builds deleted
+        """
+        now = now or datetime.now()
+        days = self.policy.build_days if days is None else days
+        cutoff_day = (now - timedelta(days=days)).date().isoformat()
+
+        with self._lock, self._write() as conn:
+            if not self._table_exists(conn, 'builds'):
+                return 0
+
+            cursor = conn.execute("""
+                DELETE FROM builds WHERE id IN (
+                    SELECT id FROM builds
+                    WHERE rollup_day < ? AND status IN ('completed', 'failed')
+                    LIMIT ?
+                )
+            """, (cutoff_day, self.policy.batch_size))
+            return cursor.rowcount
+
+    def run_step(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Run one bounded unit of retention work (one batch per table).
+
+        Returns:
+            Dict with counts of rows moved, compacted, builds deleted and partitions dropped
+        """
+        result = {table: self.downsample_step(table, now) for table in RAW_TABLES}
+        result['builds_deleted'] = self.delete_finished_builds_step(now=now)
+        result['aggregates_compacted'] = self.compact_step(now)
+        result['partitions_dropped'] = self.drop_expired_partitions(now)
+        return result
+
+    def run(self, now: Optional[datetime] = None, max_steps: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run retention steps until no work is left.
+
+        Args:
+            now: Reference time (default: now)
+            max_steps: Stop after this many steps
+
+        Returns:
+            Totals across steps
+        """
+        totals: Dict[str, Any] = {table: 0 for table in RAW_TABLES}
+        totals.update({'builds_deleted': 0, 'aggregates_compacted': 0, 'partitions_dropped': []})
+
+        steps = 0
+        while max_steps is None or steps < max_steps:
+            result = self.run_step(now)
+            steps += 1
+            for key, value in result.items():
+                totals[key] += value
+            if not any(result[table] for table in RAW_TABLES) and not result['builds_deleted']:
+                break
+
+        return totals
+
+    # ------------------------------------------------------------------
+    # Reading history
+    # ------------------------------------------------------------------
+
+    def iter_archived(self, table: str, start_month: Optional[str] = None,
+                      end_month: Optional[str] = None, start_date: Optional[str] = None,
+                      end_date: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream archived raw rows from monthly partitions, oldest month first.
+
+        Args:
+            table: 'api_calls' or 'metrics'
+            start_month: First month included ('YYYY-MM'; default: month of start_date)
+            end_month: Last month included ('YYYY-MM'; default: month of end_date)
+            start_date: First local day included ('YYYY-MM-DD'), as for live rows
+            end_date: Last local day included ('YYYY-MM-DD'), as for live rows
+
+        Yields:
+            Row dicts
+        """
+        start_month = start_month or (start_date[:7] if start_date else None)
+        end_month = end_month or (end_date[:7] if end_date else None)
+
+        where = []
+        params = []
+        if start_date:
+            where.append(f"{_local_day_sql('timestamp')} >= ?")
+            params.append(start_date)
+        if end_date:
+            where.append(f"{_local_day_sql('timestamp')} <= ?")
+            params.append(end_date)
+        sql = f"SELECT * FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+
+        for month in self.list_partitions():
+            if (start_month and month < start_month) or (end_month and month > end_month):
+                continue
+            conn = sqlite3.connect(f"file:{self.partition_path(month)}?mode=ro", uri=True)
+            conn.row_factory = sqlite3.Row
+            try:
+                if not self._table_exists(conn, table):
+                    continue
+                for row in conn.execute(sql + " ORDER BY id", params):
+                    yield dict(row)
+            finally:
+                conn.close()
+
+    def get_aggregates(self, table: str, resolution: str = 'hour',
+                       since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get downsampled aggregates.
+
+        Args:
+            table: 'api_calls' or 'metrics'
+            resolution: 'hour' or 'day'
+            since: First bucket included ('YYYY-MM-DD[ HH:00]')
+
+        Returns:
+            Aggregate rows ordered by bucket
+        """
+        aggregate_table = RAW_TABLES[table][0]
+        conn = self._pool.reader()
+        if not self._table_exists(conn, aggregate_table):
+            return []
+        rows = conn.execute(f"""
+            SELECT * FROM {aggregate_table}
+            WHERE resolution = ? AND bucket >= ?
+            ORDER BY bucket
+        """, (resolution, since or '')).fetchall()
+        return [dict(row) for row in rows]
+
+
+class RetentionWorker:
+    """Background thread running retention steps until stopped"""
+
+    def __init__(self, manager: RetentionManager, interval: float = 300.0,
+                 busy_interval: float = 1.0):
+        """
+        Initialize retention worker.
+
+        Args:
+            manager: RetentionManager to run
+            interval: Seconds between passes when there is nothing left to do
+            busy_interval: Seconds between steps while catching up (keeps the writer available)
+        """
+        self.manager = manager
+        self.interval = interval
+        self.busy_interval = busy_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'RetentionWorker':
+        """Start the background thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='metrics-retention', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                result = self.manager.run_step()
+                busy = any(result[table] for table in RAW_TABLES) or result['builds_deleted']
+            except sqlite3.Error:
+                busy = False
+            self._stop.wait(self.busy_interval if busy else self.interval)
+
+
+def start_retention_worker(db: Optional[MetricsDatabase] = None,
+                           policy: Optional[RetentionPolicy] = None,
+                           interval: float = 300.0) -> RetentionWorker:
+    """
+    Start background retention for a metrics database.
+
+    Args:
+        db: MetricsDatabase whose file is maintained (default: ~/.context-foundry/metrics.db)
+        policy: Retention windows
+        interval: Seconds between idle passes
+
+    Returns:
+        Running RetentionWorker
+    """
+    manager = RetentionManager(str(db.db_path) if db else None, policy)
+    return RetentionWorker(manager, interval).start()
+
+
+__all__ = [
+    'RetentionPolicy',
+    'RetentionManager',
+    'RetentionWorker',
+    'start_retention_worker',
+]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply metrics retention (downsample, partition, drop)")
+    parser.add_argument('--db', help="Metrics database path")
+    parser.add_argument('--raw-days', type=int, default=RetentionPolicy.raw_days)
+    parser.add_argument('--archive-months', type=int, default=RetentionPolicy.archive_months)
+    parser.add_argument('--build-days', type=int, default=RetentionPolicy.build_days)
+    args = parser.parse_args()
+
+    manager = RetentionManager(args.db, RetentionPolicy(
+        raw_days=args.raw_days,
+        archive_months=args.archive_months,
+        build_days=args.build_days
+    ))
+    totals = manager.run()
+
+    print(f"📦 Raw API calls archived: {totals['api_calls']}")
+    print(f"📦 Raw livestream metrics archived: {totals['metrics']}")
+    print(f"🗑️  Finished builds deleted: {totals['builds_deleted']}")
+    print(f"📉 Hourly aggregates compacted: {totals['aggregates_compacted']}")
+    print(f"🗂️  Partitions dropped: {', '.join(totals['partitions_dropped']) or 'none'}")
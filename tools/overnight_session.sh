@@ -20,8 +20,12 @@ PROJECT_NAME="${1:-}"
 TASK_DESCRIPTION="${2:-}"
 MAX_HOURS="${3:-8}"
 TIMESTAMP=$(date +"%Y%m%d_%H%M%S")
-LOG_FILE="logs/overnight_${TIMESTAMP}.log"
-COMPLETION_FLAG="checkpoints/ralph/${PROJECT_NAME}_${TIMESTAMP}/COMPLETE"
+# Sessions started in the same second (parallel scheduler workers) must not
+# share a log file or checkpoint directory: the pid makes the run id unique
+RUN_ID="${TIMESTAMP}_$$"
+SESSION_ID="${PROJECT_NAME}_${RUN_ID}"
+LOG_FILE="logs/overnight_${RUN_ID}.log"
+COMPLETION_FLAG="checkpoints/ralph/${SESSION_ID}/COMPLETE"
 
 # Validate arguments
 if [ -z "$PROJECT_NAME" ] || [ -z "$TASK_DESCRIPTION" ]; then
@@ -37,7 +41,7 @@ fi
 
 # Create log directory
 mkdir -p logs
-mkdir -p "checkpoints/ralph/${PROJECT_NAME}_${TIMESTAMP}"
+mkdir -p "checkpoints/ralph/${SESSION_ID}"
 
 # Logging function
 log() {
@@ -125,7 +129,7 @@ while true; do
     if python3 ace/ralph_wiggum.py \
         --project "$PROJECT_NAME" \
         --task "$TASK_DESCRIPTION" \
-        --session "${PROJECT_NAME}_${TIMESTAMP}" \
+        --session "${SESSION_ID}" \
         --iteration "$ITERATION" 2>&1 | tee -a "$LOG_FILE"; then
 
         log "${GREEN}✅ Iteration $ITERATION completed${NC}\n"
@@ -176,7 +180,7 @@ log "   Ended: $(date)"
 log ""
 log "📁 ${BLUE}Check results:${NC}"
 log "   Project files: examples/$PROJECT_NAME/"
-log "   Progress: checkpoints/ralph/${PROJECT_NAME}_${TIMESTAMP}/"
+log "   Progress: checkpoints/ralph/${SESSION_ID}/"
 log "   Full log: $LOG_FILE"
 log "${GREEN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━${NC}"
 
@@ -5,22 +5,180 @@ Schedule and manage overnight Context Foundry sessions
 """
 
 import os
+import re
 import sys
 import json
+import time
+import random
 import smtplib
+import tempfile
+import threading
+import uuid
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime, time as dt_time
 from pathlib import Path
 from typing import List, Dict, Optional
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    from tools.incremental.global_scout_cache import (
+        generate_global_scout_key,
+        get_cache_entry_path,
+        is_cache_entry_valid,
+        get_cached_scout_report_global,
+        save_scout_report_to_global_cache,
+        find_similar_cached_reports,
+        extract_tech_keywords,
+        calculate_similarity,
+        normalize_task_description,
+        DEFAULT_GLOBAL_CACHE_TTL_HOURS,
+    )
+    from tools.incremental.cache_codec import read_payload
+    from tools.cache import is_cache_valid
+    from tools.cache.scout_cache import (
+        generate_scout_cache_key,
+        get_scout_cache_path,
+        save_scout_report_to_cache,
+    )
+    SCOUT_CACHE_AVAILABLE = True
+except ImportError:
+    SCOUT_CACHE_AVAILABLE = False
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Retry backoff: base * 2^(attempt-1), capped, with jitter
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 900
+
+# Estimated resident memory of one overnight session
+DEFAULT_TASK_MEMORY_MB = 1024
+
+# How long a grouped task waits for its leader's Scout report
+LEADER_SCOUT_WAIT_SECONDS = 900
+
+
+def retry_delay(attempt: int, base: float = RETRY_BASE_SECONDS, cap: float = RETRY_MAX_SECONDS) -> float:
+    """
+    Exponential backoff with jitter for retry attempts.
+
+    Args:
+        attempt: Failed attempt number (1-based)
+        base: Delay after the first failure before jitter
+        cap: Maximum delay before jitter
+
+    Returns:
+        Seconds to wait (between half and the full backoff delay)
+    """
+    delay = min(cap, base * (2 ** (attempt - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _available_memory_mb() -> Optional[float]:
+    """Available system memory in MB (None if unknown)."""
+    if psutil is not None:
+        return psutil.virtual_memory().available / (1024 * 1024)
+
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def compute_worker_limit(requested: int, task_memory_mb: int = DEFAULT_TASK_MEMORY_MB) -> int:
+    """
+    Bound the number of concurrent tasks by CPU and memory headroom.
+
+    Args:
+        requested: Number of workers asked for
+        task_memory_mb: Estimated memory per overnight session
+
+    Returns:
+        Worker count between 1 and requested
+    """
+    limit = max(1, requested)
+
+    cpu_count = os.cpu_count() or 1
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        load = 0.0
+    limit = min(limit, max(1, int(cpu_count - load)))
+
+    available_mb = _available_memory_mb()
+    if available_mb is not None and task_memory_mb > 0:
+        limit = min(limit, max(1, int(available_mb // task_memory_mb)))
+
+    return limit
+
+
 
 class TaskQueue:
     """Manage the overnight task queue."""
 
     def __init__(self, queue_file: Path = Path("overnight_tasks.txt")):
         self.queue_file = queue_file
+        self.state_file = queue_file.with_name(queue_file.name + ".state.json")
+        self.lock_file = queue_file.with_name(queue_file.name + ".lock")
+        self._thread_lock = threading.RLock()
+
+    @staticmethod
+    def task_key(task: Dict) -> str:
+        """Identify a queued task by project and description."""
+        return f"{task['project']}|{task['description']}"
+
+    @staticmethod
+    def claim_key(task: Dict) -> str:
+        """Tasks are exclusive per project: they share examples/<project>."""
+        return task['project']
+
+    @contextmanager
+    def lock(self):
+        """Serialize queue updates across threads and scheduler processes."""
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+
+            self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_file, "a") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _write_atomic(path: Path, text: str):
+        """Write a file via temp file + rename so a crash never leaves it truncated."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
 
     def load_tasks(self) -> List[Dict]:
         """Load tasks from queue file."""
@@ -53,27 +211,104 @@ class TaskQueue:
 
         return sorted(tasks, key=lambda x: x["priority"], reverse=True)
 
+    def add_task(self, task: Dict):
+        """Append a task to the queue."""
+        with self.lock():
+            existing = self.queue_file.read_text() if self.queue_file.exists() else ""
+            if existing and not existing.endswith("\n"):
+                existing += "\n"
+            line = f"{task['project']}|{task['description']}|{task.get('hours', 8)}|{task.get('priority', 0)}\n"
+            self._write_atomic(self.queue_file, existing + line)
+
     def remove_task(self, task: Dict):
         """Remove completed task from queue."""
-        tasks = self.load_tasks()
-        # Filter out the completed task
-        remaining = [
-            t
-            for t in tasks
-            if t["project"] != task["project"]
-            or t["description"] != task["description"]
-        ]
-
-        # Rewrite queue file
-        with open(self.queue_file, "w") as f:
-            f.write("# Overnight Tasks Queue\n")
-            f.write("# Format: project_name|task_description|hours|priority\n")
-            f.write("# Priority: higher number = runs first\n\n")
+        with self.lock():
+            tasks = self.load_tasks()
+            # Filter out the completed task
+            remaining = [
+                t
+                for t in tasks
+                if t["project"] != task["project"]
+                or t["description"] != task["description"]
+            ]
 
+            # Rewrite queue file
+            lines = [
+                "# Overnight Tasks Queue\n",
+                "# Format: project_name|task_description|hours|priority\n",
+                "# Priority: higher number = runs first\n\n",
+            ]
             for t in remaining:
-                f.write(
+                lines.append(
                     f"{t['project']}|{t['description']}|{t['hours']}|{t.get('priority', 0)}\n"
                 )
+            self._write_atomic(self.queue_file, "".join(lines))
+
+            # A completed task is no longer claimed
+            self._drop_claim(task)
+
+    def _load_claims(self) -> Dict[str, Dict]:
+        """Load running-task claims (empty if missing or unreadable)."""
+        if not self.state_file.exists():
+            return {}
+        try:
+            return json.loads(self.state_file.read_text())
+        except (json.JSONDecodeError, OSError):
+            return {}
+
+    @staticmethod
+    def _pid_alive(pid: int) -> bool:
+        """Check whether a process is still running."""
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        except OSError:
+            return False
+        return True
+
+    def claim_task(self, task: Dict) -> bool:
+        """
+        Mark a task as running so no other task of the same project starts.
+
+        Claims are per project: two tasks for one project would share its
+        working directory. Claims left behind by a crashed scheduler (dead
+        pid) are taken over.
+
+        Args:
+            task: Task to claim
+
+        Returns:
+            True if this process now owns the task's project
+        """
+        key = self.claim_key(task)
+        with self.lock():
+            claims = self._load_claims()
+            claim = claims.get(key)
+            owner = {"pid": os.getpid(), "thread": threading.get_ident(), "task": self.task_key(task)}
+            if (claim and self._pid_alive(claim.get("pid", -1))
+                    and any(claim.get(field) != value for field, value in owner.items())):
+                # Another scheduler, or another worker of this one, runs this project
+                return False
+
+            claims[key] = {**owner, "claimed_at": datetime.now().isoformat()}
+            self._write_atomic(self.state_file, json.dumps(claims, indent=2))
+            return True
+
+    def release_task(self, task: Dict):
+        """Drop this process's claim on a task (it stays queued)."""
+        with self.lock():
+            self._drop_claim(task)
+
+    def _drop_claim(self, task: Dict):
+        """Remove the task's project claim if it is this task's (call under lock())."""
+        claims = self._load_claims()
+        claim = claims.get(self.claim_key(task))
+        if claim and claim.get("pid") == os.getpid() and claim.get("task") == self.task_key(task):
+            del claims[self.claim_key(task)]
+            self._write_atomic(self.state_file, json.dumps(claims, indent=2))
 
 
 class NotificationService:
@@ -199,106 +434,493 @@ Check logs for details.
         self.send_desktop_notification("Context Foundry", f"{task['project']} failed")
 
 
+class ScoutPrefetcher:
+    """Warm the Scout cache for queued tasks so similar tasks skip a cold Scout phase."""
+
+    # Build mode overnight sessions run in (matches the local Scout cache key)
+    MODE = "new_project"
+
+    # Tolerance when checking a report was written after its task started
+    MTIME_SLACK_SECONDS = 1.0
+
+    # Keyword -> project type used for the global cache key
+    PROJECT_TYPE_KEYWORDS = [
+        ("cli", "cli-tool"),
+        ("command", "cli-tool"),
+        ("api", "api"),
+        ("backend", "api"),
+        ("library", "library"),
+        ("package", "library"),
+        ("game", "game"),
+        ("web", "web-app"),
+        ("app", "web-app"),
+        ("site", "web-app"),
+        ("website", "web-app"),
+    ]
+
+    def __init__(self, projects_dir: Path = Path("examples"), similarity_threshold: float = 0.85):
+        self.projects_dir = projects_dir
+        self.similarity_threshold = similarity_threshold
+        self.plans: Dict[str, Dict] = {}
+        self.stats = {"warm": 0, "cold": 0, "harvested": 0}
+        self._stats_lock = threading.Lock()
+        # Task id -> wall-clock start in this run; ids still running
+        self._started: Dict[str, float] = {}
+        self._running = set()
+
+    def _count(self, stat: str):
+        """Increment a prefetch counter (workers run concurrently)."""
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    @classmethod
+    def infer_project_type(cls, description: str) -> str:
+        """Infer a coarse project type from a task description."""
+        words = set(re.split(r"[^a-z0-9]+", description.lower()))
+        for keyword, project_type in cls.PROJECT_TYPE_KEYWORDS:
+            if keyword in words:
+                return project_type
+        return "general"
+
+    def _task_id(self, task: Dict) -> str:
+        """Identify a queued task (same identity TaskQueue uses)."""
+        return TaskQueue.task_key(task)
+
+    def project_dir(self, task: Dict) -> Path:
+        """Working directory an overnight session builds the task in."""
+        return self.projects_dir / task["project"]
+
+    def plan(self, tasks: List[Dict]) -> Dict[str, Dict]:
+        """
+        Pre-compute global cache keys and group near-identical tasks.
+
+        Each task's plan records its key, project type, tech stack, whether a
+        global cache entry (exact or similar) already exists, and the group
+        leader whose Scout report later tasks in the group can reuse.
+
+        Args:
+            tasks: Queued tasks in execution order
+
+        Returns:
+            Dict mapping task id to prefetch plan
+        """
+        self.plans = {}
+        with self._stats_lock:
+            self._started = {}
+            self._running = set()
+        leaders: List[Dict] = []
+
+        for task in tasks:
+            description = task["description"]
+            project_type = self.infer_project_type(description)
+            tech_stack = extract_tech_keywords(description)
+            key = generate_global_scout_key(description, project_type, tech_stack)
+
+            # Exact entry, else the best similar entry already in the global cache
+            source = None
+            if is_cache_entry_valid(get_cache_entry_path(key), DEFAULT_GLOBAL_CACHE_TTL_HOURS):
+                source = key
+            else:
+                similar = find_similar_cached_reports(
+                    description, project_type, tech_stack, self.similarity_threshold
+                )
+                if similar:
+                    source = similar[0][0]
+
+            # Dedupe: share a Scout report with an earlier near-identical task
+            leader = None
+            normalized = normalize_task_description(description)
+            for candidate in leaders:
+                if candidate["key"] == key or (
+                    candidate["project_type"] == project_type
+                    and calculate_similarity(normalized, candidate["normalized"]) >= self.similarity_threshold
+                ):
+                    leader = candidate
+                    break
+
+            plan = {
+                "key": key,
+                "project_type": project_type,
+                "tech_stack": tech_stack,
+                "normalized": normalized,
+                "cached_key": source,
+                "leader": leader["task_id"] if leader else None,
+                "task_id": self._task_id(task),
+            }
+            if leader is None:
+                leaders.append(plan)
+            self.plans[plan["task_id"]] = plan
+
+        warm = sum(1 for p in self.plans.values() if p["cached_key"])
+        shared = sum(1 for p in self.plans.values() if p["leader"])
+        print(f"🔥 Scout prefetch plan: {warm}/{len(tasks)} cached, "
+              f"{shared} sharing a report with an earlier task")
+
+        return self.plans
+
+    def _load_entry_report(self, cache_key: str) -> Optional[str]:
+        """Load the Scout report stored under a global cache key."""
+        try:
+            entry = json.loads(read_payload(get_cache_entry_path(cache_key)))
+            return entry.get("scout_report")
+        except (json.JSONDecodeError, OSError, ValueError):
+            return None
+
+    def _leader_key(self, plan: Dict) -> Optional[str]:
+        """Global cache key of the task whose Scout report this task shares."""
+        leader = self.plans.get(plan["leader"]) if plan["leader"] else None
+        return leader["key"] if leader else None
+
+    def warm(self, task: Dict) -> bool:
+        """
+        Seed the task's local Scout cache from the global cache before it runs.
+
+        Args:
+            task: Task about to run
+
+        Returns:
+            True if the task starts with a warm Scout cache
+        """
+        plan = self.plans.get(self._task_id(task))
+        if plan is None:
+            return False
+
+        working_directory = str(self.project_dir(task))
+        description = task["description"]
+
+        report = get_cached_scout_report_global(description, plan["project_type"], plan["tech_stack"])
+        if report is None:
+            # Similar entry found at plan time, or one harvested from the group leader
+            for cache_key in (plan["cached_key"], self._leader_key(plan)):
+                if cache_key:
+                    report = self._load_entry_report(cache_key)
+                if report:
+                    break
+
+        if report is None:
+            self._count("cold")
+            return False
+
+        Path(working_directory).mkdir(parents=True, exist_ok=True)
+        cache_key = generate_scout_cache_key(description, self.MODE, working_directory)
+        if not is_cache_valid(get_scout_cache_path(working_directory, cache_key)):
+            save_scout_report_to_cache(description, self.MODE, working_directory, report)
+
+        self._count("warm")
+        print(f"🔥 Scout cache warmed for {task['project']}")
+        return True
+
+    def _report_file(self, task: Dict) -> Optional[Path]:
+        """
+        The task's scout-report.md, if it was written after the task started.
+
+        A report left in the project directory by an earlier run (or written
+        before this run started the task) is ignored.
+        """
+        report_file = self.project_dir(task) / ".context-foundry" / "scout-report.md"
+        with self._stats_lock:
+            started = self._started.get(self._task_id(task))
+        try:
+            modified = report_file.stat().st_mtime
+        except OSError:
+            return None
+        # File timestamps come from a coarse clock and can trail time.time()
+        if started is None or modified < started - self.MTIME_SLACK_SECONDS:
+            return None
+        return report_file
+
+    def harvest(self, task: Dict) -> bool:
+        """
+        Publish a finished task's Scout report to the global cache.
+
+        Args:
+            task: Completed task
+
+        Returns:
+            True if a report from this run was saved
+        """
+        plan = self.plans.get(self._task_id(task))
+        report_file = self._report_file(task)
+        if plan is None or report_file is None:
+            return False
+
+        try:
+            report = report_file.read_text()
+        except OSError:
+            return False
+
+        save_scout_report_to_global_cache(
+            task["description"],
+            plan["project_type"],
+            plan["tech_stack"],
+            report,
+            metadata={"source": "overnight", "project": task["project"]},
+        )
+        self._count("harvested")
+        return True
+
+    def start(self, task: Dict):
+        """Mark a task as claimed and running in this run."""
+        task_id = self._task_id(task)
+        with self._stats_lock:
+            self._started[task_id] = time.time()
+            self._running.add(task_id)
+
+    def finish(self, task: Dict):
+        """Mark a task as no longer running (or never started here)."""
+        with self._stats_lock:
+            self._running.discard(self._task_id(task))
+
+    def wait_for_leader(self, task: Dict, timeout: float = LEADER_SCOUT_WAIT_SECONDS,
+                        poll_interval: float = 10.0) -> bool:
+        """
+        Wait for a concurrently running group leader to finish its Scout phase.
+
+        The leader's scout-report.md is published to the global cache as soon
+        as it appears, so this task can start warm instead of duplicating Scout.
+        Only a leader already running in this run is waited on; one that is
+        still queued (e.g. behind other tasks of its project) is not.
+
+        Args:
+            task: Task about to run
+            timeout: Maximum seconds to wait before starting cold
+            poll_interval: Seconds between checks
+
+        Returns:
+            True if the leader's report was published
+        """
+        plan = self.plans.get(self._task_id(task))
+        if plan is None or plan["leader"] is None:
+            return False
+
+        project, description = plan["leader"].split("|", 1)
+        leader_task = {"project": project, "description": description}
+
+        deadline = time.monotonic() + timeout
+        while self._report_file(leader_task) is None:
+            with self._stats_lock:
+                leader_running = plan["leader"] in self._running
+            # A finished leader's report (if any) was already harvested
+            if not leader_running or time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+
+        return self.harvest(leader_task)
+
+
 class OvernightScheduler:
     """Schedule and run overnight sessions."""
 
-    def __init__(self, queue_file: Path = Path("overnight_tasks.txt")):
+    def __init__(self, queue_file: Path = Path("overnight_tasks.txt"), prefetch: bool = True,
+                 log_dir: Path = Path("logs")):
         self.queue = TaskQueue(queue_file)
         self.notifier = NotificationService()
+        self.prefetcher = ScoutPrefetcher() if prefetch and SCOUT_CACHE_AVAILABLE else None
+        self.log_dir = log_dir
+        self.session_command = ["./tools/overnight_session.sh"]
+
+    def _task_log_path(self, task: Dict) -> Path:
+        """Log file a task's output is streamed to (unique per run)."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        safe_project = re.sub(r"[^A-Za-z0-9_.-]+", "_", task["project"])
+        run_id = uuid.uuid4().hex[:8]
+        return self.log_dir / f"scheduler_{safe_project}_{timestamp}_{run_id}.log"
+
+    @staticmethod
+    def _tail(log_file: Path, max_bytes: int = 4096) -> str:
+        """Last few KB of a task log, for failure notifications."""
+        try:
+            with open(log_file, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - max_bytes))
+                return f.read().decode("utf-8", errors="replace")
+        except OSError:
+            return ""
 
     def run_task(self, task: Dict, max_retries: int = 3) -> Dict:
-        """Run a single overnight task with retry logic."""
+        """
+        Run a single overnight task with retry logic.
+
+        Output is streamed to a per-task log file rather than buffered in
+        memory; failed attempts are retried with exponential backoff and jitter.
+        """
+        log_file = self._task_log_path(task)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+
         print(f"\n{'='*60}")
         print(f"🌙 Starting overnight session")
         print(f"📋 Project: {task['project']}")
         print(f"📝 Task: {task['description']}")
         print(f"⏰ Duration: {task['hours']} hours")
+        print(f"📄 Log: {log_file}")
         print(f"{'='*60}\n")
 
+        # Run overnight_session.sh
+        cmd = self.session_command + [
+            task["project"],
+            task["description"],
+            str(task["hours"]),
+        ]
+        timeout = task["hours"] * 3600 + 300
+
         for attempt in range(1, max_retries + 1):
-            print(f"🔄 Attempt {attempt}/{max_retries}")
-
-            try:
-                # Run overnight_session.sh
-                cmd = [
-                    "./tools/overnight_session.sh",
-                    task["project"],
-                    task["description"],
-                    str(task["hours"]),
-                ]
-
-                result = subprocess.run(
-                    cmd, check=True, capture_output=True, text=True, timeout=task["hours"] * 3600 + 300
-                )
+            print(f"🔄 [{task['project']}] Attempt {attempt}/{max_retries}")
+
+            with open(log_file, "a") as log:
+                log.write(f"\n=== Attempt {attempt}/{max_retries} ({datetime.now().isoformat()}) ===\n")
+                log.flush()
+
+                try:
+                    process = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+                except OSError as e:
+                    returncode, error = None, str(e)
+                else:
+                    try:
+                        returncode = process.wait(timeout=timeout)
+                        error = f"Command {cmd[0]} exited with status {returncode}"
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+                        process.wait()
+                        print(f"⏰ [{task['project']}] Timeout reached")
+                        return {
+                            "success": False,
+                            "attempts": attempt,
+                            "error": "Timeout exceeded",
+                            "log_file": str(log_file),
+                        }
 
+            if returncode == 0:
                 # Success
                 return {
                     "success": True,
                     "attempts": attempt,
-                    "output": result.stdout,
-                    "log_file": f"logs/overnight_*.log",
+                    "log_file": str(log_file),
                 }
 
-            except subprocess.CalledProcessError as e:
-                print(f"❌ Attempt {attempt} failed: {e}")
-
-                if attempt == max_retries:
-                    return {
-                        "success": False,
-                        "attempts": attempt,
-                        "error": str(e),
-                        "output": e.stderr,
-                    }
-
-                print(f"⏸️  Waiting 60s before retry...")
-                import time
-
-                time.sleep(60)
+            print(f"❌ [{task['project']}] Attempt {attempt} failed: {error}")
 
-            except subprocess.TimeoutExpired:
-                print(f"⏰ Timeout reached")
+            if attempt == max_retries:
                 return {
                     "success": False,
                     "attempts": attempt,
-                    "error": "Timeout exceeded",
+                    "error": error,
+                    "output": self._tail(log_file),
+                    "log_file": str(log_file),
                 }
 
+            delay = retry_delay(attempt)
+            print(f"⏸️  [{task['project']}] Waiting {delay:.0f}s before retry...")
+            time.sleep(delay)
+
         return {"success": False, "attempts": max_retries, "error": "Max retries exceeded"}
 
-    def process_queue(self):
-        """Process all tasks in the queue."""
-        tasks = self.queue.load_tasks()
+    def _process_task(self, task: Dict, index: int, total: int) -> Optional[Dict]:
+        """
+        Claim, run and settle one queued task.
 
-        if not tasks:
-            print("📭 No tasks in queue")
-            return
+        Returns:
+            Task result, or None if another worker or scheduler owns the task
+        """
+        if not self.queue.claim_task(task):
+            print(f"⏭️  Task {index}/{total} ({task['project']}) already running elsewhere, skipping")
+            if self.prefetcher:
+                self.prefetcher.finish(task)
+            return None
 
-        print(f"📊 {len(tasks)} tasks in queue\n")
+        if self.prefetcher:
+            self.prefetcher.start(task)
 
-        for i, task in enumerate(tasks, 1):
+        try:
             print(f"\n{'='*60}")
-            print(f"Task {i}/{len(tasks)}")
+            print(f"Task {index}/{total}: {task['project']}")
             print(f"{'='*60}")
 
+            if self.prefetcher:
+                self.prefetcher.wait_for_leader(task)
+                self.prefetcher.warm(task)
+
             result = self.run_task(task)
 
+            if self.prefetcher:
+                # Later tasks in the queue start from this task's Scout report
+                self.prefetcher.harvest(task)
+
             if result["success"]:
-                print(f"\n✅ Task completed successfully")
+                print(f"\n✅ [{task['project']}] Task completed successfully")
                 self.notifier.notify_completion(task, result)
                 self.queue.remove_task(task)
             else:
-                print(f"\n❌ Task failed: {result.get('error')}")
+                print(f"\n❌ [{task['project']}] Task failed: {result.get('error')}")
                 self.notifier.notify_failure(task, result.get("error", "Unknown error"))
                 # Don't remove from queue - will retry next run
 
+            return result
+        finally:
+            if self.prefetcher:
+                self.prefetcher.finish(task)
+            self.queue.release_task(task)
+
+    def _process_project(self, project_tasks: List, total: int):
+        """Run one project's queued tasks in priority order."""
+        for i, task in project_tasks:
+            self._process_task(task, i, total)
+
+    def process_queue(self, workers: int = 1, task_memory_mb: int = DEFAULT_TASK_MEMORY_MB):
+        """
+        Process all tasks in the queue.
+
+        Args:
+            workers: Maximum tasks to run concurrently
+            task_memory_mb: Estimated memory per task, used to bound workers
+        """
+        tasks = self.queue.load_tasks()
+
+        if not tasks:
+            print("📭 No tasks in queue")
+            return
+
+        print(f"📊 {len(tasks)} tasks in queue\n")
+
+        if self.prefetcher:
+            self.prefetcher.plan(tasks)
+
+        # Tasks for the same project share its directory: run them one after another
+        by_project: Dict[str, List] = {}
+        for i, task in enumerate(tasks, 1):
+            by_project.setdefault(TaskQueue.claim_key(task), []).append((i, task))
+
+        workers = compute_worker_limit(min(workers, len(by_project)), task_memory_mb)
+
+        if workers == 1:
+            for i, task in enumerate(tasks, 1):
+                self._process_task(task, i, len(tasks))
+        else:
+            print(f"⚙️  Running up to {workers} projects concurrently")
+            # Projects are submitted in priority order of their first task, so group leaders start first
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(self._process_project, project_tasks, len(tasks)): project
+                    for project, project_tasks in by_project.items()
+                }
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"❌ [{futures[future]}] Scheduler error: {e}")
+
         print(f"\n{'='*60}")
         print("🌅 All queued tasks processed")
+        if self.prefetcher:
+            stats = self.prefetcher.stats
+            print(f"🔥 Scout cache: {stats['warm']} warm starts, {stats['cold']} cold, "
+                  f"{stats['harvested']} reports shared")
         print(f"{'='*60}")
 
     def add_task(self, project: str, description: str, hours: int = 8, priority: int = 0):
         """Add a task to the queue."""
-        with open(self.queue.queue_file, "a") as f:
-            f.write(f"{project}|{description}|{hours}|{priority}\n")
+        self.queue.add_task(
+            {"project": project, "description": description, "hours": hours, "priority": priority}
+        )
 
         print(f"✅ Task added to queue: {project}")
 
@@ -312,6 +934,10 @@ def main():
 
     # Process queue
     process_parser = subparsers.add_parser("process", help="Process task queue")
+    process_parser.add_argument("--no-prefetch", action="store_true", help="Disable Scout cache prefetch")
+    process_parser.add_argument("--workers", type=int, default=1, help="Tasks to run concurrently (bounded by CPU/RAM)")
+    process_parser.add_argument("--task-memory-mb", type=int, default=DEFAULT_TASK_MEMORY_MB,
+                                help="Estimated memory per task, used to bound workers")
 
     # Add task
     add_parser = subparsers.add_parser("add", help="Add task to queue")
@@ -325,10 +951,10 @@ def main():
 
     args = parser.parse_args()
 
-    scheduler = OvernightScheduler()
+    scheduler = OvernightScheduler(prefetch=not getattr(args, "no_prefetch", False))
 
     if args.command == "process":
-        scheduler.process_queue()
+        scheduler.process_queue(workers=args.workers, task_memory_mb=args.task_memory_mb)
 
     elif args.command == "add":
         scheduler.add_task(
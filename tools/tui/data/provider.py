@@ -8,11 +8,10 @@ import asyncio
 import subprocess
 import uuid
 import os
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 
 from .models import BuildStatus, SystemStats, AgentMetrics, BuildSummary
 from ..config import TUIConfig
+from ...watch_manager import ContextWatchManager
 
 # Import metrics database
 try:
@@ -35,7 +34,7 @@ class TUIDataProvider:
         self.config = config
         self._cache: Dict[str, Any] = {}
         self._cache_ttl: Dict[str, datetime] = {}
-        self._file_observer: Optional[Observer] = None
+        self._watch_manager: Optional[ContextWatchManager] = None
         self._callbacks: List[Callable] = []
         self._running = False
         self._tracked_builds: List[str] = []  # List of working directories to monitor
@@ -53,9 +52,8 @@ class TUIDataProvider:
     async def stop(self):
         """Clean shutdown"""
         self._running = False
-        if self._file_observer:
-            self._file_observer.stop()
-            self._file_observer.join(timeout=2)
+        if self._watch_manager:
+            self._watch_manager.stop()
 
     def _load_tracked_builds(self):
         """Load tracked builds from cache file"""
@@ -87,11 +85,8 @@ class TUIDataProvider:
             self._tracked_builds.append(working_directory)
             self._save_tracked_builds()
             # Add file watcher for this directory
-            if self._file_observer:
-                cf_dir = Path(working_directory) / '.context-foundry'
-                if cf_dir.exists():
-                    event_handler = PhaseFileHandler(self._on_file_change)
-                    self._file_observer.schedule(event_handler, str(cf_dir), recursive=True)
+            if self._watch_manager:
+                self._watch_manager.add(Path(working_directory) / '.context-foundry')
 
     def _auto_detect_builds(self):
         """Auto-detect running Context Foundry builds by scanning for claude processes"""
@@ -162,22 +157,41 @@ class TUIDataProvider:
             pass
 
     def _start_file_watcher(self):
-        """Start watching .context-foundry directories"""
-        event_handler = PhaseFileHandler(self._on_file_change)
-        self._file_observer = Observer()
+        """Start watching .context-foundry directories (non-recursively)"""
+        # Debounce: one callback per file within 500ms
+        self._watch_manager = ContextWatchManager(
+            self._on_file_change,
+            debounce=0.5,
+            file_filter=lambda path: path.endswith('.json')
+        )
 
         # Watch both project dirs and global dir
         for path in self.config.get_watch_paths():
-            if path.exists():
-                self._file_observer.schedule(event_handler, str(path), recursive=True)
+            self._watch_manager.add(path)
 
-        # Watch all tracked build directories
+        # Watch all tracked build directories (finished builds are dropped
+        # once their phase file says so, see _update_build_watch)
         for build_dir in self._tracked_builds:
-            cf_dir = Path(build_dir) / '.context-foundry'
-            if cf_dir.exists():
-                self._file_observer.schedule(event_handler, str(cf_dir), recursive=True)
+            self._watch_manager.add(Path(build_dir) / '.context-foundry')
+
+        self._watch_manager.start()
+
+    def _update_build_watch(self, project_dir: Path, build_status: BuildStatus):
+        """Keep watching running builds only"""
+        if not self._watch_manager or str(project_dir) not in self._tracked_builds:
+            return
+
+        cf_dir = project_dir / '.context-foundry'
+        if build_status.status in ['completed', 'failed']:
+            self._watch_manager.remove(cf_dir)
+        else:
+            self._watch_manager.add(cf_dir)
 
-        self._file_observer.start()
+    def get_watch_stats(self) -> Dict[str, int]:
+        """Filesystem watch counts (directories, watches, events)"""
+        if not self._watch_manager:
+            return {}
+        return self._watch_manager.stats()
 
     def _on_file_change(self, filepath: Path):
         """Handle file change events"""
@@ -247,6 +261,7 @@ class TUIDataProvider:
                 data = json.load(f)
             build_status = BuildStatus.from_json(data)
             self._set_cache(cache_key, build_status)
+            self._update_build_watch(project_dir, build_status)
             return build_status
         except (json.JSONDecodeError, OSError, KeyError):
             return None
@@ -556,43 +571,3 @@ Execute the Context Foundry autonomous build orchestrator.
                 "traceback": traceback.format_exc(),
                 "status": "failed"
             }
-
-
-class PhaseFileHandler(FileSystemEventHandler):
-    """Watch for changes to phase JSON files"""
-
-    def __init__(self, callback: Callable[[Path], None]):
-        super().__init__()
-        self.callback = callback
-        self._last_modified: Dict[str, datetime] = {}
-
-    def on_modified(self, event):
-        """Handle file modification events"""
-        if event.is_directory:
-            return
-
-        # Only process JSON files
-        if not event.src_path.endswith('.json'):
-            return
-
-        path = Path(event.src_path)
-
-        # Debounce: ignore if modified within last 500ms
-        now = datetime.now()
-        last_mod = self._last_modified.get(str(path))
-
-        if last_mod and (now - last_mod).total_seconds() < 0.5:
-            return
-
-        self._last_modified[str(path)] = now
-
-        # Trigger callback
-        try:
-            self.callback(path)
-        except Exception:
-            pass  # Ignore errors in callback
-
-    def on_created(self, event):
-        """Handle file creation events"""
-        # Treat creation as modification
-        self.on_modified(event)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Context Watch Manager
+Scoped, bounded filesystem watching for Context Foundry builds
+
+Only the .context-foundry/ directories of tracked builds are watched, each
+non-recursively, plus a few known subdirectories (feedback/, patterns/)
+when they exist. Project trees, node_modules and build output are never
+watched, so an `npm install` in some other project costs nothing and the
+number of inotify watches stays bounded by the number of tracked builds
+(and by max_watches).
+
+Directories are added and removed as builds start and finish. Bursts of
+events for the same file are debounced into one callback: each event moves
+the file's deadline, and one scheduler thread delivers files whose deadline
+has passed.
+"""
+
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+# Subdirectories of .context-foundry/ that are watched too
+DEFAULT_SUBDIRS = ("feedback", "patterns")
+
+# Seconds a file must be quiet before its callback runs
+DEBOUNCE_SECONDS = 0.1
+
+# Upper bound on watches held by one manager
+MAX_WATCHES = 256
+
+
+class _ContextEventHandler(FileSystemEventHandler):
+    """Forwards watchdog events to the manager."""
+
+    def __init__(self, manager: 'ContextWatchManager'):
+        super().__init__()
+        self.manager = manager
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            if event.event_type in ('created', 'moved'):
+                path = getattr(event, 'dest_path', None) or event.src_path
+                self.manager._directory_created(os.fsdecode(path))
+            return
+
+        if event.event_type in ('modified', 'created', 'closed'):
+            self.manager._file_changed(os.fsdecode(event.src_path))
+        elif event.event_type == 'moved':
+            # Atomic writes: temp file renamed into place
+            self.manager._file_changed(os.fsdecode(event.dest_path))
+
+
+class ContextWatchManager:
+    """Non-recursive watches on the .context-foundry/ directories of tracked builds."""
+
+    def __init__(
+        self,
+        callback: Callable[[Path], None],
+        subdirs: Iterable[str] = DEFAULT_SUBDIRS,
+        debounce: float = DEBOUNCE_SECONDS,
+        max_watches: int = MAX_WATCHES,
+        file_filter: Optional[Callable[[str], bool]] = None,
+        observer=None
+    ):
+        """
+        Initialize manager (nothing is watched until start()).
+
+        Args:
+            callback: Called with the path of each changed file (from the debounce thread)
+            subdirs: Subdirectories of each directory that are watched as well
+            debounce: Seconds a file must be quiet before callback runs
+            max_watches: Upper bound on watches; directories beyond it are not watched
+            file_filter: Only files for which this returns True are reported
+            observer: Watchdog observer to use (default: a new Observer per start())
+        """
+        self.callback = callback
+        self.subdirs = tuple(subdirs)
+        self.debounce = debounce
+        self.max_watches = max_watches
+        self.file_filter = file_filter
+
+        self._observer = observer
+        self._owns_observer = observer is None
+        self._handler = _ContextEventHandler(self)
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        self._directories: Set[str] = set()   # Registered .context-foundry dirs
+        self._watches: Dict[str, object] = {}  # Watched path -> watchdog watch
+        self._deadlines: Dict[str, float] = {}  # Changed file -> monotonic delivery time
+        self._scheduler: Optional[threading.Thread] = None
+        self._started = False
+
+        self.events = 0
+        self.delivered = 0
+        self.rejected = 0  # Watches refused because of max_watches
+
+    @property
+    def available(self) -> bool:
+        """True if filesystem events can be delivered (watchdog installed or observer given)"""
+        return self._observer is not None or Observer is not None
+
+    @property
+    def watch_count(self) -> int:
+        return len(self._watches)
+
+    def start(self) -> bool:
+        """
+        Start the observer and watch every registered directory that exists.
+
+        Returns:
+            True if watching (False without watchdog)
+        """
+        with self._lock:
+            if self._started:
+                return True
+            if not self.available:
+                return False
+
+            if self._observer is None:
+                # Observer threads cannot be restarted: each start() gets a new one
+                self._observer = Observer()
+                self._observer.daemon = True
+            self._observer.start()
+            self._started = True
+            self.refresh()
+            return True
+
+    def stop(self):
+        """Stop the observer and cancel pending callbacks (start() may be called again)"""
+        with self._lock:
+            self._deadlines.clear()
+            self._watches.clear()
+            scheduler, self._scheduler = self._scheduler, None
+            self._wakeup.notify_all()
+
+            observer = self._observer if self._started else None
+            if self._owns_observer:
+                self._observer = None
+            self._started = False
+
+        # Joined without the lock: both threads may be waiting for it
+        if observer is not None:
+            observer.stop()
+            observer.join(timeout=2)
+        if scheduler is not None and scheduler is not threading.current_thread():
+            scheduler.join(timeout=2)
+
+    def add(self, directory) -> bool:
+        """
+        Register a .context-foundry directory.
+
+        A directory that does not exist yet stays registered and is watched
+        by a later refresh() once it does.
+
+        Returns:
+            True if the directory is being watched now
+        """
+        directory = os.path.abspath(os.fspath(directory))
+        with self._lock:
+            self._directories.add(directory)
+            if self._started:
+                self._watch_directory(directory)
+            return directory in self._watches
+
+    def remove(self, directory):
+        """Stop watching a directory (and its subdirectories)"""
+        directory = os.path.abspath(os.fspath(directory))
+        with self._lock:
+            self._directories.discard(directory)
+            for path in [directory] + [os.path.join(directory, s) for s in self.subdirs]:
+                self._unwatch(path)
+
+            prefix = directory + os.sep
+            for path in [p for p in self._deadlines if p.startswith(prefix)]:
+                del self._deadlines[path]
+
+    def sync(self, directories: Iterable) -> None:
+        """Make the registered directories exactly `directories` (adding and removing watches)"""
+        wanted = {os.path.abspath(os.fspath(d)) for d in directories}
+        with self._lock:
+            for directory in self._directories - wanted:
+                self.remove(directory)
+            for directory in wanted - self._directories:
+                self.add(directory)
+
+    def refresh(self):
+        """Watch registered directories (and subdirectories) that appeared since they were added"""
+        with self._lock:
+            if not self._started:
+                return
+            for directory in sorted(self._directories):
+                self._watch_directory(directory)
+
+    def directories(self) -> List[str]:
+        with self._lock:
+            return sorted(self._directories)
+
+    def _watch_directory(self, directory: str):
+        self._watch(directory)
+        for subdir in self.subdirs:
+            self._watch(os.path.join(directory, subdir))
+
+    def _watch(self, path: str) -> bool:
+        if path in self._watches:
+            return True
+        if not os.path.isdir(path):
+            return False
+        if len(self._watches) >= self.max_watches:
+            self.rejected += 1
+            print(f"⚠️  Watch limit ({self.max_watches}) reached, not watching {path}")
+            return False
+
+        try:
+            self._watches[path] = self._observer.schedule(self._handler, path, recursive=False)
+        except OSError as e:
+            # e.g. the system inotify limit
+            print(f"⚠️  Could not watch {path}: {e}")
+            return False
+        return True
+
+    def _unwatch(self, path: str):
+        watch = self._watches.pop(path, None)
+        if watch is not None and self._observer is not None:
+            try:
+                self._observer.unschedule(watch)
+            except (KeyError, ValueError, OSError):
+                pass
+
+    def _directory_created(self, path: str):
+        """A watched directory gained a subdirectory: watch it if it is a known one"""
+        parent, name = os.path.split(path)
+        if name in self.subdirs:
+            with self._lock:
+                if parent in self._directories:
+                    self._watch(path)
+
+    def _file_changed(self, path: str):
+        """Debounce events for one file"""
+        if self.file_filter is not None and not self.file_filter(path):
+            return
+
+        with self._lock:
+            self.events += 1
+            self._deadlines[path] = time.monotonic() + self.debounce
+
+            if self._scheduler is None:
+                self._scheduler = threading.Thread(
+                    target=self._run_scheduler, name="context-watch-debounce", daemon=True
+                )
+                self._scheduler.start()
+            self._wakeup.notify()
+
+    def _run_scheduler(self):
+        """Deliver files whose deadline passed, until stop() replaces this thread"""
+        while True:
+            with self._lock:
+                while True:
+                    if self._scheduler is not threading.current_thread():
+                        return
+                    now = time.monotonic()
+                    due = [path for path, deadline in self._deadlines.items() if deadline <= now]
+                    if due:
+                        break
+                    timeout = min(self._deadlines.values()) - now if self._deadlines else None
+                    self._wakeup.wait(timeout)
+
+                for path in due:
+                    del self._deadlines[path]
+                self.delivered += len(due)
+
+            for path in due:
+                self._deliver(path)
+
+    def _deliver(self, path: str):
+        try:
+            self.callback(Path(path))
+        except Exception as e:
+            print(f"⚠️  Watch callback failed for {path}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "directories": len(self._directories),
+            "watches": len(self._watches),
+            "max_watches": self.max_watches,
+            "events": self.events,
+            "delivered": self.delivered,
+            "rejected": self.rejected,
+        }
+
+
+__all__ = [
+    'ContextWatchManager',
+    'DEFAULT_SUBDIRS',
+]